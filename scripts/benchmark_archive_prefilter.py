@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""GH Archive 预筛选基准测试
+
+对比逐行 JSON 解码与字节预筛选两种方式读取小时归档的吞吐量（lines/sec）。
+不指定 --file 时生成一个模拟的小时文件（大部分事件属于无关仓库）。
+
+用法:
+    python scripts/benchmark_archive_prefilter.py
+    python scripts/benchmark_archive_prefilter.py --file 2026-01-02-15.json.gz \\
+        --repos anthropics/skills anthropics/claude-code
+"""
+
+import argparse
+import gzip
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from trendpluse.collectors.archive_reader import iter_archive_events  # noqa: E402
+
+# 模拟数据中的事件类型分布（近似 GH Archive 实际比例）
+EVENT_TYPES = [
+    ("PushEvent", 60),
+    ("CreateEvent", 12),
+    ("PullRequestEvent", 8),
+    ("WatchEvent", 8),
+    ("IssueCommentEvent", 6),
+    ("DeleteEvent", 4),
+    ("ReleaseEvent", 2),
+]
+
+
+def generate_archive(path: Path, lines: int, repos: list[str], hit_rate: float):
+    """生成模拟的小时归档文件
+
+    Args:
+        path: 输出路径
+        lines: 事件数
+        repos: 关注的仓库（按 hit_rate 比例出现）
+        hit_rate: 属于关注仓库的事件比例
+    """
+    rng = random.Random(42)
+    types = [name for name, weight in EVENT_TYPES for _ in range(weight)]
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for i in range(lines):
+            if rng.random() < hit_rate:
+                repo = rng.choice(repos)
+            else:
+                repo = f"user{rng.randrange(200_000)}/project{rng.randrange(50)}"
+            event = {
+                "id": str(40_000_000_000 + i),
+                "type": rng.choice(types),
+                "actor": {"id": i, "login": f"user{i}"},
+                "repo": {
+                    "id": rng.randrange(10**9),
+                    "name": repo,
+                    "url": f"https://api.github.com/repos/{repo}",
+                },
+                "payload": {
+                    "action": "opened",
+                    "number": i,
+                    "pull_request": {"title": "x" * 200, "body": "y" * 1500},
+                },
+                "public": True,
+                "created_at": "2026-01-02T15:00:00Z",
+            }
+            f.write(json.dumps(event, separators=(",", ":")))
+            f.write("\n")
+
+
+def count_lines(path: Path) -> int:
+    """统计文件行数"""
+    with gzip.open(path, "rb") as f:
+        return sum(1 for _ in f)
+
+
+def measure(path: Path, repos: list[str], prefilter: bool, rounds: int):
+    """测量读取吞吐量
+
+    Returns:
+        (最快一轮耗时秒数, 匹配事件数)
+    """
+    best = float("inf")
+    matched = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        matched = sum(1 for _ in iter_archive_events(path, repos, prefilter=prefilter))
+        best = min(best, time.perf_counter() - start)
+    return best, matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GH Archive 预筛选基准测试")
+    parser.add_argument("--file", type=Path, help="GH Archive 小时文件（.json.gz）")
+    parser.add_argument("--repos", nargs="+", help="关注的仓库")
+    parser.add_argument("--lines", type=int, default=200_000, help="模拟事件数")
+    parser.add_argument(
+        "--hit-rate", type=float, default=0.001, help="模拟数据中关注仓库的比例"
+    )
+    parser.add_argument("--rounds", type=int, default=3, help="每种方式运行轮数")
+    args = parser.parse_args()
+
+    repos = args.repos or [f"watched/repo{i}" for i in range(50)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.file
+        if path is None:
+            path = Path(tmp) / "2026-01-02-15.json.gz"
+            print(f"生成模拟归档: {args.lines} 行，关注仓库占比 {args.hit_rate}")
+            generate_archive(path, args.lines, repos, args.hit_rate)
+
+        lines = count_lines(path)
+        print(f"文件: {path.name}，{lines} 行，关注仓库 {len(repos)} 个\n")
+
+        results = {}
+        for label, prefilter in (("逐行 JSON 解码", False), ("字节预筛选", True)):
+            seconds, matched = measure(path, repos, prefilter, args.rounds)
+            results[label] = seconds
+            print(
+                f"{label:<12} {lines / seconds:>12,.0f} lines/sec  "
+                f"({seconds:.2f}s，匹配 {matched} 个事件)"
+            )
+
+        speedup = results["逐行 JSON 解码"] / results["字节预筛选"]
+        print(f"\n加速比: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
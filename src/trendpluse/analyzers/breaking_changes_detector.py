@@ -1,12 +1,82 @@
 """Breaking Changes 检测器
 
 使用 AI 分析 release notes，检测 breaking changes 和不兼容更新。
+release 数据按字段白名单编码为紧凑表格后放入 Prompt，
+固定的分析指令放在 system 前缀中（前缀达到最小长度时可被 provider 缓存）。
 """
 
 import json
 from typing import Any
 
-from anthropic import Anthropic
+from trendpluse.analyzers.llm_gateway import LLMGateway
+from trendpluse.analyzers.prompt_encoder import PromptEncoder, PromptField
+from trendpluse.analyzers.release_insights import ReleaseInsightAnalyzer
+from trendpluse.analyzers.token_budget import STAGE_RELEASES
+
+# Prompt 中保留的 release 字段（breaking changes 说明常在 release notes 末尾，
+# body 上限比趋势分析更宽）
+PROMPT_FIELDS = (
+    PromptField("repo"),
+    PromptField("tag_name"),
+    PromptField("name", max_chars=100),
+    PromptField("prerelease"),
+    PromptField("published_at", date=True),
+    PromptField("body", max_chars=6000),
+)
+
+# 固定的分析指令（system 前缀，各次调用相同，达到最小长度时标记为可缓存）
+SYSTEM_PROMPT = """\
+你是一个技术分析专家。用户会提供一批 GitHub Releases，请从中\
+识别 breaking changes（不兼容更新）。
+
+## 分析要求
+
+请识别以下内容：
+
+1. **Breaking Changes 判断标准**：
+   - API 移除或重命名
+   - 函数签名变更
+   - 行为不兼容改变
+   - 配置格式变更
+   - 依赖版本要求改变
+
+2. **影响等级评估**：
+   - high：需要大量代码迁移，影响核心功能
+   - medium：需要少量代码调整
+   - low：配置或轻微行为变更
+
+3. **分类**：
+   - API：接口相关
+   - Config：配置相关
+   - Behavior：行为变更
+   - Dependency：依赖变更
+
+## 输出格式
+
+请以 JSON 数组格式返回，**只包含有 breaking changes 的 releases**：
+
+```json
+[
+  {
+    "repo": "仓库名",
+    "tag_name": "版本标签",
+    "has_breaking": true,
+    "changes": [
+      {
+        "description": "变更描述（简短）",
+        "impact": "影响等级（high/medium/low）",
+        "category": "分类（API/Config/Behavior/Dependency）"
+      }
+    ]
+  }
+]
+```
+
+注意：
+- **只返回有 breaking changes 的版本**
+- **如果某个版本没有 breaking changes，不要包含在结果中**
+- **如果没有任何 breaking changes，返回空数组 []**
+"""
 
 
 class BreakingChangesDetector:
@@ -20,6 +90,8 @@ class BreakingChangesDetector:
         api_key: str,
         model: str = "glm-4.7",
         base_url: str | None = None,
+        gateway: LLMGateway | None = None,
+        insights: ReleaseInsightAnalyzer | None = None,
     ):
         """初始化检测器
 
@@ -27,16 +99,25 @@ class BreakingChangesDetector:
             api_key: Anthropic API Key
             model: 使用的模型
             base_url: API 基础 URL（可选）
+            gateway: 共享的 LLM 网关（可选，默认按 api_key 单独创建）
+            insights: Release 综合分析器（可选，提供时直接取其结果，不再单独调用 LLM）
         """
         self.api_key = api_key
         self.model = model
         self.base_url = base_url
 
-        # 初始化 Anthropic 客户端
-        client_kwargs: dict[str, str] = {"api_key": api_key}
-        if base_url:
-            client_kwargs["base_url"] = base_url
-        self.client = Anthropic(**client_kwargs)
+        self.gateway = gateway or LLMGateway(api_key=api_key, base_url=base_url)
+        self.insights = insights
+        self.encoder = PromptEncoder("breaking_changes", PROMPT_FIELDS)
+
+    def reset_stats(self) -> None:
+        """重置本次运行的统计计数"""
+        self.encoder.reset_stats()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """本次运行的统计信息（Prompt 编码前后的估算 token 数）"""
+        return self.encoder.stats
 
     def detect_breaking_changes(self, releases: dict[str, Any]) -> list[dict]:
         """检测 breaking changes
@@ -55,6 +136,10 @@ class BreakingChangesDetector:
             print("[DEBUG] BreakingChangesDetector: 收到空 release 列表")
             return []
 
+        # 综合分析模式：与另一视图共用同一次分析结果
+        if self.insights is not None:
+            return list(self.insights.analyze(releases).breaking_changes)
+
         print(
             f"[DEBUG] BreakingChangesDetector: 开始分析 "
             f"{len(detailed_releases)} 个 releases"
@@ -98,10 +183,12 @@ class BreakingChangesDetector:
         prompt = self._build_prompt(releases)
 
         # 调用 API
-        message = self.client.messages.create(
+        message = self.gateway.create_message(
+            stage=STAGE_RELEASES,
             model=self.model,
             max_tokens=4096,
             temperature=0.3,
+            system=self.gateway.system_prompt(SYSTEM_PROMPT),
             messages=[
                 {
                     "role": "user",
@@ -113,7 +200,7 @@ class BreakingChangesDetector:
         return message.content[0].text  # type: ignore[no-any-return]
 
     def _build_prompt(self, releases: list[dict[str, Any]]) -> str:
-        """构建分析 prompt
+        """构建分析 prompt 的可变部分（固定指令见 SYSTEM_PROMPT）
 
         Args:
             releases: release 数据列表
@@ -121,66 +208,16 @@ class BreakingChangesDetector:
         Returns:
             prompt 文本
         """
-        releases_text = json.dumps(releases, ensure_ascii=False, indent=2)
+        releases_text = self.encoder.encode(releases)
 
-        prompt = f"""你是一个技术分析专家。请分析以下 GitHub Releases，\
-识别 breaking changes（不兼容更新）。
+        return f"""\
+请分析以下 GitHub Releases，识别 breaking changes（不兼容更新）。
 
-## Release 数据
+## Release 数据（制表符分隔，首行为字段名，每行一个 release）
 
 {releases_text}
-
-## 分析要求
-
-请识别以下内容：
-
-1. **Breaking Changes 判断标准**：
-   - API 移除或重命名
-   - 函数签名变更
-   - 行为不兼容改变
-   - 配置格式变更
-   - 依赖版本要求改变
-
-2. **影响等级评估**：
-   - high：需要大量代码迁移，影响核心功能
-   - medium：需要少量代码调整
-   - low：配置或轻微行为变更
-
-3. **分类**：
-   - API：接口相关
-   - Config：配置相关
-   - Behavior：行为变更
-   - Dependency：依赖变更
-
-## 输出格式
-
-请以 JSON 数组格式返回，**只包含有 breaking changes 的 releases**：
-
-```json
-[
-  {{
-    "repo": "仓库名",
-    "tag_name": "版本标签",
-    "has_breaking": true,
-    "changes": [
-      {{
-        "description": "变更描述（简短）",
-        "impact": "影响等级（high/medium/low）",
-        "category": "分类（API/Config/Behavior/Dependency）"
-      }}
-    ]
-  }}
-]
-```
-
-注意：
-- **只返回有 breaking changes 的版本**
-- **如果某个版本没有 breaking changes，不要包含在结果中**
-- **如果没有任何 breaking changes，返回空数组 []**
 """
 
-        return prompt
-
     def _parse_response(self, llm_response: str) -> list[dict]:
         """解析 LLM 响应
 
@@ -1,15 +1,93 @@
 """Commit 分析器
 
 使用 AI 分析 commit 内容，提取技术趋势和代码变更统计。
+
+commit 按估算 token 数切分为多个分块（尽量同一仓库放在同一分块），
+各分块并发分析后合并。模型按行号指明每个信号来自哪些 commit，
+信号 ID 和来源链接由这些 commit 决定，与分块方式和信号顺序无关。
+commit 数据按字段白名单编码为紧凑表格后放入 Prompt；
+固定的分析指令放在 system 前缀中，各分块调用复用（前缀达到最小长度时
+可被 provider 缓存）。
 """
 
+import hashlib
 import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
-from anthropic import Anthropic
-
+from trendpluse.analyzers.llm_gateway import LLMGateway
+from trendpluse.analyzers.prompt_encoder import PromptEncoder, PromptField
+from trendpluse.analyzers.token_budget import STAGE_COMMITS
+from trendpluse.analyzers.tokens import estimate_tokens
 from trendpluse.models.signal import Signal
 
+# Prompt 中保留的 commit 字段（sha 和时间戳对趋势判断没有帮助；
+# row 为代码添加的行号，模型用它引用 commit，来源链接和信号 ID 由代码生成）
+PROMPT_FIELDS = (
+    PromptField("row"),
+    PromptField("repo"),
+    PromptField("message", max_chars=500),
+    PromptField("author"),
+    PromptField("files_changed", max_chars=300),
+    PromptField("additions"),
+    PromptField("deletions"),
+)
+
+# 固定的分析指令（system 前缀，各分块调用相同，达到最小长度时标记为可缓存）
+SYSTEM_PROMPT = """\
+你是一个技术趋势分析专家。用户会提供一批 GitHub commits，请从中提取有价值的\
+技术趋势和代码变更统计。
+
+## 分析要求
+
+请识别以下内容：
+
+1. **技术趋势**：
+   - 新特性/功能（capability）
+   - 抽象层改进（abstraction）
+   - 工作流优化（workflow）
+   - 评估/测试改进（eval）
+   - 安全性增强（safety）
+   - 性能优化（performance）
+
+2. **代码变更统计**：
+   - 文件类型分布
+   - 修改规模
+   - 代码复杂度
+
+## 输出格式
+
+请以 JSON 数组格式返回，每个元素包含：
+
+```json
+[
+  {
+    "title": "简短标题（5-10字）",
+    "type": "信号类型（capability/abstraction/workflow/eval/safety/performance）",
+    "category": "分类（engineering/research）",
+    "impact_score": 影响评分（1-5）,
+    "why_it_matters": "为什么重要（1-2句话）",
+    "commit_rows": [信号来自的 commit 行号（row 列）],
+    "related_repos": ["受此趋势影响或相关的仓库（可选，系统会自动添加当前commit仓库）"],
+    "sources": ["commit链接（可选，系统会自动生成）"],
+    "trends": ["趋势关键词"],
+    "tech_details": {
+      "feature_type": "特性类型",
+      "complexity": "复杂度（低/中/高）",
+      "files_affected": "影响的文件类型"
+    }
+  }
+]
+```
+
+注意：
+- 只返回真正有价值的趋势（避免琐碎修复）
+- impact_score 基于影响范围和重要性
+- commit_rows 必填：列出支撑该信号的 commit 的 row 值
+- related_repos 可选：列出除当前仓库外，其他相关或影响的仓库
+- 如果没有有价值的趋势，返回空数组 []
+"""
+
 
 class CommitAnalyzer:
     """Commit 分析器
@@ -22,6 +100,9 @@ class CommitAnalyzer:
         api_key: str,
         model: str = "claude-sonnet-4-20250514",
         base_url: str | None = None,
+        gateway: LLMGateway | None = None,
+        chunk_token_limit: int = 8000,
+        max_concurrency: int = 4,
     ):
         """初始化分析器
 
@@ -29,16 +110,28 @@ class CommitAnalyzer:
             api_key: Anthropic API Key
             model: 使用的模型
             base_url: API 基础 URL（可选）
+            gateway: 共享的 LLM 网关（可选，默认按 api_key 单独创建）
+            chunk_token_limit: 单个分块 Prompt（不含固定的 system 前缀）的估算
+                token 上限
+            max_concurrency: 同时分析的分块数
         """
         self.api_key = api_key
         self.model = model
         self.base_url = base_url
+        self.chunk_token_limit = chunk_token_limit
+        self.max_concurrency = max_concurrency
+
+        self.gateway = gateway or LLMGateway(api_key=api_key, base_url=base_url)
+        self.encoder = PromptEncoder("commit", PROMPT_FIELDS)
 
-        # 初始化 Anthropic 客户端
-        client_kwargs: dict[str, str] = {"api_key": api_key}
-        if base_url:
-            client_kwargs["base_url"] = base_url
-        self.client = Anthropic(**client_kwargs)
+    def reset_stats(self) -> None:
+        """重置本次运行的统计计数"""
+        self.encoder.reset_stats()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """本次运行的统计信息（Prompt 编码前后的估算 token 数）"""
+        return self.encoder.stats
 
     def analyze_commits(self, commits: list[dict[str, Any]]) -> list[Signal]:
         """分析 commit 列表
@@ -54,20 +147,69 @@ class CommitAnalyzer:
             print("[DEBUG] CommitAnalyzer: 收到空 commit 列表")
             return []
 
-        print(f"[DEBUG] CommitAnalyzer: 开始分析 {len(commits)} 个 commits")
+        chunks = self.plan_chunks(commits)
+        print(
+            f"[DEBUG] CommitAnalyzer: 开始分析 {len(commits)} 个 commits"
+            f"（{len(chunks)} 个分块）"
+        )
+
+        workers = max(1, min(self.max_concurrency, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(self._analyze_chunk, chunks))
+
+        signals = [signal for chunk_signals in results for signal in chunk_signals]
+        print(f"[DEBUG] CommitAnalyzer: 解析得到 {len(signals)} 个信号")
+        return signals
+
+    def plan_chunks(self, commits: list[dict[str, Any]]) -> list[list[dict[str, Any]]]:
+        """按估算 token 数把 commits 切分为分块
+
+        同一仓库的 commit 尽量放在同一分块，仓库放不下时才拆分；
+        多个小仓库可以共用一个分块。单个 commit 超过上限时单独成块。
+
+        Args:
+            commits: commit 数据列表
 
+        Returns:
+            分块列表
+        """
+        by_repo: dict[str, list[dict[str, Any]]] = {}
+        for commit in commits:
+            by_repo.setdefault(commit.get("repo", ""), []).append(commit)
+
+        header_tokens = estimate_tokens(self._build_prompt([]))
+        header_tokens += self.encoder.header_tokens()
+        budget = self.chunk_token_limit - header_tokens
+        chunks: list[list[dict[str, Any]]] = []
+        chunk: list[dict[str, Any]] = []
+        chunk_tokens = 0
+
+        for repo_commits in by_repo.values():
+            costs = [self.encoder.record_tokens(commit) for commit in repo_commits]
+            # 整个仓库放不进当前分块时另起一块
+            if chunk and chunk_tokens + sum(costs) > budget:
+                chunks.append(chunk)
+                chunk, chunk_tokens = [], 0
+            for commit, cost in zip(repo_commits, costs, strict=True):
+                if chunk and chunk_tokens + cost > budget:
+                    chunks.append(chunk)
+                    chunk, chunk_tokens = [], 0
+                chunk.append(commit)
+                chunk_tokens += cost
+
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def _analyze_chunk(self, commits: list[dict[str, Any]]) -> list[Signal]:
+        """分析单个分块，失败时返回空列表（不影响其他分块）"""
         try:
             # 调用 LLM 分析
-            print("[DEBUG] CommitAnalyzer: 调用 LLM 分析...")
             llm_response = self._call_llm(commits)
             print(f"[DEBUG] CommitAnalyzer: LLM 响应长度: {len(llm_response)} 字符")
-            print(f"[DEBUG] CommitAnalyzer: LLM 响应预览: {llm_response[:500]}...")
 
             # 解析响应
-            signals = self._parse_signals(llm_response, commits)
-            print(f"[DEBUG] CommitAnalyzer: 解析得到 {len(signals)} 个信号")
-
-            return signals
+            return self._parse_signals(llm_response, commits)
 
         except Exception as e:
             # 出错时返回空列表
@@ -87,10 +229,12 @@ class CommitAnalyzer:
         prompt = self._build_prompt(commits)
 
         # 调用 API
-        message = self.client.messages.create(
+        message = self.gateway.create_message(
+            stage=STAGE_COMMITS,
             model=self.model,
             max_tokens=4096,
             temperature=0.3,
+            system=self.gateway.system_prompt(SYSTEM_PROMPT),
             messages=[
                 {
                     "role": "user",
@@ -102,7 +246,7 @@ class CommitAnalyzer:
         return message.content[0].text  # type: ignore[no-any-return]
 
     def _build_prompt(self, commits: list[dict[str, Any]]) -> str:
-        """构建分析 prompt
+        """构建分析 prompt 的可变部分（固定指令见 SYSTEM_PROMPT）
 
         Args:
             commits: commit 数据列表
@@ -110,66 +254,19 @@ class CommitAnalyzer:
         Returns:
             prompt 文本
         """
-        commits_text = json.dumps(commits, ensure_ascii=False, indent=2)
+        # 行号从 1 开始（encoder 会省略空值）
+        commits_text = self.encoder.encode(
+            [{"row": row, **commit} for row, commit in enumerate(commits, 1)]
+        )
 
-        prompt = """\
-你是一个技术趋势分析专家。请分析以下 GitHub commits，提取有价值的\
-技术趋势和代码变更统计。
+        return f"""\
+请分析以下 GitHub commits，提取有价值的技术趋势和代码变更统计。
 
-## Commit 数据
+## Commit 数据（制表符分隔，首行为字段名，每行一个 commit）
 
 {commits_text}
-
-## 分析要求
-
-请识别以下内容：
-
-1. **技术趋势**：
-   - 新特性/功能（capability）
-   - 抽象层改进（abstraction）
-   - 工作流优化（workflow）
-   - 评估/测试改进（eval）
-   - 安全性增强（safety）
-   - 性能优化（performance）
-
-2. **代码变更统计**：
-   - 文件类型分布
-   - 修改规模
-   - 代码复杂度
-
-## 输出格式
-
-请以 JSON 数组格式返回，每个元素包含：
-
-```json
-[
-  {{
-    "title": "简短标题（5-10字）",
-    "type": "信号类型（capability/abstraction/workflow/eval/safety/performance）",
-    "category": "分类（engineering/research）",
-    "impact_score": 影响评分（1-5）,
-    "why_it_matters": "为什么重要（1-2句话）",
-    "related_repos": ["受此趋势影响或相关的仓库（可选，系统会自动添加当前commit仓库）"],
-    "sources": ["commit链接（可选，系统会自动生成）"],
-    "trends": ["趋势关键词"],
-    "tech_details": {{
-      "feature_type": "特性类型",
-      "complexity": "复杂度（低/中/高）",
-      "files_affected": "影响的文件类型"
-    }}
-  }}
-]
-```
-
-注意：
-- 只返回真正有价值的趋势（避免琐碎修复）
-- impact_score 基于影响范围和重要性
-- related_repos 可选：列出除当前仓库外，其他相关或影响的仓库
-- 如果没有有价值的趋势，返回空数组 []
 """
 
-        return prompt.format(commits_text=commits_text)
-
     def _parse_signals(
         self, llm_response: str, commits: list[dict[str, Any]]
     ) -> list[Signal]:
@@ -202,23 +299,34 @@ class CommitAnalyzer:
 
             # 转换为 Signal 对象
             signals = []
-            for idx, item in enumerate(data):
-                # 构建来源链接
-                if idx < len(commits):
-                    commit_sha = commits[idx].get("sha", "")
-                    repo = commits[idx].get("repo", "")
-                    commit_url = f"https://github.com/{repo}/commit/{commit_sha}"
-                    sources = [commit_url]
+            used_ids: set[str] = set()
+            for item in data:
+                # 按模型给出的行号找到信号对应的 commit，构建来源链接
+                matched = self._matched_commits(item, commits)
+                if matched:
+                    sources = [
+                        f"https://github.com/{c.get('repo', '')}/commit/"
+                        f"{c.get('sha', '')}"
+                        for c in matched
+                    ]
 
                     # 确保 commit 所在仓库始终在 related_repos 中
                     ai_related_repos = item.get("related_repos", [])
-                    related_repos = list(set([repo] + ai_related_repos))
+                    related_repos = list(
+                        set([c.get("repo", "") for c in matched] + ai_related_repos)
+                    )
                 else:
                     sources = item.get("sources", [])
                     related_repos = item.get("related_repos", [])
 
+                # 多个信号引用同一个 commit 时，后出现的改用标题哈希
+                signal_id = self._signal_id(item, matched[0] if matched else None)
+                if signal_id in used_ids:
+                    signal_id = self._signal_id(item, None)
+                used_ids.add(signal_id)
+
                 signal = Signal(
-                    id=f"commit-{idx}",
+                    id=signal_id,
                     title=item["title"],
                     type=item["type"],
                     category=item["category"],
@@ -234,3 +342,32 @@ class CommitAnalyzer:
         except (json.JSONDecodeError, KeyError, TypeError):
             # 解析失败时返回空列表
             return []
+
+    def _matched_commits(
+        self, item: dict[str, Any], commits: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """按信号中的 commit_rows 找到对应的 commit（忽略无效行号）"""
+        rows = item.get("commit_rows")
+        if not isinstance(rows, list):
+            return []
+        indexes: list[int] = []
+        for row in rows:
+            try:
+                index = int(row) - 1
+            except (TypeError, ValueError):
+                continue
+            if 0 <= index < len(commits) and index not in indexes:
+                indexes.append(index)
+        return [commits[index] for index in indexes]
+
+    def _signal_id(self, item: dict[str, Any], commit: dict[str, Any] | None) -> str:
+        """生成与分块方式无关的稳定信号 ID
+
+        有对应 commit 时使用仓库和 commit SHA，否则使用标题和类型的哈希。
+        """
+        if commit is not None and commit.get("sha"):
+            return f"commit-{commit.get('repo', '')}-{commit['sha'][:12]}"
+        digest = hashlib.sha1(
+            f"{item.get('title', '')}\n{item.get('type', '')}".encode()
+        ).hexdigest()
+        return f"commit-{digest[:12]}"
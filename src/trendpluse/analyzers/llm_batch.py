@@ -0,0 +1,281 @@
+"""LLM 批处理任务（Message Batches）
+
+夜间运行不需要即时结果，可以把一次运行中各分析器的请求合并为一个批处理任务，
+吞吐更高、单价更低：
+1. 收集：在 collecting() 期间，网关不发出未命中缓存的请求，而是登记到本任务
+   并抛出 BatchDeferredError（分析器按失败处理）
+2. 提交并轮询：登记的请求以 provider 的 message-batch 格式一次提交，
+   custom_id 由调用阶段和请求内容哈希组成，结果按 custom_id 对应回请求
+3. 回填：成功的结果写入 LLMCache，随后正常运行分析器时全部命中缓存；
+   失败或缺失的请求在正常运行时退回为即时调用
+
+任务状态（运行标识、批次 ID）保存在磁盘上，进程重启后同一运行直接续接已提交的批次。
+结构化请求使用 tool_use（与 Instructor 的 ANTHROPIC_TOOLS 模式相同）提交，
+结果按响应模型校验后缓存。
+"""
+
+import json
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from anthropic import Anthropic
+from pydantic import BaseModel, ValidationError
+
+from trendpluse.analyzers.llm_gateway import LLMGateway
+
+# 结构化请求未指定 max_tokens 时的默认值（批处理接口要求必填）
+DEFAULT_MAX_TOKENS = 4096
+
+
+class BatchDeferredError(RuntimeError):
+    """请求已登记到批处理任务，结果稍后通过缓存提供"""
+
+
+class LLMBatchRunner:
+    """LLM 批处理任务"""
+
+    def __init__(
+        self,
+        gateway: LLMGateway,
+        state_path: str = "data/llm_batch.json",
+        base_url: str | None = None,
+        poll_interval: float = 60.0,
+        max_wait: float = 24 * 3600,
+    ):
+        """初始化批处理任务
+
+        Args:
+            gateway: 共享的 LLM 网关（必须启用响应缓存）
+            state_path: 任务状态文件路径
+            base_url: 批处理接口的 API Base URL（可选，默认与网关相同）
+            poll_interval: 轮询间隔（秒）
+            max_wait: 最长等待时间（秒），超时后未完成的请求退回为即时调用
+        """
+        if gateway.cache is None:
+            raise ValueError("批处理模式需要启用 LLM 响应缓存")
+
+        self.gateway = gateway
+        self.state_path = Path(state_path)
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+        self.client = Anthropic(
+            api_key=gateway.api_key,
+            base_url=base_url or gateway.base_url,
+            timeout=gateway.timeout,
+            max_retries=gateway.max_retries,
+        )
+        # custom_id -> 登记的请求
+        self._requests: dict[str, dict[str, Any]] = {}
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """重置本次运行的统计计数"""
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.resumed = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """本次运行的统计信息"""
+        return {
+            "llm_batch_requests": self.submitted,
+            "llm_batch_succeeded": self.succeeded,
+            "llm_batch_failed": self.failed,
+            "llm_batch_resumed": self.resumed,
+        }
+
+    @contextmanager
+    def collecting(self) -> Iterator["LLMBatchRunner"]:
+        """收集阶段：期间网关把未命中缓存的请求登记到本任务"""
+        self._requests = {}
+        self.gateway.batch = self
+        try:
+            yield self
+        finally:
+            self.gateway.batch = None
+
+    def defer(
+        self,
+        stage: str,
+        key: str,
+        params: dict[str, Any],
+        reserved: int = 0,
+        response_model: type | None = None,
+    ) -> None:
+        """登记一个请求（由网关调用）
+
+        Args:
+            stage: 调用阶段
+            key: 请求的缓存键
+            params: messages.create 的请求参数
+            reserved: 已向 token 预算预占的额度
+            response_model: 结构化请求的响应模型（普通消息为 None）
+
+        Raises:
+            BatchDeferredError: 总是抛出，通知调用方结果稍后提供
+        """
+        custom_id = f"{stage}-{key[:48]}"
+        if custom_id not in self._requests:
+            self._requests[custom_id] = {
+                "stage": stage,
+                "key": key,
+                "params": _batch_params(params, response_model),
+                "reserved": reserved,
+                "response_model": response_model,
+            }
+        elif self.gateway.budget is not None:
+            # 重复请求只提交一次，释放重复预占的额度
+            self.gateway.budget.settle(stage, reserved, 0)
+        raise BatchDeferredError(f"请求 {custom_id} 已加入批处理任务")
+
+    def run(self, run_id: str) -> int:
+        """提交（或续接）批处理任务，等待完成并把结果写入缓存
+
+        Args:
+            run_id: 运行标识（如报告日期），同一 run_id 重启后续接已提交的批次
+
+        Returns:
+            写入缓存的结果数
+        """
+        state = self._load_state()
+        if state.get("run_id") == run_id and state.get("done"):
+            # 结果已写入缓存，未命中的请求在正常运行时即时调用
+            self._release_reservations()
+            return 0
+
+        if state.get("run_id") == run_id and state.get("batch_id"):
+            batch_id = state["batch_id"]
+            self.resumed = 1
+            print(f"[DEBUG] LLMBatchRunner: 续接批处理任务 {batch_id}")
+        elif not self._requests:
+            return 0
+        else:
+            batch = self.client.messages.batches.create(
+                requests=[
+                    {"custom_id": custom_id, "params": request["params"]}
+                    for custom_id, request in self._requests.items()
+                ]
+            )
+            batch_id = batch.id
+            self.submitted = len(self._requests)
+            self._save_state({"run_id": run_id, "batch_id": batch_id, "done": False})
+            print(
+                f"[DEBUG] LLMBatchRunner: 已提交批处理任务 {batch_id}"
+                f"（{self.submitted} 个请求）"
+            )
+
+        if not self._wait(batch_id):
+            print(f"[DEBUG] LLMBatchRunner: 批处理任务 {batch_id} 超时，退回即时调用")
+            self._release_reservations()
+            return 0
+
+        stored = self._store_results(batch_id)
+        self._release_reservations()
+        self._save_state({"run_id": run_id, "batch_id": batch_id, "done": True})
+        return stored
+
+    def _wait(self, batch_id: str) -> bool:
+        """轮询直到批次处理结束，超时返回 False"""
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            batch = self.client.messages.batches.retrieve(batch_id)
+            if batch.processing_status == "ended":
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_interval)
+
+    def _store_results(self, batch_id: str) -> int:
+        """按 custom_id 把结果对应回请求并写入缓存"""
+        assert self.gateway.cache is not None
+        stored = 0
+        for item in self.client.messages.batches.results(batch_id):
+            request = self._requests.pop(item.custom_id, None)
+            if request is None:
+                # 续接时本次没有再次产生的请求，忽略
+                continue
+            if item.result.type != "succeeded":
+                self.failed += 1
+                self._settle(request, 0)
+                continue
+
+            message = item.result.message
+            self._settle(request, self.gateway.record_usage(message) or 0)
+            response = _parse_result(message, request["response_model"])
+            if response is None:
+                self.failed += 1
+                continue
+            self.gateway.cache.put(request["key"], response)
+            self.succeeded += 1
+            stored += 1
+
+        print(
+            f"[DEBUG] LLMBatchRunner: 批处理任务 {batch_id} 完成，"
+            f"成功 {self.succeeded}，失败 {self.failed}"
+        )
+        return stored
+
+    def _settle(self, request: dict[str, Any], actual: int) -> None:
+        """按结果用量结算预占的 token 额度"""
+        if self.gateway.budget is not None:
+            self.gateway.budget.settle(request["stage"], request["reserved"], actual)
+
+    def _release_reservations(self) -> None:
+        """释放没有得到结果的请求的预占额度（正常运行时会重新申请）"""
+        for request in self._requests.values():
+            self._settle(request, 0)
+        self._requests = {}
+
+    def _load_state(self) -> dict[str, Any]:
+        """加载任务状态，文件不存在或损坏时返回空状态"""
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _save_state(self, state: dict[str, Any]) -> None:
+        """保存任务状态"""
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.state_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+
+
+def _batch_params(
+    params: dict[str, Any], response_model: type | None
+) -> dict[str, Any]:
+    """构造批处理请求参数（结构化请求转换为强制调用同名工具）"""
+    batch_params = {"max_tokens": DEFAULT_MAX_TOKENS, **params}
+    if response_model is None or not issubclass(response_model, BaseModel):
+        return batch_params
+
+    name = response_model.__name__
+    batch_params["tools"] = [
+        {
+            "name": name,
+            "description": (response_model.__doc__ or name).strip(),
+            "input_schema": response_model.model_json_schema(),
+        }
+    ]
+    batch_params["tool_choice"] = {"type": "tool", "name": name}
+    return batch_params
+
+
+def _parse_result(message: Any, response_model: type | None) -> Any | None:
+    """把批处理结果转换为缓存格式，结构化结果校验失败时返回 None"""
+    if response_model is None or not issubclass(response_model, BaseModel):
+        return message.model_dump(mode="json")
+
+    for block in message.content:
+        if block.type == "tool_use":
+            try:
+                result = response_model.model_validate(block.input)
+            except ValidationError:
+                return None
+            return result.model_dump(mode="json")
+    return None
@@ -0,0 +1,186 @@
+"""LLM 响应缓存
+
+在磁盘上按请求内容（模型、temperature、max_tokens、prompt 等全部参数）
+的 SHA-256 缓存 LLM 原始响应。同一天重跑 run_daily 时，各分析器发出的
+相同请求直接读取缓存，不再重复计费。
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+
+class LLMCache:
+    """磁盘 LLM 响应缓存
+
+    - 每个条目一个 JSON 文件，文件名为请求参数的 SHA-256
+    - 超过 ttl 的条目视为未命中并删除
+    - 读取命中时刷新文件 mtime，总大小超过 max_bytes 时按 mtime 从旧到新淘汰（LRU）
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = "data/llm_cache",
+        ttl: float = 7 * 24 * 3600,
+        max_bytes: int = 100 * 1024 * 1024,
+    ):
+        """初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            ttl: 条目有效期（秒）
+            max_bytes: 缓存总大小上限（字节）
+        """
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: int | None = None
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """重置本次运行的统计计数"""
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """本次运行的统计信息"""
+        return {
+            "llm_cache_hits": self.hits,
+            "llm_cache_misses": self.misses,
+            "llm_cache_stores": self.stores,
+            "llm_cache_evictions": self.evictions,
+        }
+
+    @staticmethod
+    def make_key(kind: str, params: dict[str, Any]) -> str:
+        """生成缓存键
+
+        Args:
+            kind: 调用类型（message 或结构化响应模型名）
+            params: 请求参数（model、temperature、max_tokens、messages 等）
+
+        Returns:
+            缓存键
+        """
+        data = json.dumps(
+            {"kind": kind, **params},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Any | None:
+        """读取缓存的响应
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            响应数据，不存在、过期或损坏时返回 None
+        """
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            stored_at = float(entry["stored_at"])
+            response = entry["response"]
+        except (OSError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+            self._count_miss()
+            return None
+
+        if time.time() - stored_at > self.ttl:
+            with self._lock:
+                self.misses += 1
+                self._remove_locked(path)
+            return None
+
+        # 刷新访问时间，用于 LRU 淘汰
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return response
+
+    def put(self, key: str, response: Any) -> None:
+        """写入缓存条目
+
+        Args:
+            key: 缓存键
+            response: 可 JSON 序列化的响应数据
+        """
+        data = json.dumps(
+            {"stored_at": time.time(), "response": response}, ensure_ascii=False
+        ).encode("utf-8")
+
+        with self._lock:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            total = self._current_size()
+            old_size = path.stat().st_size if path.exists() else 0
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(data)
+            tmp_path.replace(path)
+
+            self.stores += 1
+            self._total_bytes = total - old_size + len(data)
+            self._evict_locked()
+
+    def _count_miss(self) -> None:
+        """记录一次未命中"""
+        with self._lock:
+            self.misses += 1
+
+    def _path(self, key: str) -> Path:
+        """缓存条目文件路径"""
+        return self.cache_dir / f"{key}.json"
+
+    def _current_size(self) -> int:
+        """当前缓存总大小（首次调用时扫描目录）"""
+        if self._total_bytes is None:
+            self._total_bytes = sum(
+                p.stat().st_size for p in self.cache_dir.glob("*.json")
+            )
+        return self._total_bytes
+
+    def _remove_locked(self, path: Path) -> None:
+        """删除单个条目并更新总大小"""
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return
+        if self._total_bytes is not None:
+            self._total_bytes -= size
+
+    def _evict_locked(self) -> None:
+        """按最近访问时间淘汰条目，直到总大小不超过上限"""
+        if self._current_size() <= self.max_bytes:
+            return
+
+        entries = sorted(
+            (p.stat().st_mtime, p.stat().st_size, p)
+            for p in self.cache_dir.glob("*.json")
+        )
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+
+        self._total_bytes = total
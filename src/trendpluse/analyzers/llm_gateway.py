@@ -0,0 +1,475 @@
+"""LLM 调用网关
+
+所有分析器共享同一个网关：
+- 同步 / 异步两个 Anthropic 客户端，各自持有一个连接池，TLS 会话在各阶段间复用
+- 并发上限（同步调用用线程信号量，异步调用用 asyncio 信号量）
+- 统一的超时（Settings.anthropic_timeout）和重试策略（SDK 内置的指数退避，
+  覆盖连接错误、429 和 5xx）
+- 普通消息调用和 Instructor 结构化调用两种入口
+- 可选的磁盘响应缓存（LLMCache），相同请求直接返回缓存的响应
+- 可选的每日 token 预算（TokenBudget），按调用阶段优先级放行，缓存命中不计入
+- 批处理收集期间（LLMBatchRunner.collecting），未命中缓存的请求登记到批处理任务
+- Prompt 缓存：分析器把固定的指令写在 system 前缀，可变数据放在 user 消息中，
+  连续和分块调用复用 provider 侧缓存的前缀；响应 usage 中的缓存读取 / 写入
+  token 数计入统计。provider 只缓存达到最小长度（MIN_CACHEABLE_TOKENS，
+  结构化调用的工具定义也计入）的前缀，system_prompt 只为估算达到该长度的前缀
+  添加缓存标记；去重判断、PR 信号、日报总览等较短的前缀按普通文本发送
+"""
+
+import asyncio
+import json
+import threading
+from typing import TYPE_CHECKING, Any, TypeVar
+
+import anthropic
+import httpx
+import instructor
+from anthropic import Anthropic, AsyncAnthropic
+from anthropic.types import Message
+from pydantic import BaseModel, ValidationError
+
+from trendpluse.analyzers.llm_cache import LLMCache
+from trendpluse.analyzers.token_budget import STAGE_PR, TokenBudget
+from trendpluse.analyzers.tokens import estimate_tokens
+
+if TYPE_CHECKING:
+    from trendpluse.analyzers.llm_batch import LLMBatchRunner
+
+T = TypeVar("T")
+
+DEFAULT_TIMEOUT = 120.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_MAX_CONCURRENCY = 4
+# 连接池大小（保持的空闲连接数和总连接数上限）
+DEFAULT_MAX_CONNECTIONS = 20
+# provider 可缓存的最短前缀（Sonnet / Opus 为 1024 token，更短的前缀不会被缓存）
+MIN_CACHEABLE_TOKENS = 1024
+
+
+class LLMGateway:
+    """共享的 LLM 调用网关（线程安全，支持 asyncio）"""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str | None = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        cache: LLMCache | None = None,
+        budget: TokenBudget | None = None,
+        prompt_caching: bool = True,
+    ):
+        """初始化网关
+
+        Args:
+            api_key: API Key (智谱AI 或 Anthropic)
+            base_url: API Base URL（可选）
+            timeout: 单次请求超时（秒）
+            max_retries: 失败重试次数（连接错误、429、5xx）
+            max_concurrency: 同时在途的请求数上限
+            max_connections: 连接池大小
+            cache: 响应缓存（可选）
+            budget: 每日 token 预算（可选）
+            prompt_caching: 是否把 system 前缀标记为可缓存
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self.budget = budget
+        self.prompt_caching = prompt_caching
+        # 批处理收集器（仅在 LLMBatchRunner.collecting 期间设置）
+        self.batch: LLMBatchRunner | None = None
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+
+        self.client = Anthropic(
+            **self._client_kwargs(),
+            http_client=anthropic.DefaultHttpxClient(limits=self.limits),
+        )
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._structured_client: Any = None
+
+        # 异步客户端和信号量绑定事件循环，切换循环时重建
+        self._async_loop: asyncio.AbstractEventLoop | None = None
+        self._async_client: AsyncAnthropic | None = None
+        self._async_structured_client: Any = None
+        self._async_semaphore: asyncio.Semaphore | None = None
+        # 正在关闭的旧异步客户端（保留引用，避免任务被提前回收）
+        self._closing: set[asyncio.Task[None]] = set()
+
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """重置本次运行的统计计数"""
+        self.requests = 0
+        self.errors = 0
+        self.input_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """本次运行的统计信息"""
+        return {
+            "llm_requests": self.requests,
+            "llm_errors": self.errors,
+            "llm_input_tokens": self.input_tokens,
+            "llm_cache_read_tokens": self.cache_read_tokens,
+            "llm_cache_write_tokens": self.cache_write_tokens,
+        }
+
+    def system_prompt(
+        self, text: str, response_model: type[BaseModel] | None = None
+    ) -> str | list[dict[str, Any]]:
+        """构造 system 参数，启用 Prompt 缓存且前缀足够长时把整段前缀标记为可缓存
+
+        缓存前缀依次包含工具定义和 system 文本：结构化调用的响应模型会作为工具
+        定义发送，其 JSON Schema 一并计入长度。长度按 estimate_tokens 估算。
+
+        Args:
+            text: 固定的指令文本（不能包含每次调用不同的数据）
+            response_model: 结构化调用的 Pydantic 响应模型（可选）
+
+        Returns:
+            messages.create 的 system 参数（前缀短于 MIN_CACHEABLE_TOKENS 时为普通文本）
+        """
+        if not self.prompt_caching:
+            return text
+
+        prefix_tokens = estimate_tokens(text)
+        if response_model is not None:
+            schema = json.dumps(response_model.model_json_schema(), ensure_ascii=False)
+            prefix_tokens += estimate_tokens(schema)
+        if prefix_tokens < MIN_CACHEABLE_TOKENS:
+            return text
+
+        return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
+
+    def record_usage(self, response: Any) -> int | None:
+        """记录响应的 token 用量（包括 Prompt 缓存读取和写入）
+
+        Args:
+            response: Message 响应或 Instructor 结构化结果
+
+        Returns:
+            本次调用消耗的 token 总数，响应没有 usage 时返回 None
+        """
+        usage = _usage(response)
+        if usage is None:
+            return None
+        cache_read = _cache_tokens(usage, "cache_read_input_tokens")
+        cache_write = _cache_tokens(usage, "cache_creation_input_tokens")
+        with self._lock:
+            self.input_tokens += usage.input_tokens
+            self.cache_read_tokens += cache_read
+            self.cache_write_tokens += cache_write
+        return int(usage.input_tokens + cache_read + cache_write + usage.output_tokens)
+
+    def create_message(self, stage: str = STAGE_PR, **kwargs: Any) -> Any:
+        """同步调用 messages.create
+
+        Args:
+            stage: 调用阶段（用于 token 预算优先级）
+            **kwargs: 透传给 messages.create 的参数
+
+        Returns:
+            Message 响应
+
+        Raises:
+            TokenBudgetExceededError: 当日 token 预算不足
+            BatchDeferredError: 批处理收集期间，请求已登记到批处理任务
+        """
+        key = self._cache_key("message", kwargs)
+        cached = self._load_cached(key, Message)
+        if cached is not None:
+            return cached
+
+        reserved = self._reserve(stage, kwargs)
+        self._defer_if_batching(stage, key, kwargs, reserved)
+        message = None
+        try:
+            with self._semaphore:
+                message = self._counted(self.client.messages.create, **kwargs)
+        finally:
+            self._settle(stage, reserved, message)
+        self._store(key, message)
+        return message
+
+    def create_structured(
+        self, response_model: type[T], stage: str = STAGE_PR, **kwargs: Any
+    ) -> T:
+        """同步调用 Instructor 提取结构化结果
+
+        Args:
+            response_model: Pydantic 响应模型
+            stage: 调用阶段（用于 token 预算优先级）
+            **kwargs: 透传给 chat.completions.create 的参数
+
+        Returns:
+            响应模型实例
+
+        Raises:
+            TokenBudgetExceededError: 当日 token 预算不足
+            BatchDeferredError: 批处理收集期间，请求已登记到批处理任务
+        """
+        key = self._cache_key(self._structured_kind(response_model), kwargs)
+        cached = self._load_cached(key, response_model)
+        if cached is not None:
+            return cached
+
+        if self._structured_client is None:
+            self._structured_client = instructor.from_anthropic(self.client)
+        reserved = self._reserve(stage, kwargs)
+        self._defer_if_batching(stage, key, kwargs, reserved, response_model)
+        result = None
+        try:
+            with self._semaphore:
+                result = self._counted(
+                    self._structured_client.chat.completions.create,
+                    response_model=response_model,
+                    **kwargs,
+                )
+        finally:
+            self._settle(stage, reserved, result)
+        self._store(key, result)
+        return result  # type: ignore[no-any-return]
+
+    async def acreate_message(self, stage: str = STAGE_PR, **kwargs: Any) -> Any:
+        """异步调用 messages.create
+
+        Args:
+            stage: 调用阶段（用于 token 预算优先级）
+            **kwargs: 透传给 messages.create 的参数
+
+        Returns:
+            Message 响应
+
+        Raises:
+            TokenBudgetExceededError: 当日 token 预算不足
+            BatchDeferredError: 批处理收集期间，请求已登记到批处理任务
+        """
+        key = self._cache_key("message", kwargs)
+        cached = self._load_cached(key, Message)
+        if cached is not None:
+            return cached
+
+        client, semaphore = self._async_state()
+        reserved = self._reserve(stage, kwargs)
+        self._defer_if_batching(stage, key, kwargs, reserved)
+        message = None
+        try:
+            async with semaphore:
+                message = await self._acounted(client.messages.create, **kwargs)
+        finally:
+            self._settle(stage, reserved, message)
+        self._store(key, message)
+        return message
+
+    async def acreate_structured(
+        self, response_model: type[T], stage: str = STAGE_PR, **kwargs: Any
+    ) -> T:
+        """异步调用 Instructor 提取结构化结果
+
+        Args:
+            response_model: Pydantic 响应模型
+            stage: 调用阶段（用于 token 预算优先级）
+            **kwargs: 透传给 chat.completions.create 的参数
+
+        Returns:
+            响应模型实例
+
+        Raises:
+            TokenBudgetExceededError: 当日 token 预算不足
+            BatchDeferredError: 批处理收集期间，请求已登记到批处理任务
+        """
+        key = self._cache_key(self._structured_kind(response_model), kwargs)
+        cached = self._load_cached(key, response_model)
+        if cached is not None:
+            return cached
+
+        client, semaphore = self._async_state()
+        if self._async_structured_client is None:
+            self._async_structured_client = instructor.from_anthropic(client)
+        reserved = self._reserve(stage, kwargs)
+        self._defer_if_batching(stage, key, kwargs, reserved, response_model)
+        result = None
+        try:
+            async with semaphore:
+                result = await self._acounted(
+                    self._async_structured_client.chat.completions.create,
+                    response_model=response_model,
+                    **kwargs,
+                )
+        finally:
+            self._settle(stage, reserved, result)
+        self._store(key, result)
+        return result  # type: ignore[no-any-return]
+
+    def close(self) -> None:
+        """关闭同步和异步连接池"""
+        self.client.close()
+        if self._async_client is not None:
+            self._close_async_client(self._async_client)
+            self._async_client = None
+            self._async_structured_client = None
+            self._async_loop = None
+
+    def _close_async_client(self, client: AsyncAnthropic) -> None:
+        """关闭异步客户端
+
+        在事件循环中调用时调度为后台任务，否则在临时事件循环中同步关闭。
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(_aclose_quietly(client))
+            return
+        task = loop.create_task(_aclose_quietly(client))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def _client_kwargs(self) -> dict[str, Any]:
+        """两个客户端共用的构造参数"""
+        kwargs: dict[str, Any] = {
+            "api_key": self.api_key,
+            "timeout": self.timeout,
+            "max_retries": self.max_retries,
+        }
+        if self.base_url:
+            kwargs["base_url"] = self.base_url
+        return kwargs
+
+    def _cache_key(self, kind: str, params: dict[str, Any]) -> str | None:
+        """请求的缓存键，未启用缓存时返回 None"""
+        if self.cache is None:
+            return None
+        return self.cache.make_key(kind, params)
+
+    @staticmethod
+    def _structured_kind(response_model: type) -> str:
+        """结构化调用的缓存类型（响应模型的结构变化时缓存自动失效）"""
+        schema = ""
+        if issubclass(response_model, BaseModel):
+            schema = json.dumps(response_model.model_json_schema(), sort_keys=True)
+        return f"{response_model.__module__}.{response_model.__qualname__}:{schema}"
+
+    def _load_cached(self, key: str | None, model: type[T]) -> T | None:
+        """读取缓存并还原为响应对象"""
+        if key is None or self.cache is None:
+            return None
+        data = self.cache.get(key)
+        if data is None or not issubclass(model, BaseModel):
+            return None
+        try:
+            return model.model_validate(data)
+        except ValidationError:
+            return None
+
+    def _store(self, key: str | None, response: Any) -> None:
+        """缓存响应（只缓存 Pydantic 对象）"""
+        if key is None or self.cache is None or not isinstance(response, BaseModel):
+            return
+        self.cache.put(key, response.model_dump(mode="json"))
+
+    def _reserve(self, stage: str, params: dict[str, Any]) -> int:
+        """调用前向预算预占额度，未启用预算时返回 0"""
+        if self.budget is None:
+            return 0
+        return self.budget.reserve(stage, self.budget.estimate_request(params))
+
+    def _defer_if_batching(
+        self,
+        stage: str,
+        key: str | None,
+        params: dict[str, Any],
+        reserved: int,
+        response_model: type | None = None,
+    ) -> None:
+        """批处理收集期间把请求登记到批处理任务（抛出 BatchDeferredError）"""
+        if self.batch is not None and key is not None:
+            self.batch.defer(stage, key, params, reserved, response_model)
+
+    def _settle(self, stage: str, reserved: int, response: Any) -> None:
+        """调用后记录 usage 并结算预算（没有 usage 时按预占数结算，失败记 0）"""
+        actual = 0
+        if response is not None:
+            recorded = self.record_usage(response)
+            actual = reserved if recorded is None else recorded
+        if self.budget is not None:
+            self.budget.settle(stage, reserved, actual)
+
+    def _async_state(self) -> tuple[AsyncAnthropic, asyncio.Semaphore]:
+        """获取当前事件循环对应的异步客户端和信号量"""
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            if self._async_client is not None:
+                self._close_async_client(self._async_client)
+            self._async_client = AsyncAnthropic(
+                **self._client_kwargs(),
+                http_client=anthropic.DefaultAsyncHttpxClient(limits=self.limits),
+            )
+            self._async_structured_client = None
+            self._async_semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._async_loop = loop
+        assert self._async_client is not None
+        assert self._async_semaphore is not None
+        return self._async_client, self._async_semaphore
+
+    def _counted(self, func: Any, **kwargs: Any) -> Any:
+        """调用并记录统计"""
+        with self._lock:
+            self.requests += 1
+        try:
+            return func(**kwargs)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+
+    async def _acounted(self, func: Any, **kwargs: Any) -> Any:
+        """异步调用并记录统计"""
+        with self._lock:
+            self.requests += 1
+        try:
+            return await func(**kwargs)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+
+
+def _usage(response: Any) -> Any | None:
+    """从响应元数据读取 usage，没有有效的 usage 时返回 None
+
+    Message 直接带 usage；Instructor 结构化结果的原始响应在 _raw_response 中。
+    """
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        usage = getattr(getattr(response, "_raw_response", None), "usage", None)
+    input_tokens = getattr(usage, "input_tokens", None)
+    output_tokens = getattr(usage, "output_tokens", None)
+    if not isinstance(input_tokens, int) or not isinstance(output_tokens, int):
+        return None
+    return usage
+
+
+def _cache_tokens(usage: Any, field: str) -> int:
+    """读取 Prompt 缓存的 token 数（provider 不支持缓存时为 0）"""
+    value = getattr(usage, field, None)
+    return value if isinstance(value, int) else 0
+
+
+async def _aclose_quietly(client: AsyncAnthropic) -> None:
+    """关闭异步客户端，所属事件循环已关闭等原因导致失败时只记录日志"""
+    try:
+        await client.close()
+    except Exception as e:
+        print(f"[DEBUG] 关闭异步 LLM 客户端失败: {e}")
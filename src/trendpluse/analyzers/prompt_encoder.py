@@ -0,0 +1,140 @@
+"""Prompt 数据编码
+
+把采集到的记录编码为紧凑的制表符分隔表格（首行为字段名，每条记录一行），
+替代 json.dumps(indent=2)：
+- 按分析器的字段白名单只保留有用字段（丢弃 assets、html_url 等）
+- 所有记录都为空的列整列省略（如恒为 0 的 additions / deletions）
+- 每个字段可设置长度上限，时间字段只保留日期
+- 文本中的 Markdown 链接只保留文字，GitHub PR / issue 链接缩写为 #编号
+
+每次编码都记录编码前（原 indent=2 JSON）和编码后的估算 token 数。
+"""
+
+import json
+import re
+import threading
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from trendpluse.analyzers.tokens import estimate_tokens
+
+_HTML_COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+_MARKDOWN_LINK = re.compile(r"\[([^\]]*)\]\((?:[^()\s]+)\)")
+_GITHUB_REF = re.compile(r"https://github\.com/[\w.-]+/[\w.-]+/(?:pull|issues)/(\d+)")
+_SPACES = re.compile(r"[ \t\r\f\v]+")
+_NEWLINES = re.compile(r"\s*\n\s*")
+
+
+@dataclass(frozen=True)
+class PromptField:
+    """白名单中的单个字段"""
+
+    name: str
+    # 文本最大字符数（None 表示不限制）
+    max_chars: int | None = None
+    # 是否为 ISO 时间（只保留日期部分）
+    date: bool = False
+
+
+class PromptEncoder:
+    """按字段白名单把记录编码为紧凑表格（线程安全）"""
+
+    def __init__(self, name: str, fields: Sequence[PromptField]):
+        """初始化编码器
+
+        Args:
+            name: 编码器名称（统计键前缀）
+            fields: 字段白名单（按输出列顺序）
+        """
+        self.name = name
+        self.fields = tuple(fields)
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """重置本次运行的统计计数"""
+        self.tokens_raw = 0
+        self.tokens_encoded = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """本次运行的统计信息"""
+        return {
+            f"{self.name}_prompt_tokens_raw": self.tokens_raw,
+            f"{self.name}_prompt_tokens_encoded": self.tokens_encoded,
+        }
+
+    def encode(self, records: Sequence[dict[str, Any]]) -> str:
+        """编码记录列表
+
+        Args:
+            records: 原始记录列表
+
+        Returns:
+            表格文本，空列表返回空字符串
+        """
+        if not records:
+            return ""
+
+        rows = [
+            [self._cell(record, field) for field in self.fields] for record in records
+        ]
+        # 所有记录都为空的列整列省略
+        columns = [
+            index
+            for index in range(len(self.fields))
+            if any(row[index] for row in rows)
+        ]
+        lines = ["\t".join(self.fields[index].name for index in columns)]
+        lines.extend("\t".join(row[index] for index in columns) for row in rows)
+        text = "\n".join(lines)
+
+        raw = estimate_tokens(json.dumps(list(records), ensure_ascii=False, indent=2))
+        encoded = estimate_tokens(text)
+        with self._lock:
+            self.tokens_raw += raw
+            self.tokens_encoded += encoded
+        print(
+            f"[DEBUG] PromptEncoder({self.name}): {len(records)} 条记录，"
+            f"估算 token {raw} → {encoded}"
+        )
+        return text
+
+    def record_tokens(self, record: dict[str, Any]) -> int:
+        """单条记录编码后的估算 token 数（用于切分分块）"""
+        row = "\t".join(self._cell(record, field) for field in self.fields)
+        return estimate_tokens(row) + 1
+
+    def header_tokens(self) -> int:
+        """表头（字段名行）的估算 token 数"""
+        return estimate_tokens("\t".join(field.name for field in self.fields)) + 1
+
+    def _cell(self, record: dict[str, Any], field: PromptField) -> str:
+        """格式化单个字段"""
+        value = record.get(field.name)
+        if not value:
+            return ""
+        if isinstance(value, str):
+            text = value[:10] if field.date else _compact_text(value)
+        elif value is True:
+            text = "true"
+        elif isinstance(value, list):
+            text = ",".join(_compact_text(str(item)) for item in value)
+        elif isinstance(value, dict):
+            text = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        else:
+            text = str(value)
+
+        if field.max_chars is not None and len(text) > field.max_chars:
+            text = text[: field.max_chars - 1] + "…"
+        return text
+
+
+def _compact_text(text: str) -> str:
+    """压缩文本：去掉注释和链接地址、合并空白，换行写作 \\n（保证一条记录一行）"""
+    text = _HTML_COMMENT.sub("", text)
+    text = _GITHUB_REF.sub(r"#\1", text)
+    text = _MARKDOWN_LINK.sub(r"\1", text)
+    text = _SPACES.sub(" ", text)
+    return _NEWLINES.sub(r"\\n", text.strip())
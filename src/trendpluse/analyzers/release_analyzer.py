@@ -1,15 +1,82 @@
 """Release 分析器
 
 使用 AI 分析 release 内容，提取版本升级趋势和重要特性。
+release 数据按字段白名单编码为紧凑表格后放入 Prompt，
+固定的分析指令放在 system 前缀中（前缀达到最小长度时可被 provider 缓存）。
 """
 
 import json
 from typing import Any
 
-from anthropic import Anthropic
-
+from trendpluse.analyzers.llm_gateway import LLMGateway
+from trendpluse.analyzers.prompt_encoder import PromptEncoder, PromptField
+from trendpluse.analyzers.release_insights import ReleaseInsightAnalyzer
+from trendpluse.analyzers.token_budget import STAGE_RELEASES
 from trendpluse.models.signal import Signal
 
+# Prompt 中保留的 release 字段（assets、html_url、version_info 等对趋势判断没有帮助）
+PROMPT_FIELDS = (
+    PromptField("repo"),
+    PromptField("tag_name"),
+    PromptField("name", max_chars=100),
+    PromptField("prerelease"),
+    PromptField("published_at", date=True),
+    PromptField("body", max_chars=3000),
+)
+
+# 固定的分析指令（system 前缀，各次调用相同，达到最小长度时标记为可缓存）
+SYSTEM_PROMPT = """\
+你是一个技术趋势分析专家。用户会提供一批 GitHub Releases，请从中提取有价值的\
+版本升级趋势和重要特性信息。
+
+## 分析要求
+
+请识别以下内容：
+
+1. **重大版本升级**：
+   - 主版本升级（major version bump）
+   - Breaking changes
+   - 重大架构变更
+
+2. **重要新特性**：
+   - 新功能发布（capability）
+   - 抽象层改进（abstraction）
+   - 工作流优化（workflow）
+   - 安全性增强（safety）
+   - 性能优化（performance）
+
+3. **评估标准**：
+   - 优先关注主版本升级（如 v1.0.0 → v2.0.0）
+   - 关注重要的次版本更新（如包含 breaking changes）
+   - **过滤掉纯 bug 修复的补丁版本**（如 v1.0.0 → v1.0.1）
+   - 关注影响范围广的特性
+   - 关注技术创新点
+
+## 输出格式
+
+请以 JSON 数组格式返回，每个元素包含：
+
+```json
+[
+  {
+    "title": "简短标题（5-10字）",
+    "type": "信号类型（capability/abstraction/workflow/eval/safety/performance）",
+    "category": "分类（engineering/research）",
+    "impact_score": 影响评分（1-5）,
+    "why_it_matters": "为什么重要（1-2句话）",
+    "related_repos": ["相关仓库名"],
+    "sources": ["release链接"]
+  }
+]
+```
+
+注意：
+- **只返回真正有价值的重大更新**
+- **忽略纯 bug 修复的补丁版本**
+- **如果没有重要更新，返回空数组 []**
+- impact_score 基于影响范围和重要性（主版本升级通常 4-5 分）
+"""
+
 
 class ReleaseAnalyzer:
     """Release 分析器
@@ -22,6 +89,8 @@ class ReleaseAnalyzer:
         api_key: str,
         model: str = "glm-4.7",
         base_url: str | None = None,
+        gateway: LLMGateway | None = None,
+        insights: ReleaseInsightAnalyzer | None = None,
     ):
         """初始化分析器
 
@@ -29,16 +98,25 @@ class ReleaseAnalyzer:
             api_key: Anthropic API Key
             model: 使用的模型
             base_url: API 基础 URL（可选）
+            gateway: 共享的 LLM 网关（可选，默认按 api_key 单独创建）
+            insights: Release 综合分析器（可选，提供时直接取其结果，不再单独调用 LLM）
         """
         self.api_key = api_key
         self.model = model
         self.base_url = base_url
 
-        # 初始化 Anthropic 客户端
-        client_kwargs: dict[str, str] = {"api_key": api_key}
-        if base_url:
-            client_kwargs["base_url"] = base_url
-        self.client = Anthropic(**client_kwargs)
+        self.gateway = gateway or LLMGateway(api_key=api_key, base_url=base_url)
+        self.insights = insights
+        self.encoder = PromptEncoder("release", PROMPT_FIELDS)
+
+    def reset_stats(self) -> None:
+        """重置本次运行的统计计数"""
+        self.encoder.reset_stats()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """本次运行的统计信息（Prompt 编码前后的估算 token 数）"""
+        return self.encoder.stats
 
     def analyze_releases(self, releases: dict[str, Any]) -> list[Signal]:
         """分析 release 列表
@@ -57,6 +135,10 @@ class ReleaseAnalyzer:
             print("[DEBUG] ReleaseAnalyzer: 收到空 release 列表")
             return []
 
+        # 综合分析模式：与另一视图共用同一次分析结果
+        if self.insights is not None:
+            return list(self.insights.analyze(releases).signals)
+
         print(f"[DEBUG] ReleaseAnalyzer: 开始分析 {len(detailed_releases)} 个 releases")
 
         try:
@@ -90,10 +172,12 @@ class ReleaseAnalyzer:
         prompt = self._build_prompt(releases)
 
         # 调用 API
-        message = self.client.messages.create(
+        message = self.gateway.create_message(
+            stage=STAGE_RELEASES,
             model=self.model,
             max_tokens=4096,
             temperature=0.3,
+            system=self.gateway.system_prompt(SYSTEM_PROMPT),
             messages=[
                 {
                     "role": "user",
@@ -105,7 +189,7 @@ class ReleaseAnalyzer:
         return message.content[0].text  # type: ignore[no-any-return]
 
     def _build_prompt(self, releases: list[dict[str, Any]]) -> str:
-        """构建分析 prompt
+        """构建分析 prompt 的可变部分（固定指令见 SYSTEM_PROMPT）
 
         Args:
             releases: release 数据列表
@@ -113,66 +197,16 @@ class ReleaseAnalyzer:
         Returns:
             prompt 文本
         """
-        releases_text = json.dumps(releases, ensure_ascii=False, indent=2)
+        releases_text = self.encoder.encode(releases)
 
-        prompt = """\
-你是一个技术趋势分析专家。请分析以下 GitHub Releases，提取有价值的\
-版本升级趋势和重要特性信息。
+        return f"""\
+请分析以下 GitHub Releases，提取有价值的版本升级趋势和重要特性信息。
 
-## Release 数据
+## Release 数据（制表符分隔，首行为字段名，每行一个 release）
 
 {releases_text}
-
-## 分析要求
-
-请识别以下内容：
-
-1. **重大版本升级**：
-   - 主版本升级（major version bump）
-   - Breaking changes
-   - 重大架构变更
-
-2. **重要新特性**：
-   - 新功能发布（capability）
-   - 抽象层改进（abstraction）
-   - 工作流优化（workflow）
-   - 安全性增强（safety）
-   - 性能优化（performance）
-
-3. **评估标准**：
-   - 优先关注主版本升级（如 v1.0.0 → v2.0.0）
-   - 关注重要的次版本更新（如包含 breaking changes）
-   - **过滤掉纯 bug 修复的补丁版本**（如 v1.0.0 → v1.0.1）
-   - 关注影响范围广的特性
-   - 关注技术创新点
-
-## 输出格式
-
-请以 JSON 数组格式返回，每个元素包含：
-
-```json
-[
-  {{
-    "title": "简短标题（5-10字）",
-    "type": "信号类型（capability/abstraction/workflow/eval/safety/performance）",
-    "category": "分类（engineering/research）",
-    "impact_score": 影响评分（1-5）,
-    "why_it_matters": "为什么重要（1-2句话）",
-    "related_repos": ["相关仓库名"],
-    "sources": ["release链接"]
-  }}
-]
-```
-
-注意：
-- **只返回真正有价值的重大更新**
-- **忽略纯 bug 修复的补丁版本**
-- **如果没有重要更新，返回空数组 []**
-- impact_score 基于影响范围和重要性（主版本升级通常 4-5 分）
 """
 
-        return prompt.format(releases_text=releases_text)
-
     def _parse_signals(
         self, llm_response: str, releases: list[dict[str, Any]]
     ) -> list[Signal]:
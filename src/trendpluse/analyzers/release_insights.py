@@ -0,0 +1,245 @@
+"""Release 综合分析器
+
+一次结构化调用同时提取 Release 趋势信号和 breaking changes，
+ReleaseAnalyzer 和 BreakingChangesDetector 在注入本分析器后只是其结果的两个视图，
+同一批 Release 只发送一次（不再重复发送完整的 release body）。
+
+Release 较多时按估算 token 数切分为多个分块并发分析，结果按分块顺序合并。
+release 数据按字段白名单编码为紧凑表格后放入 Prompt，
+固定的分析指令放在 system 前缀中，各分块调用复用（前缀达到最小长度时
+可被 provider 缓存）。
+"""
+
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from trendpluse.analyzers.llm_batch import BatchDeferredError
+from trendpluse.analyzers.llm_gateway import LLMGateway
+from trendpluse.analyzers.prompt_encoder import PromptEncoder, PromptField
+from trendpluse.analyzers.token_budget import STAGE_RELEASES
+from trendpluse.analyzers.tokens import estimate_tokens
+from trendpluse.models.signal import ReleaseAnalysis, ReleaseSignal, Signal
+
+# Prompt 中保留的 release 字段（同时检测 breaking changes，body 上限较宽）
+PROMPT_FIELDS = (
+    PromptField("repo"),
+    PromptField("tag_name"),
+    PromptField("name", max_chars=100),
+    PromptField("prerelease"),
+    PromptField("published_at", date=True),
+    PromptField("body", max_chars=6000),
+)
+
+# 固定的分析指令（system 前缀，各分块调用相同，达到最小长度时标记为可缓存）
+SYSTEM_PROMPT = """\
+你是一个技术趋势分析专家。用户会提供一批 GitHub Releases，请同时完成两项任务。
+
+## 任务一：趋势信号（signals）
+
+- 优先关注主版本升级（如 v1.0.0 → v2.0.0）和包含 breaking changes 的次版本
+- 关注重要新特性：capability / abstraction / workflow / safety / performance
+- **过滤掉纯 bug 修复的补丁版本**，只返回真正有价值的重大更新
+- impact_score 基于影响范围和重要性（主版本升级通常 4-5 分）
+- repo 和 tag_name 填写信号来源的 Release
+
+## 任务二：Breaking Changes（breaking_changes）
+
+- 判断标准：API 移除或重命名、函数签名变更、行为不兼容改变、
+  配置格式变更、依赖版本要求改变
+- impact：high（需要大量代码迁移）/ medium（少量调整）/ low（配置或轻微行为变更）
+- category：API / Config / Behavior / Dependency
+- **只包含有 breaking changes 的 Release**
+
+没有符合条件的内容时，对应列表返回空数组。
+"""
+
+
+@dataclass
+class ReleaseInsights:
+    """Release 综合分析结果"""
+
+    signals: list[Signal] = field(default_factory=list)
+    breaking_changes: list[dict] = field(default_factory=list)
+    # 是否有分块加入了批处理任务（结果不完整，不缓存）
+    deferred: bool = False
+
+
+class ReleaseInsightAnalyzer:
+    """Release 综合分析器（趋势信号 + breaking changes）"""
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "glm-4.7",
+        base_url: str | None = None,
+        gateway: LLMGateway | None = None,
+        chunk_token_limit: int = 8000,
+        max_concurrency: int = 4,
+    ):
+        """初始化分析器
+
+        Args:
+            api_key: Anthropic API Key
+            model: 使用的模型
+            base_url: API 基础 URL（可选）
+            gateway: 共享的 LLM 网关（可选，默认按 api_key 单独创建）
+            chunk_token_limit: 单个分块 Prompt（不含固定的 system 前缀）的估算
+                token 上限
+            max_concurrency: 同时分析的分块数
+        """
+        self.model = model
+        self.chunk_token_limit = chunk_token_limit
+        self.max_concurrency = max_concurrency
+        self.gateway = gateway or LLMGateway(api_key=api_key, base_url=base_url)
+        self.encoder = PromptEncoder("release_insights", PROMPT_FIELDS)
+
+        # 最近一次分析的结果（两个视图对同一批 Release 共用一次调用）
+        self._lock = threading.Lock()
+        self._last_key: str | None = None
+        self._last_result: ReleaseInsights | None = None
+
+    def reset_stats(self) -> None:
+        """重置本次运行的统计计数"""
+        self.encoder.reset_stats()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """本次运行的统计信息（Prompt 编码前后的估算 token 数）"""
+        return self.encoder.stats
+
+    def analyze(self, releases: dict[str, Any]) -> ReleaseInsights:
+        """分析 Release，同一批数据只调用一次 LLM
+
+        Args:
+            releases: release 数据字典（包含 detailed_releases）
+
+        Returns:
+            趋势信号和 breaking changes
+        """
+        detailed_releases = releases.get("detailed_releases", [])
+        if not detailed_releases:
+            return ReleaseInsights()
+
+        key = hashlib.sha256(
+            json.dumps(detailed_releases, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        with self._lock:
+            if key == self._last_key and self._last_result is not None:
+                return self._last_result
+            result = self._analyze(detailed_releases)
+            if not result.deferred:
+                self._last_key, self._last_result = key, result
+            return result
+
+    def plan_chunks(self, releases: list[dict[str, Any]]) -> list[list[dict[str, Any]]]:
+        """按输入顺序把 Release 切分为分块，单个 Release 超过上限时单独成块
+
+        Args:
+            releases: release 数据列表
+
+        Returns:
+            分块列表
+        """
+        header_tokens = estimate_tokens(self._build_prompt([]))
+        budget = self.chunk_token_limit - header_tokens - self.encoder.header_tokens()
+        chunks: list[list[dict[str, Any]]] = []
+        chunk: list[dict[str, Any]] = []
+        chunk_tokens = 0
+        for release in releases:
+            cost = self.encoder.record_tokens(release)
+            if chunk and chunk_tokens + cost > budget:
+                chunks.append(chunk)
+                chunk, chunk_tokens = [], 0
+            chunk.append(release)
+            chunk_tokens += cost
+
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def _analyze(self, releases: list[dict[str, Any]]) -> ReleaseInsights:
+        """分块并发分析并合并结果"""
+        chunks = self.plan_chunks(releases)
+        print(
+            f"[DEBUG] ReleaseInsightAnalyzer: 开始分析 {len(releases)} 个 releases"
+            f"（{len(chunks)} 个分块）"
+        )
+
+        workers = max(1, min(self.max_concurrency, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(self._analyze_chunk, chunks))
+
+        insights = ReleaseInsights()
+        for result in results:
+            insights.signals.extend(result.signals)
+            insights.breaking_changes.extend(result.breaking_changes)
+            insights.deferred = insights.deferred or result.deferred
+
+        print(
+            f"[DEBUG] ReleaseInsightAnalyzer: 得到 {len(insights.signals)} 个信号，"
+            f"{len(insights.breaking_changes)} 个 breaking changes"
+        )
+        return insights
+
+    def _analyze_chunk(self, releases: list[dict[str, Any]]) -> ReleaseInsights:
+        """分析单个分块，失败时返回空结果（不影响其他分块）"""
+        try:
+            analysis = self.gateway.create_structured(
+                ReleaseAnalysis,
+                stage=STAGE_RELEASES,
+                model=self.model,
+                max_tokens=4096,
+                temperature=0.3,
+                system=self.gateway.system_prompt(SYSTEM_PROMPT, ReleaseAnalysis),
+                messages=[{"role": "user", "content": self._build_prompt(releases)}],
+            )
+        except BatchDeferredError:
+            return ReleaseInsights(deferred=True)
+        except Exception as e:
+            print(f"[DEBUG] ReleaseInsightAnalyzer: 分析失败 - {type(e).__name__}: {e}")
+            return ReleaseInsights()
+
+        return ReleaseInsights(
+            signals=[self._to_signal(item) for item in analysis.signals],
+            breaking_changes=[
+                item.model_dump()
+                for item in analysis.breaking_changes
+                if item.has_breaking and item.changes
+            ],
+        )
+
+    def _to_signal(self, item: ReleaseSignal) -> Signal:
+        """补全 ID 和来源链接，转换为 Signal"""
+        return Signal(
+            id=f"release-{item.repo}-{item.tag_name}",
+            title=item.title,
+            type=item.type,
+            category=item.category,
+            impact_score=item.impact_score,
+            why_it_matters=item.why_it_matters,
+            sources=[f"https://github.com/{item.repo}/releases/tag/{item.tag_name}"],
+            related_repos=list(dict.fromkeys([item.repo, *item.related_repos])),
+        )
+
+    def _build_prompt(self, releases: list[dict[str, Any]]) -> str:
+        """构建综合分析 prompt 的可变部分（固定指令见 SYSTEM_PROMPT）
+
+        Args:
+            releases: release 数据列表
+
+        Returns:
+            prompt 文本
+        """
+        releases_text = self.encoder.encode(releases)
+
+        return f"""\
+请分析以下 GitHub Releases，同时完成趋势信号和 Breaking Changes 两项任务。
+
+## Release 数据（制表符分隔，首行为字段名，每行一个 release）
+
+{releases_text}
+"""
@@ -9,8 +9,27 @@ from datetime import UTC, datetime, timedelta
 from pathlib import Path
 from typing import Any
 
+from trendpluse.analyzers.token_budget import STAGE_DEDUP, TokenBudgetExceededError
 from trendpluse.models.signal import Signal
 
+# 去重判断的固定指令（system 前缀，各次调用相同；短于 provider 的最小缓存长度，
+# 按普通文本发送）
+SYSTEM_PROMPT = """\
+你是一个技术趋势分析专家。用户会提供一条新信号和若干标题相似的历史信号，\
+请判断新信号是否与历史信号重复。
+
+## 判断标准
+- 如果描述的是同一个技术趋势/特性，判定为"重复"
+- 如果是不同的改进或新特性，判定为"不重复"
+- 标题微调但本质相同 → 重复
+- 类型或特性不同 → 不重复
+
+## 回答格式
+只回答一个词：
+- DUPLICATE（重复）
+- UNIQUE（不重复）
+"""
+
 
 class SignalDeduplicator:
     """信号去重器
@@ -27,7 +46,7 @@ class SignalDeduplicator:
         """初始化去重器
 
         Args:
-            llm_client: Anthropic 客户端
+            llm_client: LLM 网关（LLMGateway）
             lookback_days: 历史信号时间窗口（天）
             history_path: 历史信号存储路径
         """
@@ -113,8 +132,12 @@ class SignalDeduplicator:
         # 阶段 2: 查找相似标题（编辑距离 <= 2）
         similar_signals = self._find_similar_signals(signal, history)
         if similar_signals:
-            # 阶段 3: LLM 深度判断
-            return self._llm_check_duplicate(signal, similar_signals)
+            # 阶段 3: LLM 深度判断（预算不足时保留信号）
+            try:
+                return self._llm_check_duplicate(signal, similar_signals)
+            except TokenBudgetExceededError as e:
+                print(f"[DEBUG] SignalDeduplicator: {e}")
+                return False
 
         return False
 
@@ -176,13 +199,13 @@ class SignalDeduplicator:
         Returns:
             True 如果 LLM 判断为重复，False 否则
         """
-        # 构建对比 Prompt
+        # 构建对比 Prompt（固定的判断标准见 SYSTEM_PROMPT）
         history_text = "\n".join(
             f"- {s.title} (类型: {s.type}, 重要性: {s.why_it_matters})"
             for s in history[:3]  # 只对比最相似的 3 个
         )
 
-        prompt = f"""你是一个技术趋势分析专家。判断以下新信号是否与历史信号重复。
+        prompt = f"""判断以下新信号是否与历史信号重复。
 
 ## 新信号
 标题: {signal.title}
@@ -191,24 +214,15 @@ class SignalDeduplicator:
 
 ## 历史信号（相似标题）
 {history_text}
-
-## 判断标准
-- 如果描述的是同一个技术趋势/特性，判定为"重复"
-- 如果是不同的改进或新特性，判定为"不重复"
-- 标题微调但本质相同 → 重复
-- 类型或特性不同 → 不重复
-
-## 回答格式
-只回答一个词：
-- DUPLICATE（重复）
-- UNIQUE（不重复）
 """
 
         # 调用 LLM
-        message = self.llm_client.messages.create(
+        message = self.llm_client.create_message(
+            stage=STAGE_DEDUP,
             model="glm-4.7",
             max_tokens=10,
             temperature=0,
+            system=self.llm_client.system_prompt(SYSTEM_PROMPT),
             messages=[{"role": "user", "content": prompt}],
         )
 
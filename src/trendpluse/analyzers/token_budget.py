@@ -0,0 +1,201 @@
+"""每日 LLM token 预算
+
+所有 LLM 调用经 LLMGateway 发出前先向预算申请额度：
+- 调用前按 Prompt 估算 token 数加 max_tokens 预占额度，调用后按响应的 usage 结算
+- 用量按日期记入磁盘账本，同一天多次运行累计计算
+- 额度不足时按阶段优先级放行：PR 分析 > releases > commits > 去重。
+  低优先级阶段调用后必须仍保留一定比例的预算（留给更高优先级阶段），否则跳过
+"""
+
+import json
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+from trendpluse.analyzers.tokens import estimate_tokens
+
+# 调用阶段（PR 分析包含日报总览生成）
+STAGE_PR = "pr"
+STAGE_RELEASES = "releases"
+STAGE_COMMITS = "commits"
+STAGE_DEDUP = "dedup"
+
+# 各阶段调用后必须保留的预算比例（优先级越低保留越多）
+STAGE_RESERVES = {
+    STAGE_PR: 0.0,
+    STAGE_RELEASES: 0.1,
+    STAGE_COMMITS: 0.2,
+    STAGE_DEDUP: 0.3,
+}
+
+
+class TokenBudgetExceededError(RuntimeError):
+    """当日预算不足，调用被跳过"""
+
+
+class TokenBudget:
+    """每日 token 预算（线程安全）"""
+
+    def __init__(
+        self,
+        daily_limit: int,
+        ledger_path: str = "data/token_ledger.json",
+        history_days: int = 30,
+    ):
+        """初始化预算
+
+        Args:
+            daily_limit: 每日 token 上限，小于等于 0 表示不限制（只记账）
+            ledger_path: 账本文件路径
+            history_days: 账本保留的天数
+        """
+        self.daily_limit = daily_limit
+        self.ledger_path = Path(ledger_path)
+        self.history_days = history_days
+        self._lock = threading.Lock()
+        # 已预占但尚未结算的额度（并发调用时避免同时超额）
+        self._pending = 0
+        self._ledger = self._load_ledger()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """重置本次运行的统计计数"""
+        self.used = 0
+        self.skipped = dict.fromkeys(STAGE_RESERVES, 0)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """本次运行的统计信息"""
+        stats = {
+            "token_budget_limit": self.daily_limit,
+            "token_budget_used": self.used,
+            "token_budget_used_today": self.used_today(),
+            "token_budget_remaining": self.remaining(),
+        }
+        for stage, count in self.skipped.items():
+            stats[f"token_budget_skipped_{stage}"] = count
+        return stats
+
+    def used_today(self) -> int:
+        """当日已结算的用量"""
+        with self._lock:
+            return int(self._today_entry()["used"])
+
+    def remaining(self) -> int:
+        """当日剩余额度（不限制时为 -1）"""
+        if self.daily_limit <= 0:
+            return -1
+        with self._lock:
+            used = int(self._today_entry()["used"]) + self._pending
+        return max(0, self.daily_limit - used)
+
+    @staticmethod
+    def estimate_request(params: dict[str, Any]) -> int:
+        """估算一次调用最多消耗的 token 数（Prompt 估算 + max_tokens）
+
+        Args:
+            params: messages.create 的请求参数
+
+        Returns:
+            估算的 token 数
+        """
+        texts = [_content_text(params.get("system"))]
+        texts.extend(
+            _content_text(message.get("content"))
+            for message in params.get("messages", [])
+        )
+        return sum(estimate_tokens(text) for text in texts) + int(
+            params.get("max_tokens", 0)
+        )
+
+    def reserve(self, stage: str, tokens: int) -> int:
+        """为一次调用预占额度
+
+        Args:
+            stage: 调用阶段
+            tokens: 预估 token 数
+
+        Returns:
+            预占的 token 数（结算时传回 settle）
+
+        Raises:
+            TokenBudgetExceededError: 按阶段优先级额度不足
+        """
+        with self._lock:
+            if self.daily_limit > 0:
+                reserve = STAGE_RESERVES.get(stage, 0.0) * self.daily_limit
+                used = int(self._today_entry()["used"]) + self._pending
+                if used + tokens > self.daily_limit - reserve:
+                    self.skipped[stage] = self.skipped.get(stage, 0) + 1
+                    entry = self._today_entry()
+                    entry["skipped"][stage] = entry["skipped"].get(stage, 0) + 1
+                    self._save_locked()
+                    raise TokenBudgetExceededError(
+                        f"token 预算不足，跳过 {stage} 调用"
+                        f"（今日已用 {used}，本次预估 {tokens}，"
+                        f"上限 {self.daily_limit}）"
+                    )
+            self._pending += tokens
+        return tokens
+
+    def settle(self, stage: str, reserved: int, actual: int) -> None:
+        """结算一次调用，释放预占额度并记入实际用量
+
+        Args:
+            stage: 调用阶段
+            reserved: reserve 返回的预占数
+            actual: 实际消耗的 token 数（调用失败时为 0）
+        """
+        with self._lock:
+            self._pending = max(0, self._pending - reserved)
+            if actual <= 0:
+                return
+            self.used += actual
+            entry = self._today_entry()
+            entry["used"] += actual
+            entry["stages"][stage] = entry["stages"].get(stage, 0) + actual
+            self._save_locked()
+
+    def _today_entry(self) -> dict[str, Any]:
+        """当日账本条目（不存在时创建）"""
+        entry = self._ledger.setdefault(date.today().isoformat(), {})
+        entry.setdefault("used", 0)
+        entry.setdefault("stages", {})
+        entry.setdefault("skipped", {})
+        return entry
+
+    def _load_ledger(self) -> dict[str, dict[str, Any]]:
+        """加载账本，文件不存在或损坏时返回空账本"""
+        try:
+            with open(self.ledger_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _save_locked(self) -> None:
+        """保存账本（只保留最近 history_days 天）"""
+        cutoff = (date.today() - timedelta(days=self.history_days)).isoformat()
+        self._ledger = {day: v for day, v in self._ledger.items() if day >= cutoff}
+        try:
+            self.ledger_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.ledger_path.with_suffix(".tmp")
+            tmp_path.write_text(
+                json.dumps(self._ledger, ensure_ascii=False, indent=2),
+                encoding="utf-8",
+            )
+            tmp_path.replace(self.ledger_path)
+        except OSError as e:
+            print(f"保存 token 账本失败: {e}")
+
+
+def _content_text(content: Any) -> str:
+    """提取消息内容中的文本（字符串或内容块列表）"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(
+            block.get("text", "") for block in content if isinstance(block, dict)
+        )
+    return ""
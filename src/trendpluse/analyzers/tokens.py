@@ -0,0 +1,19 @@
+"""Prompt token 估算
+
+不依赖分词器的近似估算，用于切分批次和预算控制：
+中日韩字符约 1 个 token，其余字符约 4 个一个 token。
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本的 token 数
+
+    Args:
+        text: 文本
+
+    Returns:
+        估算的 token 数（向上取整）
+    """
+    wide = sum(1 for char in text if ord(char) >= 0x2E80)
+    narrow = len(text) - wide
+    return wide + (narrow + 3) // 4
@@ -1,12 +1,65 @@
 """AI 趋势信号分析器
 
 支持 Anthropic Claude 和智谱 AI (GLM) + Instructor 提取结构化趋势信号。
+批量分析 PR 时可并发调用（异步 Instructor 客户端 + 信号量），
+每个 PR 有单独的超时，结果顺序与输入一致，失败按 PR 记录。
+批量模式下多个 PR 合并为一次结构化调用（按 PR 编号对应结果），
+批次大小按 Prompt token 上限自适应，无效结果回退为单个 PR 调用。
+固定的分析指令放在 system 前缀中（前缀达到最小长度时可被 provider 缓存），
+user 消息只包含 PR 数据。
 """
 
-import anthropic
-import instructor
+import asyncio
+from dataclasses import dataclass
+from typing import Any
 
-from trendpluse.models.signal import DailyReport, Signal
+from trendpluse.analyzers.llm_batch import BatchDeferredError
+from trendpluse.analyzers.llm_gateway import LLMGateway
+from trendpluse.analyzers.token_budget import TokenBudgetExceededError
+from trendpluse.analyzers.tokens import estimate_tokens
+from trendpluse.models.signal import DailyReport, PRSignalBatch, Signal
+
+# 单条信号的输出 token 上限（批次按 PR 数累加）
+SIGNAL_MAX_TOKENS = 1000
+
+# PR 分析的固定指令（system 前缀，各次调用相同；连同响应模型仍短于
+# MIN_CACHEABLE_TOKENS，目前按普通文本发送）
+SYSTEM_PROMPT = """\
+你是一个技术趋势分析专家。用户会提供 GitHub PR 的标题、描述、仓库、作者和链接，\
+请提取关键信息并返回结构化趋势信号。
+
+## 字段要求
+
+- title：简短标题（5-10字）
+- type：capability / abstraction / workflow / eval / safety / performance
+- category：engineering（工程实践）或 research（研究进展）
+- impact_score：影响评分 1-5，基于影响范围和重要性
+- why_it_matters：为什么重要（1-2句话）
+- id、sources 和 related_repos 可以留空，系统会按 PR 链接和仓库补全
+
+## 多个 PR
+
+一次提供多个 PR 时（以“### PR #编号”分隔），为每个 PR 返回一条结构化信号，
+pr_number 填写对应的 PR 编号，不要遗漏或合并 PR。
+"""
+
+# 日报总览的固定指令
+REPORT_SYSTEM_PROMPT = """\
+你是一个技术趋势分析专家。请基于用户提供的当日信号生成一份简洁的每日趋势报告，\
+summary_brief 用 2-3 句话概括当日最重要的趋势。
+"""
+
+
+@dataclass
+class PRAnalysisError:
+    """单个 PR 分析失败的记录"""
+
+    repo: str
+    number: int
+    # error（调用或解析失败）、timeout（超过单项超时）、budget（token 预算不足）
+    # 或 deferred（已加入批处理任务）
+    reason: str
+    message: str = ""
 
 
 class TrendAnalyzer:
@@ -17,6 +70,11 @@ class TrendAnalyzer:
         api_key: str,
         model: str = "glm-4.7",
         base_url: str = "https://open.bigmodel.cn/api/anthropic",
+        gateway: LLMGateway | None = None,
+        max_concurrency: int = 1,
+        item_timeout: float = 180.0,
+        batch_size: int = 1,
+        batch_token_limit: int = 6000,
     ):
         """初始化分析器
 
@@ -24,12 +82,45 @@ class TrendAnalyzer:
             api_key: API Key (智谱AI 或 Anthropic)
             model: 模型名称 (glm-4.7, claude-sonnet-4-20250514 等)
             base_url: API Base URL
+            gateway: 共享的 LLM 网关（可选，默认按 api_key 单独创建）
+            max_concurrency: 批量分析时同时分析的 PR 数，1 表示逐个串行分析
+            item_timeout: 并发模式下单次调用的超时（秒）
+            batch_size: 每次调用最多合并的 PR 数，1 表示每个 PR 单独调用
+            batch_token_limit: 批量 Prompt 的估算 token 上限
         """
         self.model = model
+        self.max_concurrency = max_concurrency
+        self.item_timeout = item_timeout
+        self.batch_size = batch_size
+        self.batch_token_limit = batch_token_limit
+        self.reset_stats()
         # 使用 Anthropic 客户端 (支持智谱AI Anthropic兼容端点)
-        self.client = instructor.from_anthropic(
-            anthropic.Anthropic(api_key=api_key, base_url=base_url)
-        )
+        self.gateway = gateway or LLMGateway(api_key=api_key, base_url=base_url)
+
+    def reset_stats(self) -> None:
+        """重置本次运行的统计计数"""
+        self.analyzed = 0
+        self.batches = 0
+        self.fallbacks = 0
+        self.last_errors: list[PRAnalysisError] = []
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """本次运行的统计信息"""
+        return {
+            "pr_analysis_requests": self.analyzed,
+            "pr_analysis_batches": self.batches,
+            "pr_analysis_fallbacks": self.fallbacks,
+            "pr_analysis_errors": sum(
+                1 for error in self.last_errors if error.reason == "error"
+            ),
+            "pr_analysis_timeouts": sum(
+                1 for error in self.last_errors if error.reason == "timeout"
+            ),
+            "pr_analysis_budget_skips": sum(
+                1 for error in self.last_errors if error.reason == "budget"
+            ),
+        }
 
     def analyze_pr(self, pr_details: dict) -> Signal:
         """分析单个 PR 提取信号
@@ -40,25 +131,258 @@ class TrendAnalyzer:
         Returns:
             提取的信号
         """
-        # 构建 Prompt
-        prompt = f"""分析以下 GitHub PR，提取趋势信号。
+        signal = self.gateway.create_structured(
+            Signal,
+            model=self.model,
+            system=self.gateway.system_prompt(SYSTEM_PROMPT, Signal),
+            messages=[{"role": "user", "content": self._build_pr_prompt(pr_details)}],
+            max_tokens=SIGNAL_MAX_TOKENS,
+        )
+        return self._complete_signal(signal, pr_details)
+
+    async def analyze_pr_async(self, pr_details: dict) -> Signal:
+        """分析单个 PR 提取信号（异步）
+
+        Args:
+            pr_details: PR 详情字典
+
+        Returns:
+            提取的信号
+        """
+        signal = await self.gateway.acreate_structured(
+            Signal,
+            model=self.model,
+            system=self.gateway.system_prompt(SYSTEM_PROMPT, Signal),
+            messages=[{"role": "user", "content": self._build_pr_prompt(pr_details)}],
+            max_tokens=SIGNAL_MAX_TOKENS,
+        )
+        return self._complete_signal(signal, pr_details)
+
+    def analyze_prs(self, pr_list: list[dict]) -> list[Signal]:
+        """批量分析多个 PR
+
+        batch_size 大于 1 时多个 PR 合并为一次调用（见 plan_batches）；
+        max_concurrency 大于 1 时各批次并发分析，否则逐批串行分析。
+        失败的 PR 不出现在结果中，记录在 last_errors。
+
+        Args:
+            pr_list: PR 详情列表
+
+        Returns:
+            信号列表（按输入顺序，仅包含成功项）
+        """
+        if self.max_concurrency > 1:
+            return asyncio.run(self.analyze_prs_async(pr_list))
+
+        results = []
+        for batch in self.plan_batches(pr_list):
+            results.extend(self._analyze_batch(batch))
+        return self._collect_results(results)
+
+    async def analyze_prs_async(self, pr_list: list[dict]) -> list[Signal]:
+        """并发分析多个 PR
+
+        同时在途的调用数不超过 max_concurrency，单次调用超过 item_timeout 记为超时。
+
+        Args:
+            pr_list: PR 详情列表
+
+        Returns:
+            信号列表（按输入顺序，仅包含成功项）
+        """
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+        batch_results = await asyncio.gather(
+            *(
+                self._analyze_batch_async(batch, semaphore)
+                for batch in self.plan_batches(pr_list)
+            )
+        )
+        return self._collect_results(
+            [result for results in batch_results for result in results]
+        )
+
+    def plan_batches(self, pr_list: list[dict]) -> list[list[dict]]:
+        """按输入顺序把 PR 切分为批次
+
+        每批最多 batch_size 个 PR，Prompt 估算 token 数不超过 batch_token_limit
+        （单个 PR 超过上限时单独成批）；同一批内 PR 编号不重复，便于按编号对应结果。
+
+        Args:
+            pr_list: PR 详情列表
+
+        Returns:
+            批次列表
+        """
+        if self.batch_size <= 1:
+            return [[pr] for pr in pr_list]
+
+        header_tokens = estimate_tokens(self._build_batch_prompt([]))
+        batches: list[list[dict]] = []
+        batch: list[dict] = []
+        batch_tokens = header_tokens
+        for pr in pr_list:
+            pr_tokens = estimate_tokens(self._format_batch_item(pr))
+            if batch and (
+                len(batch) >= self.batch_size
+                or batch_tokens + pr_tokens > self.batch_token_limit
+                or pr.get("number") in {item.get("number") for item in batch}
+            ):
+                batches.append(batch)
+                batch, batch_tokens = [], header_tokens
+            batch.append(pr)
+            batch_tokens += pr_tokens
+
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _analyze_batch(self, batch: list[dict]) -> list[Signal | PRAnalysisError]:
+        """分析一个批次，未得到有效结果的 PR 逐个回退为单独调用"""
+        if len(batch) == 1:
+            return [self._analyze_one(batch[0])]
+
+        self.batches += 1
+        try:
+            response = self.gateway.create_structured(
+                PRSignalBatch, **self._batch_request(batch)
+            )
+            signals = self._match_batch(batch, response)
+        except BatchDeferredError as e:
+            # 已加入批处理任务，不再逐个回退（避免重复提交）
+            return [self._analysis_error(pr, "deferred", e) for pr in batch]
+        except Exception:
+            signals = [None] * len(batch)
+
+        results: list[Signal | PRAnalysisError] = []
+        for pr, signal in zip(batch, signals, strict=True):
+            if signal is None:
+                self.fallbacks += 1
+                results.append(self._analyze_one(pr))
+            else:
+                results.append(signal)
+        return results
+
+    async def _analyze_batch_async(
+        self, batch: list[dict], semaphore: asyncio.Semaphore
+    ) -> list[Signal | PRAnalysisError]:
+        """异步分析一个批次，未得到有效结果的 PR 逐个回退为单独调用"""
+        if len(batch) == 1:
+            return [await self._analyze_one_async(batch[0], semaphore)]
+
+        self.batches += 1
+        try:
+            async with semaphore:
+                response = await asyncio.wait_for(
+                    self.gateway.acreate_structured(
+                        PRSignalBatch, **self._batch_request(batch)
+                    ),
+                    timeout=self.item_timeout,
+                )
+            signals = self._match_batch(batch, response)
+        except BatchDeferredError as e:
+            # 已加入批处理任务，不再逐个回退（避免重复提交）
+            return [self._analysis_error(pr, "deferred", e) for pr in batch]
+        except Exception:
+            signals = [None] * len(batch)
+
+        fallback = [pr for pr, signal in zip(batch, signals, strict=True) if not signal]
+        self.fallbacks += len(fallback)
+        retried = iter(
+            await asyncio.gather(
+                *(self._analyze_one_async(pr, semaphore) for pr in fallback)
+            )
+        )
+        return [signal or next(retried) for signal in signals]
+
+    def _analyze_one(self, pr: dict) -> Signal | PRAnalysisError:
+        """单独分析一个 PR，失败时返回失败记录"""
+        try:
+            return self.analyze_pr(pr)
+        except BatchDeferredError as e:
+            return self._analysis_error(pr, "deferred", e)
+        except TokenBudgetExceededError as e:
+            return self._analysis_error(pr, "budget", e)
+        except Exception as e:
+            return self._analysis_error(pr, "error", e)
+
+    async def _analyze_one_async(
+        self, pr: dict, semaphore: asyncio.Semaphore
+    ) -> Signal | PRAnalysisError:
+        """异步单独分析一个 PR，失败或超时时返回失败记录"""
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(
+                    self.analyze_pr_async(pr), timeout=self.item_timeout
+                )
+            except TimeoutError as e:
+                return self._analysis_error(pr, "timeout", e)
+            except BatchDeferredError as e:
+                return self._analysis_error(pr, "deferred", e)
+            except TokenBudgetExceededError as e:
+                return self._analysis_error(pr, "budget", e)
+            except Exception as e:
+                return self._analysis_error(pr, "error", e)
+
+    def _collect_results(self, results: list[Signal | PRAnalysisError]) -> list[Signal]:
+        """记录失败项并返回成功的信号"""
+        self.analyzed += len(results)
+        self.last_errors = [r for r in results if isinstance(r, PRAnalysisError)]
+        return [r for r in results if isinstance(r, Signal)]
+
+    def _batch_request(self, batch: list[dict]) -> dict[str, Any]:
+        """批次调用的请求参数"""
+        return {
+            "model": self.model,
+            "system": self.gateway.system_prompt(SYSTEM_PROMPT, PRSignalBatch),
+            "messages": [{"role": "user", "content": self._build_batch_prompt(batch)}],
+            "max_tokens": SIGNAL_MAX_TOKENS * len(batch),
+        }
+
+    def _match_batch(
+        self, batch: list[dict], response: PRSignalBatch
+    ) -> list[Signal | None]:
+        """按 PR 编号把批次结果对应回输入，缺失或重复的编号视为无效"""
+        by_number: dict[int, Signal | None] = {}
+        for item in response.items:
+            # 同一编号出现多次时无法确定对应关系，回退为单独调用
+            by_number[item.pr_number] = (
+                None if item.pr_number in by_number else item.signal
+            )
 
-PR 标题: {pr_details.get("title", "")}
+        signals: list[Signal | None] = []
+        for pr in batch:
+            signal = by_number.get(pr.get("number", 0))
+            signals.append(self._complete_signal(signal, pr) if signal else None)
+        return signals
+
+    def _format_pr(self, pr_details: dict) -> str:
+        """格式化单个 PR 的字段"""
+        return f"""PR 标题: {pr_details.get("title", "")}
 PR 描述: {pr_details.get("body", "")}
 仓库: {pr_details.get("repo_name", "")}
 作者: {pr_details.get("author", "")}
 链接: {pr_details.get("url", "")}
-
-请提取关键信息并返回结构化信号。
 """
 
-        signal = self.client.chat.completions.create(
-            model=self.model,
-            response_model=Signal,
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=1000,
-        )
+    def _build_pr_prompt(self, pr_details: dict) -> str:
+        """构建单个 PR 的分析 Prompt（固定指令见 SYSTEM_PROMPT）"""
+        return f"""分析以下 GitHub PR，提取趋势信号。
+
+{self._format_pr(pr_details)}"""
 
+    def _format_batch_item(self, pr_details: dict) -> str:
+        """格式化批次 Prompt 中的单个 PR"""
+        return f"### PR #{pr_details.get('number', 0)}\n{self._format_pr(pr_details)}\n"
+
+    def _build_batch_prompt(self, batch: list[dict]) -> str:
+        """构建多个 PR 的批量分析 Prompt（固定指令见 SYSTEM_PROMPT）"""
+        items = "".join(self._format_batch_item(pr) for pr in batch)
+        return f"""分析以下 {len(batch)} 个 GitHub PR，分别为每个 PR 提取一条趋势信号。
+
+{items}"""
+
+    def _complete_signal(self, signal: Signal, pr_details: dict) -> Signal:
+        """补全模型未给出的 ID、来源和相关仓库"""
         # 确保 ID 格式
         if not signal.id:
             signal.id = (
@@ -76,30 +400,19 @@ PR 描述: {pr_details.get("body", "")}
             if repo_name:
                 signal.related_repos = [repo_name]
 
-        return signal  # type: ignore[no-any-return]
-
-    def analyze_prs(self, pr_list: list[dict]) -> list[Signal]:
-        """批量分析多个 PR
-
-        Args:
-            pr_list: PR 详情列表
-
-        Returns:
-            信号列表
-        """
-        signals = []
-
-        for pr in pr_list:
-            try:
-                signal = self.analyze_pr(pr)
-                signals.append(signal)
-            except Exception as e:
-                repo_name = pr.get("repo_name", "unknown")
-                number = pr.get("number", 0)
-                print(f"分析 PR {repo_name}#{number} 失败: {e}")
-                continue
-
-        return signals
+        return signal
+
+    def _analysis_error(
+        self, pr: dict, reason: str, error: BaseException
+    ) -> PRAnalysisError:
+        """构造失败记录"""
+        message = str(error) or type(error).__name__
+        return PRAnalysisError(
+            repo=pr.get("repo_name", "unknown"),
+            number=pr.get("number", 0),
+            reason=reason,
+            message=message,
+        )
 
     def generate_report(self, signals: list[Signal], date: str) -> DailyReport:
         """生成每日报告
@@ -117,7 +430,7 @@ PR 描述: {pr_details.get("body", "")}
         # 筛选高影响信号
         high_impact_count = len(self.filter_high_impact(signals, threshold=4))
 
-        # 构建 Prompt
+        # 构建 Prompt（固定指令见 REPORT_SYSTEM_PROMPT）
         prompt = f"""基于以下信号生成每日趋势报告。
 
 日期: {date}
@@ -130,16 +443,26 @@ PR 描述: {pr_details.get("body", "")}
 
 研究信号:
 {self._format_signals(categorized["research"])}
-
-请生成一份简洁的每日报告。
 """
 
-        report = self.client.chat.completions.create(
-            model=self.model,
-            response_model=DailyReport,
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=2000,
-        )
+        try:
+            report = self.gateway.create_structured(
+                DailyReport,
+                model=self.model,
+                system=self.gateway.system_prompt(REPORT_SYSTEM_PROMPT, DailyReport),
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=2000,
+            )
+        except TokenBudgetExceededError as e:
+            # 预算不足时不生成 AI 总览，信号照常输出
+            print(f"[DEBUG] TrendAnalyzer: {e}")
+            report = DailyReport(
+                date=date,
+                summary_brief=f"今日共 {len(signals)} 条趋势信号"
+                "（token 预算不足，未生成总览）。",
+                engineering_signals=categorized["engineering"],
+                research_signals=categorized["research"],
+            )
 
         # 确保日期正确
         report.date = date
@@ -150,7 +473,7 @@ PR 描述: {pr_details.get("body", "")}
         report.stats["total_prs_analyzed"] = len(signals)
         report.stats["high_impact_signals"] = high_impact_count
 
-        return report  # type: ignore[no-any-return]
+        return report
 
     def filter_high_impact(
         self, signals: list[Signal], threshold: int = 4
@@ -8,8 +8,14 @@ from typing import Any
 
 from github import Github, GithubException
 
+from trendpluse.collectors.contributor_index import ContributorIndex
+from trendpluse.collectors.repo_registry import RepoLookupMixin, RepoRegistry
 
-class ActivityCollector:
+# GitHub 贡献者列表接口最多返回的作者数，达到该数量时列表可能被截断
+CONTRIBUTORS_LIST_CAP = 500
+
+
+class ActivityCollector(RepoLookupMixin):
     """仓库活跃度采集器
 
     统计以下指标：
@@ -19,13 +25,24 @@ class ActivityCollector:
     - 各仓库的活跃度详情
     """
 
-    def __init__(self, token: str = ""):
+    def __init__(
+        self,
+        token: str = "",
+        registry: RepoRegistry | None = None,
+        contributor_index: ContributorIndex | None = None,
+    ):
         """初始化采集器
 
         Args:
             token: GitHub Personal Access Token（可选）
+            registry: 共享仓库注册表（可选，提供时复用其客户端和句柄缓存）
+            contributor_index: 已知贡献者索引（可选，None 时使用内存索引）
         """
-        if token:
+        self.registry = registry
+        self.contributor_index = contributor_index or ContributorIndex(path=None)
+        if registry is not None:
+            self.client = registry.client
+        elif token:
             self.client = Github(login_or_token=token)
         else:
             self.client = Github()
@@ -60,7 +77,7 @@ class ActivityCollector:
 
         for repo_name in repos:
             try:
-                repo = self.client.get_repo(repo_name)
+                repo = self._get_repo(repo_name)
                 repo_activity, repo_commits = self._collect_repo_activity(
                     repo, since, repo_name
                 )
@@ -78,6 +95,8 @@ class ActivityCollector:
                 print(f"获取仓库 {repo_name} 活跃度失败: {e}")
                 continue
 
+        self.contributor_index.save()
+
         # 按活跃度排序
         activity_data["repo_activity"].sort(
             key=lambda x: x["commit_count"], reverse=True
@@ -121,25 +140,19 @@ class ActivityCollector:
 
             print(f"[DEBUG] {repo_name}: 获取到 {len(commits_list)} 个 commits")
 
-            # 用于统计新贡献者
-            # 策略：检查该时间之前的贡献者集合
-            existing_contributors = set()
-
-            # 先获取一段时间之前的贡献者（采样，避免过多请求）
-            try:
-                past_since = since - timedelta(days=30)
-                past_commits = repo.get_commits(since=past_since, until=since)
-                # 转换为列表并安全切片
-                past_commits_list = list(past_commits)
-                for commit in past_commits_list[:100]:  # 采样 100 个
-                    if commit and commit.author:
-                        existing_contributors.add(commit.author.login)
-            except GithubException:
-                pass  # 如果获取失败，existing_contributors 保持为空
+            new_contributors_set = self._new_contributors(
+                repo,
+                repo_name,
+                since_date,
+                [
+                    (c.author.login, c.commit.author.date)
+                    for c in commits_list
+                    if c and c.author
+                ],
+            )
 
             # 统计当前时间范围的 commits
             contributor_commits: dict[str, int] = {}
-            new_contributors_set = set()
 
             for commit in commits_list:
                 activity["commit_count"] += 1
@@ -175,10 +188,6 @@ class ActivityCollector:
                     author = commit.author.login
                     contributor_commits[author] = contributor_commits.get(author, 0) + 1
 
-                    # 判断是否为新贡献者
-                    if author not in existing_contributors:
-                        new_contributors_set.add(author)
-
             activity["new_contributors"] = len(new_contributors_set)
 
             # Top 贡献者（最多 5 个）
@@ -195,3 +204,131 @@ class ActivityCollector:
             print(f"处理仓库 {repo_name} commits 失败: {e}")
 
         return activity, detailed_commits
+
+    def detect_new_contributors(
+        self,
+        repo_name: str,
+        window_start: datetime,
+        commits: list[tuple[str, datetime]],
+    ) -> set[str]:
+        """判断统计窗口内的新贡献者，并把窗口内的作者记入贡献者索引
+
+        供异步引擎和 GraphQL 采集器使用，保证各采集模式共用同一个索引。
+        调用方负责在采集结束后保存索引。
+
+        Args:
+            repo_name: 仓库名称
+            window_start: 统计窗口起点
+            commits: 统计窗口内的 [(作者 login, 提交时间), ...]
+
+        Returns:
+            新贡献者 login 集合
+
+        Raises:
+            GithubException: 获取仓库失败
+        """
+        repo = self._get_repo(repo_name)
+        return self._new_contributors(repo, repo_name, window_start, commits)
+
+    def _new_contributors(
+        self,
+        repo: Any,
+        repo_name: str,
+        window_start: datetime,
+        commits: list[tuple[str, datetime]],
+    ) -> set[str]:
+        """统计窗口开始前不在索引中的作者即为新贡献者
+
+        仓库首次统计时先回填历史贡献者，之后每天增量更新。
+
+        Args:
+            repo: PyGithub Repository 对象
+            repo_name: 仓库名称
+            window_start: 统计窗口起点
+            commits: 统计窗口内的 [(作者 login, 提交时间), ...]
+
+        Returns:
+            新贡献者 login 集合
+        """
+        if not self.contributor_index.is_seeded(repo_name):
+            window_authors = {login for login, _ in commits}
+            self._backfill_contributors(repo, repo_name, window_start, window_authors)
+
+        new_contributors: set[str] = set()
+        for author, seen_at in commits:
+            if author not in new_contributors and not self._is_known(
+                repo, repo_name, author, window_start
+            ):
+                new_contributors.add(author)
+            self.contributor_index.record(repo_name, author, seen_at)
+        return new_contributors
+
+    def _is_known(
+        self, repo: Any, repo_name: str, author: str, window_start: datetime
+    ) -> bool:
+        """作者在统计窗口开始前是否已提交过
+
+        先查本地索引；索引不完整（回填失败或贡献者列表被截断）时，索引中没有的
+        作者再按作者查询窗口开始前的 commit，查到时补记到索引。
+
+        Args:
+            repo: PyGithub Repository 对象
+            repo_name: 仓库名称
+            author: 作者 login
+            window_start: 统计窗口起点
+
+        Returns:
+            是否为已知贡献者
+        """
+        if self.contributor_index.is_known(repo_name, author, before=window_start):
+            return True
+        if self.contributor_index.is_complete(repo_name):
+            return False
+
+        try:
+            earlier_commits = repo.get_commits(author=author, until=window_start)
+            found = next(iter(earlier_commits), None) is not None
+        except GithubException as e:
+            print(f"查询 {repo_name} 作者 {author} 的历史 commit 失败: {e}")
+            return False
+        if found:
+            self.contributor_index.add_known(repo_name, author)
+        return found
+
+    def _backfill_contributors(
+        self,
+        repo: Any,
+        repo_name: str,
+        window_start: datetime,
+        window_authors: set[str],
+    ) -> None:
+        """一次性回填仓库的历史贡献者
+
+        贡献者列表覆盖全部历史但不含时间信息，其中也包含统计窗口内的作者；
+        对这部分作者单独查询窗口开始前是否有 commit，避免漏判新贡献者。
+
+        限制：GitHub 的贡献者列表只返回前 500 名左右的作者。列表达到该数量时
+        记为不完整，之后索引中没有的作者逐个查询历史 commit（见 _is_known），
+        避免把长尾的老贡献者误判为新贡献者。
+
+        Args:
+            repo: PyGithub Repository 对象
+            repo_name: 仓库名称
+            window_start: 统计窗口起点
+            window_authors: 统计窗口内的 commit 作者
+        """
+        try:
+            contributors = {c.login for c in repo.get_contributors() if c and c.login}
+
+            known = contributors - window_authors
+            for login in contributors & window_authors:
+                earlier_commits = repo.get_commits(author=login, until=window_start)
+                if next(iter(earlier_commits), None) is not None:
+                    known.add(login)
+
+            self.contributor_index.seed(
+                repo_name, known, complete=len(contributors) < CONTRIBUTORS_LIST_CAP
+            )
+        except GithubException as e:
+            # 回填失败时不标记为已回填，下次运行重试
+            print(f"回填仓库 {repo_name} 贡献者失败: {e}")
@@ -0,0 +1,232 @@
+"""GH Archive 本地文件读取
+
+读取 GH Archive 按小时归档的 .json.gz 文件（https://data.gharchive.org/），
+逐行流式解压，只保留关注仓库的指定类型事件。
+
+每小时数十万行中只有极少数属于关注仓库，解析前先在字节层面
+提取 "repo":{"id":...,"name":"owner/repo" 中的仓库名并查集合，
+不相关的行不进入 JSON 解码。
+
+多个小时文件由进程池并行解压解析（每个 worker 处理一个文件），
+在途任务数有上限，结果按文件顺序流式返回，内存占用与小时数无关。
+"""
+
+import gzip
+import json
+import os
+import re
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from trendpluse.collectors.formats import parse_timestamp
+
+# 趋势分析关注的事件类型
+ARCHIVE_EVENT_TYPES = ("PullRequestEvent", "ReleaseEvent")
+
+# 归档行中顶层 repo 字段的字节模式（GH Archive 使用紧凑 JSON，repo 在 payload 之前）
+_REPO_NAME_PATTERN = re.compile(rb'"repo":\{"id":\d+,"name":"([^"]+)"')
+
+
+class RepoPrefilter:
+    """字节层面的仓库预筛选
+
+    用预编译正则提取行内第一个 repo 名，再查关注仓库的字节集合。
+    无法提取时（格式与预期不同）保守地交给 JSON 解码，不会漏掉事件。
+    """
+
+    def __init__(self, repos: Iterable[str]):
+        """初始化预筛选器
+
+        Args:
+            repos: 关注的仓库
+        """
+        self.repo_names = {repo.encode() for repo in repos}
+
+    def matches(self, line: bytes) -> bool:
+        """该行是否可能属于关注仓库
+
+        Args:
+            line: 归档中的一行原始字节
+
+        Returns:
+            是否需要进一步解析
+        """
+        match = _REPO_NAME_PATTERN.search(line)
+        if match is None:
+            return True
+        return match.group(1) in self.repo_names
+
+
+def archive_file_name(hour: datetime) -> str:
+    """GH Archive 小时文件名（小时不补零，例如 2026-01-02-5.json.gz）
+
+    Args:
+        hour: 小时（UTC）
+
+    Returns:
+        文件名
+    """
+    return f"{hour:%Y-%m-%d}-{hour.hour}.json.gz"
+
+
+def hourly_files(
+    archive_dir: Path, start: datetime, end: datetime
+) -> tuple[list[Path], list[Path]]:
+    """列出时间范围内的小时文件
+
+    Args:
+        archive_dir: 归档目录
+        start: 起始时间（含，向下取整到小时）
+        end: 结束时间（不含）
+
+    Returns:
+        (存在的文件, 缺失的文件)，均按时间顺序
+    """
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=UTC)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=UTC)
+
+    hour = start.astimezone(UTC).replace(minute=0, second=0, microsecond=0)
+    end = end.astimezone(UTC)
+
+    existing: list[Path] = []
+    missing: list[Path] = []
+    while hour < end:
+        path = archive_dir / archive_file_name(hour)
+        (existing if path.exists() else missing).append(path)
+        hour += timedelta(hours=1)
+    return existing, missing
+
+
+def iter_archive_events(
+    path: Path,
+    repos: Iterable[str],
+    event_types: Iterable[str] = ARCHIVE_EVENT_TYPES,
+    prefilter: bool = True,
+) -> Iterator[dict[str, Any]]:
+    """流式读取单个小时文件中关注仓库的事件
+
+    无法解析的行会被跳过（归档偶尔包含截断行）。
+
+    Args:
+        path: .json.gz 文件路径
+        repos: 关注的仓库
+        event_types: 保留的事件类型
+        prefilter: 是否在 JSON 解码前做字节层面的仓库预筛选
+
+    Yields:
+        事件字典（格式同 GHArchiveCollector.fetch_events）
+    """
+    repo_set = set(repos)
+    type_set = set(event_types)
+    repo_filter = RepoPrefilter(repo_set) if prefilter else None
+
+    with gzip.open(path, "rb") as f:
+        for line in f:
+            if repo_filter is not None and not repo_filter.matches(line):
+                continue
+            try:
+                raw = json.loads(line)
+            except ValueError:
+                continue
+
+            if raw.get("type") not in type_set:
+                continue
+            if (raw.get("repo") or {}).get("name") not in repo_set:
+                continue
+            yield to_event(raw)
+
+
+def to_event(raw: dict[str, Any]) -> dict[str, Any]:
+    """将归档原始事件转换为统一事件格式
+
+    Args:
+        raw: GH Archive 原始事件
+
+    Returns:
+        {"type", "repo": {"name"}, "payload", "created_at"}
+    """
+    created_at = parse_timestamp(raw.get("created_at"))
+    return {
+        "type": raw["type"],
+        "repo": {"name": raw["repo"]["name"]},
+        "payload": raw.get("payload") or {},
+        "created_at": created_at.isoformat() if created_at else "",
+    }
+
+
+def scan_archive_file(
+    path: Path,
+    repos: Iterable[str],
+    event_types: Iterable[str] = ARCHIVE_EVENT_TYPES,
+) -> list[dict[str, Any]]:
+    """读取单个小时文件中关注仓库的事件（进程池 worker 入口）
+
+    Args:
+        path: .json.gz 文件路径
+        repos: 关注的仓库
+        event_types: 保留的事件类型
+
+    Returns:
+        事件列表，按 created_at 升序
+    """
+    events = list(iter_archive_events(path, repos, event_types))
+    events.sort(key=lambda event: event["created_at"])
+    return events
+
+
+def scan_archive_files(
+    paths: list[Path],
+    repos: Iterable[str],
+    event_types: Iterable[str] = ARCHIVE_EVENT_TYPES,
+    workers: int | None = None,
+    max_pending: int | None = None,
+) -> Iterator[dict[str, Any]]:
+    """并行读取多个小时文件，按 created_at 升序流式返回事件
+
+    GH Archive 按事件时间分小时归档，传入按时间排序的文件时，
+    按文件顺序拼接各文件内排好序的结果即为全局有序。
+
+    Args:
+        paths: 小时文件（按时间顺序）
+        repos: 关注的仓库
+        event_types: 保留的事件类型
+        workers: 进程数，默认 CPU 核数；不超过 1 时在当前进程中顺序读取
+        max_pending: 在途文件数上限（默认 workers 的 2 倍），限制结果缓冲的内存
+
+    Yields:
+        事件字典
+    """
+    repos = list(repos)
+    event_types = list(event_types)
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+
+    if workers <= 1:
+        for path in paths:
+            yield from scan_archive_file(path, repos, event_types)
+        return
+
+    max_pending = max_pending or workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: deque[Future[list[dict[str, Any]]]] = deque()
+        remaining = iter(paths)
+
+        def submit_next() -> None:
+            path = next(remaining, None)
+            if path is not None:
+                pending.append(
+                    executor.submit(scan_archive_file, path, repos, event_types)
+                )
+
+        for _ in range(max_pending):
+            submit_next()
+
+        while pending:
+            events = pending.popleft().result()
+            submit_next()
+            yield from events
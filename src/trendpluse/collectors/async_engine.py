@@ -0,0 +1,487 @@
+"""异步采集引擎
+
+基于 httpx.AsyncClient 并发调用 GitHub REST API，按主机限制并发数。
+输出与 ActivityCollector / ReleaseCollector / GitHubEventsCollector
+完全一致的数据结构，Pipeline 可以直接切换而无需改动下游。
+"""
+
+import asyncio
+import json
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+from github import GithubException
+
+from trendpluse.collectors.activity import ActivityCollector
+from trendpluse.collectors.formats import (
+    assemble_activity_data,
+    assemble_release_data,
+    build_pr_event,
+    build_repo_activity,
+    build_repo_releases,
+    commit_authors,
+    parse_timestamp,
+    sampled_new_contributors,
+)
+from trendpluse.collectors.http_cache import HttpCache
+from trendpluse.collectors.rate_limiter import RateLimitScheduler, resource_for_url
+from trendpluse.collectors.releases import RELEASE_LOOKAHEAD
+
+
+class AsyncCollectionEngine:
+    """异步并发采集引擎
+
+    一次运行内共享同一个 httpx.AsyncClient（连接池复用），
+    并通过每个主机一个信号量限制同时在途的请求数。
+    """
+
+    def __init__(
+        self,
+        token: str = "",
+        base_url: str = "https://api.github.com",
+        max_concurrency_per_host: int = 8,
+        timeout: float = 30.0,
+        http_cache: HttpCache | None = None,
+        scheduler: RateLimitScheduler | None = None,
+        activity_collector: ActivityCollector | None = None,
+    ):
+        """初始化采集引擎
+
+        Args:
+            token: GitHub Personal Access Token（可选）
+            base_url: GitHub REST API 地址
+            max_concurrency_per_host: 每个主机的最大并发请求数
+            timeout: 单个请求超时（秒）
+            http_cache: 条件请求缓存（可选）
+            scheduler: 速率限制调度器（可选，启用后按调度器分配的 token 发送请求）
+            activity_collector: 活跃度采集器（可选，提供时通过其贡献者索引判断
+                新贡献者；否则按 30 天 commit 采样近似判断）
+        """
+        self.token = token
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency_per_host = max_concurrency_per_host
+        self.timeout = timeout
+        self.http_cache = http_cache
+        self.scheduler = scheduler
+        self.activity_collector = activity_collector
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._index_lock = asyncio.Lock()
+        # 最近一次采集中 PR 事件获取成功的仓库
+        self.last_synced_repos: list[str] = []
+
+    def collect_all(
+        self,
+        repos: list[str],
+        activity_since: datetime,
+        release_since: datetime,
+        pr_since: datetime,
+        include_prereleases: bool = False,
+    ) -> tuple[dict[str, Any], dict[str, Any], list[dict]]:
+        """同步入口：并发采集活跃度、Releases 和 PR 事件
+
+        Args:
+            repos: 仓库列表
+            activity_since: 活跃度统计截止时间（统计此前一天）
+            release_since: Release 起始时间
+            pr_since: PR 起始时间
+            include_prereleases: 是否包含预发布版本
+
+        Returns:
+            (activity_data, release_data, events)
+        """
+        return asyncio.run(
+            self.collect_all_async(
+                repos=repos,
+                activity_since=activity_since,
+                release_since=release_since,
+                pr_since=pr_since,
+                include_prereleases=include_prereleases,
+            )
+        )
+
+    async def collect_all_async(
+        self,
+        repos: list[str],
+        activity_since: datetime,
+        release_since: datetime,
+        pr_since: datetime,
+        include_prereleases: bool = False,
+    ) -> tuple[dict[str, Any], dict[str, Any], list[dict]]:
+        """并发采集活跃度、Releases 和 PR 事件
+
+        三类数据共用同一个连接池和并发限制。
+
+        Returns:
+            (activity_data, release_data, events)
+        """
+        # 每次运行都在新的事件循环中，信号量需要重新创建
+        self._semaphores = {}
+        async with self._create_client() as client:
+            activity_data, release_data, events = await asyncio.gather(
+                self._collect_activity(client, repos, activity_since),
+                self._collect_releases(
+                    client, repos, release_since, include_prereleases
+                ),
+                self._fetch_events(client, repos, pr_since),
+            )
+        return activity_data, release_data, events
+
+    async def collect_activity_async(
+        self, repos: list[str], since: datetime
+    ) -> dict[str, Any]:
+        """并发收集仓库活跃度，返回格式同 ActivityCollector.collect_activity"""
+        self._semaphores = {}
+        async with self._create_client() as client:
+            return await self._collect_activity(client, repos, since)
+
+    async def collect_releases_async(
+        self,
+        repos: list[str],
+        since: datetime,
+        include_prereleases: bool = False,
+    ) -> dict[str, Any]:
+        """并发收集 Releases，返回格式同 ReleaseCollector.collect_releases"""
+        self._semaphores = {}
+        async with self._create_client() as client:
+            return await self._collect_releases(
+                client, repos, since, include_prereleases
+            )
+
+    async def fetch_events_async(self, repos: list[str], since: datetime) -> list[dict]:
+        """并发获取 PR 事件，返回格式同 GitHubEventsCollector.fetch_events"""
+        self._semaphores = {}
+        async with self._create_client() as client:
+            return await self._fetch_events(client, repos, since)
+
+    def _create_client(self) -> httpx.AsyncClient:
+        """创建带连接池的 HTTP 客户端"""
+        headers = {
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+        }
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency_per_host,
+                max_keepalive_connections=self.max_concurrency_per_host,
+            ),
+        )
+
+    def _get_semaphore(self, url: str) -> asyncio.Semaphore:
+        """获取指定主机的并发信号量"""
+        host = urlsplit(url).netloc or urlsplit(self.base_url).netloc
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.max_concurrency_per_host)
+        return self._semaphores[host]
+
+    async def _get_json(
+        self,
+        client: httpx.AsyncClient,
+        path: str,
+        params: dict[str, Any] | None = None,
+    ) -> tuple[Any, httpx.Response]:
+        """发送 GET 请求并解析 JSON（受主机并发限制）
+
+        Raises:
+            httpx.HTTPError: 请求失败或返回错误状态码
+        """
+        url = path if path.startswith("http") else f"{self.base_url}{path}"
+
+        # 条件请求：命中缓存时附加 If-None-Match / If-Modified-Since
+        cache_key = None
+        entry = None
+        headers: dict[str, str] = {}
+        if self.http_cache is not None:
+            full_url = str(httpx.URL(url, params=params))
+            cache_key = self.http_cache.make_key(full_url, self.token)
+            entry = self.http_cache.get(cache_key)
+            if entry is not None:
+                headers = self.http_cache.conditional_headers(entry)
+
+        async with self._get_semaphore(url):
+            if self.scheduler is None:
+                response = await client.get(url, params=params, headers=headers)
+            else:
+                resource = resource_for_url(url)
+                token = await self.scheduler.acquire_async(
+                    resource, self.scheduler.is_priority(url)
+                )
+                if token:
+                    headers = {**headers, "Authorization": f"Bearer {token}"}
+                response = await client.get(url, params=params, headers=headers)
+                self.scheduler.update(
+                    token, response.headers, response.status_code, resource=resource
+                )
+
+        if self.http_cache is not None and cache_key is not None:
+            if response.status_code == 304 and entry is not None:
+                self.http_cache.record_hit()
+                cached = httpx.Response(
+                    entry.status,
+                    headers=entry.headers,
+                    content=entry.content,
+                    request=response.request,
+                )
+                return json.loads(entry.content), cached
+
+            self.http_cache.record_miss()
+            if response.status_code == 200:
+                self.http_cache.put(
+                    cache_key,
+                    url=str(response.request.url),
+                    status=response.status_code,
+                    headers=dict(response.headers),
+                    content=response.content,
+                )
+
+        response.raise_for_status()
+        return response.json(), response
+
+    async def _paginate(
+        self,
+        client: httpx.AsyncClient,
+        path: str,
+        params: dict[str, Any] | None = None,
+        stop: Callable[[dict[str, Any]], bool] | None = None,
+        max_items: int | None = None,
+        on_page: Callable[[], None] | None = None,
+    ) -> list[dict[str, Any]]:
+        """按 Link 头逐页获取列表
+
+        Args:
+            client: HTTP 客户端
+            path: API 路径
+            params: 首页查询参数
+            stop: 遇到返回 True 的条目时停止（该条目不包含在结果中）
+            max_items: 最多返回的条目数
+            on_page: 每获取一页后调用（用于统计请求页数）
+
+        Returns:
+            条目列表
+        """
+        items: list[dict[str, Any]] = []
+        next_url: str | None = path
+        next_params: dict[str, Any] | None = {"per_page": 100, **(params or {})}
+
+        while next_url:
+            page, response = await self._get_json(client, next_url, next_params)
+            if on_page is not None:
+                on_page()
+            for item in page:
+                if stop is not None and stop(item):
+                    return items
+                items.append(item)
+                if max_items is not None and len(items) >= max_items:
+                    return items
+
+            next_link = response.links.get("next")
+            next_url = next_link["url"] if next_link else None
+            next_params = None  # next 链接已包含查询参数
+
+        return items
+
+    async def _collect_activity(
+        self,
+        client: httpx.AsyncClient,
+        repos: list[str],
+        since: datetime,
+    ) -> dict[str, Any]:
+        """并发收集仓库活跃度"""
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=UTC)
+
+        # 贡献者索引不是线程安全的，各仓库依次读写
+        self._index_lock = asyncio.Lock()
+        results = await asyncio.gather(
+            *(self._collect_repo_activity(client, repo, since) for repo in repos),
+            return_exceptions=True,
+        )
+        if self.activity_collector is not None:
+            self.activity_collector.contributor_index.save()
+
+        # 按输入顺序合并，保持与同步采集器一致
+        return assemble_activity_data(since, list(zip(repos, results, strict=True)))
+
+    async def _collect_repo_activity(
+        self,
+        client: httpx.AsyncClient,
+        repo_name: str,
+        since: datetime,
+    ) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+        """收集单个仓库的活跃度（逻辑同 ActivityCollector）"""
+        commits_path = f"/repos/{repo_name}/commits"
+        window_start = since - timedelta(days=1)
+        window = {"since": window_start.isoformat(), "until": since.isoformat()}
+
+        fetches = [self._paginate(client, commits_path, window)]
+        if self.activity_collector is None:
+            # 没有贡献者索引时，与当日 commits 并发获取 30 天采样
+            past_window = {
+                "since": (since - timedelta(days=30)).isoformat(),
+                "until": since.isoformat(),
+            }
+            fetches.append(
+                self._paginate(client, commits_path, past_window, max_items=100)
+            )
+        results: list[list[dict[str, Any]] | BaseException] = await asyncio.gather(
+            *fetches, return_exceptions=True
+        )
+
+        commits_result = results[0]
+        if isinstance(commits_result, BaseException):
+            # 与同步采集器一致：commits 获取失败时输出空的活跃度条目
+            print(f"处理仓库 {repo_name} commits 失败: {commits_result}")
+            return build_repo_activity(repo_name, [], set())
+        commits = commits_result
+
+        if self.activity_collector is None:
+            # 采样失败时视为没有历史贡献者
+            past_result = results[1]
+            past_commits = [] if isinstance(past_result, BaseException) else past_result
+            new_contributors = sampled_new_contributors(commits, past_commits)
+        else:
+            new_contributors = await self._indexed_new_contributors(
+                self.activity_collector, repo_name, window_start, commits
+            )
+
+        return build_repo_activity(repo_name, commits, new_contributors)
+
+    async def _indexed_new_contributors(
+        self,
+        activity_collector: ActivityCollector,
+        repo_name: str,
+        window_start: datetime,
+        commits: list[dict[str, Any]],
+    ) -> set[str]:
+        """通过贡献者索引判断新贡献者（同 ActivityCollector）
+
+        回填和历史 commit 查询使用 PyGithub 同步接口，在线程中执行。
+
+        Args:
+            activity_collector: 持有贡献者索引的活跃度采集器
+            repo_name: 仓库名称
+            window_start: 统计窗口起点
+            commits: 统计窗口内的 commits（REST 形状）
+
+        Returns:
+            新贡献者 login 集合（查询失败时为空）
+        """
+        async with self._index_lock:
+            try:
+                return await asyncio.to_thread(
+                    activity_collector.detect_new_contributors,
+                    repo_name,
+                    window_start,
+                    commit_authors(commits),
+                )
+            except GithubException as e:
+                print(f"判断仓库 {repo_name} 新贡献者失败: {e}")
+                return set()
+
+    async def _collect_releases(
+        self,
+        client: httpx.AsyncClient,
+        repos: list[str],
+        since: datetime,
+        include_prereleases: bool,
+    ) -> dict[str, Any]:
+        """并发收集 Releases"""
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=UTC)
+
+        results = await asyncio.gather(
+            *(
+                self._collect_repo_releases(client, repo, since, include_prereleases)
+                for repo in repos
+            ),
+            return_exceptions=True,
+        )
+
+        return assemble_release_data(since, list(zip(repos, results, strict=True)))
+
+    async def _collect_repo_releases(
+        self,
+        client: httpx.AsyncClient,
+        repo: str,
+        since: datetime,
+        include_prereleases: bool,
+    ) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+        """收集单个仓库的 Releases（逻辑同 ReleaseCollector）"""
+        consecutive_old = 0
+        pages_fetched = 0
+
+        def count_page() -> None:
+            nonlocal pages_fetched
+            pages_fetched += 1
+
+        def past_lookahead(release: dict[str, Any]) -> bool:
+            # 连续 RELEASE_LOOKAHEAD 条以上早于起始时间时停止翻页
+            nonlocal consecutive_old
+            created_at = parse_timestamp(release.get("created_at"))
+            if created_at is None or created_at < since:
+                consecutive_old += 1
+            else:
+                consecutive_old = 0
+            return consecutive_old > RELEASE_LOOKAHEAD
+
+        releases = await self._paginate(
+            client, f"/repos/{repo}/releases", stop=past_lookahead, on_page=count_page
+        )
+        return build_repo_releases(
+            repo, releases, since, include_prereleases, pages_fetched
+        )
+
+    async def _fetch_events(
+        self,
+        client: httpx.AsyncClient,
+        repos: list[str],
+        since: datetime,
+    ) -> list[dict]:
+        """并发获取 PR 事件"""
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=UTC)
+
+        results = await asyncio.gather(
+            *(self._fetch_repo_events(client, repo, since) for repo in repos),
+            return_exceptions=True,
+        )
+
+        events: list[dict] = []
+        self.last_synced_repos = []
+        for repo_name, result in zip(repos, results, strict=True):
+            if isinstance(result, BaseException):
+                print(f"获取仓库 {repo_name} 事件失败: {result}")
+                continue
+            events.extend(result)
+            self.last_synced_repos.append(repo_name)
+
+        return events
+
+    async def _fetch_repo_events(
+        self,
+        client: httpx.AsyncClient,
+        repo_name: str,
+        since: datetime,
+    ) -> list[dict]:
+        """获取单个仓库的 PR 事件（逻辑同 GitHubEventsCollector）"""
+
+        def is_before_since(pr: dict[str, Any]) -> bool:
+            created_at = parse_timestamp(pr.get("created_at"))
+            return created_at is None or created_at < since
+
+        pulls = await self._paginate(
+            client,
+            f"/repos/{repo_name}/pulls",
+            {"state": "all", "sort": "created", "direction": "desc"},
+            stop=is_before_since,
+        )
+
+        return [build_pr_event(repo_name, pr) for pr in pulls]
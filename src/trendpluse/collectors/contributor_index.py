@@ -0,0 +1,170 @@
+"""已知贡献者索引
+
+按仓库记录贡献者首次出现时间（login → first-seen），
+新贡献者判断变为本地查找，不再每天重新扫描 30 天的 commit 历史。
+
+索引由一次性回填建立，之后每天用当日 commits 增量更新。
+"""
+
+import json
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+
+class ContributorIndex:
+    """按仓库的已知贡献者索引
+
+    存储格式：
+        {"repos": {"owner/repo": {"seeded_at": ..., "complete": true,
+                                  "contributors": {login: 时间}}}}
+
+    回填得到的贡献者没有准确的首次出现时间，first_seen 记为 None，
+    表示"在索引建立之前已出现过"。
+    complete 为 false 表示回填时贡献者列表被截断（GitHub 只返回前 500 名左右），
+    索引中没有的作者不能直接判定为新贡献者；尚未回填（如回填失败）的仓库同样视为不完整。
+    """
+
+    def __init__(self, path: str | None = "data/contributor_index.json"):
+        """初始化索引
+
+        Args:
+            path: 索引文件路径，None 表示仅保存在内存中
+        """
+        self.path = Path(path) if path else None
+        self._repos: dict[str, dict[str, Any]] = {}
+        self._dirty = False
+        self._load()
+
+    def is_seeded(self, repo: str) -> bool:
+        """仓库是否已完成回填
+
+        Args:
+            repo: 仓库名称
+
+        Returns:
+            是否已回填
+        """
+        return self._repos.get(repo, {}).get("seeded_at") is not None
+
+    def seed(self, repo: str, logins: set[str], complete: bool = True) -> None:
+        """回填仓库的历史贡献者
+
+        已有记录（带首次出现时间）不会被覆盖。
+
+        Args:
+            repo: 仓库名称
+            logins: 在索引建立之前已出现过的贡献者
+            complete: logins 是否覆盖了全部历史贡献者
+        """
+        entry = self._entry(repo)
+        for login in logins:
+            entry["contributors"].setdefault(login, None)
+        entry["seeded_at"] = datetime.now(UTC).isoformat()
+        entry["complete"] = complete
+        self._dirty = True
+
+    def is_complete(self, repo: str) -> bool:
+        """索引是否覆盖了仓库的全部历史贡献者
+
+        Args:
+            repo: 仓库名称
+
+        Returns:
+            是否完整（未回填或回填失败时为 False；旧版本索引没有该字段，视为完整）
+        """
+        if not self.is_seeded(repo):
+            return False
+        return bool(self._repos[repo].get("complete", True))
+
+    def add_known(self, repo: str, login: str) -> None:
+        """补记一个在索引建立之前已出现过的贡献者
+
+        Args:
+            repo: 仓库名称
+            login: 贡献者 login
+        """
+        contributors = self._entry(repo)["contributors"]
+        if contributors.get(login) is not None or login not in contributors:
+            contributors[login] = None
+            self._dirty = True
+
+    def is_known(self, repo: str, login: str, before: datetime) -> bool:
+        """贡献者在指定时间之前是否已出现过
+
+        Args:
+            repo: 仓库名称
+            login: 贡献者 login
+            before: 时间点（通常为统计窗口起点）
+
+        Returns:
+            是否为已知贡献者
+        """
+        contributors = self._repos.get(repo, {}).get("contributors", {})
+        if login not in contributors:
+            return False
+
+        first_seen = contributors[login]
+        if first_seen is None:
+            return True
+        return datetime.fromisoformat(first_seen) < before
+
+    def record(self, repo: str, login: str, seen_at: datetime) -> bool:
+        """记录贡献者出现
+
+        Args:
+            repo: 仓库名称
+            login: 贡献者 login
+            seen_at: 出现时间（commit 时间）
+
+        Returns:
+            是否为首次记录
+        """
+        contributors = self._entry(repo)["contributors"]
+        if seen_at.tzinfo is None:
+            seen_at = seen_at.replace(tzinfo=UTC)
+
+        if login not in contributors:
+            contributors[login] = seen_at.isoformat()
+            self._dirty = True
+            return True
+
+        # 保留最早的出现时间（补采较早的 commit 时向前修正）
+        first_seen = contributors[login]
+        if first_seen is not None and seen_at < datetime.fromisoformat(first_seen):
+            contributors[login] = seen_at.isoformat()
+            self._dirty = True
+        return False
+
+    def contributor_count(self, repo: str) -> int:
+        """仓库的已知贡献者数量"""
+        return len(self._repos.get(repo, {}).get("contributors", {}))
+
+    def save(self) -> None:
+        """保存索引（没有变更或未配置路径时跳过）"""
+        if self.path is None or not self._dirty:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"repos": self._repos}, f, ensure_ascii=False)
+        tmp_path.replace(self.path)
+        self._dirty = False
+
+    def _entry(self, repo: str) -> dict[str, Any]:
+        """获取（必要时创建）仓库条目"""
+        return self._repos.setdefault(repo, {"seeded_at": None, "contributors": {}})
+
+    def _load(self) -> None:
+        """从文件加载索引"""
+        if self.path is None or not self.path.exists():
+            return
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self._repos = data.get("repos", {})
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"加载贡献者索引失败: {e}")
+            self._repos = {}
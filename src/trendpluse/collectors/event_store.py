@@ -0,0 +1,330 @@
+"""本地事件存储
+
+用 SQLite 持久化各采集器返回的事件（格式同 GHArchiveCollector.fetch_events），
+按 (repo, type, created_at) 建立索引。同时记录每个仓库已采集过的时间窗口，
+重跑某一天或回填历史时直接在本地按索引查询，不再重新请求 GitHub。
+"""
+
+import hashlib
+import json
+import sqlite3
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from trendpluse.collectors.formats import parse_timestamp
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    event_key TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    active_at TEXT NOT NULL,
+    source TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_repo_type_created
+    ON events (repo, type, created_at);
+CREATE INDEX IF NOT EXISTS idx_events_repo_type_active
+    ON events (repo, type, active_at);
+CREATE INDEX IF NOT EXISTS idx_events_created ON events (created_at);
+CREATE TABLE IF NOT EXISTS coverage (
+    repo TEXT NOT NULL,
+    since TEXT NOT NULL,
+    until TEXT NOT NULL,
+    source TEXT NOT NULL,
+    PRIMARY KEY (repo, since, until)
+);
+"""
+
+
+# PR 状态变化的时间字段（API 采集的载荷没有 updated_at）
+_PR_STATE_FIELDS = ("updated_at", "closed_at", "merged_at")
+
+# 按 SQL 参数批量查询时每批的键数（低于 SQLite 的参数数量上限）
+_LOOKUP_BATCH = 500
+
+
+def _normalize_time(value: datetime | str | None) -> str:
+    """统一为可按字典序比较的 UTC 时间字符串，空值返回空字符串"""
+    if isinstance(value, str):
+        value = parse_timestamp(value)
+    if value is None:
+        return ""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return value.astimezone(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def event_key(event: dict[str, Any]) -> str:
+    """事件的去重键
+
+    PR 事件按 (仓库, 编号) 去重，不区分 action：API 采集的事件没有 action，
+    GH Archive 的事件带 opened / closed 等 action，同一 PR 只保留最新状态；
+    Release 事件按标签去重；其他事件使用内容哈希。
+
+    Args:
+        event: 事件字典
+
+    Returns:
+        去重键
+    """
+    event_type = event.get("type", "")
+    repo = (event.get("repo") or {}).get("name", "")
+    payload = event.get("payload") or {}
+
+    if event_type == "PullRequestEvent":
+        pr = payload.get("pull_request") or {}
+        number = pr.get("number", payload.get("number"))
+        if number is not None:
+            return f"{event_type}:{repo}:{number}"
+
+    if event_type == "ReleaseEvent":
+        tag = (payload.get("release") or {}).get("tag_name")
+        if tag:
+            return f"{event_type}:{repo}:{tag}:{payload.get('action', '')}"
+
+    digest = hashlib.sha1(
+        json.dumps(event, sort_keys=True, ensure_ascii=False).encode()
+    ).hexdigest()
+    return f"{event_type}:{repo}:{digest}"
+
+
+def _active_at(event: dict[str, Any]) -> str:
+    """事件最近一次活动时间（PR 取创建和合并时间中较晚者）"""
+    created_at = _normalize_time(event.get("created_at"))
+    pr = (event.get("payload") or {}).get("pull_request") or {}
+    merged_at = _normalize_time(pr.get("merged_at"))
+    return max(created_at, merged_at)
+
+
+def _state_at(event: dict[str, Any]) -> str:
+    """事件反映的状态时间（同一 PR 的多条事件以状态较新者为准）"""
+    pr = (event.get("payload") or {}).get("pull_request") or {}
+    return max(
+        _normalize_time(event.get("created_at")),
+        *(_normalize_time(pr.get(field)) for field in _PR_STATE_FIELDS),
+    )
+
+
+class EventStore:
+    """SQLite 本地事件存储"""
+
+    def __init__(self, path: str | None = "data/events.db"):
+        """初始化存储
+
+        Args:
+            path: 数据库文件路径，None 表示仅保存在内存中
+        """
+        self.path = Path(path) if path else None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path) if self.path else ":memory:")
+        self._conn.executescript(_SCHEMA)
+        self._rekey_pull_requests()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """重置本次运行的统计计数"""
+        self.written = 0
+        self.read = 0
+        self.fetches_skipped = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """本次运行的统计信息"""
+        return {
+            "event_store_written": self.written,
+            "event_store_read": self.read,
+            "event_store_fetches_skipped": self.fetches_skipped,
+        }
+
+    def add_events(self, events: Iterable[dict[str, Any]], source: str) -> int:
+        """写入事件（去重键相同时保留状态较新的事件，状态时间相同时以新数据覆盖）
+
+        Args:
+            events: 事件列表
+            source: 数据来源（如 github_api、gharchive）
+
+        Returns:
+            写入的事件数
+        """
+        rows = self._newest_rows((event, source) for event in events)
+        with self._conn:
+            self._insert_rows(rows)
+        self.written += len(rows)
+        return len(rows)
+
+    def _newest_rows(
+        self, events: Iterable[tuple[dict[str, Any], str]]
+    ) -> list[tuple[str, ...]]:
+        """整理待写入的行，去重键相同时只保留状态较新的事件
+
+        Args:
+            events: [(事件, 数据来源), ...]
+
+        Returns:
+            需要写入的行（已存储的状态更新时跳过）
+        """
+        latest: dict[str, tuple[dict[str, Any], str]] = {}
+        for event, source in events:
+            key = event_key(event)
+            current = latest.get(key)
+            if current is None or _state_at(event) >= _state_at(current[0]):
+                latest[key] = (event, source)
+
+        stored = self._stored_events(list(latest))
+        return [
+            (
+                key,
+                event.get("type", ""),
+                (event.get("repo") or {}).get("name", ""),
+                _normalize_time(event.get("created_at")),
+                _active_at(event),
+                source,
+                json.dumps(event, ensure_ascii=False),
+            )
+            for key, (event, source) in latest.items()
+            if key not in stored or _state_at(event) >= _state_at(stored[key])
+        ]
+
+    def _insert_rows(self, rows: list[tuple[str, ...]]) -> None:
+        """写入行，去重键相同时覆盖（调用方负责事务）"""
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO events "
+            "(event_key, type, repo, created_at, active_at, source, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    def _stored_events(self, keys: list[str]) -> dict[str, dict[str, Any]]:
+        """按去重键读取已存储的事件"""
+        stored: dict[str, dict[str, Any]] = {}
+        for start in range(0, len(keys), _LOOKUP_BATCH):
+            batch = keys[start : start + _LOOKUP_BATCH]
+            cursor = self._conn.execute(
+                "SELECT event_key, data FROM events "
+                f"WHERE event_key IN ({', '.join('?' * len(batch))})",
+                batch,
+            )
+            stored.update((key, json.loads(data)) for key, data in cursor)
+        return stored
+
+    def _rekey_pull_requests(self) -> None:
+        """把旧版本按 (仓库, 编号, action) 存储的 PR 事件合并到新的去重键"""
+        # 旧键形如 PullRequestEvent:owner/repo:123:opened（仓库名不含冒号）
+        legacy = self._conn.execute(
+            "SELECT event_key, source, data FROM events "
+            "WHERE type = 'PullRequestEvent' "
+            "AND event_key LIKE 'PullRequestEvent:%:%:%'"
+        ).fetchall()
+        if not legacy:
+            return
+
+        # 删除和重新写入在同一事务中完成
+        with self._conn:
+            self._conn.executemany(
+                "DELETE FROM events WHERE event_key = ?",
+                [(key,) for key, _, _ in legacy],
+            )
+            self._insert_rows(
+                self._newest_rows(
+                    (json.loads(data), source) for _, source, data in legacy
+                )
+            )
+
+    def query(
+        self,
+        repos: list[str],
+        since: datetime,
+        until: datetime | None = None,
+        event_types: Iterable[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """查询时间窗口内的事件
+
+        PR 事件按创建或合并时间落在窗口内判断（与 GitHubEventsCollector 一致）。
+
+        Args:
+            repos: 仓库列表
+            since: 起始时间（含）
+            until: 结束时间（含，None 表示不限）
+            event_types: 事件类型（None 表示全部）
+
+        Returns:
+            事件列表，按 created_at 倒序
+        """
+        if not repos:
+            return []
+
+        conditions = [
+            f"repo IN ({', '.join('?' * len(repos))})",
+            "active_at >= ?",
+        ]
+        params: list[Any] = [*repos, _normalize_time(since)]
+        if until is not None:
+            conditions.append("created_at <= ?")
+            params.append(_normalize_time(until))
+        if event_types is not None:
+            types = list(event_types)
+            conditions.append(f"type IN ({', '.join('?' * len(types))})")
+            params.extend(types)
+
+        cursor = self._conn.execute(
+            f"SELECT data FROM events WHERE {' AND '.join(conditions)} "
+            "ORDER BY created_at DESC",
+            params,
+        )
+        events = [json.loads(row[0]) for row in cursor]
+        self.read += len(events)
+        return events
+
+    def record_coverage(
+        self, repos: list[str], since: datetime, until: datetime, source: str
+    ) -> None:
+        """记录已完整采集的时间窗口
+
+        Args:
+            repos: 仓库列表
+            since: 窗口起点
+            until: 窗口终点
+            source: 数据来源
+        """
+        rows = [
+            (repo, _normalize_time(since), _normalize_time(until), source)
+            for repo in repos
+        ]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO coverage (repo, since, until, source) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def covers(self, repos: list[str], since: datetime, until: datetime) -> bool:
+        """所有仓库的时间窗口是否都已采集过
+
+        Args:
+            repos: 仓库列表
+            since: 窗口起点
+            until: 窗口终点
+
+        Returns:
+            是否全部覆盖
+        """
+        since_key = _normalize_time(since)
+        until_key = _normalize_time(until)
+        for repo in repos:
+            row = self._conn.execute(
+                "SELECT 1 FROM coverage WHERE repo = ? AND since <= ? AND until >= ? "
+                "LIMIT 1",
+                (repo, since_key, until_key),
+            ).fetchone()
+            if row is None:
+                return False
+        return True
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        self._conn.close()
@@ -0,0 +1,360 @@
+"""采集结果格式
+
+将 GitHub 原始数据（REST JSON 形状）整理为各采集器共用的输出结构：
+- 活跃度：同 ActivityCollector.collect_activity
+- Releases：同 ReleaseCollector.collect_releases
+- PR 事件：同 GitHubEventsCollector.fetch_events
+
+异步采集引擎和 GraphQL 采集器都通过这里构造结果，保证下游无需区分数据来源。
+"""
+
+from datetime import UTC, datetime
+from typing import Any
+
+from trendpluse.collectors.releases import parse_version
+
+
+def parse_timestamp(value: str | None) -> datetime | None:
+    """解析 GitHub 返回的 ISO 时间字符串
+
+    Args:
+        value: 形如 2026-01-02T10:00:00Z 的时间字符串
+
+    Returns:
+        带时区的 datetime，空值返回 None
+    """
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def commit_authors(commits: list[dict[str, Any]]) -> list[tuple[str, datetime]]:
+    """提取 commits 的作者和提交时间，供贡献者索引判断新贡献者
+
+    Args:
+        commits: commits（REST 形状）
+
+    Returns:
+        [(作者 login, 提交时间), ...]，跳过没有关联 GitHub 账号的 commit
+    """
+    authors = []
+    for commit in commits:
+        if not commit.get("author"):
+            continue
+        timestamp = parse_timestamp(commit["commit"]["author"]["date"])
+        if timestamp is not None:
+            authors.append((commit["author"]["login"], timestamp))
+    return authors
+
+
+def sampled_new_contributors(
+    commits: list[dict[str, Any]],
+    past_commits: list[dict[str, Any]],
+) -> set[str]:
+    """按历史 commit 采样判断新贡献者（没有贡献者索引时的近似做法）
+
+    采样之外的老贡献者会被误判为新贡献者。
+
+    Args:
+        commits: 统计窗口内的 commits（REST 形状）
+        past_commits: 窗口前的 commits 采样
+
+    Returns:
+        新贡献者 login 集合
+    """
+    existing_contributors = {
+        commit["author"]["login"] for commit in past_commits if commit.get("author")
+    }
+    return {
+        commit["author"]["login"]
+        for commit in commits
+        if commit.get("author")
+        and commit["author"]["login"] not in existing_contributors
+    }
+
+
+def build_repo_activity(
+    repo_name: str,
+    commits: list[dict[str, Any]],
+    new_contributors: set[str],
+) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    """构造单个仓库的活跃度（逻辑同 ActivityCollector）
+
+    Args:
+        repo_name: 仓库名称
+        commits: 统计窗口内的 commits（REST 形状）
+        new_contributors: 统计窗口内的新贡献者
+
+    Returns:
+        (仓库活跃度, 详细 commit 列表)
+    """
+    activity: dict[str, Any] = {
+        "repo": repo_name,
+        "commit_count": 0,
+        "new_contributors": 0,
+        "top_contributors": [],
+        "recent_commits": [],
+    }
+    detailed_commits: list[dict[str, Any]] = []
+
+    contributor_commits: dict[str, int] = {}
+
+    for commit in commits:
+        activity["commit_count"] += 1
+
+        author_login = commit["author"]["login"] if commit.get("author") else "Unknown"
+        message = commit["commit"]["message"].split("\n")[0]
+        timestamp = parse_timestamp(commit["commit"]["author"]["date"])
+        timestamp_str = timestamp.isoformat() if timestamp else ""
+
+        detailed_commits.append(
+            {
+                "repo": repo_name,
+                "sha": commit["sha"],
+                "message": message[:200],
+                "author": author_login,
+                "timestamp": timestamp_str,
+                "files_changed": [],
+                "additions": 0,
+                "deletions": 0,
+            }
+        )
+
+        if len(activity["recent_commits"]) < 5:
+            activity["recent_commits"].append(
+                {
+                    "sha": commit["sha"][:7],
+                    "message": message[:80],
+                    "author": author_login,
+                    "timestamp": timestamp_str,
+                }
+            )
+
+        if commit.get("author"):
+            contributor_commits[author_login] = (
+                contributor_commits.get(author_login, 0) + 1
+            )
+
+    activity["new_contributors"] = len(new_contributors)
+
+    sorted_contributors = sorted(
+        contributor_commits.items(), key=lambda x: x[1], reverse=True
+    )[:5]
+    activity["top_contributors"] = [
+        {"login": login, "commits": count} for login, count in sorted_contributors
+    ]
+
+    return activity, detailed_commits
+
+
+def assemble_activity_data(
+    since: datetime,
+    results: list[tuple[str, Any]],
+) -> dict[str, Any]:
+    """合并各仓库的活跃度结果
+
+    Args:
+        since: 统计截止时间
+        results: [(仓库名, build_repo_activity 结果或异常), ...]，按输入顺序
+
+    Returns:
+        活跃度数据，格式同 ActivityCollector.collect_activity
+    """
+    activity_data: dict[str, Any] = {
+        "total_commits": 0,
+        "active_repos": 0,
+        "new_contributors": 0,
+        "repo_activity": [],
+        "detailed_commits": [],
+        "period_start": since.isoformat(),
+        "period_end": datetime.now(UTC).isoformat(),
+    }
+
+    for repo_name, result in results:
+        if isinstance(result, BaseException):
+            print(f"获取仓库 {repo_name} 活跃度失败: {result}")
+            continue
+
+        repo_activity, repo_commits = result
+        activity_data["repo_activity"].append(repo_activity)
+        activity_data["detailed_commits"].extend(repo_commits)
+
+        if repo_activity["commit_count"] > 0:
+            activity_data["active_repos"] += 1
+            activity_data["total_commits"] += repo_activity["commit_count"]
+            activity_data["new_contributors"] += repo_activity["new_contributors"]
+
+    activity_data["repo_activity"].sort(key=lambda x: x["commit_count"], reverse=True)
+
+    return activity_data
+
+
+def build_repo_releases(
+    repo: str,
+    releases: list[dict[str, Any]],
+    since: datetime,
+    include_prereleases: bool,
+    pages_fetched: int,
+) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    """构造单个仓库的 Releases（逻辑同 ReleaseCollector）
+
+    Args:
+        repo: 仓库名称
+        releases: Release 列表（REST 形状）
+        since: 起始时间
+        include_prereleases: 是否包含预发布版本
+        pages_fetched: 获取 Release 列表实际请求的页数
+
+    Returns:
+        (仓库 Release 汇总（含本仓库的 pages_fetched）, 详细 Release 列表)
+    """
+    repo_data: dict[str, Any] = {
+        "repo": repo,
+        "release_count": 0,
+        "latest_release": None,
+        "releases": [],
+        "pages_fetched": pages_fetched,
+    }
+    detailed_releases: list[dict[str, Any]] = []
+
+    for release in releases:
+        created_at = parse_timestamp(release.get("created_at"))
+        if created_at is None or created_at < since:
+            continue
+
+        if not include_prereleases and release.get("prerelease"):
+            continue
+
+        published_at = parse_timestamp(release.get("published_at"))
+        author = release.get("author")
+        detailed = {
+            "repo": repo,
+            "tag_name": release["tag_name"],
+            "name": release.get("name") or release["tag_name"],
+            "prerelease": release.get("prerelease", False),
+            "created_at": created_at.isoformat(),
+            "published_at": published_at.isoformat() if published_at else None,
+            "body": release.get("body") or "",
+            "author": author["login"] if author else "Unknown",
+            "html_url": release.get("html_url"),
+            "assets": [
+                {
+                    "name": asset["name"],
+                    "size": asset["size"],
+                    "download_count": asset["download_count"],
+                }
+                for asset in release.get("assets", [])
+            ],
+            "version_info": parse_version(release["tag_name"]),
+        }
+
+        detailed_releases.append(detailed)
+        repo_data["release_count"] += 1
+
+        if repo_data["latest_release"] is None:
+            repo_data["latest_release"] = detailed
+
+    return repo_data, detailed_releases
+
+
+def assemble_release_data(
+    since: datetime,
+    results: list[tuple[str, Any]],
+) -> dict[str, Any]:
+    """合并各仓库的 Release 结果
+
+    Args:
+        since: 起始时间
+        results: [(仓库名, build_repo_releases 结果或异常), ...]，按输入顺序
+
+    Returns:
+        Release 数据，格式同 ReleaseCollector.collect_releases
+    """
+    release_data: dict[str, Any] = {
+        "total_releases": 0,
+        "repos_with_releases": 0,
+        "repo_releases": [],
+        "detailed_releases": [],
+        "pages_fetched": 0,
+        "period_start": since.isoformat(),
+        "period_end": datetime.now(UTC).isoformat(),
+    }
+
+    for repo_name, result in results:
+        if isinstance(result, BaseException):
+            print(f"获取仓库 {repo_name} releases 失败: {result}")
+            continue
+
+        repo_releases, detailed = result
+        release_data["pages_fetched"] += repo_releases.pop("pages_fetched")
+        if repo_releases["release_count"] > 0:
+            release_data["repo_releases"].append(repo_releases)
+            release_data["detailed_releases"].extend(detailed)
+            release_data["repos_with_releases"] += 1
+            release_data["total_releases"] += repo_releases["release_count"]
+
+    release_data["detailed_releases"].sort(key=lambda x: x["created_at"], reverse=True)
+    release_data["repo_releases"].sort(key=lambda x: x["release_count"], reverse=True)
+
+    return release_data
+
+
+def build_pr_payload(pr: dict[str, Any]) -> dict[str, Any]:
+    """保留 PR 列表/搜索接口已返回的字段，作为事件载荷
+
+    列表接口不返回 merged 和变更统计：merged 由 merged_at 推导，
+    变更统计只在原数据包含时保留。
+
+    Args:
+        pr: PR 数据（REST 形状）
+
+    Returns:
+        pull_request 载荷字典
+    """
+    merged = pr.get("merged")
+    if merged is None:
+        merged = pr.get("merged_at") is not None
+
+    user = pr.get("user") or {}
+    payload: dict[str, Any] = {
+        "number": pr["number"],
+        "title": pr["title"],
+        "body": pr.get("body"),
+        "state": pr.get("state"),
+        "draft": pr.get("draft", False),
+        "merged": merged,
+        "merged_at": pr.get("merged_at"),
+        "closed_at": pr.get("closed_at"),
+        "created_at": pr.get("created_at"),
+        "html_url": pr.get("html_url"),
+        "user": {"login": user["login"]} if user.get("login") else None,
+        "labels": [
+            {"name": label["name"]}
+            for label in pr.get("labels") or []
+            if label.get("name")
+        ],
+        "merge_commit_sha": pr.get("merge_commit_sha"),
+    }
+    for field in ("additions", "deletions", "changed_files"):
+        if pr.get(field) is not None:
+            payload[field] = pr[field]
+    return payload
+
+
+def build_pr_event(repo_name: str, pr: dict[str, Any]) -> dict[str, Any]:
+    """构造 PR 事件（格式同 GitHubEventsCollector）
+
+    Args:
+        repo_name: 仓库名称
+        pr: PR 数据（REST 形状）
+
+    Returns:
+        PullRequestEvent 事件字典
+    """
+    created_at = parse_timestamp(pr.get("created_at"))
+    return {
+        "type": "PullRequestEvent",
+        "repo": {"name": repo_name},
+        "payload": {"pull_request": build_pr_payload(pr)},
+        "created_at": created_at.isoformat() if created_at else "",
+    }
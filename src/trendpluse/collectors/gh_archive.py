@@ -1,78 +1,319 @@
 """GH Archive 数据采集器
 
-从 GH Archive 的 BigQuery 数据集获取 GitHub 事件。
+从 GH Archive 获取 GitHub 事件，支持两种后端：
+- bigquery：查询 GH Archive 的 BigQuery 数据集（需要云端凭证，按扫描量计费）
+- local：读取本地下载的小时归档文件（.json.gz），无需凭证和配额
+
+两种后端都按 [since, until] 范围只读取相关分区：BigQuery 通过
+_TABLE_SUFFIX 裁剪日表，本地后端只打开范围内的小时文件。
 """
 
-from datetime import datetime
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any, Literal
 
 from google.cloud import bigquery
 
+from trendpluse.collectors.archive_reader import (
+    ARCHIVE_EVENT_TYPES,
+    hourly_files,
+    scan_archive_files,
+)
+from trendpluse.collectors.event_store import EventStore
+from trendpluse.collectors.formats import parse_timestamp
+
+# 从 payload（JSON 字符串列）中投影的字段：(列别名, JSON 路径, 类型)
+# 只返回 EventFilter 和 GitHubDetailFetcher 需要的字段，载荷按 JSON 路径还原为嵌套字典
+PROJECTED_PAYLOAD_FIELDS: tuple[tuple[str, str, str], ...] = (
+    ("action", "$.action", "STRING"),
+    ("number", "$.number", "INT64"),
+    ("pr_number", "$.pull_request.number", "INT64"),
+    ("pr_title", "$.pull_request.title", "STRING"),
+    ("pr_body", "$.pull_request.body", "STRING"),
+    ("pr_state", "$.pull_request.state", "STRING"),
+    ("pr_draft", "$.pull_request.draft", "BOOL"),
+    ("pr_merged", "$.pull_request.merged", "BOOL"),
+    ("pr_merged_at", "$.pull_request.merged_at", "STRING"),
+    ("pr_closed_at", "$.pull_request.closed_at", "STRING"),
+    ("pr_created_at", "$.pull_request.created_at", "STRING"),
+    ("pr_html_url", "$.pull_request.html_url", "STRING"),
+    ("pr_user_login", "$.pull_request.user.login", "STRING"),
+    ("pr_merge_commit_sha", "$.pull_request.merge_commit_sha", "STRING"),
+    ("pr_additions", "$.pull_request.additions", "INT64"),
+    ("pr_deletions", "$.pull_request.deletions", "INT64"),
+    ("pr_changed_files", "$.pull_request.changed_files", "INT64"),
+    ("release_tag_name", "$.release.tag_name", "STRING"),
+    ("release_name", "$.release.name", "STRING"),
+    ("release_body", "$.release.body", "STRING"),
+    ("release_html_url", "$.release.html_url", "STRING"),
+    ("release_prerelease", "$.release.prerelease", "BOOL"),
+    ("release_created_at", "$.release.created_at", "STRING"),
+    ("release_published_at", "$.release.published_at", "STRING"),
+    ("release_author_login", "$.release.author.login", "STRING"),
+)
+
+
+def _projection_sql() -> str:
+    """生成 payload 字段投影的 SELECT 列表"""
+    columns = []
+    for alias, path, cast in PROJECTED_PAYLOAD_FIELDS:
+        expr = f"JSON_EXTRACT_SCALAR(payload, '{path}')"
+        if cast != "STRING":
+            expr = f"SAFE_CAST({expr} AS {cast})"
+        columns.append(f"{expr} AS {alias}")
+    columns.append(
+        "ARRAY(SELECT JSON_EXTRACT_SCALAR(label, '$.name') FROM "
+        "UNNEST(JSON_EXTRACT_ARRAY(payload, '$.pull_request.labels')) AS label"
+        ") AS pr_label_names"
+    )
+    return ",\n            ".join(columns)
+
+
+def _projected_payload(row: Any) -> dict[str, Any]:
+    """将投影列还原为嵌套的 payload 字典（字段名同 GH Archive 原始载荷）"""
+    payload: dict[str, Any] = {}
+    for alias, path, _ in PROJECTED_PAYLOAD_FIELDS:
+        value = row.get(alias)
+        if value is None:
+            continue
+        keys = path.removeprefix("$.").split(".")
+        target = payload
+        for key in keys[:-1]:
+            target = target.setdefault(key, {})
+        target[keys[-1]] = value
+
+    if "pull_request" in payload:
+        payload["pull_request"]["labels"] = [
+            {"name": name} for name in row.get("pr_label_names") or [] if name
+        ]
+    return payload
+
+
+def table_suffixes(since: datetime, until: datetime) -> tuple[str, str]:
+    """时间范围对应的日表后缀区间
+
+    Args:
+        since: 起始时间
+        until: 结束时间
+
+    Returns:
+        (起始后缀, 结束后缀)，格式 YYYYMMDD
+    """
+    if since.tzinfo is not None:
+        since = since.astimezone(UTC)
+    if until.tzinfo is not None:
+        until = until.astimezone(UTC)
+    return since.strftime("%Y%m%d"), until.strftime("%Y%m%d")
+
 
 class GHArchiveCollector:
     """从 GH Archive 收集数据"""
 
-    def __init__(self):
-        """初始化 BigQuery 客户端"""
-        self.client = bigquery.Client()
+    def __init__(
+        self,
+        backend: Literal["bigquery", "local"] = "bigquery",
+        archive_dir: str | None = None,
+        workers: int | None = None,
+        event_store: EventStore | None = None,
+        max_bytes_billed: int | None = None,
+    ):
+        """初始化采集器
+
+        Args:
+            backend: 数据后端（bigquery 或 local）
+            archive_dir: 本地小时归档目录（local 后端必需）
+            workers: local 后端并行解析的进程数（默认 CPU 核数）
+            event_store: 本地事件存储（可选，提供时写入获取到的事件）
+            max_bytes_billed: 单次查询扫描字节上限（可选，预估超出时不执行查询）
+
+        Raises:
+            ValueError: local 后端未指定归档目录
+        """
+        if backend == "local" and not archive_dir:
+            raise ValueError("local 后端需要指定 archive_dir")
+
+        self.backend = backend
+        self.archive_dir = Path(archive_dir) if archive_dir else None
+        self.workers = workers
+        self.event_store = event_store
+        self.max_bytes_billed = max_bytes_billed
+        self.missing_files: list[Path] = []
+        self.last_bytes_estimate: int | None = None
+        # 只有 BigQuery 后端需要客户端（会读取云端凭证）
+        self.client = bigquery.Client() if backend == "bigquery" else None
 
     def fetch_events(
         self,
         repos: list[str],
         since: datetime,
+        until: datetime | None = None,
     ) -> list[dict]:
         """获取指定仓库的 GitHub 事件
 
         Args:
             repos: 仓库列表，格式 ["owner/repo", ...]
-            since: 起始时间
+            since: 起始时间（不含）
+            until: 结束时间（含，默认当前时间）
 
         Returns:
-            事件列表
+            事件列表，按时间倒序
+
+        Raises:
+            ValueError: BigQuery 查询预估扫描量超过 max_bytes_billed
         """
-        # 构建表名（使用 GH Archive 的日表）
-        table_date = since.strftime("%Y%m%d")  # 例如：20260102
-        table_id = f"githubarchive.day.{table_date}"
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=UTC)
+        if until is None:
+            until = datetime.now(UTC)
+        elif until.tzinfo is None:
+            until = until.replace(tzinfo=UTC)
+
+        if self.backend == "local":
+            events = self._fetch_local_events(repos, since, until)
+        else:
+            events = self._fetch_bigquery_events(repos, since, until)
+
+        if self.event_store is not None:
+            self.event_store.add_events(events, source=f"gharchive_{self.backend}")
+        return events
+
+    def build_query(self) -> str:
+        """构造跨日表的范围查询
 
-        # 构建 SQL 查询
-        query = f"""
+        通过 _TABLE_SUFFIX 只扫描范围内的日表，payload 只投影需要的字段。
+
+        Returns:
+            SQL 语句（参数：repos、since、until、start_suffix、end_suffix）
+        """
+        return f"""
         SELECT
             type,
             repo.name as repo_name,
-            payload,
             created_at,
+            {_projection_sql()}
         FROM
-            `{table_id}`
+            `githubarchive.day.*`
         WHERE
-            repo.name IN UNNEST(@repos)
+            _TABLE_SUFFIX BETWEEN @start_suffix AND @end_suffix
+            AND repo.name IN UNNEST(@repos)
             AND type IN ('PullRequestEvent', 'ReleaseEvent')
             AND created_at > @since
+            AND created_at <= @until
         ORDER BY created_at DESC
         """
 
-        # 配置查询参数
-        job_config = bigquery.QueryJobConfig(
+    def estimate_bytes(self, repos: list[str], since: datetime, until: datetime) -> int:
+        """预估查询扫描的字节数（dry run，不计费）
+
+        Args:
+            repos: 仓库列表
+            since: 起始时间
+            until: 结束时间
+
+        Returns:
+            预估扫描字节数
+
+        Raises:
+            RuntimeError: 未使用 BigQuery 后端
+        """
+        job_config = self._job_config(repos, since, until)
+        job_config.dry_run = True
+        job_config.use_query_cache = False
+        job = self._bigquery_client().query(self.build_query(), job_config=job_config)
+        return int(job.total_bytes_processed or 0)
+
+    def _bigquery_client(self) -> bigquery.Client:
+        """获取 BigQuery 客户端
+
+        Raises:
+            RuntimeError: 未使用 BigQuery 后端（没有创建客户端）
+        """
+        if self.client is None:
+            raise RuntimeError(
+                f"GH Archive 后端为 {self.backend}，未配置 BigQuery 客户端"
+            )
+        return self.client
+
+    def _job_config(
+        self, repos: list[str], since: datetime, until: datetime
+    ) -> bigquery.QueryJobConfig:
+        """构造查询参数"""
+        start_suffix, end_suffix = table_suffixes(since, until)
+        return bigquery.QueryJobConfig(
             query_parameters=[
                 bigquery.ArrayQueryParameter("repos", "string", repos),
                 bigquery.ScalarQueryParameter("since", "timestamp", since.isoformat()),
+                bigquery.ScalarQueryParameter("until", "timestamp", until.isoformat()),
+                bigquery.ScalarQueryParameter("start_suffix", "string", start_suffix),
+                bigquery.ScalarQueryParameter("end_suffix", "string", end_suffix),
             ]
         )
 
-        # 执行查询
-        query_job = self.client.query(query, job_config=job_config)
+    def _fetch_bigquery_events(
+        self,
+        repos: list[str],
+        since: datetime,
+        until: datetime,
+    ) -> list[dict]:
+        """从 BigQuery 日表获取事件（先 dry run 预估扫描量）"""
+        estimate = self.estimate_bytes(repos, since, until)
+        self.last_bytes_estimate = estimate
+        print(
+            f"GH Archive 查询 {table_suffixes(since, until)}，"
+            f"预估扫描 {estimate / 1024**3:.2f} GiB"
+        )
+        if self.max_bytes_billed is not None and estimate > self.max_bytes_billed:
+            raise ValueError(
+                f"GH Archive 查询预估扫描 {estimate} 字节，"
+                f"超过上限 {self.max_bytes_billed} 字节"
+            )
 
-        # 返回结果
-        results = list(query_job.result())
+        job_config = self._job_config(repos, since, until)
+        if self.max_bytes_billed is not None:
+            job_config.maximum_bytes_billed = self.max_bytes_billed
+
+        # 执行查询
+        query_job = self._bigquery_client().query(
+            self.build_query(), job_config=job_config
+        )
 
         # 转换为统一格式
         events = []
-        for row in results:
+        for row in query_job.result():
             events.append(
                 {
                     "type": row.type,
                     "repo": {"name": row.repo_name},
-                    "payload": dict(row.payload) if row.payload else {},
+                    "payload": _projected_payload(row),
                     "created_at": row.created_at.isoformat(),
                 }
             )
 
         return events
+
+    def _fetch_local_events(
+        self,
+        repos: list[str],
+        since: datetime,
+        until: datetime,
+    ) -> list[dict]:
+        """从本地小时归档文件获取事件
+
+        只打开 [since, until] 范围内的小时文件，按时间倒序返回。
+        """
+        assert self.archive_dir is not None
+        last_hour = until.astimezone(UTC).replace(minute=0, second=0, microsecond=0)
+        files, self.missing_files = hourly_files(
+            self.archive_dir, since, last_hour + timedelta(hours=1)
+        )
+
+        events = []
+        for event in scan_archive_files(
+            files, repos, ARCHIVE_EVENT_TYPES, workers=self.workers
+        ):
+            created_at = parse_timestamp(event["created_at"])
+            if created_at is not None and since < created_at <= until:
+                events.append(event)
+
+        events.sort(key=lambda event: event["created_at"], reverse=True)
+        return events
@@ -3,6 +3,12 @@
 使用 PyGithub 获取 PR/Release 的详细信息。
 """
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+import requests
 from github import Github, GithubException
 from tenacity import (
     retry,
@@ -11,23 +17,125 @@ from tenacity import (
     wait_exponential,
 )
 
+from trendpluse.collectors.formats import parse_timestamp
+from trendpluse.collectors.repo_registry import RepoLookupMixin, RepoRegistry
+
+# 构造 PR 详情必需的 REST PR 字段（列表接口、GraphQL 采集器和 GH Archive 载荷中均包含）
+PAYLOAD_DETAIL_FIELDS = (
+    "number",
+    "title",
+    "user",
+    "created_at",
+    "html_url",
+    "state",
+)
+
+# 变更统计字段：只有单个 PR 接口返回，下游分析不依赖，缺失时不单独请求
+PAYLOAD_STAT_FIELDS = ("additions", "deletions", "changed_files")
+
+# 批量获取 PR 详情的默认并发数、单批截止时间（秒）和共享重试次数
+DEFAULT_DETAIL_WORKERS = 8
+DEFAULT_BATCH_DEADLINE = 120.0
+DEFAULT_RETRY_BUDGET = 10
+
+
+@dataclass
+class PRFetchError:
+    """单个 PR 详情获取失败的记录"""
+
+    repo: str
+    number: int
+    # error（API 返回错误）、transport（连接/网络错误）或 timeout（超过批次截止时间）
+    reason: str
+    message: str = ""
+    attempts: int = 0
+
+
+@dataclass
+class PRDetailBatch:
+    """批量获取 PR 详情的结果"""
+
+    details: list[dict] = field(default_factory=list)  # 按输入顺序，仅包含成功项
+    errors: list[PRFetchError] = field(default_factory=list)
+
+
+class _RetryBudget:
+    """批次内所有 worker 共享的重试次数"""
 
-class GitHubDetailFetcher:
+    def __init__(self, total: int):
+        self.remaining = total
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        """消耗一次重试机会，预算用尽时返回 False"""
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+class GitHubDetailFetcher(RepoLookupMixin):
     """从 GitHub API 获取详细信息"""
 
-    def __init__(self, token: str = ""):
+    def __init__(
+        self,
+        token: str = "",
+        registry: RepoRegistry | None = None,
+        max_workers: int = DEFAULT_DETAIL_WORKERS,
+        batch_deadline: float = DEFAULT_BATCH_DEADLINE,
+        retry_budget: int = DEFAULT_RETRY_BUDGET,
+        max_attempts: int = 3,
+        retry_backoff: float = 2.0,
+    ):
         """初始化 GitHub 客户端
 
         Args:
             token: GitHub API token（可选，无 token 时有严格的速率限制）
+            registry: 共享仓库注册表（可选，提供时复用其客户端和句柄缓存）
+            max_workers: 批量获取 PR 详情的并发数
+            batch_deadline: 单批次截止时间（秒），超时未完成的 PR 记为失败
+            retry_budget: 单批次所有 PR 共享的重试次数
+            max_attempts: 单个 PR 的最大尝试次数
+            retry_backoff: 批量模式重试的初始退避时间（秒），之后按指数增长
         """
-        if token:
+        self.registry = registry
+        self.max_workers = max_workers
+        self.batch_deadline = batch_deadline
+        self.retry_budget = retry_budget
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.last_errors: list[PRFetchError] = []
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+        if registry is not None:
+            self.client = registry.client
+        elif token:
             self.client = Github(login_or_token=token)
         else:
             # 无 token 时仍然可以访问公开仓库，但有速率限制
             self.client = Github()
         self._rate_limit_wait = wait_exponential(multiplier=1, min=4, max=60)
 
+    def reset_stats(self) -> None:
+        """重置本次运行的统计计数"""
+        self.api_fetches = 0
+        self.payload_hits = 0
+        self.retries = 0
+        self.failures = 0
+        self.timeouts = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """本次运行的统计信息"""
+        return {
+            "pr_detail_requests": self.api_fetches,
+            "pr_detail_from_payload": self.payload_hits,
+            "pr_detail_retries": self.retries,
+            "pr_detail_errors": self.failures,
+            "pr_detail_timeouts": self.timeouts,
+        }
+
     @retry(
         stop=stop_after_attempt(3),
         retry=retry_if_exception_type(GithubException),
@@ -44,7 +152,11 @@ class GitHubDetailFetcher:
         Returns:
             PR 详情字典
         """
-        repo = self.client.get_repo(repo_name)
+        return self._fetch_pr_details(repo_name, pr_number)
+
+    def _fetch_pr_details(self, repo_name: str, pr_number: int) -> dict:
+        """获取 PR 详情（单次请求，不重试）"""
+        repo = self._get_repo(repo_name)
         pr = repo.get_pull(pr_number)
 
         return {
@@ -79,7 +191,7 @@ class GitHubDetailFetcher:
         Returns:
             Release 详情字典
         """
-        repo = self.client.get_repo(repo_name)
+        repo = self._get_repo(repo_name)
         release = repo.get_release(tag_name)
 
         return {
@@ -109,7 +221,7 @@ class GitHubDetailFetcher:
         Returns:
             评论列表
         """
-        repo = self.client.get_repo(repo_name)
+        repo = self._get_repo(repo_name)
         pr = repo.get_pull(pr_number)
 
         comments = []
@@ -124,28 +236,180 @@ class GitHubDetailFetcher:
 
         return comments
 
+    @staticmethod
+    def details_from_payload(pr: dict) -> dict | None:
+        """从事件载荷构造 PR 详情
+
+        Args:
+            pr: 事件中的 pull_request 字典（REST PR 对象字段名）
+
+        列表接口不返回 merged 和变更统计：merged 由 merged_at 推导，
+        变更统计缺失时为 None。
+
+        Returns:
+            与 fetch_pr_details 格式一致的详情，必需字段不全时返回 None
+        """
+        if any(pr.get(field) is None for field in PAYLOAD_DETAIL_FIELDS):
+            return None
+
+        merged = pr.get("merged")
+        if merged is None:
+            if "merged_at" not in pr:
+                return None
+            merged = pr["merged_at"] is not None
+
+        created_at = parse_timestamp(pr["created_at"])
+        closed_at = parse_timestamp(pr.get("closed_at"))
+        return {
+            "number": pr["number"],
+            "title": pr["title"],
+            "body": pr.get("body"),
+            "author": pr["user"]["login"],
+            "created_at": created_at.isoformat() if created_at else None,
+            "closed_at": closed_at.isoformat() if closed_at else None,
+            "url": pr["html_url"],
+            "state": pr["state"],
+            "merged": merged,
+            "merge_commit_sha": pr.get("merge_commit_sha"),
+            **{field: pr.get(field) for field in PAYLOAD_STAT_FIELDS},
+        }
+
     def fetch_multiple_pr_details(self, candidates: list[dict]) -> list[dict]:
         """批量获取 PR 详情
 
+        事件载荷已包含完整详情字段时直接使用，不再请求 API；
+        其余 PR 并发获取，失败记录保存在 last_errors 中。
+
         Args:
             candidates: 候选事件列表
 
         Returns:
-            PR 详情列表
+            PR 详情列表（按候选顺序，不含失败项）
         """
-        details_list = []
+        batch = self.fetch_pr_details_batch(candidates)
+        self.last_errors = batch.errors
+        return batch.details
+
+    def fetch_pr_details_batch(self, candidates: list[dict]) -> PRDetailBatch:
+        """并发批量获取 PR 详情
+
+        - worker 池并发请求，结果保持候选顺序
+        - 整个批次有统一的截止时间，到期未完成的 PR 记为 timeout
+        - 所有 PR 共享重试次数，避免个别 PR 反复重试拖慢整个批次
+
+        Args:
+            candidates: 候选事件列表
+
+        Returns:
+            PRDetailBatch（成功的详情和结构化的失败记录）
+        """
+        deadline_at = time.monotonic() + self.batch_deadline
+        budget = _RetryBudget(self.retry_budget)
+        results: list[dict | None] = []
+        errors: dict[int, PRFetchError] = {}
+        pending: dict[int, tuple[str, int]] = {}
 
         for event in candidates:
-            if event.get("type") == "PullRequestEvent":
-                repo_name = event["repo"]["name"]
-                pr_number = event["payload"]["pull_request"]["number"]
-
-                try:
-                    details = self.fetch_pr_details(repo_name, pr_number)
-                    details_list.append(details)
-                except GithubException as e:
-                    # 记录错误但继续处理其他 PR
-                    print(f"获取 PR {repo_name}#{pr_number} 失败: {e}")
-                    continue
-
-        return details_list
+            if event.get("type") != "PullRequestEvent":
+                continue
+            pr_payload = event["payload"]["pull_request"]
+            details = self.details_from_payload(pr_payload)
+            if details is not None:
+                self.payload_hits += 1
+            else:
+                pending[len(results)] = (event["repo"]["name"], pr_payload["number"])
+            results.append(details)
+
+        if pending:
+            executor = ThreadPoolExecutor(
+                max_workers=min(self.max_workers, len(pending)),
+                thread_name_prefix="pr-detail",
+            )
+            futures = {
+                executor.submit(
+                    self._fetch_for_batch, repo_name, number, deadline_at, budget
+                ): index
+                for index, (repo_name, number) in pending.items()
+            }
+            done, not_done = wait(
+                futures, timeout=max(0.0, deadline_at - time.monotonic())
+            )
+            # 不等待超时的请求结束，线程在后台自然退出
+            executor.shutdown(wait=False, cancel_futures=True)
+
+            for future in done:
+                index = futures[future]
+                details, error = future.result()
+                if error is not None:
+                    errors[index] = error
+                results[index] = details
+            for future in not_done:
+                index = futures[future]
+                repo_name, number = pending[index]
+                errors[index] = PRFetchError(
+                    repo=repo_name,
+                    number=number,
+                    reason="timeout",
+                    message=f"超过批次截止时间 {self.batch_deadline:g}s",
+                )
+                self.timeouts += 1
+
+        return PRDetailBatch(
+            details=[details for details in results if details is not None],
+            errors=[errors[index] for index in sorted(errors)],
+        )
+
+    def _fetch_for_batch(
+        self,
+        repo_name: str,
+        pr_number: int,
+        deadline_at: float,
+        budget: _RetryBudget,
+    ) -> tuple[dict | None, PRFetchError | None]:
+        """批量模式下获取单个 PR 详情
+
+        API 错误和连接错误都会重试，重试受共享预算和批次截止时间约束；
+        失败时返回错误记录而不是抛出异常，其他 PR 的结果不受影响。
+
+        Returns:
+            (详情, 错误记录)，二者有且只有一个不为 None
+        """
+        attempts = 0
+        while True:
+            attempts += 1
+            with self._stats_lock:
+                self.api_fetches += 1
+            try:
+                return self._fetch_pr_details(repo_name, pr_number), None
+            except (GithubException, requests.RequestException) as e:
+                reason = "error" if isinstance(e, GithubException) else "transport"
+                backoff = self.retry_backoff * 2 ** (attempts - 1)
+                can_retry = (
+                    attempts < self.max_attempts
+                    and time.monotonic() + backoff < deadline_at
+                    and budget.take()
+                )
+                if not can_retry:
+                    with self._stats_lock:
+                        self.failures += 1
+                    return None, PRFetchError(
+                        repo=repo_name,
+                        number=pr_number,
+                        reason=reason,
+                        message=str(e),
+                        attempts=attempts,
+                    )
+                with self._stats_lock:
+                    self.retries += 1
+                time.sleep(backoff)
+            except Exception as e:
+                # 解析响应等非预期错误不重试，只记录该 PR 失败
+                with self._stats_lock:
+                    self.failures += 1
+                return None, PRFetchError(
+                    repo=repo_name,
+                    number=pr_number,
+                    reason="error",
+                    message=str(e),
+                    attempts=attempts,
+                )
@@ -4,20 +4,38 @@
 """
 
 from datetime import UTC, datetime
+from typing import Any
 
 from github import Github, GithubException
 
+from trendpluse.collectors.formats import build_pr_payload, parse_timestamp
+from trendpluse.collectors.pr_store import PullRequestStore
+from trendpluse.collectors.repo_registry import RepoLookupMixin, RepoRegistry
 
-class GitHubEventsCollector:
+
+class GitHubEventsCollector(RepoLookupMixin):
     """从 GitHub API 直接获取事件"""
 
-    def __init__(self, token: str = ""):
+    def __init__(
+        self,
+        token: str = "",
+        registry: RepoRegistry | None = None,
+        pr_store: PullRequestStore | None = None,
+    ):
         """初始化 GitHub 客户端
 
         Args:
             token: GitHub Personal Access Token（可选）
+            registry: 共享仓库注册表（可选，提供时复用其客户端和句柄缓存）
+            pr_store: 本地 PR 存储（可选，None 时使用内存存储）
         """
-        if token:
+        self.registry = registry
+        self.pr_store = pr_store or PullRequestStore(path=None)
+        # 最近一次 fetch_events 成功同步的仓库（失败的仓库不能记为已覆盖）
+        self.last_synced_repos: list[str] = []
+        if registry is not None:
+            self.client = registry.client
+        elif token:
             self.client = Github(login_or_token=token)
         else:
             self.client = Github()
@@ -29,6 +47,11 @@ class GitHubEventsCollector:
     ) -> list[dict]:
         """获取指定仓库的 GitHub 事件
 
+        按更新时间增量同步 PR 到本地存储，再从存储中取出窗口内
+        新建或合并的 PR（创建早于窗口、在窗口内合并的 PR 也会包含）。
+        事件载荷保留列表接口返回的合并状态、标签、作者等字段，
+        EventFilter 和 GitHubDetailFetcher 无需再逐个请求 PR 详情。
+
         Args:
             repos: 仓库列表，格式 ["owner/repo", ...]
             since: 起始时间
@@ -37,6 +60,7 @@ class GitHubEventsCollector:
             事件列表，格式与 GHArchiveCollector 一致
         """
         events = []
+        self.last_synced_repos = []
 
         # 确保 since 有时区信息（用于与 GitHub API 返回的时间比较）
         if since.tzinfo is None:
@@ -44,38 +68,90 @@ class GitHubEventsCollector:
 
         for repo_name in repos:
             try:
-                repo = self.client.get_repo(repo_name)
+                self._sync_repo(repo_name, since)
+                self.last_synced_repos.append(repo_name)
+            except GithubException as e:
+                # 记录错误但继续处理其他仓库（存储中已有的 PR 仍然可用）
+                print(f"获取仓库 {repo_name} 事件失败: {e}")
 
-                # 获取最近的 Pull Request
-                pulls = repo.get_pulls(
-                    state="all",
-                    sort="created",
-                    direction="desc",
+            for pr in self.pr_store.query(repo_name, since):
+                events.append(
+                    {
+                        "type": "PullRequestEvent",
+                        "repo": {"name": repo_name},
+                        "payload": {"pull_request": build_pr_payload(pr)},
+                        "created_at": pr["created_at"],
+                    }
                 )
 
-                for pr in pulls:
-                    # 只获取指定时间之后的 PR
-                    if pr.created_at < since:
-                        break
-
-                    events.append(
-                        {
-                            "type": "PullRequestEvent",
-                            "repo": {"name": repo_name},
-                            "payload": {
-                                "pull_request": {
-                                    "number": pr.number,
-                                    "title": pr.title,
-                                    "body": pr.body,
-                                }
-                            },
-                            "created_at": pr.created_at.isoformat(),
-                        }
-                    )
-
-            except GithubException as e:
-                # 记录错误但继续处理其他仓库
-                print(f"获取仓库 {repo_name} 事件失败: {e}")
-                continue
+        self.pr_store.prune(keep_since=since)
+        self.pr_store.save()
 
         return events
+
+    def _sync_repo(self, repo_name: str, since: datetime) -> None:
+        """增量同步单个仓库的 PR
+
+        按 updated 倒序拉取，遇到早于游标（或起始时间）的 PR 即停止。
+        存储的已同步窗口不覆盖 since（回填更早的日期）时忽略游标，重新拉取到 since。
+
+        Args:
+            repo_name: 仓库名称
+            since: 起始时间
+        """
+        cursor = self.pr_store.get_cursor(repo_name) or {}
+        cursor_since = parse_timestamp(cursor.get("since"))
+        cursor_updated_at = parse_timestamp(cursor.get("updated_at"))
+        stop_at = since
+        synced_since = since
+        if (
+            cursor_since is not None
+            and cursor_since <= since
+            and cursor_updated_at is not None
+        ):
+            stop_at = max(since, cursor_updated_at)
+            synced_since = cursor_since
+
+        repo = self._get_repo(repo_name)
+        pulls = repo.get_pulls(state="all", sort="updated", direction="desc")
+
+        newest_updated_at = cursor_updated_at
+        for pr in pulls:
+            # 早于游标的 PR 上次运行已同步
+            if pr.updated_at < stop_at:
+                break
+
+            self.pr_store.upsert(repo_name, _pr_record(pr))
+            if newest_updated_at is None or pr.updated_at > newest_updated_at:
+                newest_updated_at = pr.updated_at
+
+        if newest_updated_at is not None:
+            self.pr_store.set_cursor(repo_name, synced_since, newest_updated_at)
+
+
+def _isoformat(value: Any) -> str | None:
+    """时间转 ISO 字符串，空值返回 None"""
+    return value.isoformat() if isinstance(value, datetime) else None
+
+
+def _pr_record(pr: Any) -> dict[str, Any]:
+    """将 PyGithub PullRequest 转换为存储记录（REST PR 对象字段名）
+
+    只读取列表接口已返回的字段；merged、additions 等字段需要单独请求，
+    访问会触发 PyGithub 补全请求，这里不读取。
+    """
+    return {
+        "number": pr.number,
+        "title": pr.title,
+        "body": pr.body,
+        "state": pr.state,
+        "draft": pr.draft,
+        "created_at": _isoformat(pr.created_at),
+        "updated_at": _isoformat(pr.updated_at),
+        "closed_at": _isoformat(pr.closed_at),
+        "merged_at": _isoformat(pr.merged_at),
+        "html_url": pr.html_url,
+        "user": {"login": pr.user.login} if pr.user else None,
+        "labels": [{"name": label.name} for label in pr.labels],
+        "merge_commit_sha": pr.merge_commit_sha,
+    }
@@ -0,0 +1,560 @@
+"""GitHub GraphQL 批量采集器
+
+使用带别名的 GraphQL 查询，一次请求获取一批仓库的 PR、Releases 和 commit 历史。
+REST 路径需要 仓库数 × 页数 次请求，外加每个 PR 一次详情请求；
+这里首轮每批仓库只需一次请求，只有数据超过一页的仓库才需要追加请求。
+
+输出与 ActivityCollector / ReleaseCollector / GitHubEventsCollector 一致，
+PR 事件的 payload 额外携带合并状态、标签和代码变更统计。
+"""
+
+import json
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import httpx
+from github import GithubException
+
+from trendpluse.collectors.activity import ActivityCollector
+from trendpluse.collectors.formats import (
+    assemble_activity_data,
+    assemble_release_data,
+    build_pr_event,
+    build_repo_activity,
+    build_repo_releases,
+    commit_authors,
+    parse_timestamp,
+    sampled_new_contributors,
+)
+from trendpluse.collectors.rate_limiter import RESOURCE_GRAPHQL, RateLimitScheduler
+
+DEFAULT_ENDPOINT = "https://api.github.com/graphql"
+
+# 每个连接的分页大小（GitHub GraphQL 单个连接最多 100 条）
+PR_PAGE_SIZE = 50
+RELEASE_PAGE_SIZE = 20
+COMMIT_PAGE_SIZE = 100
+LABELS_PER_PR = 20
+ASSETS_PER_RELEASE = 20
+
+# 没有贡献者索引时，30 天贡献者采样上限
+PAST_COMMITS_SAMPLE = 100
+
+# 追加请求轮数上限，防止异常数据导致无限翻页
+MAX_PAGE_ROUNDS = 50
+
+# 采集的连接类型
+PULLS = "pulls"
+RELEASES = "releases"
+COMMITS = "commits"
+PAST_COMMITS = "past_commits"
+CONNECTIONS = (PULLS, RELEASES, COMMITS, PAST_COMMITS)
+
+
+class GraphQLCollector:
+    """GitHub GraphQL 批量采集器
+
+    每个请求为一批仓库各生成一个别名字段（r0、r1 ...），
+    字段内包含该仓库仍需获取的连接（PR / Release / commit 历史）及其游标。
+    """
+
+    def __init__(
+        self,
+        token: str = "",
+        endpoint: str = DEFAULT_ENDPOINT,
+        repos_per_query: int = 10,
+        timeout: float = 30.0,
+        scheduler: RateLimitScheduler | None = None,
+        activity_collector: ActivityCollector | None = None,
+    ):
+        """初始化采集器
+
+        Args:
+            token: GitHub Personal Access Token（GraphQL API 必须认证）
+            endpoint: GraphQL API 地址
+            repos_per_query: 单个查询包含的仓库数
+            timeout: 单个请求超时（秒）
+            scheduler: 速率限制调度器（可选，启用后按调度器分配的 token 发送请求）
+            activity_collector: 活跃度采集器（可选，提供时通过其贡献者索引判断
+                新贡献者，不再获取 30 天 commit 采样）
+        """
+        self.token = token
+        self.endpoint = endpoint
+        self.repos_per_query = repos_per_query
+        self.timeout = timeout
+        self.scheduler = scheduler
+        self.activity_collector = activity_collector
+        self.request_count = 0
+        # 最近一次采集中获取成功的仓库
+        self.last_synced_repos: list[str] = []
+        # 最近一次采集中各仓库请求的 Release 连接页数
+        self.last_release_pages: dict[str, int] = {}
+
+    def reset_stats(self) -> None:
+        """重置本次运行的统计计数"""
+        self.request_count = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """本次运行的统计信息"""
+        return {"graphql_requests": self.request_count}
+
+    def collect_all(
+        self,
+        repos: list[str],
+        activity_since: datetime,
+        release_since: datetime,
+        pr_since: datetime,
+        include_prereleases: bool = False,
+    ) -> tuple[dict[str, Any], dict[str, Any], list[dict]]:
+        """批量采集活跃度、Releases 和 PR 事件
+
+        Args:
+            repos: 仓库列表
+            activity_since: 活跃度统计截止时间（统计此前一天）
+            release_since: Release 起始时间
+            pr_since: PR 起始时间
+            include_prereleases: 是否包含预发布版本
+
+        Returns:
+            (activity_data, release_data, events)
+        """
+        activity_since = _ensure_tz(activity_since)
+        release_since = _ensure_tz(release_since)
+        pr_since = _ensure_tz(pr_since)
+
+        raw, errors = self.fetch_raw(
+            repos,
+            activity_since=activity_since,
+            release_since=release_since,
+            pr_since=pr_since,
+        )
+
+        activity_results: list[tuple[str, Any]] = []
+        release_results: list[tuple[str, Any]] = []
+        events: list[dict] = []
+        self.last_synced_repos = [repo for repo in repos if repo not in errors]
+
+        for repo in repos:
+            if repo in errors:
+                activity_results.append((repo, errors[repo]))
+                release_results.append((repo, errors[repo]))
+                print(f"获取仓库 {repo} 事件失败: {errors[repo]}")
+                continue
+
+            data = raw[repo]
+            new_contributors = self._new_contributors(
+                repo, activity_since - timedelta(days=1), data
+            )
+            activity_results.append(
+                (repo, build_repo_activity(repo, data[COMMITS], new_contributors))
+            )
+            release_results.append(
+                (
+                    repo,
+                    build_repo_releases(
+                        repo,
+                        data[RELEASES],
+                        release_since,
+                        include_prereleases,
+                        self.last_release_pages.get(repo, 0),
+                    ),
+                )
+            )
+            for pr in data[PULLS]:
+                created_at = parse_timestamp(pr["created_at"])
+                if created_at is None or created_at < pr_since:
+                    continue
+                events.append(build_pr_event(repo, pr))
+
+        if self.activity_collector is not None:
+            self.activity_collector.contributor_index.save()
+
+        activity_data = assemble_activity_data(activity_since, activity_results)
+        release_data = assemble_release_data(release_since, release_results)
+
+        return activity_data, release_data, events
+
+    def fetch_raw(
+        self,
+        repos: list[str],
+        activity_since: datetime,
+        release_since: datetime,
+        pr_since: datetime,
+    ) -> tuple[dict[str, dict[str, list[dict]]], dict[str, Exception]]:
+        """按批次获取各仓库的原始数据（已转换为 REST 形状）
+
+        Args:
+            repos: 仓库列表
+            activity_since: 活跃度统计截止时间
+            release_since: Release 起始时间
+            pr_since: PR 起始时间
+
+        Returns:
+            ({仓库: {连接类型: 条目列表}}, {失败仓库: 异常})
+        """
+        windows = {
+            COMMITS: (activity_since - timedelta(days=1), activity_since),
+            PAST_COMMITS: (activity_since - timedelta(days=30), activity_since),
+        }
+        cutoffs = {PULLS: pr_since, RELEASES: release_since}
+
+        raw: dict[str, dict[str, list[dict]]] = {
+            repo: {kind: [] for kind in CONNECTIONS} for repo in repos
+        }
+        errors: dict[str, Exception] = {}
+        self.last_release_pages = {}
+
+        # 有贡献者索引时不需要 30 天采样
+        kinds = [
+            kind
+            for kind in CONNECTIONS
+            if kind != PAST_COMMITS or self.activity_collector is None
+        ]
+
+        # 首轮获取所有连接的第一页，之后只为需要翻页的连接追加请求
+        pending: dict[str, dict[str, str | None]] = {
+            repo: dict.fromkeys(kinds) for repo in repos
+        }
+
+        with self._create_client() as client:
+            for _ in range(MAX_PAGE_ROUNDS):
+                if not pending:
+                    break
+
+                next_pending: dict[str, dict[str, str | None]] = {}
+                batch_repos = list(pending)
+
+                for start in range(0, len(batch_repos), self.repos_per_query):
+                    batch = {
+                        repo: pending[repo]
+                        for repo in batch_repos[start : start + self.repos_per_query]
+                    }
+                    query = self._build_query(batch, windows)
+
+                    try:
+                        data, field_errors = self._execute(client, query)
+                    except (httpx.HTTPError, ValueError) as e:
+                        for repo in batch:
+                            errors[repo] = e
+                        continue
+
+                    for index, (repo, connections) in enumerate(batch.items()):
+                        node = data.get(f"r{index}")
+                        if node is None:
+                            message = field_errors.get(
+                                f"r{index}", "仓库不存在或无权限"
+                            )
+                            errors[repo] = RuntimeError(message)
+                            continue
+
+                        for kind in connections:
+                            connection = _extract_connection(node, kind)
+                            if connection is None:
+                                continue  # 空仓库没有默认分支
+
+                            items = [_CONVERTERS[kind](n) for n in connection["nodes"]]
+                            raw[repo][kind].extend(items)
+                            if kind == RELEASES:
+                                self.last_release_pages[repo] = (
+                                    self.last_release_pages.get(repo, 0) + 1
+                                )
+
+                            cursor = self._next_cursor(
+                                kind, connection, items, raw[repo][kind], cutoffs
+                            )
+                            if cursor is not None:
+                                next_pending.setdefault(repo, {})[kind] = cursor
+
+                pending = next_pending
+
+        return raw, errors
+
+    def _new_contributors(
+        self, repo: str, window_start: datetime, data: dict[str, list[dict]]
+    ) -> set[str]:
+        """判断仓库统计窗口内的新贡献者
+
+        有贡献者索引时与 ActivityCollector 共用同一个索引，否则按 30 天采样近似。
+
+        Args:
+            repo: 仓库名称
+            window_start: 统计窗口起点
+            data: 仓库的原始数据（fetch_raw 结果）
+
+        Returns:
+            新贡献者 login 集合（索引查询失败时为空）
+        """
+        if self.activity_collector is None:
+            return sampled_new_contributors(data[COMMITS], data[PAST_COMMITS])
+
+        try:
+            return self.activity_collector.detect_new_contributors(
+                repo, window_start, commit_authors(data[COMMITS])
+            )
+        except GithubException as e:
+            print(f"判断仓库 {repo} 新贡献者失败: {e}")
+            return set()
+
+    @staticmethod
+    def _next_cursor(
+        kind: str,
+        connection: dict[str, Any],
+        page_items: list[dict],
+        collected: list[dict],
+        cutoffs: dict[str, datetime],
+    ) -> str | None:
+        """判断连接是否需要继续翻页
+
+        Returns:
+            下一页游标，无需翻页时返回 None
+        """
+        page_info = connection.get("pageInfo") or {}
+        if not page_info.get("hasNextPage") or not page_items:
+            return None
+
+        if kind == PAST_COMMITS:
+            # 贡献者采样只需要固定数量
+            if len(collected) >= PAST_COMMITS_SAMPLE:
+                return None
+        elif kind in cutoffs:
+            # PR 和 Release 按创建时间倒序，本页最后一条早于起始时间即可停止
+            created_at = parse_timestamp(page_items[-1].get("created_at"))
+            if created_at is None or created_at < cutoffs[kind]:
+                return None
+
+        return page_info.get("endCursor")
+
+    def _create_client(self) -> httpx.Client:
+        """创建 HTTP 客户端"""
+        headers = {"Accept": "application/vnd.github+json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return httpx.Client(headers=headers, timeout=self.timeout)
+
+    def _execute(
+        self, client: httpx.Client, query: str
+    ) -> tuple[dict[str, Any], dict[str, str]]:
+        """执行 GraphQL 查询
+
+        Args:
+            client: HTTP 客户端
+            query: 查询语句
+
+        Returns:
+            (data, {别名: 错误信息})
+
+        Raises:
+            httpx.HTTPError: 请求失败
+            ValueError: 响应中没有 data（查询整体失败）
+        """
+        self.request_count += 1
+        if self.scheduler is None:
+            response = client.post(self.endpoint, json={"query": query})
+        else:
+            token = self.scheduler.acquire(RESOURCE_GRAPHQL)
+            headers = {"Authorization": f"Bearer {token}"} if token else None
+            response = client.post(
+                self.endpoint, json={"query": query}, headers=headers
+            )
+            self.scheduler.update(
+                token, response.headers, response.status_code, RESOURCE_GRAPHQL
+            )
+        response.raise_for_status()
+        body = response.json()
+
+        field_errors: dict[str, str] = {}
+        for error in body.get("errors") or []:
+            path = error.get("path") or []
+            if path:
+                field_errors.setdefault(str(path[0]), error.get("message", ""))
+
+        data = body.get("data")
+        if data is None:
+            messages = "; ".join(e.get("message", "") for e in body.get("errors", []))
+            raise ValueError(f"GraphQL 查询失败: {messages}")
+
+        return data, field_errors
+
+    def _build_query(
+        self,
+        batch: dict[str, dict[str, str | None]],
+        windows: dict[str, tuple[datetime, datetime]],
+    ) -> str:
+        """构造批量查询
+
+        Args:
+            batch: {仓库: {连接类型: 游标}}，游标为 None 表示第一页
+            windows: commit 历史的时间窗口
+
+        Returns:
+            GraphQL 查询语句
+        """
+        fields = []
+        for index, (repo, connections) in enumerate(batch.items()):
+            owner, name = repo.split("/", 1)
+            selections = []
+
+            if PULLS in connections:
+                selections.append(_pulls_selection(connections[PULLS]))
+            if RELEASES in connections:
+                selections.append(_releases_selection(connections[RELEASES]))
+
+            history = [
+                _history_selection(kind, connections[kind], *windows[kind])
+                for kind in (COMMITS, PAST_COMMITS)
+                if kind in connections
+            ]
+            if history:
+                selections.append(
+                    "defaultBranchRef { target { ... on Commit { "
+                    + " ".join(history)
+                    + " } } }"
+                )
+
+            fields.append(
+                f"r{index}: repository(owner: {json.dumps(owner)}, "
+                f"name: {json.dumps(name)}) {{ {' '.join(selections)} }}"
+            )
+
+        return "query { " + " ".join(fields) + " }"
+
+
+def _ensure_tz(value: datetime) -> datetime:
+    """为无时区的时间补充 UTC 时区"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value
+
+
+def _after(cursor: str | None) -> str:
+    """生成分页参数"""
+    return f", after: {json.dumps(cursor)}" if cursor else ""
+
+
+def _pulls_selection(cursor: str | None) -> str:
+    """PR 连接查询片段"""
+    return (
+        f"pullRequests(first: {PR_PAGE_SIZE}{_after(cursor)}, "
+        "orderBy: {field: CREATED_AT, direction: DESC}) { "
+        "pageInfo { hasNextPage endCursor } "
+        "nodes { number title body state isDraft createdAt closedAt mergedAt "
+        "merged url additions deletions changedFiles "
+        "author { login } mergeCommit { oid } "
+        f"labels(first: {LABELS_PER_PR}) {{ nodes {{ name }} }} }} }}"
+    )
+
+
+def _releases_selection(cursor: str | None) -> str:
+    """Release 连接查询片段"""
+    return (
+        f"releases(first: {RELEASE_PAGE_SIZE}{_after(cursor)}, "
+        "orderBy: {field: CREATED_AT, direction: DESC}) { "
+        "pageInfo { hasNextPage endCursor } "
+        "nodes { tagName name isPrerelease createdAt publishedAt description url "
+        "author { login } "
+        f"releaseAssets(first: {ASSETS_PER_RELEASE}) "
+        "{ nodes { name size downloadCount } } } }"
+    )
+
+
+def _history_selection(
+    kind: str, cursor: str | None, since: datetime, until: datetime
+) -> str:
+    """commit 历史查询片段（以连接类型作为别名）"""
+    alias = "commits" if kind == COMMITS else "pastCommits"
+    return (
+        f"{alias}: history(first: {COMMIT_PAGE_SIZE}{_after(cursor)}, "
+        f"since: {json.dumps(since.isoformat())}, "
+        f"until: {json.dumps(until.isoformat())}) {{ "
+        "pageInfo { hasNextPage endCursor } "
+        "nodes { oid message authoredDate author { user { login } } } }"
+    )
+
+
+def _extract_connection(node: dict[str, Any], kind: str) -> dict[str, Any] | None:
+    """从仓库节点中取出指定连接"""
+    if kind == PULLS:
+        return node.get("pullRequests")
+    if kind == RELEASES:
+        return node.get("releases")
+
+    branch = node.get("defaultBranchRef") or {}
+    target = branch.get("target") or {}
+    return target.get("commits" if kind == COMMITS else "pastCommits")
+
+
+def _login(actor: dict[str, Any] | None) -> dict[str, str] | None:
+    """转换 GraphQL actor 为 REST user"""
+    if not actor or not actor.get("login"):
+        return None
+    return {"login": actor["login"]}
+
+
+def _convert_pull(node: dict[str, Any]) -> dict[str, Any]:
+    """转换 GraphQL PR 节点为 REST 形状"""
+    merge_commit = node.get("mergeCommit") or {}
+    return {
+        "number": node["number"],
+        "title": node["title"],
+        "body": node.get("body"),
+        "state": (node.get("state") or "").lower(),
+        "draft": node.get("isDraft", False),
+        "created_at": node.get("createdAt"),
+        "closed_at": node.get("closedAt"),
+        "merged_at": node.get("mergedAt"),
+        "merged": node.get("merged", False),
+        "html_url": node.get("url"),
+        "additions": node.get("additions"),
+        "deletions": node.get("deletions"),
+        "changed_files": node.get("changedFiles"),
+        "user": _login(node.get("author")),
+        "merge_commit_sha": merge_commit.get("oid"),
+        "labels": [
+            {"name": label["name"]}
+            for label in (node.get("labels") or {}).get("nodes", [])
+        ],
+    }
+
+
+def _convert_release(node: dict[str, Any]) -> dict[str, Any]:
+    """转换 GraphQL Release 节点为 REST 形状"""
+    return {
+        "tag_name": node["tagName"],
+        "name": node.get("name"),
+        "prerelease": node.get("isPrerelease", False),
+        "created_at": node.get("createdAt"),
+        "published_at": node.get("publishedAt"),
+        "body": node.get("description"),
+        "author": _login(node.get("author")),
+        "html_url": node.get("url"),
+        "assets": [
+            {
+                "name": asset["name"],
+                "size": asset["size"],
+                "download_count": asset["downloadCount"],
+            }
+            for asset in (node.get("releaseAssets") or {}).get("nodes", [])
+        ],
+    }
+
+
+def _convert_commit(node: dict[str, Any]) -> dict[str, Any]:
+    """转换 GraphQL Commit 节点为 REST 形状"""
+    author = node.get("author") or {}
+    return {
+        "sha": node["oid"],
+        "author": _login(author.get("user")),
+        "commit": {
+            "message": node.get("message") or "",
+            "author": {"date": node.get("authoredDate")},
+        },
+    }
+
+
+_CONVERTERS = {
+    PULLS: _convert_pull,
+    RELEASES: _convert_release,
+    COMMITS: _convert_commit,
+    PAST_COMMITS: _convert_commit,
+}
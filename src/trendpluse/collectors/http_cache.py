@@ -0,0 +1,313 @@
+"""GitHub REST 条件请求缓存
+
+在磁盘上按 (URL, token) 缓存 GET 响应及其 ETag / Last-Modified，
+下次请求时携带 If-None-Match / If-Modified-Since。
+GitHub 对 304 Not Modified 响应不计入速率限制，未变化的仓库不再消耗配额。
+"""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# 304 响应中需要覆盖到缓存响应上的头（速率限制信息以最新响应为准）
+_FRESH_HEADER_PREFIXES = ("x-ratelimit-", "date")
+
+
+@dataclass
+class CachedResponse:
+    """缓存的响应"""
+
+    url: str
+    status: int
+    headers: dict[str, str]
+    body: str  # base64 编码
+    etag: str | None = None
+    last_modified: str | None = None
+    stored_at: float = 0.0
+
+    @property
+    def content(self) -> bytes:
+        """原始响应体"""
+        return base64.b64decode(self.body)
+
+
+class HttpCache:
+    """磁盘 HTTP 缓存
+
+    - 每个条目一个 JSON 文件，文件名为 (token, URL) 的 SHA-256
+    - 读取命中时刷新文件 mtime，淘汰时按 mtime 从旧到新删除（LRU）
+    - 总大小超过 max_bytes 时触发淘汰
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = "data/http_cache",
+        max_bytes: int = 200 * 1024 * 1024,
+    ):
+        """初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存总大小上限（字节）
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: int | None = None
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """重置本次运行的统计计数"""
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """本次运行的统计信息"""
+        return {
+            "http_cache_hits": self.hits,
+            "http_cache_misses": self.misses,
+            "http_cache_stores": self.stores,
+            "http_cache_evictions": self.evictions,
+        }
+
+    def record_hit(self) -> None:
+        """记录一次命中（304 复用缓存内容；采集线程并发调用）"""
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self) -> None:
+        """记录一次未命中"""
+        with self._lock:
+            self.misses += 1
+
+    @staticmethod
+    def make_key(url: str, token: str | None) -> str:
+        """生成缓存键
+
+        Args:
+            url: 完整请求 URL（含查询参数）
+            token: 认证信息（Authorization 头或 token）
+
+        Returns:
+            缓存键
+        """
+        data = f"{token or ''}\n{url}".encode()
+        return hashlib.sha256(data).hexdigest()
+
+    def get(self, key: str) -> CachedResponse | None:
+        """读取缓存条目
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存条目，不存在或损坏时返回 None
+        """
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            entry = CachedResponse(**data)
+        except (OSError, json.JSONDecodeError, TypeError):
+            return None
+
+        # 刷新访问时间，用于 LRU 淘汰
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(
+        self,
+        key: str,
+        url: str,
+        status: int,
+        headers: dict[str, str],
+        content: bytes,
+    ) -> CachedResponse | None:
+        """写入缓存条目
+
+        只有带 ETag 或 Last-Modified 的响应才会被缓存。
+
+        Returns:
+            写入的缓存条目，不可缓存时返回 None
+        """
+        lowered = {k.lower(): v for k, v in headers.items()}
+        etag = lowered.get("etag")
+        last_modified = lowered.get("last-modified")
+        if not etag and not last_modified:
+            return None
+
+        entry = CachedResponse(
+            url=url,
+            status=status,
+            headers=dict(headers),
+            body=base64.b64encode(content).decode("ascii"),
+            etag=etag,
+            last_modified=last_modified,
+            stored_at=time.time(),
+        )
+        data = json.dumps(asdict(entry), ensure_ascii=False).encode("utf-8")
+
+        with self._lock:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            total = self._current_size()
+            old_size = path.stat().st_size if path.exists() else 0
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_bytes(data)
+            tmp_path.replace(path)
+
+            self.stores += 1
+            self._total_bytes = total - old_size + len(data)
+            self._evict_locked()
+
+        return entry
+
+    def conditional_headers(self, entry: CachedResponse) -> dict[str, str]:
+        """生成条件请求头
+
+        Args:
+            entry: 缓存条目
+
+        Returns:
+            If-None-Match / If-Modified-Since 请求头
+        """
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def _path(self, key: str) -> Path:
+        """缓存条目文件路径"""
+        return self.cache_dir / f"{key}.json"
+
+    def _current_size(self) -> int:
+        """当前缓存总大小（首次调用时扫描目录）"""
+        if self._total_bytes is None:
+            self._total_bytes = sum(
+                p.stat().st_size for p in self.cache_dir.glob("*.json")
+            )
+        return self._total_bytes
+
+    def _evict_locked(self) -> None:
+        """按最近访问时间淘汰条目，直到总大小不超过上限"""
+        if self._current_size() <= self.max_bytes:
+            return
+
+        entries = sorted(
+            (p.stat().st_mtime, p.stat().st_size, p)
+            for p in self.cache_dir.glob("*.json")
+        )
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+
+        self._total_bytes = total
+
+
+class CachingHTTPAdapter(HTTPAdapter):
+    """带条件请求缓存的 requests 适配器
+
+    只处理 GET 请求：命中缓存时附加条件请求头，
+    收到 304 时用缓存内容构造 200 响应返回给调用方。
+    """
+
+    def __init__(self, cache: HttpCache, **kwargs: Any):
+        """初始化适配器
+
+        Args:
+            cache: HTTP 缓存
+            **kwargs: 透传给 HTTPAdapter 的参数
+        """
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(  # type: ignore[override]
+        self, request: requests.PreparedRequest, **kwargs: Any
+    ) -> requests.Response:
+        """发送请求（GET 请求走条件缓存）"""
+        if request.method != "GET" or not request.url:
+            return super().send(request, **kwargs)
+
+        authorization = request.headers.get("Authorization")
+        if isinstance(authorization, bytes):
+            authorization = authorization.decode("latin-1")
+        key = self.cache.make_key(request.url, authorization)
+        entry = self.cache.get(key)
+        if entry is not None:
+            request.headers.update(self.cache.conditional_headers(entry))
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            self.cache.record_hit()
+            return self._build_cached_response(request, entry, response)
+
+        self.cache.record_miss()
+        if response.status_code == 200:
+            self.cache.put(
+                key,
+                url=request.url,
+                status=response.status_code,
+                headers=dict(response.headers),
+                content=response.content,
+            )
+        return response
+
+    @staticmethod
+    def _build_cached_response(
+        request: requests.PreparedRequest,
+        entry: CachedResponse,
+        not_modified: requests.Response,
+    ) -> requests.Response:
+        """用缓存条目构造响应
+
+        Args:
+            request: 原始请求
+            entry: 缓存条目
+            not_modified: 304 响应（提供最新的速率限制头）
+
+        Returns:
+            状态码为缓存状态码的响应
+        """
+        headers = CaseInsensitiveDict(entry.headers)
+        for name, value in not_modified.headers.items():
+            if name.lower().startswith(_FRESH_HEADER_PREFIXES):
+                headers[name] = value
+
+        response = requests.Response()
+        response.status_code = entry.status
+        response.reason = "OK"
+        response.headers = headers
+        response._content = entry.content
+        response.url = entry.url
+        response.request = request
+        response.encoding = requests.utils.get_encoding_from_headers(headers)
+        connection = getattr(not_modified, "connection", None)
+        if connection is not None:
+            response.connection = connection
+        return response
@@ -0,0 +1,158 @@
+"""本地 PR 存储
+
+按仓库保存最近的 PR 列表数据和增量同步游标（已同步窗口的起点、最新 updated_at）。
+GitHubEventsCollector 每次只拉取游标之后新建或更新的 PR 并合并进存储，
+回溯窗口内已拉取过的 PR 不再重复请求；回填早于已同步窗口的日期时忽略游标重新拉取。
+"""
+
+import json
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from trendpluse.collectors.formats import parse_timestamp
+
+
+class PullRequestStore:
+    """本地 PR 存储
+
+    存储格式：
+        {"repos": {"owner/repo": {"cursor": {...}, "pulls": {"123": {...}}}}}
+    """
+
+    def __init__(
+        self,
+        path: str | None = "data/pr_store.json",
+        retention_days: int = 30,
+    ):
+        """初始化存储
+
+        Args:
+            path: 存储文件路径，None 表示仅保存在内存中
+            retention_days: PR 最后更新超过该天数后从存储中删除
+        """
+        self.path = Path(path) if path else None
+        self.retention_days = retention_days
+        self._repos: dict[str, dict[str, Any]] = {}
+        self._dirty = False
+        self._load()
+
+    def get_cursor(self, repo: str) -> dict[str, Any] | None:
+        """获取仓库的同步游标
+
+        Args:
+            repo: 仓库名称
+
+        Returns:
+            {"since": str, "updated_at": str}（存储包含 since 之后、updated_at
+            之前更新的全部 PR），从未同步时返回 None
+        """
+        return self._repos.get(repo, {}).get("cursor")
+
+    def set_cursor(self, repo: str, since: datetime, updated_at: datetime) -> None:
+        """更新仓库的同步游标
+
+        Args:
+            repo: 仓库名称
+            since: 已同步窗口的起点
+            updated_at: 已见过的最新 PR 更新时间
+        """
+        self._entry(repo)["cursor"] = {
+            "since": since.isoformat(),
+            "updated_at": updated_at.isoformat(),
+        }
+        self._dirty = True
+
+    def upsert(self, repo: str, pr: dict[str, Any]) -> None:
+        """写入或更新 PR
+
+        Args:
+            repo: 仓库名称
+            pr: PR 数据（REST PR 对象字段名，时间为 ISO 字符串）
+        """
+        self._entry(repo)["pulls"][str(pr["number"])] = pr
+        self._dirty = True
+
+    def query(self, repo: str, since: datetime) -> list[dict[str, Any]]:
+        """查询窗口内新建或合并的 PR
+
+        Args:
+            repo: 仓库名称
+            since: 起始时间
+
+        Returns:
+            PR 列表，按创建时间倒序
+        """
+        results = []
+        for pr in self._repos.get(repo, {}).get("pulls", {}).values():
+            created_at = parse_timestamp(pr.get("created_at"))
+            merged_at = parse_timestamp(pr.get("merged_at"))
+            if (created_at and created_at >= since) or (
+                merged_at and merged_at >= since
+            ):
+                results.append(pr)
+
+        results.sort(key=lambda pr: pr.get("created_at") or "", reverse=True)
+        return results
+
+    def prune(self, keep_since: datetime | None = None) -> int:
+        """删除过期的 PR
+
+        Args:
+            keep_since: 至少保留该时间之后更新的 PR（回溯窗口超过保留天数时使用）
+
+        Returns:
+            删除的 PR 数量
+        """
+        cutoff = datetime.now(UTC) - timedelta(days=self.retention_days)
+        if keep_since is not None and keep_since < cutoff:
+            cutoff = keep_since
+
+        removed = 0
+        for entry in self._repos.values():
+            # 早于 cutoff 的 PR 被删除，已同步窗口的起点随之后移
+            cursor = entry.get("cursor") or {}
+            cursor_since = parse_timestamp(cursor.get("since"))
+            if cursor_since is not None and cursor_since < cutoff:
+                cursor["since"] = cutoff.isoformat()
+                self._dirty = True
+
+            pulls = entry.get("pulls", {})
+            for number in list(pulls):
+                updated_at = parse_timestamp(pulls[number].get("updated_at"))
+                if updated_at is not None and updated_at < cutoff:
+                    del pulls[number]
+                    removed += 1
+
+        if removed:
+            self._dirty = True
+        return removed
+
+    def save(self) -> None:
+        """保存存储（没有变更或未配置路径时跳过）"""
+        if self.path is None or not self._dirty:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"repos": self._repos}, f, ensure_ascii=False)
+        tmp_path.replace(self.path)
+        self._dirty = False
+
+    def _entry(self, repo: str) -> dict[str, Any]:
+        """获取（必要时创建）仓库条目"""
+        return self._repos.setdefault(repo, {"cursor": None, "pulls": {}})
+
+    def _load(self) -> None:
+        """从文件加载存储"""
+        if self.path is None or not self.path.exists():
+            return
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self._repos = data.get("repos", {})
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"加载 PR 存储失败: {e}")
+            self._repos = {}
@@ -0,0 +1,417 @@
+"""GitHub 速率限制调度器
+
+所有 GitHub 请求在发送前向调度器申请一个 token：
+- 令牌桶控制整体请求速率，避免短时间内打满配额或触发二级速率限制
+- 按 token、按资源类型（core / search / graphql）记录剩余配额，
+  优先使用剩余最多的 token，配额将尽时轮换到池中其他 token
+- 根据响应中的 X-RateLimit-Remaining / X-RateLimit-Reset / Retry-After 更新状态，
+  所有 token 都不可用时等待到最早的重置时间
+- 令牌桶额度不足时排队等待，priority_repos 的请求排在其他仓库的请求之前
+"""
+
+import asyncio
+import bisect
+import itertools
+import re
+import threading
+import time
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RESOURCE_CORE = "core"
+RESOURCE_SEARCH = "search"
+RESOURCE_GRAPHQL = "graphql"
+
+# 单次等待的上限（秒），超过后仍然发送请求，由调用方处理失败
+DEFAULT_MAX_WAIT = 900.0
+
+# 令牌桶额度比较的浮点误差容忍
+_EPSILON = 1e-9
+
+_REPO_PATH = re.compile(r"/repos/([^/?#]+/[^/?#]+)")
+
+
+def resource_for_url(url: str) -> str:
+    """根据请求 URL 判断 GitHub 速率限制资源类型
+
+    Args:
+        url: 请求 URL
+
+    Returns:
+        资源类型（core / search / graphql）
+    """
+    if url.rstrip("/").endswith("/graphql"):
+        return RESOURCE_GRAPHQL
+    if "/search/" in url:
+        return RESOURCE_SEARCH
+    return RESOURCE_CORE
+
+
+@dataclass
+class QuotaState:
+    """单个 token 在某类资源上的配额状态"""
+
+    remaining: int | None = None  # None 表示尚未收到响应头
+    reset_at: float = 0.0  # 配额重置时间（epoch 秒）
+    blocked_until: float = 0.0  # Retry-After 或配额耗尽导致的暂停截止时间
+
+
+class RateLimitScheduler:
+    """速率限制调度器（线程安全，支持 asyncio）"""
+
+    def __init__(
+        self,
+        tokens: list[str] | None = None,
+        requests_per_second: float = 10.0,
+        burst: int = 10,
+        min_remaining: int = 20,
+        priority_repos: list[str] | None = None,
+        max_wait: float = DEFAULT_MAX_WAIT,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], Any] = time.sleep,
+    ):
+        """初始化调度器
+
+        Args:
+            tokens: token 池，重复和空值会被忽略，为空时使用匿名访问
+            requests_per_second: 令牌桶补充速率
+            burst: 令牌桶容量
+            min_remaining: 剩余配额低于该值时优先切换到其他 token
+            priority_repos: 优先处理的仓库
+            max_wait: 单次等待上限（秒）
+            clock: 时间函数（测试注入）
+            sleep: 同步等待函数（测试注入）
+
+        Raises:
+            ValueError: requests_per_second 不是正数
+        """
+        if requests_per_second <= 0:
+            raise ValueError(
+                f"requests_per_second 必须大于 0，当前为 {requests_per_second}"
+            )
+
+        pool = list(dict.fromkeys(t for t in (tokens or []) if t))
+        self.tokens = pool or [""]
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.min_remaining = min_remaining
+        self.priority_repos = list(priority_repos or [])
+        self.max_wait = max_wait
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._quotas: dict[tuple[str, str], QuotaState] = {}
+        self._bucket = float(burst)
+        self._bucket_updated = clock()
+        self._last_token: str | None = None
+        # 等待令牌桶额度的请求，按 (是否非优先, 到达顺序) 排序，队首先获得额度
+        self._waiters: list[tuple[int, int]] = []
+        self._waited: set[tuple[int, int]] = set()
+        self._tickets = itertools.count()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """重置本次运行的统计计数"""
+        self.requests = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.rotations = 0
+        self.throttled_responses = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """本次运行的统计信息"""
+        return {
+            "rate_limit_requests": self.requests,
+            "rate_limit_waits": self.waits,
+            "rate_limit_wait_seconds": round(self.wait_seconds),
+            "rate_limit_token_rotations": self.rotations,
+            "rate_limit_throttled_responses": self.throttled_responses,
+        }
+
+    def prioritize(self, repos: list[str]) -> list[str]:
+        """按优先级排列待处理仓库
+
+        priority_repos 中的仓库按其顺序排在最前，其余保持原顺序。
+
+        Args:
+            repos: 仓库列表
+
+        Returns:
+            排序后的仓库列表
+        """
+        rank = {repo: i for i, repo in enumerate(self.priority_repos)}
+        return sorted(repos, key=lambda repo: rank.get(repo, len(rank)))
+
+    def is_priority(self, url: str) -> bool:
+        """判断请求是否属于高优先级仓库
+
+        Args:
+            url: 请求 URL
+
+        Returns:
+            URL 中的仓库在 priority_repos 中时返回 True
+        """
+        match = _REPO_PATH.search(url)
+        return match is not None and match.group(1) in self.priority_repos
+
+    def acquire(self, resource: str = RESOURCE_CORE, priority: bool = False) -> str:
+        """申请发送一个请求（必要时阻塞等待）
+
+        Args:
+            resource: 资源类型
+            priority: 是否为高优先级仓库的请求（排队时先于其他请求获得额度）
+
+        Returns:
+            本次请求使用的 token（匿名访问时为空字符串）
+        """
+        ticket = self._enqueue(priority)
+        try:
+            while True:
+                token, wait = self._reserve(resource, ticket)
+                if token is not None:
+                    break
+                self._sleep(wait)
+        finally:
+            self._dequeue(ticket)
+        if wait > 0:
+            self._sleep(wait)
+        return token
+
+    async def acquire_async(
+        self, resource: str = RESOURCE_CORE, priority: bool = False
+    ) -> str:
+        """申请发送一个请求（异步等待）
+
+        Args:
+            resource: 资源类型
+            priority: 是否为高优先级仓库的请求
+
+        Returns:
+            本次请求使用的 token
+        """
+        ticket = self._enqueue(priority)
+        try:
+            while True:
+                token, wait = self._reserve(resource, ticket)
+                if token is not None:
+                    break
+                await asyncio.sleep(wait)
+        finally:
+            self._dequeue(ticket)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return token
+
+    def update(
+        self,
+        token: str,
+        headers: Mapping[str, str],
+        status: int,
+        resource: str = RESOURCE_CORE,
+    ) -> None:
+        """根据响应头更新配额状态
+
+        Args:
+            token: 请求使用的 token
+            headers: 响应头
+            status: 响应状态码
+            resource: 请求时判断的资源类型（响应头未给出时使用）
+        """
+        lowered = {k.lower(): v for k, v in headers.items()}
+        resource = lowered.get("x-ratelimit-resource", resource)
+        now = self._clock()
+
+        with self._lock:
+            state = self._state(token, resource)
+
+            remaining = _to_int(lowered.get("x-ratelimit-remaining"))
+            if remaining is not None:
+                state.remaining = remaining
+            reset_at = _to_int(lowered.get("x-ratelimit-reset"))
+            if reset_at is not None:
+                state.reset_at = float(reset_at)
+
+            if status not in (403, 429):
+                return
+
+            # 速率限制响应：优先遵循 Retry-After，否则等到配额重置
+            retry_after = _to_int(lowered.get("retry-after"))
+            if retry_after is not None:
+                state.blocked_until = now + retry_after
+                self.throttled_responses += 1
+            elif state.remaining == 0:
+                state.blocked_until = state.reset_at
+                self.throttled_responses += 1
+
+    def _enqueue(self, priority: bool) -> tuple[int, int]:
+        """请求进入等待队列
+
+        Returns:
+            排队凭证
+        """
+        ticket = (0 if priority else 1, next(self._tickets))
+        with self._lock:
+            bisect.insort(self._waiters, ticket)
+        return ticket
+
+    def _dequeue(self, ticket: tuple[int, int]) -> None:
+        """请求离开等待队列"""
+        with self._lock:
+            if ticket in self._waiters:
+                self._waiters.remove(ticket)
+            self._waited.discard(ticket)
+
+    def _reserve(
+        self, resource: str, ticket: tuple[int, int]
+    ) -> tuple[str | None, float]:
+        """排到队首且令牌桶有额度时选择 token 并消耗额度
+
+        Returns:
+            (token, 配额不可用时需要等待的秒数)；尚未轮到时返回
+            (None, 重试前需要等待的秒数)
+        """
+        with self._lock:
+            now = self._clock()
+
+            elapsed = now - self._bucket_updated
+            self._bucket = min(
+                float(self.burst), self._bucket + elapsed * self.requests_per_second
+            )
+            self._bucket_updated = now
+
+            # 令牌桶额度不足或前面还有（更高优先级的）请求时继续排队
+            shortfall = 1 - self._bucket
+            if shortfall > _EPSILON or self._waiters[0] != ticket:
+                # 轮到前面的请求时等待一个补充周期再检查
+                wait = (shortfall if shortfall > _EPSILON else 1) / (
+                    self.requests_per_second
+                )
+                self._record_wait(ticket, wait)
+                return None, wait
+
+            self._bucket -= 1
+            token, quota_wait = self._pick_token(resource, now)
+            wait = min(quota_wait, self.max_wait)
+
+            state = self._state(token, resource)
+            if state.remaining is not None and state.remaining > 0:
+                state.remaining -= 1  # 乐观扣减，避免并发请求同时用光同一个 token
+
+            self.requests += 1
+            if wait > 0:
+                self._record_wait(ticket, wait)
+            self._waiters.remove(ticket)
+            self._waited.discard(ticket)
+            if self._last_token is not None and token != self._last_token:
+                self.rotations += 1
+            self._last_token = token
+
+            return token, wait
+
+    def _record_wait(self, ticket: tuple[int, int], wait: float) -> None:
+        """记录等待统计（同一请求多次等待只计一次）"""
+        if ticket not in self._waited:
+            self._waited.add(ticket)
+            self.waits += 1
+        self.wait_seconds += wait
+
+    def _pick_token(self, resource: str, now: float) -> tuple[str, float]:
+        """选择剩余配额最多的可用 token
+
+        Returns:
+            (token, 所有 token 都不可用时需要等待的秒数)
+        """
+        best_token = None
+        best_score: tuple[bool, int] | None = None
+        earliest_available = None
+
+        for token in self.tokens:
+            state = self._state(token, resource)
+            available_at = self._available_at(state, now)
+            if available_at > now:
+                if earliest_available is None or available_at < earliest_available[1]:
+                    earliest_available = (token, available_at)
+                continue
+
+            # 未知配额视为充足；剩余不足 min_remaining 的 token 排在后面
+            remaining = (
+                state.remaining if state.remaining is not None else 1_000_000_000
+            )
+            score = (remaining >= self.min_remaining, remaining)
+            if best_score is None or score > best_score:
+                best_token = token
+                best_score = score
+
+        if best_token is not None:
+            return best_token, 0.0
+
+        assert earliest_available is not None
+        token, available_at = earliest_available
+        return token, available_at - now
+
+    def _available_at(self, state: QuotaState, now: float) -> float:
+        """token 可以再次使用的时间"""
+        available_at = state.blocked_until
+        if (
+            state.remaining is not None
+            and state.remaining <= 0
+            and state.reset_at > now
+        ):
+            available_at = max(available_at, state.reset_at)
+        return available_at
+
+    def _state(self, token: str, resource: str) -> QuotaState:
+        """获取（必要时创建）配额状态"""
+        key = (token, resource)
+        if key not in self._quotas:
+            self._quotas[key] = QuotaState()
+        return self._quotas[key]
+
+
+class RateLimitedHTTPAdapter(HTTPAdapter):
+    """经过速率限制调度器的 requests 适配器
+
+    每个请求发送前向调度器申请 token 并替换 Authorization 头，
+    收到响应后用速率限制头更新调度器状态。
+    """
+
+    def __init__(self, scheduler: RateLimitScheduler, **kwargs: Any):
+        """初始化适配器
+
+        Args:
+            scheduler: 速率限制调度器
+            **kwargs: 透传给 HTTPAdapter 的参数
+        """
+        super().__init__(**kwargs)
+        self.scheduler = scheduler
+
+    def send(  # type: ignore[override]
+        self, request: requests.PreparedRequest, **kwargs: Any
+    ) -> requests.Response:
+        """按调度器分配的 token 发送请求"""
+        url = request.url or ""
+        resource = resource_for_url(url)
+        token = self.scheduler.acquire(resource, self.scheduler.is_priority(url))
+        if token:
+            request.headers["Authorization"] = f"token {token}"
+
+        response = super().send(request, **kwargs)
+        self.scheduler.update(
+            token, response.headers, response.status_code, resource=resource
+        )
+        return response
+
+
+def _to_int(value: str | None) -> int | None:
+    """解析整数响应头"""
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except ValueError:
+        return None
@@ -3,14 +3,25 @@
 收集 GitHub Releases 数据，包括版本号、发布时间、发布说明等。
 """
 
+from collections.abc import Iterator
 from datetime import UTC, datetime
 from re import match
 from typing import Any
 
 from github import Github, GithubException
 
+from trendpluse.collectors.repo_registry import (
+    MAX_PAGE_SIZE,
+    RepoLookupMixin,
+    RepoRegistry,
+)
 
-class ReleaseCollector:
+# 遇到早于起始时间的 Release 后继续检查的条数
+# GitHub 返回的 Release 大致按创建时间倒序，但草稿转正式、补发旧版本等情况会打乱顺序
+RELEASE_LOOKAHEAD = 10
+
+
+class ReleaseCollector(RepoLookupMixin):
     """Release 数据采集器
 
     收集以下信息：
@@ -20,16 +31,22 @@ class ReleaseCollector:
     - 版本号解析（major.minor.patch）
     """
 
-    def __init__(self, token: str = ""):
+    def __init__(self, token: str = "", registry: RepoRegistry | None = None):
         """初始化采集器
 
         Args:
             token: GitHub Personal Access Token（可选）
+            registry: 共享仓库注册表（可选，提供时复用其客户端和句柄缓存）
         """
-        if token:
+        self.registry = registry
+        if registry is not None:
+            self.client = registry.client
+        elif token:
             self.client = Github(login_or_token=token)
+            self.client.per_page = MAX_PAGE_SIZE
         else:
             self.client = Github()
+            self.client.per_page = MAX_PAGE_SIZE
 
     def collect_releases(
         self,
@@ -56,6 +73,7 @@ class ReleaseCollector:
             "repos_with_releases": 0,
             "repo_releases": [],
             "detailed_releases": [],
+            "pages_fetched": 0,
             "period_start": since.isoformat(),
             "period_end": datetime.now(UTC).isoformat(),
         }
@@ -68,6 +86,8 @@ class ReleaseCollector:
                     include_prereleases=include_prereleases,
                 )
 
+                release_data["pages_fetched"] += repo_releases.pop("pages_fetched")
+
                 if repo_releases["release_count"] > 0:
                     release_data["repo_releases"].append(repo_releases)
                     release_data["detailed_releases"].extend(detailed)
@@ -99,15 +119,18 @@ class ReleaseCollector:
     ) -> tuple[dict[str, Any], list[dict[str, Any]]]:
         """收集单个仓库的 Releases
 
+        按返回顺序逐页扫描，连续 RELEASE_LOOKAHEAD 条早于起始时间后停止，
+        不再翻完整个 Release 历史。
+
         Args:
             repo: 仓库名称
             since: 起始时间
             include_prereleases: 是否包含预发布版本
 
         Returns:
-            (仓库 Release 数据, 详细 Release 列表)
+            (仓库 Release 数据（含本仓库的 pages_fetched）, 详细 Release 列表)
         """
-        repo_obj = self.client.get_repo(repo)
+        repo_obj = self._get_repo(repo)
         all_releases = repo_obj.get_releases()
 
         repo_data: dict[str, Any] = {
@@ -118,11 +141,27 @@ class ReleaseCollector:
         }
 
         detailed_releases = []
-
-        for release in all_releases:
-            # 检查日期
+        consecutive_old = 0
+        pages_fetched = 0
+
+        def paged_releases() -> Iterator[Any]:
+            # 按需逐页请求并计数，扫描停止后不再请求下一页
+            nonlocal pages_fetched
+            while True:
+                page = all_releases.get_page(pages_fetched)
+                pages_fetched += 1
+                yield from page
+                if len(page) < MAX_PAGE_SIZE:
+                    return
+
+        for release in paged_releases():
+            # 检查日期：容忍少量乱序，连续超过窗口则停止翻页
             if release.created_at < since:
+                consecutive_old += 1
+                if consecutive_old > RELEASE_LOOKAHEAD:
+                    break
                 continue
+            consecutive_old = 0
 
             # 检查是否为预发布版本
             if not include_prereleases and release.prerelease:
@@ -162,6 +201,8 @@ class ReleaseCollector:
             if repo_data["latest_release"] is None:
                 repo_data["latest_release"] = detailed
 
+        repo_data["pages_fetched"] = pages_fetched
+
         return repo_data, detailed_releases
 
     def _parse_version(self, tag_name: str) -> dict[str, Any] | None:
@@ -173,41 +214,53 @@ class ReleaseCollector:
         Returns:
             版本信息字典，包含 major, minor, patch, is_prerelease
         """
-        # 移除 'v' 前缀
-        version = tag_name.lstrip("v")
+        return parse_version(tag_name)
 
-        # 检查是否为预发布版本
-        is_prerelease = any(
-            marker in version.lower()
-            for marker in ["alpha", "beta", "rc", "pre", "dev", "nightly"]
-        )
 
-        # 解析版本号
-        pattern = r"^(\d+)\.(\d+)\.(\d+)"
-        m = match(pattern, version)
-
-        if m:
-            major, minor, patch = m.groups()
-            return {
-                "major": int(major),
-                "minor": int(minor),
-                "patch": int(patch),
-                "is_prerelease": is_prerelease,
-            }
+def parse_version(tag_name: str) -> dict[str, Any] | None:
+    """解析版本号
 
-        # 尝试解析 v1.0 或 v2 格式
-        pattern_simple = r"^(\d+)\.(\d+)(?:\.(\d+))?"
-        m_simple = match(pattern_simple, version)
-
-        if m_simple:
-            major = int(m_simple.group(1))
-            minor = int(m_simple.group(2))
-            patch = int(m_simple.group(3)) if m_simple.group(3) else 0
-            return {
-                "major": major,
-                "minor": minor,
-                "patch": patch,
-                "is_prerelease": is_prerelease,
-            }
+    Args:
+        tag_name: Git 标签名（如 v1.2.3, 2.0.0-beta）
+
+    Returns:
+        版本信息字典，包含 major, minor, patch, is_prerelease
+    """
+    # 移除 'v' 前缀
+    version = tag_name.lstrip("v")
+
+    # 检查是否为预发布版本
+    is_prerelease = any(
+        marker in version.lower()
+        for marker in ["alpha", "beta", "rc", "pre", "dev", "nightly"]
+    )
+
+    # 解析版本号
+    pattern = r"^(\d+)\.(\d+)\.(\d+)"
+    m = match(pattern, version)
+
+    if m:
+        major, minor, patch = m.groups()
+        return {
+            "major": int(major),
+            "minor": int(minor),
+            "patch": int(patch),
+            "is_prerelease": is_prerelease,
+        }
+
+    # 尝试解析 v1.0 或 v2 格式
+    pattern_simple = r"^(\d+)\.(\d+)(?:\.(\d+))?"
+    m_simple = match(pattern_simple, version)
+
+    if m_simple:
+        major = int(m_simple.group(1))
+        minor = int(m_simple.group(2))
+        patch = int(m_simple.group(3)) if m_simple.group(3) else 0
+        return {
+            "major": major,
+            "minor": minor,
+            "patch": patch,
+            "is_prerelease": is_prerelease,
+        }
 
-        return None
+    return None
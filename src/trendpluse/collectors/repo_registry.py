@@ -0,0 +1,197 @@
+"""仓库句柄注册表
+
+进程内共享一个带连接池的 PyGithub 客户端，并缓存仓库句柄，
+避免各采集器对同一仓库重复调用 get_repo。
+"""
+
+import threading
+from typing import Any
+
+from github import Auth, Github
+
+from trendpluse.collectors.http_cache import HttpCache
+from trendpluse.collectors.rate_limiter import RateLimitScheduler
+from trendpluse.collectors.transport import install_transport
+
+# 共享客户端的连接池大小（需覆盖并发获取 PR 详情的线程数）
+DEFAULT_POOL_SIZE = 16
+
+# GitHub REST 列表接口单页最大条数
+MAX_PAGE_SIZE = 100
+
+
+class RepoRegistry:
+    """仓库句柄注册表
+
+    - 所有采集器共用同一个 Github 客户端（同一个连接池）
+    - 仓库句柄以懒加载方式创建，不会触发仓库元数据请求
+    - 同一仓库的句柄在进程内只创建一次
+    """
+
+    def __init__(self, client: Github):
+        """初始化注册表
+
+        Args:
+            client: PyGithub 客户端（建议使用 lazy=True 创建）
+        """
+        self.client = client
+        self.http_cache: HttpCache | None = None
+        self.scheduler: RateLimitScheduler | None = None
+        self._repos: dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._lookups = 0
+        self._cache_hits = 0
+        self._fetched = 0
+        # 非懒加载客户端创建句柄时会立即请求仓库元数据
+        self._eager = (
+            getattr(getattr(client, "requester", None), "is_lazy", True) is False
+        )
+
+    @classmethod
+    def from_token(
+        cls,
+        token: str = "",
+        pool_size: int = DEFAULT_POOL_SIZE,
+        http_cache: HttpCache | None = None,
+        scheduler: RateLimitScheduler | None = None,
+    ) -> "RepoRegistry":
+        """根据 token 创建注册表
+
+        Args:
+            token: GitHub Personal Access Token（可选）
+            pool_size: HTTP 连接池大小
+            http_cache: 条件请求缓存（可选）
+            scheduler: 速率限制调度器（可选）
+
+        Returns:
+            RepoRegistry 实例
+        """
+        auth = Auth.Token(token) if token else None
+        client = Github(
+            auth=auth, lazy=True, pool_size=pool_size, per_page=MAX_PAGE_SIZE
+        )
+        registry = cls(client)
+        if http_cache is not None:
+            registry.enable_http_cache(http_cache)
+        if scheduler is not None:
+            registry.enable_rate_limiter(scheduler)
+        return registry
+
+    def enable_http_cache(self, http_cache: HttpCache) -> None:
+        """为共享客户端启用条件请求缓存
+
+        Args:
+            http_cache: 条件请求缓存
+        """
+        self.http_cache = http_cache
+        install_transport(self.client, self.http_cache, self.scheduler)
+
+    def enable_rate_limiter(self, scheduler: RateLimitScheduler) -> None:
+        """让共享客户端的请求经过速率限制调度器
+
+        Args:
+            scheduler: 速率限制调度器
+        """
+        self.scheduler = scheduler
+        install_transport(self.client, self.http_cache, self.scheduler)
+
+    def get_repo(self, repo_name: str) -> Any:
+        """获取仓库句柄
+
+        Args:
+            repo_name: 仓库名称，格式 "owner/repo"
+
+        Returns:
+            PyGithub Repository 对象（懒加载）
+        """
+        with self._lock:
+            self._lookups += 1
+            repo = self._repos.get(repo_name)
+            if repo is not None:
+                self._cache_hits += 1
+                return repo
+
+            repo = self.client.get_repo(repo_name)
+            self._repos[repo_name] = repo
+            if self._eager:
+                self._fetched += 1
+            return repo
+
+    def reset_stats(self) -> None:
+        """重置本次运行的统计计数（句柄缓存保留）"""
+        with self._lock:
+            self._lookups = 0
+            self._cache_hits = 0
+            self._fetched = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """本次运行的统计信息
+
+        每次查找原本都会触发一次 GET /repos/{owner}/{repo}；
+        节省的请求数为查找次数减去实际请求了仓库元数据的次数
+        （懒加载客户端创建句柄不发送请求）。
+        """
+        with self._lock:
+            return {
+                "repo_lookups": self._lookups,
+                "repo_cache_hits": self._cache_hits,
+                "repo_requests_saved": self._lookups - self._fetched,
+            }
+
+
+class RepoLookupMixin:
+    """采集器共用的仓库句柄查找
+
+    采集器提供 registry（共享注册表，可为 None）和 client（PyGithub 客户端）属性。
+    """
+
+    registry: RepoRegistry | None
+    client: Github
+
+    def _get_repo(self, repo_name: str) -> Any:
+        """获取仓库句柄，优先使用共享注册表
+
+        Args:
+            repo_name: 仓库名称，格式 "owner/repo"
+
+        Returns:
+            PyGithub Repository 对象
+        """
+        if self.registry is not None:
+            return self.registry.get_repo(repo_name)
+        return self.client.get_repo(repo_name)
+
+
+# 进程级注册表（按 token 区分）
+_registries: dict[str, RepoRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_repo_registry(
+    token: str = "",
+    http_cache: HttpCache | None = None,
+    scheduler: RateLimitScheduler | None = None,
+) -> RepoRegistry:
+    """获取进程级共享的仓库注册表
+
+    Args:
+        token: GitHub Personal Access Token（可选）
+        http_cache: 条件请求缓存（可选，与已有注册表使用的实例不同时替换）
+        scheduler: 速率限制调度器（可选，与已有注册表使用的实例不同时替换）
+
+    Returns:
+        RepoRegistry 实例，同一 token 始终返回同一个实例
+
+    同一进程中创建多个流水线时，注册表使用最近一个流水线的缓存和调度器，
+    其请求和统计都落在该流水线自己的实例上。
+    """
+    with _registries_lock:
+        if token not in _registries:
+            _registries[token] = RepoRegistry.from_token(token)
+        registry = _registries[token]
+        if http_cache is not None and registry.http_cache is not http_cache:
+            registry.enable_http_cache(http_cache)
+        if scheduler is not None and registry.scheduler is not scheduler:
+            registry.enable_rate_limiter(scheduler)
+        return registry
@@ -0,0 +1,86 @@
+"""PyGithub 传输层定制
+
+PyGithub 没有公开替换传输层的接口，这里替换客户端 Requester 使用的连接类：
+新连接在创建 requests.Session 后挂载组合后的适配器（条件请求缓存、速率限制调度）。
+只影响传入的客户端实例，不修改全局默认连接类。
+"""
+
+from typing import Any
+
+from requests.adapters import HTTPAdapter
+
+from trendpluse.collectors.http_cache import CachingHTTPAdapter, HttpCache
+from trendpluse.collectors.rate_limiter import (
+    RateLimitedHTTPAdapter,
+    RateLimitScheduler,
+)
+
+
+def build_adapter_class(
+    http_cache: HttpCache | None, scheduler: RateLimitScheduler | None
+) -> type[HTTPAdapter]:
+    """按启用的组件组合适配器类
+
+    缓存适配器在外层：缓存键使用原始 Authorization（主 token），
+    调度器替换 token 后不影响缓存命中。
+
+    Args:
+        http_cache: 条件请求缓存（可选）
+        scheduler: 速率限制调度器（可选）
+
+    Returns:
+        适配器类
+    """
+    bases: list[type[HTTPAdapter]] = []
+    if http_cache is not None:
+        bases.append(CachingHTTPAdapter)
+    if scheduler is not None:
+        bases.append(RateLimitedHTTPAdapter)
+    if not bases:
+        return HTTPAdapter
+    if len(bases) == 1:
+        return bases[0]
+    return type("GitHubHTTPAdapter", tuple(bases), {})
+
+
+def install_transport(
+    client: Any,
+    http_cache: HttpCache | None = None,
+    scheduler: RateLimitScheduler | None = None,
+) -> None:
+    """为 PyGithub 客户端安装定制传输层
+
+    重复调用时基于最初的连接类重新安装，不会层层叠加。
+
+    Args:
+        client: PyGithub Github 实例
+        http_cache: 条件请求缓存（可选）
+        scheduler: 速率限制调度器（可选）
+    """
+    requester = client.requester
+    current_class = requester._Requester__connectionClass
+    base_class = getattr(current_class, "base_connection_class", current_class)
+
+    adapter_class = build_adapter_class(http_cache, scheduler)
+    adapter_kwargs: dict[str, Any] = {}
+    if http_cache is not None:
+        adapter_kwargs["cache"] = http_cache
+    if scheduler is not None:
+        adapter_kwargs["scheduler"] = scheduler
+
+    class GitHubConnectionClass(base_class):  # type: ignore[misc, valid-type]
+        base_connection_class = base_class
+
+        def __init__(self, *args: Any, **kwargs: Any) -> None:
+            super().__init__(*args, **kwargs)
+            self.adapter = adapter_class(
+                max_retries=self.retry,
+                pool_connections=self.pool_size,
+                pool_maxsize=self.pool_size,
+                **adapter_kwargs,
+            )
+            self.session.mount("https://", self.adapter)
+            self.session.mount("http://", self.adapter)
+
+    requester._Requester__connectionClass = GitHubConnectionClass
+    requester._Requester__connection = None  # 下次请求时使用新连接类重建
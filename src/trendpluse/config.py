@@ -3,6 +3,8 @@
 使用 pydantic-settings 管理配置，支持环境变量和 .env 文件。
 """
 
+from typing import Literal
+
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -84,6 +86,47 @@ class Settings(BaseSettings):
         description="要追踪的仓库列表",
     )
     github_base_url: str = "https://api.github.com"
+    github_graphql_url: str = "https://api.github.com/graphql"
+
+    # 采集配置
+    collection_mode: Literal["sync", "async", "graphql"] = Field(
+        default="sync",
+        description=(
+            "采集模式：sync（PyGithub 逐仓库）、async（httpx 并发）"
+            "或 graphql（GraphQL 批量查询）"
+        ),
+    )
+    github_max_concurrency: int = Field(
+        default=8, description="异步采集时每个主机的最大并发请求数"
+    )
+    github_tokens: list[str] = Field(
+        default=[],
+        description="额外的 GitHub token，与 github_token 组成 token 池轮换使用",
+    )
+    github_requests_per_second: float = Field(
+        default=10.0, gt=0, description="GitHub 请求的平均速率上限（令牌桶补充速率）"
+    )
+    github_priority_repos: list[str] = Field(
+        default=[], description="优先采集的仓库（配额紧张时先完成）"
+    )
+    http_cache_dir: str = Field(
+        default="data/http_cache", description="GitHub 条件请求缓存目录"
+    )
+    http_cache_max_mb: int = Field(
+        default=200, description="条件请求缓存大小上限（MB）"
+    )
+    contributor_index_path: str = Field(
+        default="data/contributor_index.json",
+        description="已知贡献者索引文件（用于新贡献者判断）",
+    )
+    pr_store_path: str = Field(
+        default="data/pr_store.json",
+        description="本地 PR 存储文件（含增量同步游标）",
+    )
+    event_store_path: str = Field(
+        default="data/events.db",
+        description="本地事件存储（SQLite），重跑和回填时直接查询",
+    )
 
     # Anthropic/智谱 AI 配置
     anthropic_api_key: str = Field(description="Anthropic/智谱 AI API Key")
@@ -96,6 +139,55 @@ class Settings(BaseSettings):
     )
     anthropic_max_tokens: int = 8000
     anthropic_timeout: int = 120
+    anthropic_max_concurrency: int = Field(
+        default=4, description="同时在途的 LLM 请求数上限（所有分析器共享）"
+    )
+    analysis_max_concurrency: int = Field(
+        default=4, description="并发分析的 PR 数（1 表示串行）"
+    )
+    analysis_item_timeout: float = Field(
+        default=180.0, description="单个 PR 的分析超时（秒）"
+    )
+    analysis_batch_size: int = Field(
+        default=5, description="每次调用最多合并分析的 PR 数（1 表示逐个分析）"
+    )
+    analysis_batch_token_limit: int = Field(
+        default=6000, description="批量分析 Prompt 的估算 token 上限"
+    )
+    commit_chunk_token_limit: int = Field(
+        default=8000, description="commit 分析单个分块 Prompt 的估算 token 上限"
+    )
+    combined_release_analysis: bool = Field(
+        default=True, description="Release 信号和 breaking changes 合并为一次分析"
+    )
+    release_chunk_token_limit: int = Field(
+        default=8000, description="Release 综合分析单个分块 Prompt 的估算 token 上限"
+    )
+    llm_cache_dir: str = Field(default="data/llm_cache", description="LLM 响应缓存目录")
+    llm_cache_ttl_hours: int = Field(
+        default=168, description="LLM 响应缓存有效期（小时）"
+    )
+    llm_cache_max_mb: int = Field(default=100, description="LLM 响应缓存大小上限（MB）")
+    llm_prompt_caching: bool = Field(
+        default=True,
+        description="达到最小缓存长度的固定 system 前缀标记为可缓存（provider 侧缓存）",
+    )
+    llm_batch_mode: bool = Field(
+        default=False, description="分析请求合并为一个批处理任务提交（适合夜间运行）"
+    )
+    llm_batch_base_url: str | None = Field(
+        default=None,
+        description="批处理接口的 API Base URL（默认同 anthropic_base_url）",
+    )
+    llm_batch_state_path: str = Field(
+        default="data/llm_batch.json", description="批处理任务状态文件（用于重启续接）"
+    )
+    llm_batch_poll_interval: float = Field(
+        default=60.0, description="批处理任务轮询间隔（秒）"
+    )
+    llm_batch_max_wait_hours: float = Field(
+        default=24.0, description="批处理任务最长等待时间（小时），超时退回即时调用"
+    )
 
     # 筛选规则
     candidate_labels: list[str] = [
@@ -119,6 +211,9 @@ class Settings(BaseSettings):
     # 成本控制
     daily_token_budget: int = 100_000
     max_retries: int = 3
+    token_ledger_path: str = Field(
+        default="data/token_ledger.json", description="每日 token 用量账本路径"
+    )
 
     # 输出配置
     output_dir: str = "reports/daily"
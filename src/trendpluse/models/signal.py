@@ -69,3 +69,61 @@ class DailyReport(BaseModel):
         default=None,
         description="监控的仓库列表（可选）",
     )
+
+
+class PRSignal(BaseModel):
+    """批量提取中单个 PR 的信号"""
+
+    pr_number: int = Field(description="信号对应的 PR 编号")
+    signal: Signal
+
+
+class PRSignalBatch(BaseModel):
+    """批量提取的结果（每个 PR 一条）"""
+
+    items: list[PRSignal] = Field(description="每个 PR 的信号，按 PR 编号对应")
+
+
+class BreakingChange(BaseModel):
+    """单条不兼容变更"""
+
+    description: str = Field(description="变更描述（简短）")
+    impact: Literal["high", "medium", "low"] = Field(description="影响等级")
+    category: Literal["API", "Config", "Behavior", "Dependency"] = Field(
+        description="分类"
+    )
+
+
+class ReleaseBreakingChanges(BaseModel):
+    """单个 Release 的 breaking changes"""
+
+    repo: str = Field(description="仓库名")
+    tag_name: str = Field(description="版本标签")
+    has_breaking: bool = True
+    changes: list[BreakingChange] = Field(default_factory=list)
+
+
+class ReleaseSignal(BaseModel):
+    """单个 Release 的趋势信号（由分析器补全 ID 和来源）"""
+
+    repo: str = Field(description="信号来源的仓库名")
+    tag_name: str = Field(description="信号来源的版本标签")
+    title: str = Field(description="简短标题（5-10字）")
+    type: Literal[
+        "capability", "abstraction", "workflow", "eval", "safety", "performance"
+    ] = Field(description="信号类型")
+    category: Literal["engineering", "research"] = Field(description="信号分类")
+    impact_score: int = Field(ge=1, le=5, description="影响评分 1-5")
+    why_it_matters: str = Field(description="1-2 句话说明重要性")
+    related_repos: list[str] = Field(default_factory=list, description="相关仓库")
+
+
+class ReleaseAnalysis(BaseModel):
+    """一次 Release 分析同时给出的趋势信号和 breaking changes"""
+
+    signals: list[ReleaseSignal] = Field(
+        default_factory=list, description="重大更新的趋势信号（可为空）"
+    )
+    breaking_changes: list[ReleaseBreakingChanges] = Field(
+        default_factory=list, description="只包含有 breaking changes 的 Release"
+    )
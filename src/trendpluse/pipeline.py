@@ -6,20 +6,31 @@
 from datetime import datetime, timedelta
 from pathlib import Path
 
-from anthropic import Anthropic
-
 from trendpluse.analyzers.breaking_changes_detector import (
     BreakingChangesDetector,
 )
 from trendpluse.analyzers.commit_analyzer import CommitAnalyzer
+from trendpluse.analyzers.llm_batch import LLMBatchRunner
+from trendpluse.analyzers.llm_cache import LLMCache
+from trendpluse.analyzers.llm_gateway import LLMGateway
 from trendpluse.analyzers.release_analyzer import ReleaseAnalyzer
+from trendpluse.analyzers.release_insights import ReleaseInsightAnalyzer
 from trendpluse.analyzers.signal_deduplicator import SignalDeduplicator
+from trendpluse.analyzers.token_budget import TokenBudget
 from trendpluse.analyzers.trend_analyzer import TrendAnalyzer
 from trendpluse.collectors.activity import ActivityCollector
+from trendpluse.collectors.async_engine import AsyncCollectionEngine
+from trendpluse.collectors.contributor_index import ContributorIndex
+from trendpluse.collectors.event_store import EventStore
 from trendpluse.collectors.filter import EventFilter
 from trendpluse.collectors.github_api import GitHubDetailFetcher
 from trendpluse.collectors.github_events import GitHubEventsCollector
+from trendpluse.collectors.graphql import GraphQLCollector
+from trendpluse.collectors.http_cache import HttpCache
+from trendpluse.collectors.pr_store import PullRequestStore
+from trendpluse.collectors.rate_limiter import RateLimitScheduler
 from trendpluse.collectors.releases import ReleaseCollector
+from trendpluse.collectors.repo_registry import get_repo_registry
 from trendpluse.config import Settings
 from trendpluse.models.signal import DailyReport
 from trendpluse.reporters.markdown_reporter import MarkdownReporter
@@ -36,43 +47,137 @@ class TrendPulsePipeline:
         """
         self.settings = settings or Settings()
 
-        # 初始化 LLM 客户端
-        client_kwargs: dict[str, str | None] = {
-            "api_key": self.settings.anthropic_api_key
-        }
-        if self.settings.anthropic_base_url:
-            client_kwargs["base_url"] = self.settings.anthropic_base_url
-        llm_client = Anthropic(**client_kwargs)
+        # 所有分析器共享同一个 LLM 网关（连接池、并发上限、超时、重试策略和响应缓存）
+        self.llm_cache = LLMCache(
+            cache_dir=self.settings.llm_cache_dir,
+            ttl=self.settings.llm_cache_ttl_hours * 3600,
+            max_bytes=self.settings.llm_cache_max_mb * 1024 * 1024,
+        )
+        # 每日 token 预算：所有 LLM 调用经网关按阶段优先级放行
+        self.token_budget = TokenBudget(
+            daily_limit=self.settings.daily_token_budget,
+            ledger_path=self.settings.token_ledger_path,
+        )
+        self.llm_gateway = LLMGateway(
+            api_key=self.settings.anthropic_api_key,
+            base_url=self.settings.anthropic_base_url,
+            timeout=self.settings.anthropic_timeout,
+            max_retries=self.settings.max_retries,
+            max_concurrency=self.settings.anthropic_max_concurrency,
+            cache=self.llm_cache,
+            budget=self.token_budget,
+            prompt_caching=self.settings.llm_prompt_caching,
+        )
+        # 批处理模式：一次运行的分析请求合并为一个批处理任务
+        self.llm_batch = None
+        if self.settings.llm_batch_mode:
+            self.llm_batch = LLMBatchRunner(
+                gateway=self.llm_gateway,
+                state_path=self.settings.llm_batch_state_path,
+                base_url=self.settings.llm_batch_base_url,
+                poll_interval=self.settings.llm_batch_poll_interval,
+                max_wait=self.settings.llm_batch_max_wait_hours * 3600,
+            )
+
+        # 所有 GitHub 组件共享同一个客户端、仓库句柄缓存、条件请求缓存和速率限制调度器
+        self.http_cache = HttpCache(
+            cache_dir=self.settings.http_cache_dir,
+            max_bytes=self.settings.http_cache_max_mb * 1024 * 1024,
+        )
+        self.rate_limiter = RateLimitScheduler(
+            tokens=[self.settings.github_token, *self.settings.github_tokens],
+            requests_per_second=self.settings.github_requests_per_second,
+            priority_repos=self.settings.github_priority_repos,
+        )
+        self.repo_registry = get_repo_registry(
+            self.settings.github_token,
+            http_cache=self.http_cache,
+            scheduler=self.rate_limiter,
+        )
 
         # 初始化组件
-        self.collector = GitHubEventsCollector(token=self.settings.github_token)
-        self.activity_collector = ActivityCollector(token=self.settings.github_token)
-        self.release_collector = ReleaseCollector(token=self.settings.github_token)
+        self.event_store = EventStore(path=self.settings.event_store_path)
+        self.pr_store = PullRequestStore(path=self.settings.pr_store_path)
+        self.collector = GitHubEventsCollector(
+            token=self.settings.github_token,
+            registry=self.repo_registry,
+            pr_store=self.pr_store,
+        )
+        self.contributor_index = ContributorIndex(
+            path=self.settings.contributor_index_path
+        )
+        self.activity_collector = ActivityCollector(
+            token=self.settings.github_token,
+            registry=self.repo_registry,
+            contributor_index=self.contributor_index,
+        )
+        self.release_collector = ReleaseCollector(
+            token=self.settings.github_token, registry=self.repo_registry
+        )
+        self.async_engine = AsyncCollectionEngine(
+            token=self.settings.github_token,
+            base_url=self.settings.github_base_url,
+            max_concurrency_per_host=self.settings.github_max_concurrency,
+            http_cache=self.http_cache,
+            scheduler=self.rate_limiter,
+            activity_collector=self.activity_collector,
+        )
+        self.graphql_collector = GraphQLCollector(
+            token=self.settings.github_token,
+            endpoint=self.settings.github_graphql_url,
+            scheduler=self.rate_limiter,
+            activity_collector=self.activity_collector,
+        )
         self.commit_analyzer = CommitAnalyzer(
             api_key=self.settings.anthropic_api_key,
             model=self.settings.anthropic_model,
             base_url=self.settings.anthropic_base_url,
+            gateway=self.llm_gateway,
+            chunk_token_limit=self.settings.commit_chunk_token_limit,
+            max_concurrency=self.settings.analysis_max_concurrency,
         )
+        # Release 信号和 breaking changes 共用一次综合分析
+        self.release_insights = None
+        if self.settings.combined_release_analysis:
+            self.release_insights = ReleaseInsightAnalyzer(
+                api_key=self.settings.anthropic_api_key,
+                model=self.settings.anthropic_model,
+                base_url=self.settings.anthropic_base_url,
+                gateway=self.llm_gateway,
+                chunk_token_limit=self.settings.release_chunk_token_limit,
+                max_concurrency=self.settings.analysis_max_concurrency,
+            )
         self.release_analyzer = ReleaseAnalyzer(
             api_key=self.settings.anthropic_api_key,
             model=self.settings.anthropic_model,
             base_url=self.settings.anthropic_base_url,
+            gateway=self.llm_gateway,
+            insights=self.release_insights,
         )
         self.breaking_changes_detector = BreakingChangesDetector(
             api_key=self.settings.anthropic_api_key,
             model=self.settings.anthropic_model,
             base_url=self.settings.anthropic_base_url,
+            gateway=self.llm_gateway,
+            insights=self.release_insights,
         )
         self.filter = EventFilter(max_count=self.settings.max_candidates)
-        self.fetcher = GitHubDetailFetcher(token=self.settings.github_token)
+        self.fetcher = GitHubDetailFetcher(
+            token=self.settings.github_token, registry=self.repo_registry
+        )
         self.analyzer = TrendAnalyzer(
             api_key=self.settings.anthropic_api_key,
             model=self.settings.anthropic_model,
             base_url=self.settings.anthropic_base_url,
+            gateway=self.llm_gateway,
+            max_concurrency=self.settings.analysis_max_concurrency,
+            item_timeout=self.settings.analysis_item_timeout,
+            batch_size=self.settings.analysis_batch_size,
+            batch_token_limit=self.settings.analysis_batch_token_limit,
         )
         # 初始化信号去重器
         self.deduplicator = SignalDeduplicator(
-            llm_client=llm_client,
+            llm_client=self.llm_gateway,
             lookback_days=self.settings.days_to_lookback,  # 与 PR 回溯天数一致
             history_path="data/signal_history.json",
         )
@@ -90,48 +195,64 @@ class TrendPulsePipeline:
         if date is None:
             date = datetime.now()
 
-        # 0. 收集仓库活跃度数据（独立于 PR 分析）
-        activity_data = self.activity_collector.collect_activity(
-            repos=self.settings.github_repos,
-            since=date,
-        )
+        # 重置本次运行的统计计数
+        self.repo_registry.reset_stats()
+        self.http_cache.reset_stats()
+        self.graphql_collector.reset_stats()
+        self.rate_limiter.reset_stats()
+        self.fetcher.reset_stats()
+        self.event_store.reset_stats()
+        self.llm_gateway.reset_stats()
+        self.llm_cache.reset_stats()
+        self.token_budget.reset_stats()
+        self.analyzer.reset_stats()
+        for analyzer in self._encoding_analyzers():
+            analyzer.reset_stats()
+        if self.llm_batch is not None:
+            self.llm_batch.reset_stats()
+
+        # 0. 采集活跃度、Releases（回溯 7 天）和 PR 事件（回溯 7 天）
+        activity_data, release_data, events = self._collect(date)
+        detailed_commits = activity_data.get("detailed_commits", [])
+        has_releases = bool(release_data and release_data.get("detailed_releases"))
 
-        # 0.3. 收集 Releases 数据（回溯 7 天）
-        release_since = date - timedelta(days=self.settings.days_to_lookback)
-        release_data = self.release_collector.collect_releases(
-            repos=self.settings.github_repos,
-            since=release_since,
-            include_prereleases=getattr(self.settings, "include_prereleases", False),
-        )
+        # 1. 筛选候选事件并获取详细信息
+        candidates = self.filter.filter_candidates(events)
+        pr_details = []
+        if candidates:
+            pr_details = self.fetcher.fetch_multiple_pr_details(candidates)
+            for fetch_error in self.fetcher.last_errors:
+                print(
+                    f"获取 PR {fetch_error.repo}#{fetch_error.number} 失败 "
+                    f"({fetch_error.reason}): {fetch_error.message}"
+                )
+
+        # 1.5. 批处理模式：先把本次运行的分析请求作为一个批处理任务完成
+        if self.llm_batch is not None:
+            self._run_llm_batch(
+                date,
+                detailed_commits,
+                release_data if has_releases else None,
+                pr_details,
+            )
 
-        # 0.5. 分析 commits 提取信号
-        detailed_commits = activity_data.get("detailed_commits", [])
+        # 2. 分析 commits 提取信号
         commit_signals = []
         if detailed_commits:
             commit_signals = self.commit_analyzer.analyze_commits(detailed_commits)
 
-        # 0.6. 分析 releases 提取信号
+        # 2.5. 分析 releases 提取信号
         release_signals = []
-        if release_data and release_data.get("detailed_releases"):
+        if has_releases:
             release_signals = self.release_analyzer.analyze_releases(release_data)
 
-        # 0.7. 检测 breaking changes
+        # 3. 检测 breaking changes
         breaking_changes = []
-        if release_data and release_data.get("detailed_releases"):
+        if has_releases:
             breaking_changes = self.breaking_changes_detector.detect_breaking_changes(
                 release_data
             )
 
-        # 1. 从 GitHub API 获取 PR（回溯 7 天）
-        pr_since = date - timedelta(days=self.settings.days_to_lookback)
-        events = self.collector.fetch_events(
-            repos=self.settings.github_repos,
-            since=pr_since,
-        )
-
-        # 2. 筛选候选事件
-        candidates = self.filter.filter_candidates(events)
-
         # 如果没有候选事件，返回带活跃度、commit 和 release 信号的空报告
         if not candidates:
             report = self._generate_empty_report(
@@ -142,9 +263,6 @@ class TrendPulsePipeline:
             self.reporter.save_report(report, output_path)
             return report
 
-        # 3. 获取详细信息
-        pr_details = self.fetcher.fetch_multiple_pr_details(candidates)
-
         if not pr_details:
             report = self._generate_empty_report(
                 date, activity_data, commit_signals, release_data
@@ -156,6 +274,11 @@ class TrendPulsePipeline:
 
         # 4. AI 分析提取信号
         signals = self.analyzer.analyze_prs(pr_details)
+        for analysis_error in self.analyzer.last_errors:
+            print(
+                f"分析 PR {analysis_error.repo}#{analysis_error.number} 失败 "
+                f"({analysis_error.reason}): {analysis_error.message}"
+            )
 
         if not signals:
             report = self._generate_empty_report(
@@ -185,6 +308,7 @@ class TrendPulsePipeline:
             release_data.get("detailed_releases", [])
         )
         report.stats["total_breaking_changes"] = len(breaking_changes)
+        report.stats.update(self._collection_stats(release_data))
 
         # 7. 保存报告
         output_path = self._get_output_path(date)
@@ -192,6 +316,172 @@ class TrendPulsePipeline:
 
         return report
 
+    def _run_llm_batch(
+        self,
+        date: datetime,
+        detailed_commits: list[dict],
+        release_data: dict | None,
+        pr_details: list[dict],
+    ) -> None:
+        """批处理模式：收集本次运行的分析请求，作为一个批处理任务提交并等待结果
+
+        收集阶段各分析器照常构造请求，但请求登记到批处理任务而不发出（结果丢弃）；
+        批处理结果写入 LLM 缓存后，随后的正常分析流程直接命中缓存。
+        去重和日报总览依赖 PR 分析结果，仍为即时调用。
+
+        Args:
+            date: 分析日期（同一日期重启时续接已提交的批次）
+            detailed_commits: 详细 commit 列表
+            release_data: Release 数据（没有 release 时为 None）
+            pr_details: PR 详情列表
+        """
+        assert self.llm_batch is not None
+        with self.llm_batch.collecting():
+            if detailed_commits:
+                self.commit_analyzer.analyze_commits(detailed_commits)
+            if release_data:
+                self.release_analyzer.analyze_releases(release_data)
+                self.breaking_changes_detector.detect_breaking_changes(release_data)
+            if pr_details:
+                self.analyzer.analyze_prs(pr_details)
+        # 收集阶段的缓存查询会在正常分析时重复一次，不计入本次运行
+        # （批处理结果写入缓存的次数仍计入）
+        self.llm_cache.reset_stats()
+
+        self.llm_batch.run(run_id=date.strftime("%Y-%m-%d"))
+
+        # 收集阶段的分析统计不计入本次运行
+        self.analyzer.reset_stats()
+        for analyzer in self._encoding_analyzers():
+            analyzer.reset_stats()
+
+    def _collect(self, date: datetime) -> tuple[dict, dict, list[dict]]:
+        """采集活跃度、Release 和 PR 事件
+
+        根据 collection_mode 选择逐仓库同步采集、异步并发采集或 GraphQL 批量采集，
+        各模式返回的数据结构完全一致。
+
+        Args:
+            date: 分析日期
+
+        Returns:
+            (activity_data, release_data, events)
+        """
+        release_since = date - timedelta(days=self.settings.days_to_lookback)
+        pr_since = date - timedelta(days=self.settings.days_to_lookback)
+        include_prereleases = getattr(self.settings, "include_prereleases", False)
+        # 高优先级仓库排在前面；并发请求排队等待额度时，调度器也先放行这些仓库的请求
+        repos = self.rate_limiter.prioritize(self.settings.github_repos)
+
+        if self.settings.collection_mode == "graphql":
+            activity_data, release_data, events = self.graphql_collector.collect_all(
+                repos=repos,
+                activity_since=date,
+                release_since=release_since,
+                pr_since=pr_since,
+                include_prereleases=include_prereleases,
+            )
+            return (
+                activity_data,
+                release_data,
+                self._sync_events(
+                    events,
+                    "github_graphql",
+                    repos,
+                    pr_since,
+                    date,
+                    synced_repos=self.graphql_collector.last_synced_repos,
+                ),
+            )
+
+        if self.settings.collection_mode == "async":
+            activity_data, release_data, events = self.async_engine.collect_all(
+                repos=repos,
+                activity_since=date,
+                release_since=release_since,
+                pr_since=pr_since,
+                include_prereleases=include_prereleases,
+            )
+            return (
+                activity_data,
+                release_data,
+                self._sync_events(
+                    events,
+                    "github_api",
+                    repos,
+                    pr_since,
+                    date,
+                    synced_repos=self.async_engine.last_synced_repos,
+                ),
+            )
+
+        # 收集仓库活跃度数据（独立于 PR 分析）
+        activity_data = self.activity_collector.collect_activity(
+            repos=repos,
+            since=date,
+        )
+
+        # 收集 Releases 数据
+        release_data = self.release_collector.collect_releases(
+            repos=repos,
+            since=release_since,
+            include_prereleases=include_prereleases,
+        )
+
+        # 本地事件存储已覆盖回溯窗口时（重跑或回填）直接查询，不再请求 GitHub
+        if self.event_store.covers(repos, pr_since, date):
+            self.event_store.fetches_skipped += 1
+            events = self.event_store.query(repos, pr_since, until=date)
+            return activity_data, release_data, events
+
+        # 从 GitHub API 获取 PR
+        events = self.collector.fetch_events(
+            repos=repos,
+            since=pr_since,
+        )
+
+        return (
+            activity_data,
+            release_data,
+            self._sync_events(
+                events,
+                "github_api",
+                repos,
+                pr_since,
+                date,
+                synced_repos=self.collector.last_synced_repos,
+            ),
+        )
+
+    def _sync_events(
+        self,
+        events: list[dict],
+        source: str,
+        repos: list[str],
+        since: datetime,
+        date: datetime,
+        synced_repos: list[str],
+    ) -> list[dict]:
+        """将采集到的事件写入本地事件存储，并从存储中查询回溯窗口
+
+        Args:
+            events: 本次采集的事件
+            source: 数据来源
+            repos: 仓库列表
+            since: 回溯窗口起点
+            date: 分析日期
+            synced_repos: 本次获取成功的仓库（只有这些仓库记为已覆盖）
+
+        Returns:
+            回溯窗口内（不晚于分析日期）的事件（包含此前运行已存储的事件）
+        """
+        self.event_store.add_events(events, source=source)
+        # 只声明回溯窗口已覆盖：窗口外（晚于分析日期）的事件可能不完整
+        # 获取失败的仓库不记录覆盖，重跑同一日期时会重新请求
+        covered = [repo for repo in repos if repo in synced_repos]
+        self.event_store.record_coverage(covered, since, date, source=source)
+        return self.event_store.query(repos, since, until=date)
+
     def _generate_empty_report(
         self,
         date: datetime,
@@ -229,6 +519,8 @@ class TrendPulsePipeline:
             },
         )
 
+        report.stats.update(self._collection_stats(release_data))
+
         # 添加活跃度和 release 数据（如果有）
         if activity_data:
             report.activity = activity_data
@@ -240,6 +532,46 @@ class TrendPulsePipeline:
 
         return report
 
+    def _collection_stats(self, release_data: dict | None = None) -> dict[str, int]:
+        """获取本次运行的采集统计
+
+        Args:
+            release_data: Release 数据（可选，包含 Release 翻页数时一并输出）
+
+        Returns:
+            采集统计字典
+        """
+        stats = {
+            **self.repo_registry.stats,
+            **self.http_cache.stats,
+            **self.rate_limiter.stats,
+            **self.fetcher.stats,
+            **self.event_store.stats,
+            **self.llm_gateway.stats,
+            **self.llm_cache.stats,
+            **self.token_budget.stats,
+            **self.analyzer.stats,
+        }
+        if release_data and "pages_fetched" in release_data:
+            stats["release_pages_fetched"] = release_data["pages_fetched"]
+        if self.settings.collection_mode == "graphql":
+            stats.update(self.graphql_collector.stats)
+        for analyzer in self._encoding_analyzers():
+            stats.update(analyzer.stats)
+        if self.llm_batch is not None:
+            stats.update(self.llm_batch.stats)
+        return stats
+
+    def _encoding_analyzers(self) -> list:
+        """Prompt 数据经过 PromptEncoder 编码的分析器（统计编码前后的 token 数）"""
+        if self.release_insights is not None:
+            return [self.commit_analyzer, self.release_insights]
+        return [
+            self.commit_analyzer,
+            self.release_analyzer,
+            self.breaking_changes_detector,
+        ]
+
     def _get_output_path(self, date: datetime) -> str:
         """获取报告输出路径
 
@@ -3,12 +3,14 @@
 测试仓库活跃度采集器的详细 commit 收集功能。
 """
 
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
 from unittest.mock import MagicMock, patch
 
 import pytest
+from github import GithubException
 
-from trendpluse.collectors.activity import ActivityCollector
+from trendpluse.collectors.activity import CONTRIBUTORS_LIST_CAP, ActivityCollector
+from trendpluse.collectors.contributor_index import ContributorIndex
 
 
 class TestActivityCollectorDetailedCommits:
@@ -144,3 +146,159 @@ class TestActivityCollectorDetailedCommits:
                 ]
                 for field in required_fields:
                     assert field in commit
+
+
+def _mock_commit(login: str, date: datetime) -> MagicMock:
+    """构造 mock commit"""
+    commit = MagicMock()
+    commit.sha = f"{login}-sha"
+    commit.author.login = login
+    commit.commit.message = "feat: change"
+    commit.commit.author.date = date
+    return commit
+
+
+class TestActivityCollectorContributorIndex:
+    """ActivityCollector 新贡献者索引测试"""
+
+    def test_backfill_runs_once_and_detects_new_contributors(self):
+        """测试：首次运行回填贡献者，之后只做本地查找"""
+        # Arrange
+        index = ContributorIndex(path=None)
+        collector = ActivityCollector(token="test-token", contributor_index=index)
+        since = datetime(2026, 1, 2, tzinfo=UTC)
+        today = datetime(2026, 1, 1, 12, tzinfo=UTC)
+
+        # 贡献者列表覆盖全部历史，也包含今天首次提交的 first_timer
+        contributors = []
+        for login in ("veteran", "returning", "first_timer"):
+            contributor = MagicMock()
+            contributor.login = login
+            contributors.append(contributor)
+
+        window_commits = [
+            _mock_commit("returning", today),
+            _mock_commit("first_timer", today),
+            _mock_commit("newbie", today),
+        ]
+
+        def get_commits(**kwargs):
+            # 按作者查询窗口前的 commit：只有 returning 有历史提交
+            if "author" in kwargs:
+                return [MagicMock()] if kwargs["author"] == "returning" else []
+            return window_commits
+
+        repo = MagicMock()
+        repo.get_commits.side_effect = get_commits
+        repo.get_contributors.return_value = contributors
+
+        # Act
+        activity, _ = collector._collect_repo_activity(repo, since, "test/repo")
+        rerun, _ = collector._collect_repo_activity(repo, since, "test/repo")
+
+        # Assert
+        assert activity["new_contributors"] == 2  # first_timer 和 newbie
+        assert rerun["new_contributors"] == 2  # 同一天重跑结果一致
+        repo.get_contributors.assert_called_once()
+        # 每次运行只获取当日 commits，不再扫描 30 天历史
+        window_calls = [
+            c for c in repo.get_commits.call_args_list if "author" not in c.kwargs
+        ]
+        assert len(window_calls) == 2
+        assert all(c.kwargs["since"] == since - timedelta(days=1) for c in window_calls)
+
+    def test_truncated_contributor_list_falls_back_to_author_history(self):
+        """测试：贡献者列表被截断时，索引中没有的作者按历史 commit 判断"""
+        # Arrange
+        index = ContributorIndex(path=None)
+        collector = ActivityCollector(token="test-token", contributor_index=index)
+        since = datetime(2026, 1, 2, tzinfo=UTC)
+        today = datetime(2026, 1, 1, 12, tzinfo=UTC)
+
+        # 贡献者列表达到上限，长尾作者 long_tail 不在列表中
+        contributors = []
+        for n in range(CONTRIBUTORS_LIST_CAP):
+            contributor = MagicMock()
+            contributor.login = f"top{n}"
+            contributors.append(contributor)
+
+        window_commits = [
+            _mock_commit("long_tail", today),
+            _mock_commit("newbie", today),
+            _mock_commit("newbie", today),
+        ]
+
+        def get_commits(**kwargs):
+            if "author" in kwargs:
+                return [MagicMock()] if kwargs["author"] == "long_tail" else []
+            return window_commits
+
+        repo = MagicMock()
+        repo.get_commits.side_effect = get_commits
+        repo.get_contributors.return_value = contributors
+
+        # Act
+        activity, _ = collector._collect_repo_activity(repo, since, "test/repo")
+
+        # Assert
+        assert activity["new_contributors"] == 1  # 只有 newbie
+        assert not index.is_complete("test/repo")
+        assert index.is_known("test/repo", "long_tail", before=since)
+        # 同一作者只查询一次历史 commit
+        author_calls = [
+            c.kwargs["author"]
+            for c in repo.get_commits.call_args_list
+            if "author" in c.kwargs
+        ]
+        assert sorted(author_calls) == ["long_tail", "newbie"]
+
+    def test_failed_backfill_falls_back_to_author_history(self):
+        """测试：回填失败（仓库未回填）时按作者查询历史 commit，不把老作者当成新人"""
+        # Arrange
+        index = ContributorIndex(path=None)
+        collector = ActivityCollector(token="test-token", contributor_index=index)
+        since = datetime(2026, 1, 2, tzinfo=UTC)
+        today = datetime(2026, 1, 1, 12, tzinfo=UTC)
+        window_commits = [_mock_commit("veteran", today), _mock_commit("newbie", today)]
+
+        def get_commits(**kwargs):
+            if "author" in kwargs:
+                return [MagicMock()] if kwargs["author"] == "veteran" else []
+            return window_commits
+
+        repo = MagicMock()
+        repo.get_commits.side_effect = get_commits
+        repo.get_contributors.side_effect = GithubException(502, {}, {})
+
+        # Act
+        activity, _ = collector._collect_repo_activity(repo, since, "test/repo")
+
+        # Assert
+        assert activity["new_contributors"] == 1  # 只有 newbie
+        assert not index.is_seeded("test/repo")
+        assert index.is_known("test/repo", "veteran", before=since)
+
+    def test_next_day_contributor_is_known(self):
+        """测试：前一天记录的贡献者第二天不再算新贡献者"""
+        # Arrange
+        index = ContributorIndex(path=None)
+        index.seed("test/repo", set())
+        collector = ActivityCollector(token="test-token", contributor_index=index)
+
+        day1 = datetime(2026, 1, 2, tzinfo=UTC)
+        day2 = datetime(2026, 1, 3, tzinfo=UTC)
+        repo = MagicMock()
+
+        # Act
+        repo.get_commits.return_value = [
+            _mock_commit("alice", day1 - timedelta(hours=2))
+        ]
+        first, _ = collector._collect_repo_activity(repo, day1, "test/repo")
+        repo.get_commits.return_value = [
+            _mock_commit("alice", day2 - timedelta(hours=2))
+        ]
+        second, _ = collector._collect_repo_activity(repo, day2, "test/repo")
+
+        # Assert
+        assert first["new_contributors"] == 1
+        assert second["new_contributors"] == 0
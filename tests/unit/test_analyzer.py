@@ -1,15 +1,17 @@
 """AI 分析器单元测试"""
 
-from unittest.mock import Mock, patch
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
 
+from trendpluse.analyzers.token_budget import TokenBudgetExceededError
 from trendpluse.analyzers.trend_analyzer import TrendAnalyzer
-from trendpluse.models.signal import DailyReport, Signal
+from trendpluse.models.signal import DailyReport, PRSignal, PRSignalBatch, Signal
 
 
 class TestTrendAnalyzer:
     """测试趋势信号分析器"""
 
-    @patch("trendpluse.analyzers.trend_analyzer.instructor.from_anthropic")
+    @patch("trendpluse.analyzers.llm_gateway.instructor.from_anthropic")
     def test_init_with_api_key(self, mock_from_anthropic):
         """测试：使用 API key 初始化"""
         # Arrange & Act
@@ -17,9 +19,9 @@ class TestTrendAnalyzer:
 
         # Assert
         assert analyzer is not None
-        mock_from_anthropic.assert_called_once()
+        assert analyzer.gateway.api_key == "test_key"
 
-    @patch("trendpluse.analyzers.trend_analyzer.instructor.from_anthropic")
+    @patch("trendpluse.analyzers.llm_gateway.instructor.from_anthropic")
     def test_analyze_single_pr(self, mock_from_anthropic):
         """测试：分析单个 PR 提取信号"""
         # Arrange
@@ -57,7 +59,7 @@ class TestTrendAnalyzer:
         assert signal.type == "capability"
         assert signal.impact_score == 4
 
-    @patch("trendpluse.analyzers.trend_analyzer.instructor.from_anthropic")
+    @patch("trendpluse.analyzers.llm_gateway.instructor.from_anthropic")
     def test_analyze_multiple_prs(self, mock_from_anthropic):
         """测试：批量分析多个 PR"""
         # Arrange
@@ -115,7 +117,7 @@ class TestTrendAnalyzer:
         assert signals[0].title == "功能 A"
         assert signals[1].title == "功能 B"
 
-    @patch("trendpluse.analyzers.trend_analyzer.instructor.from_anthropic")
+    @patch("trendpluse.analyzers.llm_gateway.instructor.from_anthropic")
     def test_generate_daily_report(self, mock_from_anthropic):
         """测试：生成每日报告"""
         # Arrange
@@ -171,7 +173,7 @@ class TestTrendAnalyzer:
         assert report.stats["total_prs_analyzed"] == 1  # 传入的 signals 数量
         assert report.stats["high_impact_signals"] == 1  # impact_score >= 4 的信号数量
 
-    @patch("trendpluse.analyzers.trend_analyzer.instructor.from_anthropic")
+    @patch("trendpluse.analyzers.llm_gateway.instructor.from_anthropic")
     def test_filter_high_impact_signals(self, mock_from_anthropic):
         """测试：筛选高影响信号"""
         # Arrange
@@ -210,7 +212,7 @@ class TestTrendAnalyzer:
         assert len(high_impact) == 1
         assert high_impact[0].id == "high"
 
-    @patch("trendpluse.analyzers.trend_analyzer.instructor.from_anthropic")
+    @patch("trendpluse.analyzers.llm_gateway.instructor.from_anthropic")
     def test_categorize_signals(self, mock_from_anthropic):
         """测试：按类型分类信号"""
         # Arrange
@@ -250,3 +252,225 @@ class TestTrendAnalyzer:
         assert len(categorized["research"]) == 1
         assert categorized["engineering"][0].id == "eng-1"
         assert categorized["research"][0].id == "res-1"
+
+
+def _pr(number: int) -> dict:
+    """构造 PR 详情"""
+    return {
+        "number": number,
+        "title": f"PR {number}",
+        "url": f"https://github.com/owner/repo/pull/{number}",
+        "repo_name": "owner/repo",
+    }
+
+
+def _signal_for(messages: list[dict]) -> Signal:
+    """根据 Prompt 中的 PR 标题构造信号"""
+    title = messages[0]["content"].split("PR 标题: ")[1].split("\n")[0]
+    return Signal(
+        id="",
+        title=title,
+        type="capability",
+        category="engineering",
+        impact_score=3,
+        why_it_matters="重要",
+        sources=[],
+        related_repos=[],
+    )
+
+
+class TestTrendAnalyzerConcurrent:
+    """测试并发分析 PR"""
+
+    def test_results_keep_input_order_within_concurrency_limit(self):
+        """测试：并发分析时在途数不超过上限，结果顺序与输入一致"""
+        # Arrange
+        in_flight = 0
+        peak = 0
+
+        async def create(response_model, messages, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            # 编号越小耗时越长，完成顺序与输入相反
+            number = int(messages[0]["content"].split("PR 标题: PR ")[1][0])
+            await asyncio.sleep(0.01 * (6 - number))
+            in_flight -= 1
+            return _signal_for(messages)
+
+        gateway = Mock()
+        gateway.acreate_structured = AsyncMock(side_effect=create)
+        analyzer = TrendAnalyzer(api_key="test_key", gateway=gateway, max_concurrency=2)
+
+        # Act
+        signals = analyzer.analyze_prs([_pr(n) for n in range(1, 6)])
+
+        # Assert
+        assert [s.title for s in signals] == [f"PR {n}" for n in range(1, 6)]
+        assert signals[0].id == "owner/repo-1"
+        assert peak == 2
+        assert analyzer.last_errors == []
+
+    def test_timeouts_and_failures_are_collected_per_pr(self):
+        """测试：超时和失败按 PR 记录，不影响其他 PR"""
+
+        # Arrange
+        async def create(response_model, messages, **kwargs):
+            if "PR 2" in messages[0]["content"]:
+                await asyncio.sleep(1)
+            if "PR 3" in messages[0]["content"]:
+                raise ValueError("invalid response")
+            return _signal_for(messages)
+
+        gateway = Mock()
+        gateway.acreate_structured = AsyncMock(side_effect=create)
+        analyzer = TrendAnalyzer(
+            api_key="test_key", gateway=gateway, max_concurrency=3, item_timeout=0.05
+        )
+
+        # Act
+        signals = analyzer.analyze_prs([_pr(1), _pr(2), _pr(3)])
+
+        # Assert
+        assert [s.title for s in signals] == ["PR 1"]
+        assert [(e.number, e.reason) for e in analyzer.last_errors] == [
+            (2, "timeout"),
+            (3, "error"),
+        ]
+        assert analyzer.last_errors[1].message == "invalid response"
+        assert analyzer.stats == {
+            "pr_analysis_requests": 3,
+            "pr_analysis_batches": 0,
+            "pr_analysis_fallbacks": 0,
+            "pr_analysis_errors": 1,
+            "pr_analysis_timeouts": 1,
+            "pr_analysis_budget_skips": 0,
+        }
+
+    def test_serial_mode_collects_failures(self):
+        """测试：串行模式同样按 PR 记录失败"""
+        # Arrange
+        gateway = Mock()
+        gateway.create_structured.side_effect = [
+            RuntimeError("boom"),
+            _signal_for([{"content": "PR 标题: PR 2\n"}]),
+        ]
+        analyzer = TrendAnalyzer(api_key="test_key", gateway=gateway)
+
+        # Act
+        signals = analyzer.analyze_prs([_pr(1), _pr(2)])
+
+        # Assert
+        assert [s.title for s in signals] == ["PR 2"]
+        assert [(e.number, e.reason) for e in analyzer.last_errors] == [(1, "error")]
+
+    def test_budget_exhaustion_skips_prs_and_report_summary(self):
+        """测试：预算不足时 PR 记为 budget 跳过，日报不生成总览但保留信号"""
+        # Arrange
+        gateway = Mock()
+        gateway.create_structured.side_effect = [
+            _signal_for([{"content": "PR 标题: PR 1\n"}]),
+            TokenBudgetExceededError("token 预算不足"),
+            TokenBudgetExceededError("token 预算不足"),
+        ]
+        analyzer = TrendAnalyzer(api_key="test_key", gateway=gateway)
+
+        # Act
+        signals = analyzer.analyze_prs([_pr(1), _pr(2)])
+        report = analyzer.generate_report(signals, date="2026-01-02")
+
+        # Assert
+        assert [(e.number, e.reason) for e in analyzer.last_errors] == [(2, "budget")]
+        assert analyzer.stats["pr_analysis_budget_skips"] == 1
+        assert report.date == "2026-01-02"
+        assert [s.title for s in report.engineering_signals] == ["PR 1"]
+        assert "预算不足" in report.summary_brief
+
+
+def _batch_for(messages: list[dict], skip: set[int] | None = None) -> PRSignalBatch:
+    """根据批量 Prompt 中的 PR 编号构造批量结果"""
+    content = messages[0]["content"]
+    numbers = [int(part.split("\n")[0]) for part in content.split("### PR #")[1:]]
+    return PRSignalBatch(
+        items=[
+            PRSignal(
+                pr_number=number,
+                signal=_signal_for([{"content": f"PR 标题: PR {number}\n"}]),
+            )
+            for number in numbers
+            if number not in (skip or set())
+        ]
+    )
+
+
+class TestTrendAnalyzerBatched:
+    """测试多个 PR 合并为一次结构化调用"""
+
+    def test_plan_batches_respects_size_tokens_and_unique_numbers(self):
+        """测试：批次受数量、token 上限约束，同批内 PR 编号不重复"""
+        # Arrange
+        analyzer = TrendAnalyzer(
+            api_key="test_key", gateway=Mock(), batch_size=3, batch_token_limit=400
+        )
+        other_repo_pr = {**_pr(2), "repo_name": "other/repo"}
+        long_pr = {**_pr(9), "body": "x" * 2000}
+        pr_list = [_pr(1), _pr(2), other_repo_pr, _pr(3), _pr(4), _pr(5), long_pr]
+
+        # Act
+        batches = analyzer.plan_batches(pr_list)
+
+        # Assert
+        assert [[pr["number"] for pr in batch] for batch in batches] == [
+            [1, 2],
+            [2, 3, 4],
+            [5],
+            [9],
+        ]
+
+    def test_batch_results_keyed_by_number_with_single_fallback(self):
+        """测试：批量结果按编号对应，缺失的 PR 回退为单独调用"""
+        # Arrange
+        gateway = Mock()
+
+        def create(response_model, messages, **kwargs):
+            if response_model is PRSignalBatch:
+                return _batch_for(messages, skip={2})
+            return _signal_for(messages)
+
+        gateway.create_structured.side_effect = create
+        analyzer = TrendAnalyzer(api_key="test_key", gateway=gateway, batch_size=3)
+
+        # Act
+        signals = analyzer.analyze_prs([_pr(1), _pr(2), _pr(3)])
+
+        # Assert
+        assert [s.title for s in signals] == ["PR 1", "PR 2", "PR 3"]
+        assert [s.id for s in signals] == [f"owner/repo-{n}" for n in (1, 2, 3)]
+        models = [c.args[0] for c in gateway.create_structured.call_args_list]
+        assert models == [PRSignalBatch, Signal]
+        assert analyzer.stats["pr_analysis_batches"] == 1
+        assert analyzer.stats["pr_analysis_fallbacks"] == 1
+
+    def test_failed_batch_falls_back_concurrently(self):
+        """测试：并发模式下批次校验失败时所有 PR 回退为单独调用"""
+
+        # Arrange
+        async def create(response_model, messages, **kwargs):
+            if response_model is PRSignalBatch:
+                raise ValueError("validation failed")
+            return _signal_for(messages)
+
+        gateway = Mock()
+        gateway.acreate_structured = AsyncMock(side_effect=create)
+        analyzer = TrendAnalyzer(
+            api_key="test_key", gateway=gateway, max_concurrency=2, batch_size=2
+        )
+
+        # Act
+        signals = analyzer.analyze_prs([_pr(1), _pr(2), _pr(3)])
+
+        # Assert
+        assert [s.title for s in signals] == ["PR 1", "PR 2", "PR 3"]
+        assert analyzer.stats["pr_analysis_batches"] == 1
+        assert analyzer.stats["pr_analysis_fallbacks"] == 2
+        assert analyzer.last_errors == []
@@ -0,0 +1,319 @@
+"""异步采集引擎单元测试"""
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+from unittest.mock import MagicMock
+
+import httpx
+import respx
+
+from trendpluse.collectors.activity import ActivityCollector
+from trendpluse.collectors.async_engine import AsyncCollectionEngine
+from trendpluse.collectors.contributor_index import ContributorIndex
+
+BASE_URL = "https://api.github.com"
+
+
+def _commit(sha: str, login: str | None, date: str) -> dict:
+    """构造 REST API commit 响应"""
+    return {
+        "sha": sha,
+        "author": {"login": login} if login else None,
+        "commit": {"message": f"feat: {sha}\n\nbody", "author": {"date": date}},
+    }
+
+
+def _release(tag: str, created_at: str, prerelease: bool = False) -> dict:
+    """构造 REST API release 响应"""
+    return {
+        "tag_name": tag,
+        "name": f"Release {tag}",
+        "prerelease": prerelease,
+        "created_at": created_at,
+        "published_at": created_at,
+        "body": "notes",
+        "author": {"login": "releaser"},
+        "html_url": f"https://github.com/owner/repo/releases/tag/{tag}",
+        "assets": [{"name": "a.zip", "size": 1, "download_count": 2}],
+    }
+
+
+class TestAsyncCollectionEngine:
+    """测试异步采集引擎"""
+
+    @respx.mock
+    def test_collect_all_returns_sync_compatible_shapes(self):
+        """测试：collect_all 返回与同步采集器一致的数据结构"""
+        # Arrange
+        now = datetime.now(UTC)
+        recent = (now - timedelta(hours=2)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        old = (now - timedelta(days=40)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+        def commits_handler(request: httpx.Request) -> httpx.Response:
+            # 30 天采样窗口与当日窗口使用相同接口，通过 since 区分
+            since = datetime.fromisoformat(request.url.params["since"])
+            if now - since > timedelta(days=2):
+                return httpx.Response(200, json=[_commit("old1", "alice", recent)])
+            return httpx.Response(
+                200,
+                json=[
+                    _commit("abc1234567", "alice", recent),
+                    _commit("def7654321", "bob", recent),
+                ],
+            )
+
+        respx.get(f"{BASE_URL}/repos/owner/repo/commits").mock(
+            side_effect=commits_handler
+        )
+        respx.get(f"{BASE_URL}/repos/owner/repo/releases").mock(
+            return_value=httpx.Response(
+                200,
+                json=[
+                    _release("v2.0.0", recent),
+                    _release("v2.1.0-beta", recent, prerelease=True),
+                    _release("v1.0.0", old),
+                ],
+            )
+        )
+        respx.get(f"{BASE_URL}/repos/owner/repo/pulls").mock(
+            return_value=httpx.Response(
+                200,
+                json=[
+                    {"number": 2, "title": "New", "body": "b", "created_at": recent},
+                    {"number": 1, "title": "Old", "body": "b", "created_at": old},
+                ],
+            )
+        )
+
+        engine = AsyncCollectionEngine(token="test_token")
+        since = now - timedelta(days=7)
+
+        # Act
+        activity, releases, events = engine.collect_all(
+            repos=["owner/repo"],
+            activity_since=now,
+            release_since=since,
+            pr_since=since,
+        )
+
+        # Assert - 活跃度
+        assert activity["total_commits"] == 2
+        assert activity["active_repos"] == 1
+        assert activity["new_contributors"] == 1  # 只有 bob 是新贡献者
+        assert activity["detailed_commits"][0]["sha"] == "abc1234567"
+        assert activity["repo_activity"][0]["recent_commits"][0]["sha"] == "abc1234"
+
+        # Assert - Releases（排除旧版本和预发布版本）
+        assert releases["total_releases"] == 1
+        assert releases["detailed_releases"][0]["tag_name"] == "v2.0.0"
+        assert releases["detailed_releases"][0]["version_info"]["major"] == 2
+
+        # Assert - PR 事件（遇到旧 PR 即停止）
+        assert len(events) == 1
+        assert events[0]["type"] == "PullRequestEvent"
+        assert events[0]["repo"]["name"] == "owner/repo"
+        assert events[0]["payload"]["pull_request"]["number"] == 2
+
+    @respx.mock
+    def test_failed_repo_does_not_abort_others(self):
+        """测试：单个仓库失败时继续处理其他仓库"""
+        # Arrange
+        recent = datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+        respx.get(f"{BASE_URL}/repos/bad/repo/pulls").mock(
+            return_value=httpx.Response(404, json={"message": "Not Found"})
+        )
+        respx.get(f"{BASE_URL}/repos/good/repo/pulls").mock(
+            return_value=httpx.Response(
+                200,
+                json=[{"number": 7, "title": "t", "body": "", "created_at": recent}],
+            )
+        )
+
+        engine = AsyncCollectionEngine()
+
+        # Act
+        events = asyncio.run(
+            engine.fetch_events_async(
+                repos=["bad/repo", "good/repo"],
+                since=datetime.now() - timedelta(days=1),
+            )
+        )
+
+        # Assert
+        assert [e["repo"]["name"] for e in events] == ["good/repo"]
+
+    @respx.mock
+    def test_failed_commits_keep_empty_activity_entry(self):
+        """测试：commits 获取失败时与同步采集器一样输出空的活跃度条目"""
+        # Arrange
+        respx.get(f"{BASE_URL}/repos/bad/repo/commits").mock(
+            return_value=httpx.Response(404, json={"message": "Not Found"})
+        )
+        engine = AsyncCollectionEngine()
+
+        # Act
+        activity = asyncio.run(
+            engine.collect_activity_async(repos=["bad/repo"], since=datetime.now(UTC))
+        )
+
+        # Assert
+        assert activity["repo_activity"] == [
+            {
+                "repo": "bad/repo",
+                "commit_count": 0,
+                "new_contributors": 0,
+                "top_contributors": [],
+                "recent_commits": [],
+            }
+        ]
+        assert activity["total_commits"] == 0
+
+    @respx.mock
+    def test_paginate_follows_link_header(self):
+        """测试：按 Link 头翻页"""
+        # Arrange
+        recent = datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+        page2_url = f"{BASE_URL}/repos/owner/repo/releases?page=2"
+        respx.get(page2_url).mock(
+            return_value=httpx.Response(200, json=[_release("v1.1.0", recent)])
+        )
+        respx.get(f"{BASE_URL}/repos/owner/repo/releases").mock(
+            return_value=httpx.Response(
+                200,
+                json=[_release("v1.2.0", recent)],
+                headers={"Link": f'<{page2_url}>; rel="next"'},
+            )
+        )
+
+        engine = AsyncCollectionEngine()
+
+        # Act
+        result = asyncio.run(
+            engine.collect_releases_async(
+                repos=["owner/repo"], since=datetime.now() - timedelta(days=1)
+            )
+        )
+
+        # Assert
+        assert result["total_releases"] == 2
+
+    def test_concurrency_is_bounded_per_host(self):
+        """测试：同一主机的并发请求数不超过上限"""
+        # Arrange
+        engine = AsyncCollectionEngine(max_concurrency_per_host=2)
+        in_flight = 0
+        peak = 0
+
+        async def fake_get(url, params=None, headers=None):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, json=[], request=httpx.Request("GET", url))
+
+        class FakeClient:
+            get = staticmethod(fake_get)
+
+        async def run():
+            await asyncio.gather(
+                *(engine._get_json(FakeClient(), f"/repos/o/r{i}") for i in range(6))
+            )
+
+        # Act
+        asyncio.run(run())
+
+        # Assert
+        assert peak == 2
+
+    @respx.mock
+    def test_release_scan_stops_after_lookahead_window(self):
+        """测试：连续超过窗口的旧 Release 后不再翻页"""
+        # Arrange
+        old = (datetime.now(UTC) - timedelta(days=365)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        page2_url = f"{BASE_URL}/repos/owner/repo/releases?page=2"
+        page2 = respx.get(page2_url).mock(return_value=httpx.Response(200, json=[]))
+        respx.get(f"{BASE_URL}/repos/owner/repo/releases").mock(
+            return_value=httpx.Response(
+                200,
+                json=[_release(f"v0.{i}.0", old) for i in range(20)],
+                headers={"Link": f'<{page2_url}>; rel="next"'},
+            )
+        )
+
+        engine = AsyncCollectionEngine()
+
+        # Act
+        result = asyncio.run(
+            engine.collect_releases_async(
+                repos=["owner/repo"], since=datetime.now() - timedelta(days=1)
+            )
+        )
+
+        # Assert
+        assert result["total_releases"] == 0
+        assert result["pages_fetched"] == 1
+        assert not page2.called
+
+    @respx.mock
+    def test_release_pages_fetched_counts_page_requests(self):
+        """测试：pages_fetched 统计实际请求的 Release 页数"""
+        # Arrange
+        recent = datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+        page2_url = f"{BASE_URL}/repos/owner/repo/releases?page=2"
+        respx.get(page2_url).mock(
+            return_value=httpx.Response(200, json=[_release("v1.0.0", recent)])
+        )
+        respx.get(f"{BASE_URL}/repos/owner/repo/releases").mock(
+            return_value=httpx.Response(
+                200,
+                json=[_release("v2.0.0", recent)],
+                headers={"Link": f'<{page2_url}>; rel="next"'},
+            )
+        )
+
+        engine = AsyncCollectionEngine()
+
+        # Act
+        result = asyncio.run(
+            engine.collect_releases_async(
+                repos=["owner/repo"], since=datetime.now() - timedelta(days=1)
+            )
+        )
+
+        # Assert
+        assert result["total_releases"] == 2
+        assert result["pages_fetched"] == 2
+
+    @respx.mock
+    def test_new_contributors_use_contributor_index(self):
+        """测试：提供活跃度采集器时按贡献者索引判断新贡献者，不再获取 30 天采样"""
+        # Arrange
+        now = datetime.now(UTC)
+        recent = (now - timedelta(hours=2)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        commits_route = respx.get(f"{BASE_URL}/repos/owner/repo/commits").mock(
+            return_value=httpx.Response(
+                200,
+                json=[
+                    _commit("abc1234567", "alice", recent),
+                    _commit("def7654321", "bob", recent),
+                ],
+            )
+        )
+
+        # alice 是索引中的老贡献者（30 天采样里没有她）
+        index = ContributorIndex(path=None)
+        index.seed("owner/repo", {"alice"})
+        activity_collector = ActivityCollector(contributor_index=index)
+        activity_collector.client = MagicMock()
+        engine = AsyncCollectionEngine(activity_collector=activity_collector)
+
+        # Act
+        activity = asyncio.run(engine.collect_activity_async(["owner/repo"], now))
+
+        # Assert
+        assert activity["new_contributors"] == 1
+        assert commits_route.call_count == 1
+        window_start = now - timedelta(days=1)
+        assert index.is_known("owner/repo", "bob", before=now)
+        assert not index.is_known("owner/repo", "bob", before=window_start)
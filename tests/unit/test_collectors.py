@@ -1,11 +1,45 @@
 """数据采集单元测试"""
 
-from datetime import datetime, timedelta
+import gzip
+import json
+from datetime import UTC, datetime, timedelta
 from unittest.mock import Mock, patch
 
+import pytest
+
+from trendpluse.collectors.archive_reader import (
+    RepoPrefilter,
+    iter_archive_events,
+    scan_archive_files,
+)
+from trendpluse.collectors.filter import EventFilter
 from trendpluse.collectors.gh_archive import GHArchiveCollector
 
 
+def _write_archive(path, lines: list) -> None:
+    """写入 GH Archive 小时文件（dict 序列化为 JSON，字符串原样写入）"""
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for line in lines:
+            # GH Archive 使用紧凑 JSON
+            if not isinstance(line, str):
+                line = json.dumps(line, separators=(",", ":"))
+            f.write(line)
+            f.write("\n")
+
+
+def _raw_event(event_type: str, repo: str, created_at: str, **payload) -> dict:
+    """构造 GH Archive 原始事件"""
+    return {
+        "id": "1",
+        "type": event_type,
+        "actor": {"login": "alice"},
+        "repo": {"id": 1, "name": repo, "url": f"https://api.github.com/repos/{repo}"},
+        "payload": payload,
+        "public": True,
+        "created_at": created_at,
+    }
+
+
 class TestGHArchiveCollector:
     """测试 GH Archive 数据采集器"""
 
@@ -26,10 +60,11 @@ class TestGHArchiveCollector:
         mock_row = Mock()
         mock_row.type = "PullRequestEvent"
         mock_row.repo_name = "anthropics/skills"
-        mock_row.payload = {"number": 123}
+        mock_row.get.side_effect = {"action": "closed", "number": 123}.get
         mock_row.created_at.isoformat.return_value = "2026-01-02T10:00:00Z"
 
         mock_job = Mock()
+        mock_job.total_bytes_processed = 1024
         mock_job.result.return_value = [mock_row]
         mock_client.return_value.query.return_value = mock_job
 
@@ -44,6 +79,7 @@ class TestGHArchiveCollector:
         assert isinstance(events, list)
         assert len(events) == 1
         assert events[0]["repo"]["name"] == "anthropics/skills"
+        assert events[0]["payload"] == {"action": "closed", "number": 123}
 
     @patch("trendpluse.collectors.gh_archive.bigquery.Client")
     def test_fetch_events_filters_by_repos(self, mock_client):
@@ -95,3 +131,300 @@ class TestGHArchiveCollector:
 
         # Assert
         assert events == []
+
+
+class TestGHArchiveRangeQuery:
+    """测试 BigQuery 多日范围查询"""
+
+    @patch("trendpluse.collectors.gh_archive.bigquery.Client")
+    def test_query_uses_table_suffix_range_and_projection(self, mock_client):
+        """测试：7 天回溯使用 _TABLE_SUFFIX 覆盖整个范围，只投影需要的字段"""
+        # Arrange
+        mock_client.return_value.query.return_value.total_bytes_processed = 10
+        mock_client.return_value.query.return_value.result.return_value = []
+        collector = GHArchiveCollector()
+
+        # Act
+        collector.fetch_events(
+            repos=["anthropics/skills"],
+            since=datetime(2026, 1, 1, tzinfo=UTC),
+            until=datetime(2026, 1, 8, tzinfo=UTC),
+        )
+
+        # Assert
+        dry_run_call, query_call = mock_client.return_value.query.call_args_list
+        assert dry_run_call.kwargs["job_config"].dry_run is True
+        sql = query_call.args[0]
+        assert "`githubarchive.day.*`" in sql
+        assert "_TABLE_SUFFIX BETWEEN @start_suffix AND @end_suffix" in sql
+        assert "'$.pull_request.merged'" in sql
+        assert "\n            payload,\n" not in sql
+        params = {
+            p.name: p.value
+            for p in query_call.kwargs["job_config"].query_parameters
+            if p.name.endswith("suffix")
+        }
+        assert params == {"start_suffix": "20260101", "end_suffix": "20260108"}
+        assert collector.last_bytes_estimate == 10
+
+    @patch("trendpluse.collectors.gh_archive.bigquery.Client")
+    def test_estimate_over_cap_skips_query(self, mock_client):
+        """测试：预估扫描量超过上限时不执行查询"""
+        # Arrange
+        mock_client.return_value.query.return_value.total_bytes_processed = 5 * 1024**3
+        collector = GHArchiveCollector(max_bytes_billed=1024**3)
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            collector.fetch_events(
+                repos=["anthropics/skills"], since=datetime(2026, 1, 1, tzinfo=UTC)
+            )
+        assert mock_client.return_value.query.call_count == 1  # 只有 dry run
+
+    @patch("trendpluse.collectors.gh_archive.bigquery.Client")
+    def test_projected_row_is_rebuilt_as_nested_payload(self, mock_client):
+        """测试：投影列还原为 EventFilter 可用的嵌套载荷"""
+        # Arrange
+        row = Mock()
+        row.type = "PullRequestEvent"
+        row.repo_name = "anthropics/skills"
+        row.created_at = datetime(2026, 1, 2, 10, tzinfo=UTC)
+        row.get.side_effect = {
+            "action": "closed",
+            "number": 5,
+            "pr_number": 5,
+            "pr_title": "Add eval",
+            "pr_merged": True,
+            "pr_user_login": "alice",
+            "pr_label_names": ["eval", None],
+        }.get
+        mock_job = mock_client.return_value.query.return_value
+        mock_job.total_bytes_processed = 1
+        mock_job.result.return_value = [row]
+        collector = GHArchiveCollector()
+
+        # Act
+        events = collector.fetch_events(
+            repos=["anthropics/skills"], since=datetime(2026, 1, 2, tzinfo=UTC)
+        )
+
+        # Assert
+        assert events[0]["payload"] == {
+            "action": "closed",
+            "number": 5,
+            "pull_request": {
+                "number": 5,
+                "title": "Add eval",
+                "merged": True,
+                "user": {"login": "alice"},
+                "labels": [{"name": "eval"}],
+            },
+        }
+        assert EventFilter().filter_candidates(events) == events
+
+
+class TestGHArchiveLocalBackend:
+    """测试 GH Archive 本地文件后端"""
+
+    def test_local_backend_does_not_create_bigquery_client(self, tmp_path):
+        """测试：本地后端不需要 BigQuery 凭证"""
+        # Arrange & Act
+        with patch("trendpluse.collectors.gh_archive.bigquery.Client") as mock_client:
+            collector = GHArchiveCollector(backend="local", archive_dir=str(tmp_path))
+
+        # Assert
+        mock_client.assert_not_called()
+        assert collector.client is None
+
+    def test_local_backend_rejects_bigquery_estimate(self, tmp_path):
+        """测试：local 后端调用 BigQuery 预估时给出明确错误"""
+        # Arrange
+        collector = GHArchiveCollector(backend="local", archive_dir=str(tmp_path))
+        now = datetime.now(UTC)
+
+        # Act & Assert
+        with pytest.raises(RuntimeError, match="BigQuery"):
+            collector.estimate_bytes(["owner/repo"], now - timedelta(days=1), now)
+
+    def test_local_backend_requires_archive_dir(self):
+        """测试：本地后端必须指定归档目录"""
+        # Act & Assert
+        with pytest.raises(ValueError):
+            GHArchiveCollector(backend="local")
+
+    def test_fetch_events_from_hourly_files(self, tmp_path):
+        """测试：只读范围内的小时文件，按仓库、类型和时间过滤，格式同 BigQuery 后端"""
+        # Arrange
+        _write_archive(
+            tmp_path / "2026-01-02-9.json.gz",
+            [
+                _raw_event(
+                    "PullRequestEvent",
+                    "anthropics/skills",
+                    "2026-01-02T09:10:00Z",
+                    action="closed",
+                    number=1,
+                ),
+                _raw_event("PushEvent", "anthropics/skills", "2026-01-02T09:20:00Z"),
+                _raw_event("PullRequestEvent", "other/repo", "2026-01-02T09:30:00Z"),
+                "{truncated",
+            ],
+        )
+        _write_archive(
+            tmp_path / "2026-01-02-10.json.gz",
+            [
+                _raw_event(
+                    "ReleaseEvent",
+                    "anthropics/skills",
+                    "2026-01-02T10:05:00Z",
+                    action="published",
+                )
+            ],
+        )
+        # 早于 since 的事件
+        _write_archive(
+            tmp_path / "2026-01-02-8.json.gz",
+            [
+                _raw_event(
+                    "PullRequestEvent", "anthropics/skills", "2026-01-02T08:00:00Z"
+                )
+            ],
+        )
+        collector = GHArchiveCollector(backend="local", archive_dir=str(tmp_path))
+
+        # Act
+        events = collector.fetch_events(
+            repos=["anthropics/skills"],
+            since=datetime(2026, 1, 2, 9, tzinfo=UTC),
+            until=datetime(2026, 1, 2, 23, 59, tzinfo=UTC),
+        )
+
+        # Assert
+        assert events == [
+            {
+                "type": "ReleaseEvent",
+                "repo": {"name": "anthropics/skills"},
+                "payload": {"action": "published"},
+                "created_at": "2026-01-02T10:05:00+00:00",
+            },
+            {
+                "type": "PullRequestEvent",
+                "repo": {"name": "anthropics/skills"},
+                "payload": {"action": "closed", "number": 1},
+                "created_at": "2026-01-02T09:10:00+00:00",
+            },
+        ]
+        # 早于 since 的小时文件不会被打开，9~23 点中只有 2 个文件存在
+        assert len(collector.missing_files) == 13
+
+
+class TestRepoPrefilter:
+    """测试字节层面的仓库预筛选"""
+
+    def test_matches_only_watched_repos(self):
+        """测试：按顶层 repo 名匹配，payload 中的同名字段不影响结果"""
+        # Arrange
+        prefilter = RepoPrefilter(["anthropics/skills"])
+        watched = json.dumps(
+            _raw_event("PushEvent", "anthropics/skills", "2026-01-02T09:00:00Z"),
+            separators=(",", ":"),
+        ).encode()
+        other = json.dumps(
+            _raw_event(
+                "PullRequestEvent",
+                "other/repo",
+                "2026-01-02T09:00:00Z",
+                mention="anthropics/skills",
+            ),
+            separators=(",", ":"),
+        ).encode()
+
+        # Act & Assert
+        assert prefilter.matches(watched) is True
+        assert prefilter.matches(other) is False
+
+    def test_unrecognized_layout_falls_back_to_json(self):
+        """测试：无法提取 repo 名时交给 JSON 解码，不会漏掉事件"""
+        # Arrange
+        prefilter = RepoPrefilter(["anthropics/skills"])
+        spaced = json.dumps(
+            _raw_event("PushEvent", "other/repo", "2026-01-02T09:00:00Z")
+        ).encode()
+
+        # Act & Assert
+        assert prefilter.matches(spaced) is True
+
+    def test_prefilter_does_not_change_results(self, tmp_path):
+        """测试：开启和关闭预筛选返回相同的事件"""
+        # Arrange
+        path = tmp_path / "2026-01-02-9.json.gz"
+        _write_archive(
+            path,
+            [
+                _raw_event("PullRequestEvent", repo, "2026-01-02T09:00:00Z", number=i)
+                for i, repo in enumerate(
+                    ["anthropics/skills", "other/repo", "anthropics/skills"]
+                )
+            ],
+        )
+
+        # Act
+        filtered = list(iter_archive_events(path, ["anthropics/skills"]))
+        unfiltered = list(
+            iter_archive_events(path, ["anthropics/skills"], prefilter=False)
+        )
+
+        # Assert
+        assert filtered == unfiltered
+        assert [e["payload"]["number"] for e in filtered] == [0, 2]
+
+
+class TestScanArchiveFiles:
+    """测试多文件并行读取"""
+
+    def _write_hours(self, tmp_path) -> list:
+        """写入 3 个小时文件，每个文件内事件乱序"""
+        paths = []
+        for hour in range(3):
+            path = tmp_path / f"2026-01-02-{hour}.json.gz"
+            _write_archive(
+                path,
+                [
+                    _raw_event(
+                        "PullRequestEvent",
+                        "anthropics/skills",
+                        f"2026-01-02T{hour:02d}:{minute:02d}:00Z",
+                        number=hour * 100 + minute,
+                    )
+                    for minute in (30, 10, 50)
+                ],
+            )
+            paths.append(path)
+        return paths
+
+    def test_process_pool_returns_events_in_time_order(self, tmp_path):
+        """测试：进程池并行读取，结果按 created_at 升序"""
+        # Arrange
+        paths = self._write_hours(tmp_path)
+
+        # Act
+        events = list(
+            scan_archive_files(paths, ["anthropics/skills"], workers=2, max_pending=1)
+        )
+
+        # Assert
+        created = [e["created_at"] for e in events]
+        assert created == sorted(created)
+        assert len(events) == 9
+
+    def test_parallel_matches_sequential(self, tmp_path):
+        """测试：并行与顺序读取结果一致"""
+        # Arrange
+        paths = self._write_hours(tmp_path)
+
+        # Act
+        parallel = list(scan_archive_files(paths, ["anthropics/skills"], workers=2))
+        sequential = list(scan_archive_files(paths, ["anthropics/skills"], workers=1))
+
+        # Assert
+        assert parallel == sequential
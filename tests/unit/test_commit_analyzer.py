@@ -3,11 +3,13 @@
 测试 commit 分析器的核心功能。
 """
 
+import json
 from typing import Any
 from unittest.mock import patch
 
 import pytest
 
+from trendpluse.analyzers.tokens import estimate_tokens
 from trendpluse.models.signal import Signal
 
 
@@ -132,6 +134,7 @@ class TestCommitAnalyzer:
         "category": "engineering",
         "impact_score": 4,
         "why_it_matters": "提供了实时流式响应能力，显著改善用户体验",
+        "commit_rows": [1],
         "related_repos": ["anthropics/claude-sdk-python"],
         "trends": ["新增流式API", "性能优化"],
         "tech_details": {"feature_type": "API增强", "complexity": "中等"}
@@ -176,6 +179,7 @@ class TestCommitAnalyzer:
                 "category": "engineering",
                 "impact_score": 5,
                 "why_it_matters": "AI Agent 从被动执行向主动感知演进",
+                "commit_rows": [1],
                 "related_repos": ["google-gemini/gemini-cli"],
                 "trends": ["上下文感知"],
                 "tech_details": {"feature_type": "Agent", "complexity": "高"}
@@ -186,6 +190,7 @@ class TestCommitAnalyzer:
                 "category": "engineering",
                 "impact_score": 3,
                 "why_it_matters": "改进 CI/CD 集成体验",
+                "commit_rows": [2],
                 "related_repos": ["continuedev/continue"],
                 "trends": ["DevOps"],
                 "tech_details": {"feature_type": "集成", "complexity": "低"}
@@ -210,3 +215,159 @@ class TestCommitAnalyzer:
             signals[1].sources[0]
             == "https://github.com/anthropics/claude-code-action/commit/def456"
         )
+
+    def test_parse_signals_uses_commit_rows_when_fewer_signals(self, analyzer):
+        """测试解析信号 - 信号少于 commit 时按 commit_rows 对应，而非按位置"""
+        # Arrange
+        commits = [
+            {"repo": "a/one", "sha": "aaa111", "message": "chore: bump deps"},
+            {"repo": "a/one", "sha": "bbb222", "message": "docs: typo"},
+            {"repo": "b/two", "sha": "ccc333", "message": "feat: streaming"},
+        ]
+        llm_response = json.dumps(
+            [
+                {
+                    "title": "流式输出",
+                    "type": "capability",
+                    "category": "engineering",
+                    "impact_score": 4,
+                    "why_it_matters": "减少延迟",
+                    "commit_rows": [3],
+                    "related_repos": [],
+                },
+                {
+                    "title": "未注明来源",
+                    "type": "workflow",
+                    "category": "engineering",
+                    "impact_score": 2,
+                    "why_it_matters": "一般",
+                    "commit_rows": [9],
+                    "related_repos": [],
+                },
+            ],
+            ensure_ascii=False,
+        )
+
+        # Act
+        signals = analyzer._parse_signals(llm_response, commits)
+
+        # Assert
+        assert signals[0].id == "commit-b/two-ccc333"
+        assert signals[0].sources == ["https://github.com/b/two/commit/ccc333"]
+        assert signals[0].related_repos == ["b/two"]
+        # 行号无效时不关联任何 commit
+        assert signals[1].id.startswith("commit-")
+        assert "a/one" not in signals[1].id
+        assert signals[1].sources == []
+
+    def test_build_prompt_numbers_commit_rows(self, analyzer, sample_commit_data):
+        """测试构建 prompt - 每个 commit 带有从 1 开始的行号"""
+        # Act
+        prompt = analyzer._build_prompt(sample_commit_data)
+
+        # Assert
+        lines = prompt.strip().splitlines()
+        assert lines[-3].startswith("row\trepo")
+        assert lines[-2].startswith("1\t")
+        assert lines[-1].startswith("2\t")
+
+
+class TestCommitAnalyzerChunking:
+    """测试 commit 分块和并发分析"""
+
+    @staticmethod
+    def _commit(repo: str, sha: str, size: int = 10) -> dict[str, Any]:
+        """构造 commit 数据"""
+        return {"repo": repo, "sha": sha, "message": "m" * size}
+
+    @staticmethod
+    def _response(commits: list[dict[str, Any]]) -> str:
+        """为分块中每个 commit 返回一条信号"""
+        return json.dumps(
+            [
+                {
+                    "title": f"{c['repo']} {c['sha']}",
+                    "type": "capability",
+                    "category": "engineering",
+                    "impact_score": 3,
+                    "why_it_matters": "重要",
+                    "commit_rows": [row],
+                    "related_repos": [],
+                }
+                for row, c in enumerate(commits, 1)
+            ],
+            ensure_ascii=False,
+        )
+
+    def test_plan_chunks_groups_by_repo_within_token_limit(self):
+        """测试：同一仓库尽量在同一分块，分块不超过 token 上限"""
+        from trendpluse.analyzers.commit_analyzer import CommitAnalyzer
+
+        # Arrange
+        analyzer = CommitAnalyzer(api_key="test-key")
+        header = estimate_tokens(analyzer._build_prompt([]))
+        analyzer.chunk_token_limit = header + 200
+        commits = [
+            self._commit("a/one", "a1", 400),
+            self._commit("b/two", "b1"),
+            self._commit("a/one", "a2", 400),
+            self._commit("c/three", "c1"),
+        ]
+
+        # Act
+        chunks = analyzer.plan_chunks(commits)
+
+        # Assert
+        assert [[c["sha"] for c in chunk] for chunk in chunks] == [
+            ["a1"],
+            ["a2", "b1", "c1"],
+        ]
+
+    def test_chunks_analyzed_concurrently_with_stable_ids(self):
+        """测试：分块并发分析后按顺序合并，信号 ID 与分块方式无关"""
+        from trendpluse.analyzers.commit_analyzer import CommitAnalyzer
+
+        # Arrange
+        commits = [self._commit(f"r/{i % 3}", f"sha{i:02d}", 200) for i in range(9)]
+        single = CommitAnalyzer(api_key="test-key", chunk_token_limit=100_000)
+        chunked = CommitAnalyzer(api_key="test-key", max_concurrency=3)
+        chunked.chunk_token_limit = estimate_tokens(chunked._build_prompt([])) + 200
+
+        # Act
+        with patch.object(single, "_call_llm", side_effect=self._response):
+            single_signals = single.analyze_commits(commits)
+        with patch.object(
+            chunked, "_call_llm", side_effect=self._response
+        ) as mock_call:
+            chunked_signals = chunked.analyze_commits(commits)
+
+        # Assert
+        # 每个仓库 3 个 commit 恰好放进一个分块
+        assert mock_call.call_count == 3
+        assert sorted(s.id for s in chunked_signals) == sorted(
+            s.id for s in single_signals
+        )
+        assert len({s.id for s in chunked_signals}) == 9
+        assert "commit-r/0-sha00" in {s.id for s in chunked_signals}
+
+    def test_failed_chunk_does_not_drop_others(self):
+        """测试：单个分块失败时其他分块的信号仍然返回"""
+        from trendpluse.analyzers.commit_analyzer import CommitAnalyzer
+
+        # Arrange
+        analyzer = CommitAnalyzer(api_key="test-key")
+        header = estimate_tokens(analyzer._build_prompt([]))
+        analyzer.chunk_token_limit = header + 150
+        commits = [self._commit("a/one", "a1", 400), self._commit("b/two", "b1", 400)]
+
+        def call(chunk):
+            if chunk[0]["repo"] == "a/one":
+                raise RuntimeError("context overflow")
+            return self._response(chunk)
+
+        # Act
+        with patch.object(analyzer, "_call_llm", side_effect=call):
+            signals = analyzer.analyze_commits(commits)
+
+        # Assert
+        assert [s.id for s in signals] == ["commit-b/two-b1"]
@@ -67,6 +67,22 @@ class TestSettings:
 
         assert "Invalid repo format" in str(exc_info.value)
 
+    def test_validate_non_positive_requests_per_second(self, monkeypatch):
+        """测试：GitHub 请求速率不是正数时应该抛出错误"""
+        # Arrange
+        monkeypatch.setenv("GITHUB_TOKEN", "test_token")
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test_key")
+        monkeypatch.setenv("GITHUB_REQUESTS_PER_SECOND", "0")
+
+        # Act & Assert
+        with pytest.raises(ValidationError) as exc_info:
+            from trendpluse.config import Settings
+
+            _ = Settings()
+
+        error_fields = {e["loc"][0] for e in exc_info.value.errors()}
+        assert "github_requests_per_second" in error_fields
+
     def test_validate_missing_required_fields(self, monkeypatch):
         """测试：缺少必需字段应该抛出错误"""
         # Arrange - 清除环境变量
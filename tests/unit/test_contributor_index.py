@@ -0,0 +1,73 @@
+"""已知贡献者索引单元测试"""
+
+from datetime import UTC, datetime, timedelta
+
+from trendpluse.collectors.contributor_index import ContributorIndex
+
+
+class TestContributorIndex:
+    """测试已知贡献者索引"""
+
+    def test_is_known_uses_first_seen_time(self):
+        """测试：只有首次出现早于给定时间的贡献者才算已知"""
+        # Arrange
+        index = ContributorIndex(path=None)
+        window_start = datetime(2026, 1, 2, tzinfo=UTC)
+        index.record("o/r", "old", window_start - timedelta(days=3))
+        index.record("o/r", "today", window_start + timedelta(hours=1))
+
+        # Act & Assert
+        assert index.is_known("o/r", "old", before=window_start)
+        assert not index.is_known("o/r", "today", before=window_start)
+        assert not index.is_known("o/r", "stranger", before=window_start)
+        assert not index.is_known("o/other", "old", before=window_start)
+
+    def test_record_keeps_earliest_time(self):
+        """测试：重复记录时保留最早的出现时间"""
+        # Arrange
+        index = ContributorIndex(path=None)
+        later = datetime(2026, 1, 5, tzinfo=UTC)
+        earlier = datetime(2026, 1, 1, tzinfo=UTC)
+
+        # Act
+        first = index.record("o/r", "alice", later)
+        second = index.record("o/r", "alice", earlier)
+
+        # Assert
+        assert first is True
+        assert second is False
+        assert index.is_known("o/r", "alice", before=datetime(2026, 1, 2, tzinfo=UTC))
+
+    def test_seed_marks_repo_and_keeps_recorded_times(self):
+        """测试：回填标记仓库且不覆盖已有记录"""
+        # Arrange
+        index = ContributorIndex(path=None)
+        window_start = datetime(2026, 1, 2, tzinfo=UTC)
+        index.record("o/r", "newbie", window_start + timedelta(hours=1))
+
+        # Act
+        index.seed("o/r", {"veteran", "newbie"})
+
+        # Assert
+        assert index.is_seeded("o/r")
+        assert index.is_known("o/r", "veteran", before=window_start)
+        assert not index.is_known("o/r", "newbie", before=window_start)
+
+    def test_save_and_reload(self, tmp_path):
+        """测试：索引持久化后可重新加载"""
+        # Arrange
+        path = tmp_path / "index.json"
+        index = ContributorIndex(path=str(path))
+        index.seed("o/r", {"veteran"})
+        index.record("o/r", "alice", datetime(2026, 1, 1, tzinfo=UTC))
+
+        # Act
+        index.save()
+        reloaded = ContributorIndex(path=str(path))
+
+        # Assert
+        assert reloaded.is_seeded("o/r")
+        assert reloaded.contributor_count("o/r") == 2
+        assert reloaded.is_known(
+            "o/r", "alice", before=datetime(2026, 2, 1, tzinfo=UTC)
+        )
@@ -0,0 +1,193 @@
+"""本地事件存储单元测试"""
+
+import json
+import sqlite3
+from datetime import UTC, datetime, timedelta
+
+from trendpluse.collectors.event_store import EventStore, event_key
+
+
+def _pr_event(
+    repo: str, number: int, created_at: str, merged_at: str | None = None
+) -> dict:
+    """构造 PR 事件"""
+    return {
+        "type": "PullRequestEvent",
+        "repo": {"name": repo},
+        "payload": {
+            "pull_request": {
+                "number": number,
+                "title": f"PR {number}",
+                "merged": merged_at is not None,
+                "merged_at": merged_at,
+            }
+        },
+        "created_at": created_at,
+    }
+
+
+def _archive_pr_event(
+    repo: str, number: int, action: str, created_at: str, merged_at: str | None
+) -> dict:
+    """构造 GH Archive 的 PR 事件（带 action，事件时间为状态变化时间）"""
+    event = _pr_event(repo, number, created_at, merged_at)
+    event["payload"]["action"] = action
+    return event
+
+
+class TestEventStore:
+    """测试 SQLite 事件存储"""
+
+    def test_query_by_repo_type_and_window(self):
+        """测试：按仓库、类型和时间窗口查询，按时间倒序返回原始事件"""
+        # Arrange
+        store = EventStore(path=None)
+        store.add_events(
+            [
+                _pr_event("o/a", 1, "2026-01-01T10:00:00+00:00"),
+                _pr_event("o/a", 2, "2026-01-03T10:00:00+00:00"),
+                _pr_event("o/b", 3, "2026-01-03T11:00:00Z"),
+                {
+                    "type": "ReleaseEvent",
+                    "repo": {"name": "o/a"},
+                    "payload": {"release": {"tag_name": "v1"}},
+                    "created_at": "2026-01-03T12:00:00+00:00",
+                },
+            ],
+            source="test",
+        )
+
+        # Act
+        events = store.query(
+            ["o/a", "o/b"],
+            since=datetime(2026, 1, 2, tzinfo=UTC),
+            event_types=["PullRequestEvent"],
+        )
+
+        # Assert
+        assert [e["payload"]["pull_request"]["number"] for e in events] == [3, 2]
+        assert events[0]["created_at"] == "2026-01-03T11:00:00Z"
+        assert store.stats["event_store_read"] == 2
+
+    def test_merged_in_window_is_included(self):
+        """测试：创建早于窗口、在窗口内合并的 PR 也会返回"""
+        # Arrange
+        store = EventStore(path=None)
+        store.add_events(
+            [
+                _pr_event(
+                    "o/a",
+                    1,
+                    "2025-12-01T00:00:00+00:00",
+                    merged_at="2026-01-03T00:00:00+00:00",
+                )
+            ],
+            source="test",
+        )
+
+        # Act
+        events = store.query(["o/a"], since=datetime(2026, 1, 2, tzinfo=UTC))
+
+        # Assert
+        assert len(events) == 1
+
+    def test_same_pr_is_replaced(self):
+        """测试：同一 PR 的新状态覆盖旧状态"""
+        # Arrange
+        store = EventStore(path=None)
+        event = _pr_event("o/a", 1, "2026-01-03T00:00:00+00:00")
+        merged = _pr_event(
+            "o/a", 1, "2026-01-03T00:00:00+00:00", "2026-01-03T05:00:00+00:00"
+        )
+
+        # Act
+        store.add_events([event], source="test")
+        store.add_events([merged], source="test")
+        events = store.query(["o/a"], since=datetime(2026, 1, 1, tzinfo=UTC))
+
+        # Assert
+        assert event_key(event) == event_key(merged)
+        assert [e["payload"]["pull_request"]["merged"] for e in events] == [True]
+
+    def test_api_and_archive_events_for_same_pr_are_stored_once(self):
+        """测试：API 和 GH Archive 采集的同一 PR 只保留一条，以最新状态为准"""
+        # Arrange
+        store = EventStore(path=None)
+        opened = _archive_pr_event(
+            "o/a", 1, "opened", "2026-01-03T00:00:00+00:00", None
+        )
+        closed = _archive_pr_event(
+            "o/a", 1, "closed", "2026-01-03T05:00:00+00:00", "2026-01-03T05:00:00Z"
+        )
+        # API 事件没有 action，事件时间为 PR 创建时间
+        api = _pr_event("o/a", 1, "2026-01-03T00:00:00+00:00")
+
+        # Act
+        store.add_events([closed, opened], source="gharchive_local")
+        written = store.add_events([api], source="github_api")
+        events = store.query(["o/a"], since=datetime(2026, 1, 1, tzinfo=UTC))
+
+        # Assert
+        assert event_key(opened) == event_key(closed) == event_key(api)
+        assert written == 0  # 已存储的合并状态更新，不被旧状态覆盖
+        assert len(events) == 1
+        assert events[0]["payload"]["action"] == "closed"
+        assert events[0]["payload"]["pull_request"]["merged"] is True
+
+    def test_legacy_keys_are_merged_on_open(self, tmp_path):
+        """测试：旧版本按 action 区分的 PR 事件在打开存储时合并为一条"""
+        # Arrange
+        path = str(tmp_path / "events.db")
+        EventStore(path=path).close()
+        opened = _archive_pr_event(
+            "o/a", 1, "opened", "2026-01-03T00:00:00+00:00", None
+        )
+        closed = _archive_pr_event(
+            "o/a", 1, "closed", "2026-01-03T05:00:00+00:00", "2026-01-03T05:00:00Z"
+        )
+        with sqlite3.connect(path) as conn:
+            conn.executemany(
+                "INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        f"PullRequestEvent:o/a:1:{event['payload']['action']}",
+                        "PullRequestEvent",
+                        "o/a",
+                        "2026-01-03T00:00:00Z",
+                        "2026-01-03T05:00:00Z",
+                        "gharchive_local",
+                        json.dumps(event),
+                    )
+                    for event in (closed, opened)
+                ],
+            )
+        conn.close()
+
+        # Act
+        store = EventStore(path=path)
+        events = store.query(["o/a"], since=datetime(2026, 1, 1, tzinfo=UTC))
+
+        # Assert
+        assert [e["payload"]["action"] for e in events] == ["closed"]
+
+    def test_coverage_and_persistence(self, tmp_path):
+        """测试：已采集窗口持久化，子窗口视为已覆盖"""
+        # Arrange
+        path = str(tmp_path / "events.db")
+        since = datetime(2026, 1, 1)
+        until = since + timedelta(days=7)
+        store = EventStore(path=path)
+        store.add_events(
+            [_pr_event("o/a", 1, "2026-01-03T00:00:00+00:00")], source="test"
+        )
+        store.record_coverage(["o/a", "o/b"], since, until, source="test")
+        store.close()
+
+        # Act
+        reopened = EventStore(path=path)
+
+        # Assert
+        assert reopened.covers(["o/a", "o/b"], since + timedelta(days=1), until)
+        assert not reopened.covers(["o/a"], since, until + timedelta(hours=1))
+        assert not reopened.covers(["o/a", "o/c"], since, until)
+        assert len(reopened.query(["o/a"], since)) == 1
@@ -1,8 +1,11 @@
 """GitHub API 详情获取单元测试"""
 
+import threading
 from unittest.mock import Mock, patch
 
 import pytest
+import requests
+from github import GithubException
 
 from trendpluse.collectors.github_api import GitHubDetailFetcher
 
@@ -155,7 +158,8 @@ class TestGitHubDetailFetcher:
         mock_pr_2.changed_files = 3
 
         mock_repo = Mock()
-        mock_repo.get_pull.side_effect = [mock_pr_1, mock_pr_2]
+        # 并发获取时请求顺序不确定，按编号返回
+        mock_repo.get_pull.side_effect = {1: mock_pr_1, 2: mock_pr_2}.get
 
         mock_github = Mock()
         mock_github.get_repo.return_value = mock_repo
@@ -184,6 +188,99 @@ class TestGitHubDetailFetcher:
         assert details_list[0]["number"] == 1
         assert details_list[1]["number"] == 2
 
+    @patch("trendpluse.collectors.github_api.Github")
+    def test_fetch_multiple_pr_details_uses_complete_payload(self, mock_github_class):
+        """测试：事件载荷字段完整时不再请求 API"""
+        # Arrange
+        mock_github = Mock()
+        mock_github_class.return_value = mock_github
+        fetcher = GitHubDetailFetcher(token="test_token")
+
+        candidates = [
+            {
+                "type": "PullRequestEvent",
+                "repo": {"name": "owner/repo"},
+                "payload": {
+                    "pull_request": {
+                        "number": 1,
+                        "title": "PR 1",
+                        "body": "Body 1",
+                        "user": {"login": "alice"},
+                        "created_at": "2026-01-01T00:00:00Z",
+                        "closed_at": "2026-01-02T00:00:00Z",
+                        "html_url": "https://github.com/owner/repo/pull/1",
+                        "state": "closed",
+                        "merged": True,
+                        "merge_commit_sha": "sha1",
+                        "additions": 10,
+                        "deletions": 5,
+                        "changed_files": 2,
+                    }
+                },
+            },
+        ]
+
+        # Act
+        details_list = fetcher.fetch_multiple_pr_details(candidates)
+
+        # Assert
+        mock_github.get_repo.assert_not_called()
+        assert details_list == [
+            {
+                "number": 1,
+                "title": "PR 1",
+                "body": "Body 1",
+                "author": "alice",
+                "created_at": "2026-01-01T00:00:00+00:00",
+                "closed_at": "2026-01-02T00:00:00+00:00",
+                "url": "https://github.com/owner/repo/pull/1",
+                "state": "closed",
+                "merged": True,
+                "merge_commit_sha": "sha1",
+                "additions": 10,
+                "deletions": 5,
+                "changed_files": 2,
+            }
+        ]
+
+    def test_details_from_list_payload_without_stats(self):
+        """测试：列表接口载荷缺少 merged 和变更统计时由 merged_at 推导"""
+        # Arrange
+        pr = {
+            "number": 7,
+            "title": "PR 7",
+            "body": None,
+            "user": {"login": "bob"},
+            "created_at": "2026-01-01T00:00:00Z",
+            "merged_at": "2026-01-02T00:00:00Z",
+            "html_url": "https://github.com/owner/repo/pull/7",
+            "state": "closed",
+        }
+
+        # Act
+        details = GitHubDetailFetcher.details_from_payload(pr)
+
+        # Assert
+        assert details is not None
+        assert details["merged"] is True
+        assert details["author"] == "bob"
+        assert details["changed_files"] is None
+
+    def test_details_from_payload_requires_merge_state(self):
+        """测试：既没有 merged 也没有 merged_at 时仍需请求 API"""
+        # Arrange
+        pr = {
+            "number": 7,
+            "title": "PR 7",
+            "user": {"login": "bob"},
+            "created_at": "2026-01-01T00:00:00Z",
+            "html_url": "https://github.com/owner/repo/pull/7",
+            "state": "open",
+        }
+
+        # Act & Assert
+        assert GitHubDetailFetcher.details_from_payload(pr) is None
+
     @patch("trendpluse.collectors.github_api.Github")
     def test_rate_limit_handling(self, mock_github_class):
         """测试：处理 API 速率限制"""
@@ -204,3 +301,137 @@ class TestGitHubDetailFetcher:
         # Act & Assert
         with pytest.raises(Exception):  # 应该抛出异常或处理
             fetcher.fetch_pr_details("owner/repo", 123)
+
+
+def _pr_event(number: int, repo: str = "owner/repo") -> dict:
+    """构造只有编号的 PR 事件（需要请求 API 获取详情）"""
+    return {
+        "type": "PullRequestEvent",
+        "repo": {"name": repo},
+        "payload": {"pull_request": {"number": number}},
+    }
+
+
+def _mock_pull(number: int) -> Mock:
+    """构造 PyGithub PR 对象"""
+    pr = Mock()
+    pr.number = number
+    pr.title = f"PR {number}"
+    pr.user.login = "alice"
+    pr.created_at.isoformat.return_value = "2026-01-01T00:00:00+00:00"
+    pr.closed_at = None
+    pr.merged = True
+    return pr
+
+
+class TestGitHubDetailFetcherBatch:
+    """测试并发批量获取 PR 详情"""
+
+    def test_batch_keeps_input_order_and_collects_errors(self):
+        """测试：结果保持输入顺序，失败的 PR 以结构化错误返回"""
+        # Arrange
+        release_first = threading.Event()
+
+        def get_pull(number):
+            if number == 1:
+                # 第一个 PR 最后完成
+                release_first.wait(timeout=5)
+            if number == 2:
+                raise GithubException(404, {"message": "Not Found"}, {})
+            if number == 3:
+                release_first.set()
+            return _mock_pull(number)
+
+        mock_repo = Mock()
+        mock_repo.get_pull.side_effect = get_pull
+        registry = Mock()
+        registry.get_repo.return_value = mock_repo
+        fetcher = GitHubDetailFetcher(registry=registry, max_workers=3, max_attempts=1)
+
+        # Act
+        batch = fetcher.fetch_pr_details_batch([_pr_event(n) for n in (1, 2, 3)])
+
+        # Assert
+        assert [d["number"] for d in batch.details] == [1, 3]
+        assert len(batch.errors) == 1
+        assert batch.errors[0].number == 2
+        assert batch.errors[0].reason == "error"
+        assert batch.errors[0].attempts == 1
+        assert fetcher.stats["pr_detail_errors"] == 1
+
+    def test_transport_error_on_one_pr_keeps_others(self):
+        """测试：单个 PR 连接失败时记为 transport 错误，其他 PR 照常返回"""
+
+        # Arrange
+        def get_pull(number):
+            if number == 2:
+                raise requests.ConnectionError("connection reset")
+            return _mock_pull(number)
+
+        mock_repo = Mock()
+        mock_repo.get_pull.side_effect = get_pull
+        registry = Mock()
+        registry.get_repo.return_value = mock_repo
+        fetcher = GitHubDetailFetcher(registry=registry, max_workers=3, max_attempts=1)
+
+        # Act
+        batch = fetcher.fetch_pr_details_batch([_pr_event(n) for n in (1, 2, 3)])
+
+        # Assert
+        assert [d["number"] for d in batch.details] == [1, 3]
+        assert [(e.number, e.reason) for e in batch.errors] == [(2, "transport")]
+        assert "connection reset" in batch.errors[0].message
+        assert fetcher.stats["pr_detail_errors"] == 1
+
+    def test_retry_budget_is_shared_across_batch(self):
+        """测试：所有 PR 共享重试预算，用尽后不再重试"""
+        # Arrange
+        mock_repo = Mock()
+        mock_repo.get_pull.side_effect = GithubException(502, {}, {})
+        registry = Mock()
+        registry.get_repo.return_value = mock_repo
+        fetcher = GitHubDetailFetcher(
+            registry=registry,
+            max_workers=1,
+            retry_budget=1,
+            max_attempts=3,
+            retry_backoff=0,
+        )
+
+        # Act
+        batch = fetcher.fetch_pr_details_batch([_pr_event(1), _pr_event(2)])
+
+        # Assert
+        assert batch.details == []
+        assert mock_repo.get_pull.call_count == 3  # 2 次首次请求 + 1 次重试
+        assert sorted(e.attempts for e in batch.errors) == [1, 2]
+        assert fetcher.stats["pr_detail_retries"] == 1
+
+    def test_deadline_returns_partial_results(self):
+        """测试：超过批次截止时间的 PR 记为 timeout，已完成的照常返回"""
+        # Arrange
+        unblock = threading.Event()
+
+        def get_pull(number):
+            if number == 2:
+                unblock.wait(timeout=5)
+            return _mock_pull(number)
+
+        mock_repo = Mock()
+        mock_repo.get_pull.side_effect = get_pull
+        registry = Mock()
+        registry.get_repo.return_value = mock_repo
+        fetcher = GitHubDetailFetcher(
+            registry=registry, max_workers=2, batch_deadline=0.2
+        )
+
+        # Act
+        try:
+            details = fetcher.fetch_multiple_pr_details([_pr_event(1), _pr_event(2)])
+        finally:
+            unblock.set()
+
+        # Assert
+        assert [d["number"] for d in details] == [1]
+        assert [(e.number, e.reason) for e in fetcher.last_errors] == [(2, "timeout")]
+        assert fetcher.stats["pr_detail_timeouts"] == 1
@@ -3,7 +3,41 @@
 from datetime import UTC, datetime, timedelta
 from unittest.mock import Mock, patch
 
+from github import GithubException
+
+from trendpluse.collectors.filter import EventFilter
+from trendpluse.collectors.github_api import GitHubDetailFetcher
 from trendpluse.collectors.github_events import GitHubEventsCollector
+from trendpluse.collectors.pr_store import PullRequestStore
+
+
+def _mock_pr(
+    number: int,
+    created_at: datetime,
+    updated_at: datetime | None = None,
+    merged_at: datetime | None = None,
+    labels: list[str] | None = None,
+) -> Mock:
+    """构造 mock PR（按 updated 排序同步需要 updated_at）"""
+    pr = Mock()
+    pr.number = number
+    pr.title = f"PR {number}"
+    pr.body = "body"
+    pr.state = "closed" if merged_at else "open"
+    pr.draft = False
+    pr.created_at = created_at
+    pr.updated_at = updated_at or created_at
+    pr.closed_at = merged_at
+    pr.merged_at = merged_at
+    pr.html_url = f"https://github.com/owner/repo/pull/{number}"
+    pr.user.login = "alice"
+    pr.merge_commit_sha = f"sha{number}" if merged_at else None
+    pr.labels = []
+    for name in labels or []:
+        label = Mock()
+        label.name = name
+        pr.labels.append(label)
+    return pr
 
 
 class TestGitHubEventsCollector:
@@ -32,11 +66,7 @@ class TestGitHubEventsCollector:
         """测试：fetch_events 应该返回事件列表"""
         # Arrange
         mock_repo = Mock()
-        mock_pr = Mock()
-        mock_pr.number = 123
-        mock_pr.title = "Test PR"
-        mock_pr.body = "Test body"
-        mock_pr.created_at = datetime.now(UTC)
+        mock_pr = _mock_pr(123, datetime.now(UTC))
 
         mock_repo.get_pulls.return_value = [mock_pr]
         mock_github.return_value.get_repo.return_value = mock_repo
@@ -59,10 +89,8 @@ class TestGitHubEventsCollector:
         """测试：应该按日期过滤"""
         # Arrange
         mock_repo = Mock()
-        old_pr = Mock()
-        old_pr.created_at = datetime.now(UTC) - timedelta(days=10)
-        recent_pr = Mock()
-        recent_pr.created_at = datetime.now(UTC)
+        old_pr = _mock_pr(1, datetime.now(UTC) - timedelta(days=10))
+        recent_pr = _mock_pr(2, datetime.now(UTC))
 
         mock_repo.get_pulls.return_value = [recent_pr, old_pr]
         mock_github.return_value.get_repo.return_value = mock_repo
@@ -100,8 +128,7 @@ class TestGitHubEventsCollector:
         """测试：应该处理多个仓库"""
         # Arrange
         mock_repo = Mock()
-        mock_pr = Mock()
-        mock_pr.created_at = datetime.now(UTC)
+        mock_pr = _mock_pr(1, datetime.now(UTC))
         mock_repo.get_pulls.return_value = [mock_pr]
 
         mock_github.return_value.get_repo.return_value = mock_repo
@@ -123,11 +150,7 @@ class TestGitHubEventsCollector:
         """测试：事件格式应与 EventFilter 兼容"""
         # Arrange
         mock_repo = Mock()
-        mock_pr = Mock()
-        mock_pr.number = 123
-        mock_pr.title = "Test PR"
-        mock_pr.body = "Test body"
-        mock_pr.created_at = datetime.now(UTC)
+        mock_pr = _mock_pr(123, datetime.now(UTC))
 
         mock_repo.get_pulls.return_value = [mock_pr]
         mock_github.return_value.get_repo.return_value = mock_repo
@@ -146,3 +169,148 @@ class TestGitHubEventsCollector:
         assert "payload" in event
         assert "created_at" in event
         assert event["repo"]["name"] == "anthropics/skills"
+
+    @patch("trendpluse.collectors.github_events.Github")
+    def test_fetch_events_uses_cursor_on_next_run(self, mock_github):
+        """测试：第二次运行只同步游标之后更新的 PR"""
+        # Arrange
+        now = datetime.now(UTC)
+        first_pr = _mock_pr(1, now - timedelta(hours=5))
+        mock_repo = Mock()
+        mock_repo.get_pulls.return_value = [first_pr]
+        mock_github.return_value.get_repo.return_value = mock_repo
+
+        store = PullRequestStore(path=None)
+        collector = GitHubEventsCollector(pr_store=store)
+        since = now - timedelta(days=7)
+        collector.fetch_events(repos=["owner/repo"], since=since)
+
+        # 第二次运行：新 PR + 已同步过的旧 PR（应在旧 PR 处停止）
+        new_pr = _mock_pr(2, now - timedelta(hours=1))
+        untouched = Mock()
+        untouched.updated_at = now - timedelta(hours=6)
+        mock_repo.get_pulls.return_value = [new_pr, untouched]
+
+        # Act
+        events = collector.fetch_events(repos=["owner/repo"], since=since)
+
+        # Assert
+        mock_repo.get_pulls.assert_called_with(
+            state="all", sort="updated", direction="desc"
+        )
+        assert [e["payload"]["pull_request"]["number"] for e in events] == [2, 1]
+        cursor = store.get_cursor("owner/repo")
+        assert cursor["since"] == since.isoformat()
+        assert cursor["updated_at"] == new_pr.updated_at.isoformat()
+
+    @patch("trendpluse.collectors.github_events.Github")
+    def test_fetch_events_backfill_ignores_newer_cursor(self, mock_github):
+        """测试：回填早于已同步窗口的日期时忽略游标，拉取更早的 PR"""
+        # Arrange
+        now = datetime.now(UTC)
+        recent_pr = _mock_pr(2, now - timedelta(hours=1))
+        mock_repo = Mock()
+        mock_repo.get_pulls.return_value = [recent_pr]
+        mock_github.return_value.get_repo.return_value = mock_repo
+
+        store = PullRequestStore(path=None)
+        collector = GitHubEventsCollector(pr_store=store)
+        collector.fetch_events(repos=["owner/repo"], since=now - timedelta(days=1))
+
+        # 回填：起始时间早于已同步窗口，旧 PR 更新时间早于游标
+        old_pr = _mock_pr(1, now - timedelta(days=5))
+        mock_repo.get_pulls.return_value = [recent_pr, old_pr]
+        backfill_since = now - timedelta(days=7)
+
+        # Act
+        events = collector.fetch_events(repos=["owner/repo"], since=backfill_since)
+
+        # Assert
+        assert [e["payload"]["pull_request"]["number"] for e in events] == [2, 1]
+        assert store.get_cursor("owner/repo")["since"] == backfill_since.isoformat()
+
+    @patch("trendpluse.collectors.github_events.Github")
+    def test_fetch_events_includes_pr_merged_after_creation(self, mock_github):
+        """测试：创建早于窗口但在窗口内合并的 PR 也会返回"""
+        # Arrange
+        now = datetime.now(UTC)
+        late_merge = _mock_pr(
+            5,
+            created_at=now - timedelta(days=20),
+            updated_at=now - timedelta(hours=1),
+            merged_at=now - timedelta(hours=1),
+        )
+        mock_repo = Mock()
+        mock_repo.get_pulls.return_value = [late_merge]
+        mock_github.return_value.get_repo.return_value = mock_repo
+
+        collector = GitHubEventsCollector()
+
+        # Act
+        events = collector.fetch_events(
+            repos=["owner/repo"], since=now - timedelta(days=7)
+        )
+
+        # Assert
+        assert [e["payload"]["pull_request"]["number"] for e in events] == [5]
+
+    @patch("trendpluse.collectors.github_events.Github")
+    def test_fetch_events_persists_store(self, mock_github, tmp_path):
+        """测试：PR 存储持久化，API 失败时仍返回已存储的 PR"""
+        # Arrange
+        now = datetime.now(UTC)
+        path = str(tmp_path / "pr_store.json")
+        mock_repo = Mock()
+        mock_repo.get_pulls.return_value = [_mock_pr(9, now - timedelta(hours=2))]
+        mock_github.return_value.get_repo.return_value = mock_repo
+        since = now - timedelta(days=7)
+        GitHubEventsCollector(pr_store=PullRequestStore(path=path)).fetch_events(
+            repos=["owner/repo"], since=since
+        )
+
+        mock_repo.get_pulls.side_effect = GithubException(500, "boom", None)
+        collector = GitHubEventsCollector(pr_store=PullRequestStore(path=path))
+
+        # Act
+        events = collector.fetch_events(repos=["owner/repo"], since=since)
+
+        # Assert
+        assert [e["payload"]["pull_request"]["number"] for e in events] == [9]
+
+    @patch("trendpluse.collectors.github_events.Github")
+    def test_payload_carries_list_fields(self, mock_github):
+        """测试：事件载荷保留列表接口字段，筛选和详情无需再请求 API"""
+        # Arrange
+        now = datetime.now(UTC)
+        merged_pr = _mock_pr(
+            3,
+            created_at=now - timedelta(hours=5),
+            merged_at=now - timedelta(hours=1),
+            labels=["feature"],
+        )
+        open_pr = _mock_pr(4, created_at=now - timedelta(hours=2))
+        mock_repo = Mock()
+        mock_repo.get_pulls.return_value = [open_pr, merged_pr]
+        mock_github.return_value.get_repo.return_value = mock_repo
+        collector = GitHubEventsCollector()
+
+        # Act
+        events = collector.fetch_events(
+            repos=["owner/repo"], since=now - timedelta(days=1)
+        )
+        candidates = EventFilter().filter_candidates(events)
+        details = GitHubDetailFetcher.details_from_payload(
+            candidates[0]["payload"]["pull_request"]
+        )
+
+        # Assert
+        pr = events[1]["payload"]["pull_request"]
+        assert pr["merged"] is True
+        assert pr["labels"] == [{"name": "feature"}]
+        assert pr["user"] == {"login": "alice"}
+        assert pr["html_url"] == "https://github.com/owner/repo/pull/3"
+        assert events[0]["payload"]["pull_request"]["merged"] is False
+        assert [c["payload"]["pull_request"]["number"] for c in candidates] == [3]
+        assert details is not None
+        assert details["author"] == "alice"
+        assert details["additions"] is None
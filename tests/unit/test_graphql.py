@@ -0,0 +1,400 @@
+"""GraphQL 批量采集器单元测试"""
+
+import json
+from datetime import UTC, datetime, timedelta
+from unittest.mock import MagicMock
+
+import httpx
+import respx
+
+from trendpluse.collectors.activity import ActivityCollector
+from trendpluse.collectors.contributor_index import ContributorIndex
+from trendpluse.collectors.graphql import GraphQLCollector
+
+ENDPOINT = "https://api.github.com/graphql"
+
+
+def _ts(value: datetime) -> str:
+    """格式化为 GraphQL 时间字符串"""
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _pull(number: int, created_at: str, merged: bool = True) -> dict:
+    """构造 GraphQL PR 节点"""
+    return {
+        "number": number,
+        "title": f"PR {number}",
+        "body": "body",
+        "state": "MERGED" if merged else "OPEN",
+        "isDraft": False,
+        "createdAt": created_at,
+        "closedAt": created_at if merged else None,
+        "mergedAt": created_at if merged else None,
+        "merged": merged,
+        "url": f"https://github.com/owner/repo/pull/{number}",
+        "additions": 10,
+        "deletions": 2,
+        "changedFiles": 3,
+        "author": {"login": "alice"},
+        "mergeCommit": {"oid": f"sha{number}"} if merged else None,
+        "labels": {"nodes": [{"name": "feature"}]},
+    }
+
+
+def _release(tag: str, created_at: str) -> dict:
+    """构造 GraphQL Release 节点"""
+    return {
+        "tagName": tag,
+        "name": f"Release {tag}",
+        "isPrerelease": False,
+        "createdAt": created_at,
+        "publishedAt": created_at,
+        "description": "notes",
+        "url": f"https://github.com/owner/repo/releases/tag/{tag}",
+        "author": {"login": "releaser"},
+        "releaseAssets": {"nodes": [{"name": "a.zip", "size": 1, "downloadCount": 2}]},
+    }
+
+
+def _commit(oid: str, login: str | None, date: str) -> dict:
+    """构造 GraphQL Commit 节点"""
+    return {
+        "oid": oid,
+        "message": f"feat: {oid}\n\nbody",
+        "authoredDate": date,
+        "author": {"user": {"login": login} if login else None},
+    }
+
+
+def _connection(nodes: list[dict], cursor: str | None = None) -> dict:
+    """构造 GraphQL 连接"""
+    return {
+        "pageInfo": {"hasNextPage": cursor is not None, "endCursor": cursor},
+        "nodes": nodes,
+    }
+
+
+def _repository(pulls: dict, releases: dict, commits: dict, past_commits: dict) -> dict:
+    """构造仓库节点"""
+    return {
+        "pullRequests": pulls,
+        "releases": releases,
+        "defaultBranchRef": {
+            "target": {"commits": commits, "pastCommits": past_commits}
+        },
+    }
+
+
+class TestGraphQLCollector:
+    """测试 GraphQL 批量采集器"""
+
+    @respx.mock
+    def test_collect_all_batches_repos_into_one_query(self):
+        """测试：多个仓库合并为一次查询，输出与 REST 采集器一致"""
+        # Arrange
+        now = datetime.now(UTC)
+        recent = _ts(now - timedelta(hours=2))
+        old = _ts(now - timedelta(days=40))
+
+        repo_a = _repository(
+            pulls=_connection([_pull(2, recent), _pull(1, old)]),
+            releases=_connection([_release("v2.0.0", recent), _release("v1.0.0", old)]),
+            commits=_connection(
+                [
+                    _commit("abc1234567", "alice", recent),
+                    _commit("def7654321", "bob", recent),
+                ]
+            ),
+            past_commits=_connection([_commit("old1", "alice", recent)]),
+        )
+        repo_b = _repository(
+            pulls=_connection([]),
+            releases=_connection([]),
+            commits=_connection([]),
+            past_commits=_connection([]),
+        )
+        route = respx.post(ENDPOINT).mock(
+            return_value=httpx.Response(
+                200, json={"data": {"r0": repo_a, "r1": repo_b}}
+            )
+        )
+
+        collector = GraphQLCollector(token="test_token")
+        since = now - timedelta(days=7)
+
+        # Act
+        activity, releases, events = collector.collect_all(
+            repos=["owner/repo", "owner/empty"],
+            activity_since=now,
+            release_since=since,
+            pr_since=since,
+        )
+
+        # Assert - 请求数
+        assert route.call_count == 1
+        assert collector.stats == {"graphql_requests": 1}
+        query = json.loads(route.calls[0].request.content)["query"]
+        assert 'r0: repository(owner: "owner", name: "repo")' in query
+        assert 'r1: repository(owner: "owner", name: "empty")' in query
+
+        # Assert - 活跃度
+        assert activity["total_commits"] == 2
+        assert activity["active_repos"] == 1
+        assert activity["new_contributors"] == 1
+        assert activity["detailed_commits"][0]["sha"] == "abc1234567"
+
+        # Assert - Releases
+        assert releases["total_releases"] == 1
+        assert releases["detailed_releases"][0]["tag_name"] == "v2.0.0"
+        assert releases["detailed_releases"][0]["assets"][0]["download_count"] == 2
+
+        # Assert - PR 事件携带合并状态、标签和变更统计
+        assert len(events) == 1
+        pr = events[0]["payload"]["pull_request"]
+        assert events[0]["repo"]["name"] == "owner/repo"
+        assert pr["number"] == 2
+        assert pr["merged"] is True
+        assert pr["labels"] == [{"name": "feature"}]
+        assert pr["additions"] == 10
+        assert pr["changed_files"] == 3
+        assert pr["user"] == {"login": "alice"}
+
+    @respx.mock
+    def test_follow_up_queries_only_request_remaining_pages(self):
+        """测试：只为需要翻页的连接追加请求"""
+        # Arrange
+        now = datetime.now(UTC)
+        recent = _ts(now - timedelta(hours=2))
+        responses = [
+            {
+                "data": {
+                    "r0": _repository(
+                        pulls=_connection([_pull(3, recent)], cursor="PR_CURSOR"),
+                        releases=_connection([]),
+                        commits=_connection([]),
+                        past_commits=_connection([]),
+                    )
+                }
+            },
+            {"data": {"r0": {"pullRequests": _connection([_pull(2, recent)])}}},
+        ]
+        route = respx.post(ENDPOINT).mock(
+            side_effect=[httpx.Response(200, json=body) for body in responses]
+        )
+
+        collector = GraphQLCollector(token="test_token")
+
+        # Act
+        _, _, events = collector.collect_all(
+            repos=["owner/repo"],
+            activity_since=now,
+            release_since=now - timedelta(days=7),
+            pr_since=now - timedelta(days=7),
+        )
+
+        # Assert
+        assert route.call_count == 2
+        follow_up = json.loads(route.calls[1].request.content)["query"]
+        assert 'after: "PR_CURSOR"' in follow_up
+        assert "releases(" not in follow_up
+        assert "history(" not in follow_up
+        assert [e["payload"]["pull_request"]["number"] for e in events] == [3, 2]
+
+    @respx.mock
+    def test_release_pages_fetched_counts_connection_pages(self):
+        """测试：pages_fetched 统计实际获取的 Release 连接页数"""
+        # Arrange
+        now = datetime.now(UTC)
+        recent = _ts(now - timedelta(hours=2))
+        responses = [
+            {
+                "data": {
+                    "r0": _repository(
+                        pulls=_connection([]),
+                        releases=_connection(
+                            [_release("v2.0.0", recent)], cursor="REL_CURSOR"
+                        ),
+                        commits=_connection([]),
+                        past_commits=_connection([]),
+                    )
+                }
+            },
+            {"data": {"r0": {"releases": _connection([_release("v1.0.0", recent)])}}},
+        ]
+        respx.post(ENDPOINT).mock(
+            side_effect=[httpx.Response(200, json=body) for body in responses]
+        )
+
+        collector = GraphQLCollector(token="test_token")
+
+        # Act
+        _, releases, _ = collector.collect_all(
+            repos=["owner/repo"],
+            activity_since=now,
+            release_since=now - timedelta(days=7),
+            pr_since=now - timedelta(days=7),
+        )
+
+        # Assert
+        assert releases["total_releases"] == 2
+        assert releases["pages_fetched"] == 2
+
+    @respx.mock
+    def test_stops_paging_when_page_is_older_than_since(self):
+        """测试：最后一条早于起始时间时不再翻页"""
+        # Arrange
+        now = datetime.now(UTC)
+        old = _ts(now - timedelta(days=40))
+        route = respx.post(ENDPOINT).mock(
+            return_value=httpx.Response(
+                200,
+                json={
+                    "data": {
+                        "r0": _repository(
+                            pulls=_connection([_pull(1, old)], cursor="MORE"),
+                            releases=_connection([_release("v1", old)], cursor="MORE"),
+                            commits=_connection([]),
+                            past_commits=_connection([]),
+                        )
+                    }
+                },
+            )
+        )
+
+        collector = GraphQLCollector(token="test_token")
+
+        # Act
+        _, releases, events = collector.collect_all(
+            repos=["owner/repo"],
+            activity_since=now,
+            release_since=now - timedelta(days=7),
+            pr_since=now - timedelta(days=7),
+        )
+
+        # Assert
+        assert route.call_count == 1
+        assert events == []
+        assert releases["total_releases"] == 0
+
+    @respx.mock
+    def test_missing_repo_does_not_abort_batch(self):
+        """测试：单个仓库不存在时继续处理同批次其他仓库"""
+        # Arrange
+        now = datetime.now(UTC)
+        recent = _ts(now - timedelta(hours=2))
+        respx.post(ENDPOINT).mock(
+            return_value=httpx.Response(
+                200,
+                json={
+                    "data": {
+                        "r0": None,
+                        "r1": _repository(
+                            pulls=_connection([_pull(7, recent)]),
+                            releases=_connection([]),
+                            commits=_connection([]),
+                            past_commits=_connection([]),
+                        ),
+                    },
+                    "errors": [
+                        {"path": ["r0"], "message": "Could not resolve to a Repository"}
+                    ],
+                },
+            )
+        )
+
+        collector = GraphQLCollector(token="test_token")
+
+        # Act
+        activity, _, events = collector.collect_all(
+            repos=["bad/repo", "good/repo"],
+            activity_since=now,
+            release_since=now - timedelta(days=7),
+            pr_since=now - timedelta(days=7),
+        )
+
+        # Assert
+        assert [e["repo"]["name"] for e in events] == ["good/repo"]
+        assert [a["repo"] for a in activity["repo_activity"]] == ["good/repo"]
+
+    @respx.mock
+    def test_repos_are_split_into_batches(self):
+        """测试：仓库按 repos_per_query 分批查询"""
+        # Arrange
+        empty = _repository(
+            pulls=_connection([]),
+            releases=_connection([]),
+            commits=_connection([]),
+            past_commits=_connection([]),
+        )
+        route = respx.post(ENDPOINT).mock(
+            side_effect=lambda request: httpx.Response(
+                200,
+                json={
+                    "data": {
+                        alias: empty
+                        for alias in ("r0", "r1")
+                        if f"{alias}: repository"
+                        in json.loads(request.content)["query"]
+                    }
+                },
+            )
+        )
+
+        collector = GraphQLCollector(token="test_token", repos_per_query=2)
+        now = datetime.now(UTC)
+
+        # Act
+        collector.collect_all(
+            repos=["o/a", "o/b", "o/c"],
+            activity_since=now,
+            release_since=now,
+            pr_since=now,
+        )
+
+        # Assert
+        assert route.call_count == 2
+
+    @respx.mock
+    def test_new_contributors_use_contributor_index(self):
+        """测试：提供活跃度采集器时按贡献者索引判断新贡献者，查询不含 30 天采样"""
+        # Arrange
+        now = datetime.now(UTC)
+        recent = _ts(now - timedelta(hours=2))
+        repo = _repository(
+            pulls=_connection([]),
+            releases=_connection([]),
+            commits=_connection(
+                [
+                    _commit("abc1234567", "alice", recent),
+                    _commit("def7654321", "bob", recent),
+                ]
+            ),
+            past_commits=_connection([]),
+        )
+        route = respx.post(ENDPOINT).mock(
+            return_value=httpx.Response(200, json={"data": {"r0": repo}})
+        )
+
+        # alice 是索引中的老贡献者（30 天采样里没有她）
+        index = ContributorIndex(path=None)
+        index.seed("owner/repo", {"alice"})
+        activity_collector = ActivityCollector(contributor_index=index)
+        activity_collector.client = MagicMock()
+        collector = GraphQLCollector(
+            token="test_token", activity_collector=activity_collector
+        )
+
+        # Act
+        activity, _, _ = collector.collect_all(
+            repos=["owner/repo"],
+            activity_since=now,
+            release_since=now,
+            pr_since=now,
+        )
+
+        # Assert
+        assert activity["new_contributors"] == 1
+        query = json.loads(route.calls[0].request.content)["query"]
+        assert "pastCommits" not in query
+        window_start = now - timedelta(days=1)
+        assert not index.is_known("owner/repo", "bob", before=window_start)
@@ -0,0 +1,203 @@
+"""条件请求缓存单元测试"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import httpx
+import requests
+import respx
+from github import Github
+from requests.adapters import HTTPAdapter
+
+from trendpluse.collectors.async_engine import AsyncCollectionEngine
+from trendpluse.collectors.http_cache import CachingHTTPAdapter, HttpCache
+from trendpluse.collectors.transport import install_transport
+
+
+def _response(status: int, body: bytes = b"", headers: dict | None = None):
+    """构造 requests 响应"""
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response.headers.update(headers or {})
+    return response
+
+
+def _prepared(url: str = "https://api.github.com/repos/o/r/releases"):
+    """构造已准备好的 GET 请求"""
+    request = requests.Request(
+        "GET", url, headers={"Authorization": "token abc"}
+    ).prepare()
+    return request
+
+
+class TestHttpCache:
+    """测试磁盘 HTTP 缓存"""
+
+    def test_put_and_get_roundtrip(self, tmp_path):
+        """测试：写入后可以读回原始内容"""
+        # Arrange
+        cache = HttpCache(cache_dir=str(tmp_path))
+        key = cache.make_key("https://x/y", "token")
+
+        # Act
+        cache.put(key, "https://x/y", 200, {"ETag": '"v1"'}, b'[{"a": 1}]')
+        entry = cache.get(key)
+
+        # Assert
+        assert entry is not None
+        assert entry.etag == '"v1"'
+        assert entry.content == b'[{"a": 1}]'
+        assert cache.conditional_headers(entry) == {"If-None-Match": '"v1"'}
+
+    def test_key_depends_on_token(self):
+        """测试：不同 token 使用不同缓存键"""
+        assert HttpCache.make_key("https://x", "a") != HttpCache.make_key(
+            "https://x", "b"
+        )
+
+    def test_response_without_validators_is_not_cached(self, tmp_path):
+        """测试：没有 ETag/Last-Modified 的响应不缓存"""
+        # Arrange
+        cache = HttpCache(cache_dir=str(tmp_path))
+        key = cache.make_key("https://x/y", None)
+
+        # Act
+        result = cache.put(key, "https://x/y", 200, {}, b"{}")
+
+        # Assert
+        assert result is None
+        assert cache.get(key) is None
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """测试：超过大小上限时淘汰最久未访问的条目"""
+        # Arrange
+        cache = HttpCache(cache_dir=str(tmp_path), max_bytes=900)
+        body = b"x" * 150
+        keys = [cache.make_key(f"https://x/{i}", None) for i in range(3)]
+        cache.put(keys[0], "https://x/0", 200, {"ETag": "a"}, body)
+        cache.put(keys[1], "https://x/1", 200, {"ETag": "b"}, body)
+        # 让 0 号条目成为最旧、1 号条目最近访问
+        os.utime(tmp_path / f"{keys[0]}.json", (1, 1))
+        os.utime(tmp_path / f"{keys[1]}.json", (2, 2))
+        cache.get(keys[1])
+
+        # Act
+        cache.put(keys[2], "https://x/2", 200, {"ETag": "c"}, body)
+
+        # Assert
+        assert cache.get(keys[0]) is None
+        assert cache.get(keys[1]) is not None
+        assert cache.get(keys[2]) is not None
+        assert cache.evictions == 1
+
+
+class TestCachingHTTPAdapter:
+    """测试 requests 缓存适配器"""
+
+    def test_not_modified_returns_cached_body(self, tmp_path):
+        """测试：304 时返回缓存内容并更新速率限制头"""
+        # Arrange
+        cache = HttpCache(cache_dir=str(tmp_path))
+        adapter = CachingHTTPAdapter(cache)
+        fresh = _response(
+            200,
+            b'[{"tag_name": "v1"}]',
+            {"ETag": '"v1"', "X-RateLimit-Remaining": "10"},
+        )
+        not_modified = _response(304, headers={"X-RateLimit-Remaining": "9"})
+
+        # Act
+        with patch.object(
+            HTTPAdapter, "send", side_effect=[fresh, not_modified]
+        ) as send:
+            adapter.send(_prepared())
+            cached = adapter.send(_prepared())
+
+        # Assert
+        second_request = send.call_args_list[1].args[0]
+        assert second_request.headers["If-None-Match"] == '"v1"'
+        assert cached.status_code == 200
+        assert cached.json() == [{"tag_name": "v1"}]
+        assert cached.headers["X-RateLimit-Remaining"] == "9"
+        assert cache.stats["http_cache_hits"] == 1
+        assert cache.stats["http_cache_misses"] == 1
+
+    def test_concurrent_sends_count_every_miss(self, tmp_path):
+        """测试：采集线程并发请求时命中 / 未命中计数不丢失"""
+        # Arrange
+        cache = HttpCache(cache_dir=str(tmp_path))
+        adapter = CachingHTTPAdapter(cache)
+
+        # Act
+        with (
+            patch.object(HTTPAdapter, "send", return_value=_response(200, b"{}")),
+            ThreadPoolExecutor(max_workers=8) as executor,
+        ):
+            list(executor.map(lambda _: adapter.send(_prepared()), range(400)))
+
+        # Assert
+        assert cache.stats["http_cache_misses"] == 400
+
+    def test_non_get_requests_bypass_cache(self, tmp_path):
+        """测试：非 GET 请求不经过缓存"""
+        # Arrange
+        cache = HttpCache(cache_dir=str(tmp_path))
+        adapter = CachingHTTPAdapter(cache)
+        request = requests.Request("POST", "https://api.github.com/graphql").prepare()
+
+        # Act
+        with patch.object(HTTPAdapter, "send", return_value=_response(200)):
+            adapter.send(request)
+
+        # Assert
+        assert cache.stats["http_cache_misses"] == 0
+        assert not any(tmp_path.iterdir())
+
+    def test_install_transport_mounts_cache_adapter(self, tmp_path):
+        """测试：安装后 PyGithub 新建的连接使用缓存适配器"""
+        # Arrange
+        client = Github()
+        cache = HttpCache(cache_dir=str(tmp_path))
+
+        # Act
+        install_transport(client, http_cache=cache)
+        connection_class = client.requester._Requester__connectionClass
+        connection = connection_class("api.github.com", 443)
+
+        # Assert
+        assert isinstance(
+            connection.session.get_adapter("https://x"), CachingHTTPAdapter
+        )
+
+
+class TestAsyncEngineCache:
+    """测试异步采集引擎的条件请求"""
+
+    @respx.mock
+    def test_async_engine_uses_conditional_requests(self, tmp_path):
+        """测试：异步引擎在 304 时使用缓存内容"""
+        # Arrange
+        recent = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
+        pulls = [{"number": 1, "title": "t", "body": "", "created_at": recent}]
+        route = respx.get("https://api.github.com/repos/o/r/pulls").mock(
+            side_effect=[
+                httpx.Response(200, json=pulls, headers={"ETag": '"p1"'}),
+                httpx.Response(304),
+            ]
+        )
+        cache = HttpCache(cache_dir=str(tmp_path))
+        engine = AsyncCollectionEngine(token="t", http_cache=cache)
+        since = datetime.now() - timedelta(days=1)
+
+        # Act
+        first = asyncio.run(engine.fetch_events_async(["o/r"], since))
+        second = asyncio.run(engine.fetch_events_async(["o/r"], since))
+
+        # Assert
+        assert first == second
+        assert route.calls[1].request.headers["If-None-Match"] == '"p1"'
+        assert cache.hits == 1
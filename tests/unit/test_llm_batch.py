@@ -0,0 +1,233 @@
+"""LLMBatchRunner 单元测试"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from trendpluse.analyzers.commit_analyzer import CommitAnalyzer
+from trendpluse.analyzers.llm_batch import BatchDeferredError, LLMBatchRunner
+from trendpluse.analyzers.llm_cache import LLMCache
+from trendpluse.analyzers.llm_gateway import LLMGateway
+from trendpluse.analyzers.token_budget import TokenBudget
+from trendpluse.analyzers.trend_analyzer import TrendAnalyzer
+from trendpluse.models.signal import Signal
+
+
+def _batch(status: str, base_url: str) -> dict:
+    """构造 message batch 对象"""
+    return {
+        "id": "msgbatch_1",
+        "type": "message_batch",
+        "processing_status": status,
+        "request_counts": {
+            "processing": 0,
+            "succeeded": 0,
+            "errored": 0,
+            "canceled": 0,
+            "expired": 0,
+        },
+        "created_at": "2026-01-02T00:00:00Z",
+        "expires_at": "2026-01-03T00:00:00Z",
+        "ended_at": None,
+        "archived_at": None,
+        "cancel_initiated_at": None,
+        "results_url": (
+            f"{base_url}/v1/messages/batches/msgbatch_1/results"
+            if status == "ended"
+            else None
+        ),
+    }
+
+
+def _message(content: list[dict]) -> dict:
+    """构造 Message 响应"""
+    return {
+        "id": "msg_1",
+        "type": "message",
+        "role": "assistant",
+        "model": "glm-4.7",
+        "content": content,
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": 30, "output_tokens": 20},
+    }
+
+
+def _result(custom_id: str, params: dict) -> dict:
+    """按请求类型构造成功的批处理结果"""
+    if "tools" in params:
+        signal = {
+            "id": "x",
+            "title": "流式 API",
+            "type": "capability",
+            "category": "engineering",
+            "impact_score": 4,
+            "why_it_matters": "减少延迟",
+            "sources": [],
+            "related_repos": [],
+        }
+        content = [{"type": "tool_use", "id": "t1", "name": "Signal", "input": signal}]
+    else:
+        signals = [
+            {
+                "title": "新特性",
+                "type": "capability",
+                "category": "engineering",
+                "impact_score": 3,
+                "why_it_matters": "重要",
+                "commit_rows": [1],
+                "related_repos": [],
+            }
+        ]
+        content = [{"type": "text", "text": json.dumps(signals, ensure_ascii=False)}]
+    return {
+        "custom_id": custom_id,
+        "result": {"type": "succeeded", "message": _message(content)},
+    }
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """本地 Message Batches 替身端点：第一次查询处理中，之后处理完成"""
+
+    submitted: list[dict] = []
+    create_calls = 0
+    retrieve_calls = 0
+
+    def do_POST(self):  # noqa: N802
+        length = int(self.headers["Content-Length"])
+        type(self).submitted.extend(json.loads(self.rfile.read(length))["requests"])
+        type(self).create_calls += 1
+        self._send_json(_batch("in_progress", self._base()))
+
+    def do_GET(self):  # noqa: N802
+        if self.path.endswith("/results"):
+            lines = [_result(r["custom_id"], r["params"]) for r in self.submitted]
+            body = "\n".join(json.dumps(line, ensure_ascii=False) for line in lines)
+            self._send(body.encode(), "application/binary")
+            return
+        type(self).retrieve_calls += 1
+        status = "in_progress" if self.retrieve_calls == 1 else "ended"
+        self._send_json(_batch(status, self._base()))
+
+    def log_message(self, format, *args):
+        pass
+
+    def _base(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _send_json(self, data: dict) -> None:
+        self._send(json.dumps(data).encode(), "application/json")
+
+    def _send(self, body: bytes, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def stand_in():
+    """启动本地替身端点，返回 (base_url, handler 类)"""
+    handler = type(
+        "StandIn",
+        (_StandInHandler,),
+        {"submitted": [], "create_calls": 0, "retrieve_calls": 0},
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", handler
+    server.shutdown()
+    server.server_close()
+
+
+def _pr() -> dict:
+    """构造 PR 详情"""
+    return {"number": 7, "title": "Add streaming", "repo_name": "a/b", "url": "u"}
+
+
+class TestLLMBatchRunner:
+    """测试批处理任务"""
+
+    def test_collect_submit_and_replay_from_cache(self, tmp_path, stand_in):
+        """测试：收集的请求一次提交，结果按 custom_id 回填后分析器不再即时调用"""
+        # Arrange
+        base_url, handler = stand_in
+        budget = TokenBudget(daily_limit=0, ledger_path=str(tmp_path / "l.json"))
+        gateway = LLMGateway(
+            api_key="test_key", cache=LLMCache(str(tmp_path / "c")), budget=budget
+        )
+        runner = LLMBatchRunner(
+            gateway,
+            state_path=str(tmp_path / "batch.json"),
+            base_url=base_url,
+            poll_interval=0,
+        )
+        commit_analyzer = CommitAnalyzer(api_key="test_key", gateway=gateway)
+        trend_analyzer = TrendAnalyzer(api_key="test_key", gateway=gateway)
+        commits = [{"repo": "a/b", "sha": "abc123", "message": "feat: streaming"}]
+
+        # Act
+        with runner.collecting():
+            assert commit_analyzer.analyze_commits(commits) == []
+            assert trend_analyzer.analyze_prs([_pr()]) == []
+            assert [e.reason for e in trend_analyzer.last_errors] == ["deferred"]
+            with pytest.raises(BatchDeferredError):
+                trend_analyzer.analyze_pr(_pr())
+        stored = runner.run(run_id="2026-01-02")
+        commit_signals = commit_analyzer.analyze_commits(commits)
+        pr_signals = trend_analyzer.analyze_prs([_pr()])
+
+        # Assert
+        # 重复请求只提交一次
+        submitted = handler.submitted
+        assert [r["custom_id"].split("-")[0] for r in submitted] == ["commits", "pr"]
+        assert submitted[1]["params"]["tool_choice"] == {
+            "type": "tool",
+            "name": "Signal",
+        }
+        assert stored == 2
+        assert [s.id for s in commit_signals] == ["commit-a/b-abc123"]
+        assert isinstance(pr_signals[0], Signal)
+        assert pr_signals[0].sources == ["u"]
+        # 第二遍全部命中缓存，没有即时请求
+        assert gateway.stats["llm_requests"] == 0
+        assert budget.stats["token_budget_used"] == 100
+        assert runner.stats["llm_batch_succeeded"] == 2
+
+    def test_resumes_submitted_batch_after_restart(self, tmp_path, stand_in):
+        """测试：重启后同一运行续接已提交的批次，不再重复提交"""
+        # Arrange
+        base_url, handler = stand_in
+        state_path = tmp_path / "batch.json"
+        state_path.write_text(
+            json.dumps({"run_id": "2026-01-02", "batch_id": "msgbatch_1"})
+        )
+        gateway = LLMGateway(api_key="test_key", cache=LLMCache(str(tmp_path / "c")))
+        runner = LLMBatchRunner(
+            gateway, state_path=str(state_path), base_url=base_url, poll_interval=0
+        )
+        commit_analyzer = CommitAnalyzer(api_key="test_key", gateway=gateway)
+        commits = [{"repo": "a/b", "sha": "abc123", "message": "feat: streaming"}]
+        with runner.collecting():
+            commit_analyzer.analyze_commits(commits)
+        # 替身端点上的批次来自重启前的提交
+        handler.submitted = [
+            {"custom_id": custom_id, "params": request["params"]}
+            for custom_id, request in runner._requests.items()
+        ]
+
+        # Act
+        stored = runner.run(run_id="2026-01-02")
+
+        # Assert
+        assert handler.create_calls == 0
+        assert stored == 1
+        assert runner.stats["llm_batch_resumed"] == 1
+        assert json.loads(state_path.read_text())["done"] is True
+        assert [s.id for s in commit_analyzer.analyze_commits(commits)] == [
+            "commit-a/b-abc123"
+        ]
@@ -0,0 +1,139 @@
+"""LLMCache 单元测试"""
+
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+from anthropic.types import Message
+
+from trendpluse.analyzers.llm_cache import LLMCache
+from trendpluse.analyzers.llm_gateway import LLMGateway
+from trendpluse.models.signal import Signal
+
+
+def _message(text: str) -> Message:
+    """构造 Message 响应"""
+    return Message(
+        id="msg_1",
+        type="message",
+        role="assistant",
+        model="glm-4.7",
+        content=[{"type": "text", "text": text}],
+        stop_reason="end_turn",
+        stop_sequence=None,
+        usage={"input_tokens": 10, "output_tokens": 5},
+    )
+
+
+class TestLLMCache:
+    """测试磁盘 LLM 响应缓存"""
+
+    def test_put_and_get_roundtrip(self, tmp_path):
+        """测试：写入后可按相同参数读取"""
+        # Arrange
+        cache = LLMCache(cache_dir=str(tmp_path))
+        params = {"model": "m", "temperature": 0.3, "max_tokens": 10, "prompt": "p"}
+        key = cache.make_key("message", params)
+
+        # Act
+        cache.put(key, {"text": "hello"})
+
+        # Assert
+        assert cache.get(key) == {"text": "hello"}
+        assert cache.make_key("message", dict(params)) == key
+        assert cache.make_key("message", {**params, "temperature": 0}) != key
+        assert cache.stats["llm_cache_hits"] == 1
+
+    def test_expired_entry_is_miss(self, tmp_path):
+        """测试：超过有效期的条目视为未命中并删除"""
+        # Arrange
+        cache = LLMCache(cache_dir=str(tmp_path), ttl=60)
+        cache.put("k", {"text": "old"})
+
+        # Act
+        with patch(
+            "trendpluse.analyzers.llm_cache.time.time",
+            return_value=time.time() + 120,
+        ):
+            result = cache.get("k")
+
+        # Assert
+        assert result is None
+        assert cache.misses == 1
+        assert not (tmp_path / "k.json").exists()
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """测试：超过大小上限时淘汰最久未访问的条目"""
+        # Arrange
+        cache = LLMCache(cache_dir=str(tmp_path), max_bytes=250)
+        cache.put("a", {"text": "x" * 50})
+        cache.put("b", {"text": "y" * 50})
+        os.utime(tmp_path / "a.json", (1, 1))
+        os.utime(tmp_path / "b.json", (2, 2))
+
+        # Act
+        cache.put("c", {"text": "z" * 50})
+
+        # Assert
+        assert not (tmp_path / "a.json").exists()
+        assert (tmp_path / "c.json").exists()
+        assert cache.evictions == 1
+
+
+class TestLLMGatewayCache:
+    """测试网关前置的响应缓存"""
+
+    @patch("trendpluse.analyzers.llm_gateway.Anthropic")
+    def test_identical_message_is_served_from_cache(self, mock_anthropic, tmp_path):
+        """测试：相同请求第二次直接返回缓存，不再调用 API"""
+        # Arrange
+        cache = LLMCache(cache_dir=str(tmp_path))
+        gateway = LLMGateway(api_key="test_key", cache=cache)
+        mock_anthropic.return_value.messages.create.return_value = _message("[]")
+        request = {
+            "model": "glm-4.7",
+            "max_tokens": 100,
+            "temperature": 0.3,
+            "messages": [{"role": "user", "content": "分析"}],
+        }
+
+        # Act
+        first = gateway.create_message(**request)
+        second = LLMGateway(api_key="test_key", cache=cache).create_message(**request)
+
+        # Assert
+        assert mock_anthropic.return_value.messages.create.call_count == 1
+        assert second.content[0].text == first.content[0].text == "[]"
+        assert cache.stats["llm_cache_hits"] == 1
+        assert cache.stats["llm_cache_misses"] == 1
+
+    @patch("trendpluse.analyzers.llm_gateway.instructor.from_anthropic")
+    @patch("trendpluse.analyzers.llm_gateway.Anthropic")
+    def test_structured_result_is_cached(
+        self, mock_anthropic, mock_from_anthropic, tmp_path
+    ):
+        """测试：Instructor 结构化结果同样缓存并还原为响应模型"""
+        # Arrange
+        signal = Signal(
+            id="r-1",
+            title="流式 API",
+            type="capability",
+            category="engineering",
+            impact_score=4,
+            why_it_matters="减少延迟",
+            sources=["https://github.com/a/b/pull/1"],
+            related_repos=["a/b"],
+        )
+        mock_create = MagicMock(return_value=signal)
+        mock_from_anthropic.return_value.chat.completions.create = mock_create
+        gateway = LLMGateway(api_key="test_key", cache=LLMCache(str(tmp_path)))
+        request = {"model": "glm-4.7", "messages": [{"role": "user", "content": "x"}]}
+
+        # Act
+        gateway.create_structured(Signal, **request)
+        cached = gateway.create_structured(Signal, **request)
+
+        # Assert
+        mock_create.assert_called_once()
+        assert isinstance(cached, Signal)
+        assert cached == signal
@@ -0,0 +1,330 @@
+"""LLMGateway 单元测试"""
+
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from anthropic.types import Message
+from pydantic import BaseModel, Field
+
+from trendpluse.analyzers.commit_analyzer import SYSTEM_PROMPT, CommitAnalyzer
+from trendpluse.analyzers.llm_gateway import MIN_CACHEABLE_TOKENS, LLMGateway
+from trendpluse.analyzers.release_analyzer import ReleaseAnalyzer
+from trendpluse.analyzers.signal_deduplicator import (
+    SYSTEM_PROMPT as DEDUP_SYSTEM_PROMPT,
+)
+from trendpluse.analyzers.token_budget import TokenBudget
+from trendpluse.analyzers.tokens import estimate_tokens
+
+
+class TestLLMGateway:
+    """测试共享 LLM 网关"""
+
+    @patch("trendpluse.analyzers.llm_gateway.Anthropic")
+    def test_client_configured_with_timeout_and_retries(self, mock_anthropic):
+        """测试：客户端使用配置的超时、重试次数和连接池"""
+        # Act
+        gateway = LLMGateway(
+            api_key="test_key",
+            base_url="https://test.api",
+            timeout=30,
+            max_retries=5,
+        )
+
+        # Assert
+        kwargs = mock_anthropic.call_args.kwargs
+        assert kwargs["api_key"] == "test_key"
+        assert kwargs["base_url"] == "https://test.api"
+        assert kwargs["timeout"] == 30
+        assert kwargs["max_retries"] == 5
+        assert kwargs["http_client"] is not None
+        assert gateway.client is mock_anthropic.return_value
+
+    @patch("trendpluse.analyzers.llm_gateway.Anthropic")
+    def test_analyzers_share_one_client(self, mock_anthropic):
+        """测试：注入同一网关的分析器复用同一个客户端"""
+        # Arrange
+        gateway = LLMGateway(api_key="test_key")
+        mock_anthropic.return_value.messages.create.return_value = MagicMock(
+            content=[MagicMock(text="[]")]
+        )
+        commit_analyzer = CommitAnalyzer(api_key="test_key", gateway=gateway)
+        release_analyzer = ReleaseAnalyzer(api_key="test_key", gateway=gateway)
+
+        # Act
+        commit_analyzer.analyze_commits([{"repo": "a/b", "sha": "abc"}])
+        release_analyzer.analyze_releases(
+            {"detailed_releases": [{"repo": "a/b", "tag_name": "v1.0.0"}]}
+        )
+
+        # Assert
+        mock_anthropic.assert_called_once()
+        assert mock_anthropic.return_value.messages.create.call_count == 2
+        assert gateway.stats == {
+            "llm_requests": 2,
+            "llm_errors": 0,
+            "llm_input_tokens": 0,
+            "llm_cache_read_tokens": 0,
+            "llm_cache_write_tokens": 0,
+        }
+
+    @patch("trendpluse.analyzers.llm_gateway.Anthropic")
+    def test_sync_calls_respect_concurrency_limit(self, mock_anthropic):
+        """测试：同步调用的在途请求数不超过并发上限"""
+        # Arrange
+        gateway = LLMGateway(api_key="test_key", max_concurrency=2)
+        lock = threading.Lock()
+        in_flight = 0
+        peak = 0
+
+        def slow_create(**kwargs):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.02)
+            with lock:
+                in_flight -= 1
+
+        mock_anthropic.return_value.messages.create.side_effect = slow_create
+
+        # Act
+        threads = [
+            threading.Thread(target=gateway.create_message, kwargs={"model": "m"})
+            for _ in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Assert
+        assert peak == 2
+        assert gateway.requests == 6
+
+    @patch("trendpluse.analyzers.llm_gateway.AsyncAnthropic")
+    @patch("trendpluse.analyzers.llm_gateway.Anthropic")
+    def test_async_calls_respect_concurrency_limit(
+        self, mock_anthropic, mock_async_anthropic
+    ):
+        """测试：异步调用复用客户端，在途请求数不超过并发上限"""
+        # Arrange
+        gateway = LLMGateway(api_key="test_key", max_concurrency=2)
+        in_flight = 0
+        peak = 0
+
+        async def slow_create(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return kwargs["model"]
+
+        mock_async_anthropic.return_value.messages.create = AsyncMock(
+            side_effect=slow_create
+        )
+
+        async def run():
+            return await asyncio.gather(
+                *(gateway.acreate_message(model=f"m{i}") for i in range(5))
+            )
+
+        # Act
+        results = asyncio.run(run())
+
+        # Assert
+        assert results == [f"m{i}" for i in range(5)]
+        assert peak == 2
+        mock_async_anthropic.assert_called_once()
+
+    @patch("trendpluse.analyzers.llm_gateway.AsyncAnthropic")
+    @patch("trendpluse.analyzers.llm_gateway.Anthropic")
+    def test_async_clients_are_closed(self, mock_anthropic, mock_async_anthropic):
+        """测试：切换事件循环时关闭旧的异步客户端，close() 关闭当前客户端"""
+        # Arrange
+        clients = [MagicMock(), MagicMock()]
+        for client in clients:
+            client.messages.create = AsyncMock(return_value="ok")
+            client.close = AsyncMock()
+        mock_async_anthropic.side_effect = clients
+        gateway = LLMGateway(api_key="test_key")
+
+        # Act
+        asyncio.run(gateway.acreate_message(model="m"))
+        asyncio.run(gateway.acreate_message(model="m"))
+        first_closed = clients[0].close.await_count
+        gateway.close()
+
+        # Assert
+        assert first_closed == 1
+        clients[1].close.assert_awaited_once()
+        mock_anthropic.return_value.close.assert_called_once()
+
+    @patch("trendpluse.analyzers.llm_gateway.Anthropic")
+    def test_errors_are_counted_and_raised(self, mock_anthropic):
+        """测试：调用失败时计入错误数并向上抛出"""
+        # Arrange
+        gateway = LLMGateway(api_key="test_key")
+        mock_anthropic.return_value.messages.create.side_effect = RuntimeError("boom")
+
+        # Act & Assert
+        with pytest.raises(RuntimeError):
+            gateway.create_message(model="m")
+        assert gateway.stats == {
+            "llm_requests": 1,
+            "llm_errors": 1,
+            "llm_input_tokens": 0,
+            "llm_cache_read_tokens": 0,
+            "llm_cache_write_tokens": 0,
+        }
+
+    @patch("trendpluse.analyzers.llm_gateway.Anthropic")
+    def test_fixed_instructions_sent_as_shared_system_prefix(
+        self, mock_anthropic, tmp_path
+    ):
+        """测试：固定指令作为各分块相同的 system 前缀发送，缓存读取 token 计入统计"""
+        # Arrange
+        budget = TokenBudget(daily_limit=0, ledger_path=str(tmp_path / "l.json"))
+        gateway = LLMGateway(api_key="test_key", budget=budget)
+        mock_create = mock_anthropic.return_value.messages.create
+        mock_create.return_value = Message(
+            id="msg_1",
+            type="message",
+            role="assistant",
+            model="glm-4.7",
+            content=[{"type": "text", "text": "[]"}],
+            stop_reason="end_turn",
+            stop_sequence=None,
+            usage={
+                "input_tokens": 100,
+                "output_tokens": 20,
+                "cache_read_input_tokens": 900,
+                "cache_creation_input_tokens": 0,
+            },
+        )
+        analyzer = CommitAnalyzer(
+            api_key="test_key", gateway=gateway, chunk_token_limit=60
+        )
+        commits = [
+            {"repo": "a/b", "sha": "a1", "message": "feat: streaming " * 10},
+            {"repo": "c/d", "sha": "c1", "message": "perf: faster parser " * 10},
+        ]
+
+        # Act
+        analyzer.analyze_commits(commits)
+
+        # Assert
+        assert mock_create.call_count == 2
+        systems = [c.kwargs["system"] for c in mock_create.call_args_list]
+        # commit 分析的指令短于最小缓存长度，按普通文本发送
+        assert systems[0] == systems[1] == SYSTEM_PROMPT
+        # 可变的 commit 数据只在 user 消息中
+        prompts = [
+            c.kwargs["messages"][0]["content"] for c in mock_create.call_args_list
+        ]
+        assert all("## 分析要求" not in prompt for prompt in prompts)
+        # 分块并发调用，完成顺序不固定
+        assert sorted("a/b" in prompt for prompt in prompts) == [False, True]
+        assert sorted("c/d" in prompt for prompt in prompts) == [False, True]
+        assert gateway.stats["llm_input_tokens"] == 200
+        assert gateway.stats["llm_cache_read_tokens"] == 1800
+        # 缓存读取的 token 同样计入预算
+        assert budget.stats["token_budget_used"] == 2040
+
+    @patch("trendpluse.analyzers.llm_gateway.Anthropic")
+    def test_repeated_long_prefix_records_cache_write_then_read(self, mock_anthropic):
+        """测试：达到最小长度的前缀标记为可缓存，重复调用先写入后读取缓存"""
+        # Arrange
+        gateway = LLMGateway(api_key="test_key")
+        long_prompt = SYSTEM_PROMPT * 3
+        assert estimate_tokens(long_prompt) >= MIN_CACHEABLE_TOKENS
+
+        def response(cache_read: int, cache_write: int) -> Message:
+            return Message(
+                id="msg_1",
+                type="message",
+                role="assistant",
+                model="glm-4.7",
+                content=[{"type": "text", "text": "[]"}],
+                stop_reason="end_turn",
+                stop_sequence=None,
+                usage={
+                    "input_tokens": 50,
+                    "output_tokens": 10,
+                    "cache_read_input_tokens": cache_read,
+                    "cache_creation_input_tokens": cache_write,
+                },
+            )
+
+        mock_create = mock_anthropic.return_value.messages.create
+        mock_create.side_effect = [response(0, 1500), response(1500, 0)]
+
+        # Act
+        for content in ("第一批数据", "第二批数据"):
+            gateway.create_message(
+                model="m",
+                max_tokens=10,
+                system=gateway.system_prompt(long_prompt),
+                messages=[{"role": "user", "content": content}],
+            )
+
+        # Assert
+        for call in mock_create.call_args_list:
+            assert call.kwargs["system"] == [
+                {
+                    "type": "text",
+                    "text": long_prompt,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ]
+        assert gateway.stats["llm_cache_write_tokens"] == 1500
+        assert gateway.stats["llm_cache_read_tokens"] == 1500
+        assert gateway.stats["llm_input_tokens"] == 100
+
+    def test_short_prefix_sent_as_plain_text(self):
+        """测试：短于最小缓存长度的前缀不添加缓存标记"""
+        # Arrange
+        gateway = LLMGateway(api_key="test_key")
+
+        # Act
+        system = gateway.system_prompt(DEDUP_SYSTEM_PROMPT)
+
+        # Assert
+        assert system == DEDUP_SYSTEM_PROMPT
+
+    def test_response_schema_counts_toward_prefix_length(self):
+        """测试：结构化调用的响应模型 Schema 计入前缀长度"""
+
+        # Arrange
+        class LargeModel(BaseModel):
+            items: list[str] = Field(description="条目说明 " * 400)
+
+        gateway = LLMGateway(api_key="test_key")
+
+        # Act
+        plain = gateway.system_prompt(SYSTEM_PROMPT)
+        structured = gateway.system_prompt(SYSTEM_PROMPT, LargeModel)
+
+        # Assert
+        assert plain == SYSTEM_PROMPT
+        assert structured == [
+            {
+                "type": "text",
+                "text": SYSTEM_PROMPT,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+
+    def test_prompt_caching_can_be_disabled(self):
+        """测试：关闭 Prompt 缓存时 system 以普通文本发送"""
+        # Arrange
+        gateway = LLMGateway(api_key="test_key", prompt_caching=False)
+
+        # Act
+        system = gateway.system_prompt(SYSTEM_PROMPT)
+
+        # Assert
+        assert system == SYSTEM_PROMPT
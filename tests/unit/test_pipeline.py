@@ -1,11 +1,55 @@
 """Pipeline 主流程单元测试"""
 
-from datetime import datetime
+from datetime import UTC, datetime, timedelta
 from unittest.mock import Mock, patch
 
+from github import GithubException
+
 from trendpluse.pipeline import TrendPulsePipeline
 
 
+def _make_settings(tmp_path):
+    """构造 Pipeline 使用的 mock 配置"""
+    mock_settings_instance = Mock()
+    mock_settings_instance.github_token = "test_token"
+    mock_settings_instance.anthropic_api_key = "test_api_key"
+    mock_settings_instance.anthropic_model = "glm-4.7"
+    mock_settings_instance.anthropic_base_url = "https://open.bigmodel.cn/api/anthropic"
+    mock_settings_instance.github_repos = ["anthropics/skills"]
+    mock_settings_instance.max_candidates = 20
+    mock_settings_instance.days_to_lookback = 1
+    mock_settings_instance.collection_mode = "sync"
+    mock_settings_instance.github_graphql_url = "https://api.github.com/graphql"
+    mock_settings_instance.http_cache_dir = str(tmp_path / "http_cache")
+    mock_settings_instance.http_cache_max_mb = 1
+    mock_settings_instance.contributor_index_path = str(
+        tmp_path / "contributor_index.json"
+    )
+    mock_settings_instance.pr_store_path = str(tmp_path / "pr_store.json")
+    mock_settings_instance.event_store_path = str(tmp_path / "events.db")
+    mock_settings_instance.github_tokens = []
+    mock_settings_instance.github_requests_per_second = 10.0
+    mock_settings_instance.github_priority_repos = []
+    mock_settings_instance.anthropic_timeout = 120
+    mock_settings_instance.anthropic_max_concurrency = 4
+    mock_settings_instance.max_retries = 3
+    mock_settings_instance.analysis_max_concurrency = 4
+    mock_settings_instance.analysis_item_timeout = 180.0
+    mock_settings_instance.analysis_batch_size = 5
+    mock_settings_instance.commit_chunk_token_limit = 8000
+    mock_settings_instance.combined_release_analysis = True
+    mock_settings_instance.release_chunk_token_limit = 8000
+    mock_settings_instance.analysis_batch_token_limit = 6000
+    mock_settings_instance.llm_cache_dir = str(tmp_path / "llm_cache")
+    mock_settings_instance.llm_cache_ttl_hours = 24
+    mock_settings_instance.llm_cache_max_mb = 1
+    mock_settings_instance.llm_prompt_caching = True
+    mock_settings_instance.daily_token_budget = 100_000
+    mock_settings_instance.token_ledger_path = str(tmp_path / "token_ledger.json")
+    mock_settings_instance.llm_batch_mode = False
+    return mock_settings_instance
+
+
 class MockSignalDeduplicator:
     """Mock SignalDeduplicator for testing"""
 
@@ -43,19 +87,11 @@ class TestTrendPulsePipeline:
         mock_activity_collector,
         mock_reporter,
         mock_settings,
+        tmp_path,
     ):
         """测试：初始化创建所有组件"""
         # Arrange
-        mock_settings_instance = Mock()
-        mock_settings_instance.github_token = "test_token"
-        mock_settings_instance.anthropic_api_key = "test_api_key"
-        mock_settings_instance.anthropic_model = "glm-4.7"
-        mock_settings_instance.anthropic_base_url = (
-            "https://open.bigmodel.cn/api/anthropic"
-        )
-        mock_settings_instance.github_repos = ["anthropics/skills"]
-        mock_settings_instance.max_candidates = 20
-        mock_settings_instance.days_to_lookback = 1
+        mock_settings_instance = _make_settings(tmp_path)
         mock_settings.return_value = mock_settings_instance
 
         # Act
@@ -63,26 +99,48 @@ class TestTrendPulsePipeline:
 
         # Assert
         assert pipeline is not None
-        mock_collector.assert_called_once_with(token="test_token")
-        mock_activity_collector.assert_called_once_with(token="test_token")
-        mock_release_collector.assert_called_once_with(token="test_token")
+        registry = pipeline.repo_registry
+        mock_collector.assert_called_once_with(
+            token="test_token", registry=registry, pr_store=pipeline.pr_store
+        )
+        mock_activity_collector.assert_called_once_with(
+            token="test_token",
+            registry=registry,
+            contributor_index=pipeline.contributor_index,
+        )
+        mock_release_collector.assert_called_once_with(
+            token="test_token", registry=registry
+        )
         mock_filter.assert_called_once()
-        mock_fetcher.assert_called_once_with(token="test_token")
+        mock_fetcher.assert_called_once_with(token="test_token", registry=registry)
         mock_commit_analyzer.assert_called_once_with(
             api_key="test_api_key",
             model="glm-4.7",
             base_url="https://open.bigmodel.cn/api/anthropic",
+            gateway=pipeline.llm_gateway,
+            chunk_token_limit=8000,
+            max_concurrency=4,
         )
         mock_release_analyzer.assert_called_once_with(
             api_key="test_api_key",
             model="glm-4.7",
             base_url="https://open.bigmodel.cn/api/anthropic",
+            gateway=pipeline.llm_gateway,
+            insights=pipeline.release_insights,
         )
         mock_analyzer.assert_called_once_with(
             api_key="test_api_key",
             model="glm-4.7",
             base_url="https://open.bigmodel.cn/api/anthropic",
+            gateway=pipeline.llm_gateway,
+            max_concurrency=4,
+            item_timeout=180.0,
+            batch_size=5,
+            batch_token_limit=6000,
         )
+        assert pipeline.llm_gateway.timeout == 120
+        assert pipeline.breaking_changes_detector.insights is pipeline.release_insights
+        assert pipeline.llm_gateway.max_concurrency == 4
         mock_reporter.assert_called_once()
 
     @patch("trendpluse.pipeline.Settings")
@@ -108,19 +166,11 @@ class TestTrendPulsePipeline:
         mock_activity_collector,
         mock_reporter,
         mock_settings,
+        tmp_path,
     ):
         """测试：运行每日分析流程"""
         # Arrange
-        mock_settings_instance = Mock()
-        mock_settings_instance.github_token = "test_token"
-        mock_settings_instance.anthropic_api_key = "test_api_key"
-        mock_settings_instance.anthropic_model = "glm-4.7"
-        mock_settings_instance.anthropic_base_url = (
-            "https://open.bigmodel.cn/api/anthropic"
-        )
-        mock_settings_instance.github_repos = ["anthropics/skills"]
-        mock_settings_instance.max_candidates = 20
-        mock_settings_instance.days_to_lookback = 1
+        mock_settings_instance = _make_settings(tmp_path)
         mock_settings.return_value = mock_settings_instance
 
         # Mock 组件
@@ -132,6 +182,7 @@ class TestTrendPulsePipeline:
                 "payload": {"pull_request": {"number": 1}},
             }
         ]
+        mock_collector_instance.last_synced_repos = ["anthropics/skills"]
         mock_collector.return_value = mock_collector_instance
 
         mock_activity_collector_instance = Mock()
@@ -166,6 +217,7 @@ class TestTrendPulsePipeline:
         mock_release_collector.return_value = mock_release_collector_instance
 
         mock_commit_analyzer_instance = Mock()
+        mock_commit_analyzer_instance.stats = {}
         mock_commit_analyzer_instance.analyze_commits.return_value = []
         mock_commit_analyzer.return_value = mock_commit_analyzer_instance
 
@@ -184,12 +236,16 @@ class TestTrendPulsePipeline:
         mock_filter.return_value = mock_filter_instance
 
         mock_fetcher_instance = Mock()
+        mock_fetcher_instance.stats = {}
+        mock_fetcher_instance.last_errors = []
         mock_fetcher_instance.fetch_multiple_pr_details.return_value = [
             {"number": 1, "title": "PR 1", "repo_name": "anthropics/skills"}
         ]
         mock_fetcher.return_value = mock_fetcher_instance
 
         mock_analyzer_instance = Mock()
+        mock_analyzer_instance.stats = {}
+        mock_analyzer_instance.last_errors = []
         mock_signal = Mock()
         mock_signal.id = "test-1"
         mock_signal.title = "测试信号"
@@ -248,23 +304,16 @@ class TestTrendPulsePipeline:
         mock_activity_collector,
         mock_reporter,
         mock_settings,
+        tmp_path,
     ):
         """测试：没有事件时的处理"""
         # Arrange
-        mock_settings_instance = Mock()
-        mock_settings_instance.github_token = "test_token"
-        mock_settings_instance.anthropic_api_key = "test_api_key"
-        mock_settings_instance.anthropic_model = "glm-4.7"
-        mock_settings_instance.anthropic_base_url = (
-            "https://open.bigmodel.cn/api/anthropic"
-        )
-        mock_settings_instance.github_repos = ["anthropics/skills"]
-        mock_settings_instance.max_candidates = 20
-        mock_settings_instance.days_to_lookback = 1
+        mock_settings_instance = _make_settings(tmp_path)
         mock_settings.return_value = mock_settings_instance
 
         mock_collector_instance = Mock()
         mock_collector_instance.fetch_events.return_value = []
+        mock_collector_instance.last_synced_repos = ["anthropics/skills"]
         mock_collector.return_value = mock_collector_instance
 
         mock_activity_collector_instance = Mock()
@@ -299,6 +348,7 @@ class TestTrendPulsePipeline:
         mock_release_collector.return_value = mock_release_collector_instance
 
         mock_commit_analyzer_instance = Mock()
+        mock_commit_analyzer_instance.stats = {}
         mock_commit_analyzer_instance.analyze_commits.return_value = []
         mock_commit_analyzer.return_value = mock_commit_analyzer_instance
 
@@ -311,10 +361,14 @@ class TestTrendPulsePipeline:
         mock_filter.return_value = mock_filter_instance
 
         mock_fetcher_instance = Mock()
+        mock_fetcher_instance.stats = {}
+        mock_fetcher_instance.last_errors = []
         mock_fetcher_instance.fetch_multiple_pr_details.return_value = []
         mock_fetcher.return_value = mock_fetcher_instance
 
         mock_analyzer_instance = Mock()
+        mock_analyzer_instance.stats = {}
+        mock_analyzer_instance.last_errors = []
         mock_analyzer_instance.analyze_prs.return_value = []
         # 创建一个支持属性赋值的报告对象
         mock_report_obj = Mock()
@@ -344,3 +398,150 @@ class TestTrendPulsePipeline:
         mock_analyzer_instance.analyze_prs.assert_not_called()
         # commit 分析仍应被调用
         mock_commit_analyzer_instance.analyze_commits.assert_called_once()
+
+    @patch("trendpluse.pipeline.Settings")
+    @patch("trendpluse.pipeline.ActivityCollector")
+    @patch("trendpluse.pipeline.ReleaseCollector")
+    @patch("trendpluse.pipeline.GitHubEventsCollector")
+    def test_rerun_reads_events_from_local_store(
+        self,
+        mock_collector,
+        mock_release_collector,
+        mock_activity_collector,
+        mock_settings,
+        tmp_path,
+    ):
+        """测试：重跑已采集过的日期时从本地事件存储查询，不再请求 GitHub"""
+        # Arrange
+        mock_settings.return_value = _make_settings(tmp_path)
+        mock_collector.return_value.fetch_events.return_value = [
+            {
+                "type": "PullRequestEvent",
+                "repo": {"name": "anthropics/skills"},
+                "payload": {"pull_request": {"number": 1, "merged": True}},
+                "created_at": "2026-01-01T12:00:00+00:00",
+            }
+        ]
+        mock_collector.return_value.last_synced_repos = ["anthropics/skills"]
+        pipeline = TrendPulsePipeline()
+        date = datetime(2026, 1, 2)
+
+        # Act
+        _, _, first = pipeline._collect(date)
+        _, _, second = pipeline._collect(date)
+
+        # Assert
+        mock_collector.return_value.fetch_events.assert_called_once()
+        assert first == second
+        assert [e["payload"]["pull_request"]["number"] for e in second] == [1]
+        assert pipeline.event_store.stats["event_store_fetches_skipped"] == 1
+
+    @patch("trendpluse.pipeline.Settings")
+    @patch("trendpluse.pipeline.MarkdownReporter")
+    @patch("trendpluse.pipeline.ActivityCollector")
+    @patch("trendpluse.pipeline.ReleaseCollector")
+    @patch("trendpluse.pipeline.CommitAnalyzer")
+    @patch("trendpluse.pipeline.ReleaseAnalyzer")
+    @patch("trendpluse.pipeline.TrendAnalyzer")
+    @patch("trendpluse.pipeline.SignalDeduplicator", MockSignalDeduplicator)
+    @patch("trendpluse.pipeline.GitHubDetailFetcher")
+    @patch("trendpluse.pipeline.EventFilter")
+    def test_rerun_refetches_repo_whose_fetch_failed(
+        self,
+        mock_filter,
+        mock_fetcher,
+        mock_analyzer,
+        mock_release_analyzer,
+        mock_commit_analyzer,
+        mock_release_collector,
+        mock_activity_collector,
+        mock_reporter,
+        mock_settings,
+        tmp_path,
+    ):
+        """测试：获取失败的仓库不记为已覆盖，同一日期重跑时重新请求"""
+        # Arrange
+        settings = _make_settings(tmp_path)
+        settings.github_repos = ["o/ok", "o/flaky"]
+        mock_settings.return_value = settings
+        mock_activity_collector.return_value.collect_activity.return_value = {
+            "detailed_commits": []
+        }
+        mock_release_collector.return_value.collect_releases.return_value = {
+            "detailed_releases": []
+        }
+        mock_commit_analyzer.return_value.analyze_commits.return_value = []
+        mock_commit_analyzer.return_value.stats = {}
+        mock_filter.return_value.filter_candidates.return_value = []
+        mock_fetcher.return_value.stats = {}
+        mock_fetcher.return_value.last_errors = []
+        mock_analyzer.return_value.stats = {}
+        mock_analyzer.return_value.last_errors = []
+
+        ok_repo = Mock()
+        ok_repo.get_pulls.return_value = []
+        failures = {"o/flaky": 1}
+
+        def get_repo(name):
+            if failures.get(name):
+                failures[name] -= 1
+                raise GithubException(502, {"message": "Bad Gateway"}, {})
+            return ok_repo
+
+        pipeline = TrendPulsePipeline()
+        pipeline.collector.registry = None
+        pipeline.collector.client = Mock()
+        pipeline.collector.client.get_repo.side_effect = get_repo
+        date = datetime(2026, 1, 2, tzinfo=UTC)
+
+        # Act
+        pipeline.run_daily(date=date)
+        first_synced = list(pipeline.collector.last_synced_repos)
+        pipeline.run_daily(date=date)
+
+        # Assert
+        assert first_synced == ["o/ok"]
+        # 第二次运行没有跳过获取，失败的仓库被重新请求并记为已覆盖
+        assert pipeline.collector.last_synced_repos == ["o/ok", "o/flaky"]
+        assert pipeline.event_store.covers(
+            ["o/ok", "o/flaky"], date - timedelta(days=1), date
+        )
+
+    @patch("trendpluse.pipeline.Settings")
+    @patch("trendpluse.pipeline.ActivityCollector")
+    @patch("trendpluse.pipeline.ReleaseCollector")
+    @patch("trendpluse.pipeline.GitHubEventsCollector")
+    def test_fresh_fetch_excludes_events_after_analysis_date(
+        self,
+        mock_collector,
+        mock_release_collector,
+        mock_activity_collector,
+        mock_settings,
+        tmp_path,
+    ):
+        """测试：回填历史日期时，新拉取的晚于分析日期的事件不计入窗口"""
+        # Arrange
+        mock_settings.return_value = _make_settings(tmp_path)
+        mock_collector.return_value.fetch_events.return_value = [
+            {
+                "type": "PullRequestEvent",
+                "repo": {"name": "anthropics/skills"},
+                "payload": {"pull_request": {"number": number, "merged": True}},
+                "created_at": created_at,
+            }
+            for number, created_at in (
+                (1, "2026-01-01T12:00:00+00:00"),
+                (2, "2026-01-05T12:00:00+00:00"),
+            )
+        ]
+        pipeline = TrendPulsePipeline()
+        date = datetime(2026, 1, 2, tzinfo=UTC)
+
+        # Act
+        _, _, events = pipeline._collect(date)
+
+        # Assert
+        assert [e["payload"]["pull_request"]["number"] for e in events] == [1]
+        assert not pipeline.event_store.covers(
+            ["anthropics/skills"], date - timedelta(days=1), date + timedelta(days=1)
+        )
@@ -0,0 +1,88 @@
+"""PromptEncoder 单元测试"""
+
+from trendpluse.analyzers.prompt_encoder import PromptEncoder, PromptField
+from trendpluse.analyzers.release_analyzer import PROMPT_FIELDS
+
+
+def _release(tag: str, body: str) -> dict:
+    """构造采集器输出形状的 release 数据"""
+    return {
+        "repo": "a/b",
+        "tag_name": tag,
+        "name": tag,
+        "prerelease": False,
+        "created_at": "2026-01-02T10:00:00+00:00",
+        "published_at": "2026-01-02T10:00:00+00:00",
+        "body": body,
+        "author": "alice",
+        "html_url": f"https://github.com/a/b/releases/tag/{tag}",
+        "assets": [{"name": "a.tar.gz", "size": 1024, "download_count": 0}],
+        "version_info": {"major": 1, "minor": 0, "patch": 0},
+    }
+
+
+class TestPromptEncoder:
+    """测试 Prompt 数据编码"""
+
+    def test_encodes_allowlisted_fields_as_table(self):
+        """测试：只保留白名单字段，每条记录一行，时间只保留日期"""
+        # Arrange
+        encoder = PromptEncoder("release", PROMPT_FIELDS)
+        body = (
+            "## Changes\n\n* Add streaming by @bob in "
+            "https://github.com/a/b/pull/12\n* See [docs](https://example.com/docs)"
+            "<!-- internal -->"
+        )
+
+        # Act
+        text = encoder.encode([_release("v1.0.0", body), _release("v1.1.0", "")])
+
+        # Assert
+        assert text.split("\n") == [
+            "repo\ttag_name\tname\tpublished_at\tbody",
+            "a/b\tv1.0.0\tv1.0.0\t2026-01-02\t"
+            "## Changes\\n* Add streaming by @bob in #12\\n* See docs",
+            "a/b\tv1.1.0\tv1.1.0\t2026-01-02\t",
+        ]
+
+    def test_empty_columns_dropped_and_long_values_capped(self):
+        """测试：全部为空的列省略，超长字段截断"""
+        # Arrange
+        encoder = PromptEncoder(
+            "commit",
+            [
+                PromptField("message", max_chars=10),
+                PromptField("files_changed"),
+                PromptField("additions"),
+            ],
+        )
+        commits = [
+            {"message": "feat: add streaming API", "files_changed": [], "additions": 0},
+            {"message": "fix", "files_changed": [], "additions": 0},
+        ]
+
+        # Act
+        text = encoder.encode(commits)
+
+        # Assert
+        assert text == "message\nfeat: add…\nfix"
+
+    def test_records_tokens_before_and_after(self):
+        """测试：统计编码前（indent=2 JSON）和编码后的估算 token 数"""
+        # Arrange
+        encoder = PromptEncoder("release", PROMPT_FIELDS)
+        releases = [_release(f"v1.{n}.0", "notes " * 20) for n in range(5)]
+
+        # Act
+        encoder.encode(releases)
+        stats = encoder.stats
+        encoder.reset_stats()
+
+        # Assert
+        assert stats["release_prompt_tokens_encoded"] > 0
+        assert (
+            stats["release_prompt_tokens_encoded"]
+            < stats["release_prompt_tokens_raw"] / 2
+        )
+        assert encoder.stats["release_prompt_tokens_raw"] == 0
+        assert encoder.encode([]) == ""
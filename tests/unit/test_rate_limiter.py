@@ -0,0 +1,331 @@
+"""速率限制调度器单元测试"""
+
+import asyncio
+import json
+from datetime import UTC, datetime
+from unittest.mock import patch
+
+import httpx
+import pytest
+import requests
+import respx
+from github import Github
+from requests.adapters import HTTPAdapter
+
+from trendpluse.collectors.async_engine import AsyncCollectionEngine
+from trendpluse.collectors.graphql import GraphQLCollector
+from trendpluse.collectors.http_cache import CachingHTTPAdapter, HttpCache
+from trendpluse.collectors.rate_limiter import (
+    RESOURCE_GRAPHQL,
+    RESOURCE_SEARCH,
+    RateLimitedHTTPAdapter,
+    RateLimitScheduler,
+    resource_for_url,
+)
+from trendpluse.collectors.transport import install_transport
+
+
+class FakeClock:
+    """可控的时钟，sleep 时推进时间"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+        self.sleeps: list[float] = []
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _scheduler(clock: FakeClock, **kwargs) -> RateLimitScheduler:
+    """构造使用假时钟的调度器"""
+    kwargs.setdefault("requests_per_second", 1000.0)
+    kwargs.setdefault("burst", 1000)
+    return RateLimitScheduler(clock=clock.time, sleep=clock.sleep, **kwargs)
+
+
+def _response(status: int, headers: dict | None = None) -> requests.Response:
+    """构造 requests 响应"""
+    response = requests.Response()
+    response.status_code = status
+    response._content = b"{}"
+    response.headers.update(headers or {})
+    return response
+
+
+class TestRateLimitScheduler:
+    """测试速率限制调度器"""
+
+    def test_resource_for_url(self):
+        """测试：根据 URL 判断资源类型"""
+        # Act & Assert
+        assert resource_for_url("https://api.github.com/graphql") == RESOURCE_GRAPHQL
+        assert (
+            resource_for_url("https://api.github.com/search/issues?q=x")
+            == RESOURCE_SEARCH
+        )
+        assert resource_for_url("https://api.github.com/repos/o/r") == "core"
+
+    def test_rotates_to_token_with_more_remaining(self):
+        """测试：剩余配额低于阈值时切换到池中其他 token"""
+        # Arrange
+        clock = FakeClock()
+        scheduler = _scheduler(clock, tokens=["a", "b"], min_remaining=20)
+        scheduler.update("a", {"X-RateLimit-Remaining": "10"}, 200)
+        scheduler.update("b", {"X-RateLimit-Remaining": "4000"}, 200)
+
+        # Act
+        token = scheduler.acquire()
+
+        # Assert
+        assert token == "b"
+        assert clock.sleeps == []
+
+    def test_low_quota_token_still_used_when_it_is_the_only_one(self):
+        """测试：只有一个 token 时配额偏低仍继续使用"""
+        # Arrange
+        clock = FakeClock()
+        scheduler = _scheduler(clock, tokens=["a"])
+        scheduler.update("a", {"X-RateLimit-Remaining": "3"}, 200)
+
+        # Act
+        token = scheduler.acquire()
+
+        # Assert
+        assert token == "a"
+        assert scheduler.stats["rate_limit_waits"] == 0
+
+    def test_waits_until_reset_when_all_tokens_exhausted(self):
+        """测试：所有 token 配额耗尽时等待到最早的重置时间"""
+        # Arrange
+        clock = FakeClock(now=1000.0)
+        scheduler = _scheduler(clock, tokens=["a", "b"])
+        scheduler.update(
+            "a", {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1300"}, 200
+        )
+        scheduler.update(
+            "b", {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1100"}, 200
+        )
+
+        # Act
+        token = scheduler.acquire()
+
+        # Assert
+        assert token == "b"
+        assert clock.sleeps == [100.0]
+        assert scheduler.stats["rate_limit_waits"] == 1
+        assert scheduler.stats["rate_limit_wait_seconds"] == 100
+
+    def test_retry_after_blocks_token(self):
+        """测试：收到 Retry-After 后该 token 暂停使用"""
+        # Arrange
+        clock = FakeClock(now=1000.0)
+        scheduler = _scheduler(clock, tokens=["a"])
+
+        # Act
+        scheduler.update("a", {"Retry-After": "60"}, 403)
+        token = scheduler.acquire()
+
+        # Assert
+        assert token == "a"
+        assert clock.sleeps == [60.0]
+        assert scheduler.stats["rate_limit_throttled_responses"] == 1
+
+    def test_quota_is_tracked_per_resource(self):
+        """测试：core 配额耗尽不影响 GraphQL 请求"""
+        # Arrange
+        clock = FakeClock(now=1000.0)
+        scheduler = _scheduler(clock, tokens=["a"])
+        scheduler.update(
+            "a", {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "2000"}, 200
+        )
+
+        # Act
+        scheduler.acquire(RESOURCE_GRAPHQL)
+
+        # Assert
+        assert clock.sleeps == []
+
+    def test_token_bucket_paces_requests(self):
+        """测试：令牌桶用完后按补充速率等待"""
+        # Arrange
+        clock = FakeClock()
+        scheduler = _scheduler(clock, tokens=["a"], requests_per_second=2.0, burst=2)
+
+        # Act
+        for _ in range(4):
+            scheduler.acquire()
+
+        # Assert
+        assert clock.sleeps == [0.5, 0.5]
+        assert scheduler.stats["rate_limit_requests"] == 4
+
+    def test_rejects_non_positive_requests_per_second(self):
+        """测试：补充速率不是正数时拒绝创建调度器"""
+        # Act & Assert
+        for rate in (0, -1.0):
+            with pytest.raises(ValueError, match="requests_per_second"):
+                _scheduler(FakeClock(), requests_per_second=rate)
+
+    def test_anonymous_pool_returns_empty_token(self):
+        """测试：没有 token 时使用匿名访问"""
+        # Arrange
+        scheduler = _scheduler(FakeClock(), tokens=["", ""])
+
+        # Act
+        token = scheduler.acquire()
+
+        # Assert
+        assert token == ""
+
+    def test_prioritize_moves_priority_repos_first(self):
+        """测试：高优先级仓库按配置顺序排在最前，其余保持原顺序"""
+        # Arrange
+        scheduler = RateLimitScheduler(priority_repos=["o/c", "o/b"])
+
+        # Act
+        ordered = scheduler.prioritize(["o/a", "o/b", "o/c", "o/d"])
+
+        # Assert
+        assert ordered == ["o/c", "o/b", "o/a", "o/d"]
+
+    def test_is_priority_matches_repo_in_url(self):
+        """测试：根据请求 URL 中的仓库判断优先级"""
+        # Arrange
+        scheduler = RateLimitScheduler(priority_repos=["o/b"])
+
+        # Act & Assert
+        assert scheduler.is_priority("https://api.github.com/repos/o/b/commits?x=1")
+        assert not scheduler.is_priority("https://api.github.com/repos/o/a/pulls")
+        assert not scheduler.is_priority("https://api.github.com/graphql")
+
+    def test_priority_requests_are_served_before_queued_requests(self):
+        """测试：令牌桶额度不足时，后到的高优先级请求先于排队中的请求获得额度"""
+        # Arrange
+        scheduler = RateLimitScheduler(requests_per_second=20.0, burst=1)
+        scheduler.acquire()  # 用完令牌桶额度
+        order: list[str] = []
+
+        async def request(name: str, priority: bool) -> None:
+            await scheduler.acquire_async(priority=priority)
+            order.append(name)
+
+        async def run() -> None:
+            await asyncio.gather(request("normal", False), request("priority", True))
+
+        # Act
+        asyncio.run(run())
+
+        # Assert
+        assert order == ["priority", "normal"]
+        assert scheduler.stats["rate_limit_waits"] == 2
+
+
+class TestRateLimitedHTTPAdapter:
+    """测试 requests 适配器"""
+
+    def test_adapter_uses_scheduled_token_and_updates_quota(self):
+        """测试：请求使用调度器分配的 token，响应头回写配额"""
+        # Arrange
+        clock = FakeClock()
+        scheduler = _scheduler(clock, tokens=["primary", "spare"], min_remaining=20)
+        scheduler.update("primary", {"X-RateLimit-Remaining": "5"}, 200)
+        adapter = RateLimitedHTTPAdapter(scheduler)
+        request = requests.Request(
+            "GET",
+            "https://api.github.com/repos/o/r/pulls",
+            headers={"Authorization": "token primary"},
+        ).prepare()
+
+        # Act
+        with patch.object(
+            HTTPAdapter,
+            "send",
+            return_value=_response(200, {"X-RateLimit-Remaining": "1"}),
+        ) as mock_send:
+            adapter.send(request)
+
+        # Assert
+        sent = mock_send.call_args[0][0]
+        assert sent.headers["Authorization"] == "token spare"
+        assert scheduler.acquire() == "primary"  # spare 剩余 1，primary 剩余 5
+
+    def test_install_transport_combines_cache_and_scheduler(self, tmp_path):
+        """测试：同时启用缓存和调度器时挂载组合适配器，重复安装不叠加"""
+        # Arrange
+        client = Github()
+        cache = HttpCache(cache_dir=str(tmp_path))
+        scheduler = RateLimitScheduler(tokens=["t"])
+
+        # Act
+        install_transport(client, http_cache=cache)
+        install_transport(client, http_cache=cache, scheduler=scheduler)
+        connection_class = client.requester._Requester__connectionClass
+        connection = connection_class("api.github.com", 443)
+
+        # Assert
+        adapter = connection.session.get_adapter("https://x")
+        assert isinstance(adapter, CachingHTTPAdapter)
+        assert isinstance(adapter, RateLimitedHTTPAdapter)
+        assert adapter.scheduler is scheduler
+        assert (
+            connection_class.__mro__.count(connection_class.base_connection_class) == 1
+        )
+
+
+class TestSchedulerIntegration:
+    """测试 httpx 采集器接入调度器"""
+
+    @respx.mock
+    def test_async_engine_uses_scheduler_tokens(self):
+        """测试：异步引擎按调度器分配的 token 发送请求"""
+        # Arrange
+        recent = datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+        route = respx.get("https://api.github.com/repos/o/r/pulls").mock(
+            return_value=httpx.Response(
+                200,
+                json=[{"number": 1, "title": "t", "body": "", "created_at": recent}],
+                headers={"X-RateLimit-Remaining": "42"},
+            )
+        )
+        scheduler = RateLimitScheduler(tokens=["pooled"])
+        engine = AsyncCollectionEngine(token="default", scheduler=scheduler)
+
+        # Act
+        asyncio.run(
+            engine.fetch_events_async(["o/r"], datetime(2000, 1, 1, tzinfo=UTC))
+        )
+
+        # Assert
+        request = route.calls[0].request
+        assert request.headers["Authorization"] == "Bearer pooled"
+        assert scheduler.stats["rate_limit_requests"] == 1
+
+    @respx.mock
+    def test_graphql_collector_uses_graphql_quota(self):
+        """测试：GraphQL 请求使用 graphql 资源配额"""
+        # Arrange
+        route = respx.post("https://api.github.com/graphql").mock(
+            return_value=httpx.Response(
+                200,
+                json={"data": {"r0": None}},
+                headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1"},
+            )
+        )
+        scheduler = RateLimitScheduler(tokens=["pooled"])
+        collector = GraphQLCollector(token="default", scheduler=scheduler)
+        now = datetime.now(UTC)
+
+        # Act
+        collector.collect_all(
+            repos=["o/r"], activity_since=now, release_since=now, pr_since=now
+        )
+
+        # Assert
+        assert route.calls[0].request.headers["Authorization"] == "Bearer pooled"
+        assert "query" in json.loads(route.calls[0].request.content)
+        assert scheduler._state("pooled", RESOURCE_GRAPHQL).remaining == 0
+        assert scheduler._state("pooled", "core").remaining is None
@@ -3,7 +3,31 @@
 from datetime import UTC, datetime, timedelta
 from unittest.mock import MagicMock, Mock, patch
 
-from trendpluse.collectors.releases import ReleaseCollector
+from trendpluse.collectors.releases import RELEASE_LOOKAHEAD, ReleaseCollector
+
+
+def _mock_release(tag_name: str, created_at: datetime) -> Mock:
+    """构造 mock release"""
+    release = Mock()
+    release.created_at = created_at
+    release.published_at = created_at
+    release.tag_name = tag_name
+    release.title = tag_name
+    release.body = ""
+    release.prerelease = False
+    release.author.login = "testuser"
+    release.html_url = f"https://github.com/test/test/releases/{tag_name}"
+    release.assets = []
+    return release
+
+
+def _paginated(releases: list) -> MagicMock:
+    """构造按页返回 Release 的 PaginatedList（每页 100 条）"""
+    paginated = MagicMock()
+    paginated.get_page.side_effect = lambda page: releases[
+        page * 100 : (page + 1) * 100
+    ]
+    return paginated
 
 
 class TestReleaseCollector:
@@ -31,7 +55,7 @@ class TestReleaseCollector:
         """测试：collect_releases 应返回包含预期键的字典"""
         # Arrange
         mock_repo = MagicMock()
-        mock_repo.get_releases.return_value = []
+        mock_repo.get_releases.return_value = _paginated([])
 
         mock_client = MagicMock()
         mock_client.get_repo.return_value = mock_repo
@@ -81,7 +105,7 @@ class TestReleaseCollector:
         new_release.assets = []
 
         mock_repo = MagicMock()
-        mock_repo.get_releases.return_value = [old_release, new_release]
+        mock_repo.get_releases.return_value = _paginated([old_release, new_release])
 
         mock_client = MagicMock()
         mock_client.get_repo.return_value = mock_repo
@@ -128,7 +152,7 @@ class TestReleaseCollector:
         pre_release.published_at = datetime.now(UTC)
 
         mock_repo = MagicMock()
-        mock_repo.get_releases.return_value = [stable_release, pre_release]
+        mock_repo.get_releases.return_value = _paginated([stable_release, pre_release])
 
         mock_client = MagicMock()
         mock_client.get_repo.return_value = mock_repo
@@ -210,7 +234,7 @@ class TestReleaseCollector:
             releases.append(release)
 
         mock_repo = MagicMock()
-        mock_repo.get_releases.return_value = releases
+        mock_repo.get_releases.return_value = _paginated(releases)
 
         mock_client = MagicMock()
         mock_client.get_repo.return_value = mock_repo
@@ -228,3 +252,64 @@ class TestReleaseCollector:
         assert len(detailed_releases) == 3
         assert detailed_releases[0]["tag_name"] == "v1.0.0"  # 最新的
         assert detailed_releases[2]["tag_name"] == "v1.0.2"  # 最旧的
+
+    @patch("trendpluse.collectors.releases.Github")
+    def test_collect_releases_stops_after_lookahead_window(self, mock_github):
+        """测试：连续超过窗口的旧 Release 后停止扫描"""
+        # Arrange
+        now = datetime.now(UTC)
+        old = now - timedelta(days=365)
+        releases = (
+            [_mock_release("v3.0.0", now), _mock_release("v1.0.0", old)]
+            + [_mock_release("v2.9.0", now)]  # 窗口内的乱序 Release 仍会收集
+            + [_mock_release(f"v0.{i}.0", old) for i in range(RELEASE_LOOKAHEAD + 1)]
+            + [_mock_release("v9.9.9", now)]  # 超出窗口，不再扫描
+            + [_mock_release(f"v0.0.{i}", old) for i in range(500)]
+        )
+        paginated = _paginated(releases)
+
+        mock_repo = MagicMock()
+        mock_repo.get_releases.return_value = paginated
+        mock_client = MagicMock()
+        mock_client.get_repo.return_value = mock_repo
+        mock_github.return_value = mock_client
+
+        collector = ReleaseCollector(token="test_token")
+
+        # Act
+        result = collector.collect_releases(
+            repos=["test/repo"], since=now - timedelta(days=1)
+        )
+
+        # Assert
+        tags = [r["tag_name"] for r in result["detailed_releases"]]
+        assert sorted(tags) == ["v2.9.0", "v3.0.0"]
+        assert paginated.get_page.call_count == 1  # 后续页不再请求
+        assert result["pages_fetched"] == 1
+        assert mock_client.per_page == 100
+
+    @patch("trendpluse.collectors.releases.Github")
+    def test_pages_fetched_counts_page_requests(self, mock_github):
+        """测试：pages_fetched 统计实际请求的页数（最后一页不满时停止）"""
+        # Arrange
+        now = datetime.now(UTC)
+        releases = [_mock_release(f"v1.{i}.0", now) for i in range(150)]
+        paginated = _paginated(releases)
+
+        mock_repo = MagicMock()
+        mock_repo.get_releases.return_value = paginated
+        mock_client = MagicMock()
+        mock_client.get_repo.return_value = mock_repo
+        mock_github.return_value = mock_client
+
+        collector = ReleaseCollector(token="test_token")
+
+        # Act
+        result = collector.collect_releases(
+            repos=["test/repo"], since=now - timedelta(days=1)
+        )
+
+        # Assert
+        assert result["total_releases"] == 150
+        assert result["pages_fetched"] == 2
+        assert paginated.get_page.call_count == 2
@@ -0,0 +1,124 @@
+"""ReleaseInsightAnalyzer 单元测试"""
+
+from unittest.mock import Mock
+
+from trendpluse.analyzers.breaking_changes_detector import BreakingChangesDetector
+from trendpluse.analyzers.release_analyzer import ReleaseAnalyzer
+from trendpluse.analyzers.release_insights import ReleaseInsightAnalyzer
+from trendpluse.analyzers.tokens import estimate_tokens
+from trendpluse.models.signal import (
+    BreakingChange,
+    ReleaseAnalysis,
+    ReleaseBreakingChanges,
+    ReleaseSignal,
+)
+
+
+def _release(repo: str, tag: str, body: str = "notes") -> dict:
+    """构造 release 数据"""
+    return {"repo": repo, "tag_name": tag, "name": tag, "body": body}
+
+
+def _analysis_for(repo: str, tag: str, breaking: bool = True) -> ReleaseAnalysis:
+    """构造单个 release 的综合分析结果"""
+    return ReleaseAnalysis(
+        signals=[
+            ReleaseSignal(
+                repo=repo,
+                tag_name=tag,
+                title="主版本升级",
+                type="capability",
+                category="engineering",
+                impact_score=5,
+                why_it_matters="新 API",
+                related_repos=["other/repo"],
+            )
+        ],
+        breaking_changes=[
+            ReleaseBreakingChanges(
+                repo=repo,
+                tag_name=tag,
+                has_breaking=breaking,
+                changes=[
+                    BreakingChange(
+                        description="移除旧 API", impact="high", category="API"
+                    )
+                ],
+            )
+        ],
+    )
+
+
+class TestReleaseInsightAnalyzer:
+    """测试 Release 综合分析"""
+
+    def test_views_share_one_structured_call(self):
+        """测试：两个视图对同一批 release 只调用一次 LLM"""
+        # Arrange
+        gateway = Mock()
+        gateway.create_structured.return_value = _analysis_for("test/repo", "v2.0.0")
+        insights = ReleaseInsightAnalyzer(api_key="test_key", gateway=gateway)
+        release_analyzer = ReleaseAnalyzer(
+            api_key="test_key", gateway=gateway, insights=insights
+        )
+        detector = BreakingChangesDetector(
+            api_key="test_key", gateway=gateway, insights=insights
+        )
+        releases = {"detailed_releases": [_release("test/repo", "v2.0.0")]}
+
+        # Act
+        signals = release_analyzer.analyze_releases(releases)
+        breaking_changes = detector.detect_breaking_changes(releases)
+
+        # Assert
+        gateway.create_structured.assert_called_once()
+        gateway.create_message.assert_not_called()
+        prompt = gateway.create_structured.call_args.kwargs["messages"][0]["content"]
+        assert "repo\ttag_name\tname\tbody" in prompt
+        assert "test/repo\tv2.0.0\tv2.0.0\tnotes" in prompt
+
+        assert len(signals) == 1
+        assert signals[0].id == "release-test/repo-v2.0.0"
+        assert signals[0].sources == [
+            "https://github.com/test/repo/releases/tag/v2.0.0"
+        ]
+        assert signals[0].related_repos == ["test/repo", "other/repo"]
+        assert breaking_changes == [
+            {
+                "repo": "test/repo",
+                "tag_name": "v2.0.0",
+                "has_breaking": True,
+                "changes": [
+                    {"description": "移除旧 API", "impact": "high", "category": "API"}
+                ],
+            }
+        ]
+
+    def test_chunks_are_merged_in_order_and_failures_isolated(self):
+        """测试：超过 token 上限时分块分析，失败分块不影响其他分块"""
+        # Arrange
+        gateway = Mock()
+
+        def create(response_model, messages, **kwargs):
+            content = messages[0]["content"]
+            if "a/b\tv1.0.0" in content:
+                raise ValueError("invalid response")
+            tag = "v2.0.0" if "a/b\tv2.0.0" in content else "v3.0.0"
+            return _analysis_for("a/b", tag, breaking=tag == "v2.0.0")
+
+        gateway.create_structured.side_effect = create
+        insights = ReleaseInsightAnalyzer(api_key="test_key", gateway=gateway)
+        insights.chunk_token_limit = estimate_tokens(insights._build_prompt([])) + 300
+        releases = [_release("a/b", f"v{n}.0.0", "x" * 1000) for n in (1, 2, 3)]
+
+        # Act
+        result = insights.analyze({"detailed_releases": releases})
+
+        # Assert
+        assert gateway.create_structured.call_count == 3
+        assert [s.id for s in result.signals] == [
+            "release-a/b-v2.0.0",
+            "release-a/b-v3.0.0",
+        ]
+        # has_breaking 为 false 的记录不返回
+        assert [b["tag_name"] for b in result.breaking_changes] == ["v2.0.0"]
@@ -0,0 +1,130 @@
+"""仓库句柄注册表单元测试"""
+
+from datetime import UTC, datetime
+from unittest.mock import Mock, patch
+
+from trendpluse.collectors.github_api import GitHubDetailFetcher
+from trendpluse.collectors.http_cache import HttpCache
+from trendpluse.collectors.rate_limiter import RateLimitScheduler
+from trendpluse.collectors.releases import ReleaseCollector
+from trendpluse.collectors.repo_registry import RepoRegistry, get_repo_registry
+
+
+class TestRepoRegistry:
+    """测试仓库句柄注册表"""
+
+    def test_get_repo_caches_handles(self):
+        """测试：同一仓库只创建一次句柄"""
+        # Arrange
+        mock_client = Mock()
+        registry = RepoRegistry(mock_client)
+
+        # Act
+        first = registry.get_repo("owner/repo")
+        second = registry.get_repo("owner/repo")
+        registry.get_repo("owner/other")
+
+        # Assert
+        assert first is second
+        assert mock_client.get_repo.call_count == 2
+        assert registry.stats == {
+            "repo_lookups": 3,
+            "repo_cache_hits": 1,
+            "repo_requests_saved": 3,
+        }
+
+    def test_requests_saved_excludes_eager_fetches(self):
+        """测试：非懒加载客户端创建句柄会请求元数据，不计入节省的请求数"""
+        # Arrange
+        mock_client = Mock()
+        mock_client.requester.is_lazy = False
+        registry = RepoRegistry(mock_client)
+
+        # Act
+        registry.get_repo("owner/repo")
+        registry.get_repo("owner/repo")
+        registry.get_repo("owner/other")
+
+        # Assert
+        assert registry.stats["repo_lookups"] == 3
+        assert registry.stats["repo_requests_saved"] == 1
+
+    def test_reset_stats_keeps_handles(self):
+        """测试：重置统计不清空句柄缓存"""
+        # Arrange
+        mock_client = Mock()
+        registry = RepoRegistry(mock_client)
+        registry.get_repo("owner/repo")
+
+        # Act
+        registry.reset_stats()
+        registry.get_repo("owner/repo")
+
+        # Assert
+        assert mock_client.get_repo.call_count == 1
+        assert registry.stats["repo_lookups"] == 1
+        assert registry.stats["repo_cache_hits"] == 1
+
+    def test_from_token_creates_lazy_client(self):
+        """测试：from_token 创建懒加载客户端"""
+        # Arrange & Act
+        with patch("trendpluse.collectors.repo_registry.Github") as mock_github:
+            RepoRegistry.from_token("test_token")
+
+        # Assert
+        kwargs = mock_github.call_args.kwargs
+        assert kwargs["lazy"] is True
+        assert kwargs["auth"] is not None
+
+    def test_get_repo_registry_is_process_wide(self):
+        """测试：同一 token 返回同一个注册表"""
+        # Arrange & Act
+        with patch("trendpluse.collectors.repo_registry.Github"):
+            first = get_repo_registry("registry_test_token")
+            second = get_repo_registry("registry_test_token")
+
+        # Assert
+        assert first is second
+
+    def test_get_repo_registry_uses_latest_components(self, tmp_path):
+        """测试：后创建的流水线传入新的缓存和调度器时替换注册表中的旧实例"""
+        # Arrange
+        first_cache = HttpCache(cache_dir=str(tmp_path / "first"))
+        second_cache = HttpCache(cache_dir=str(tmp_path / "second"))
+        scheduler = RateLimitScheduler(tokens=["t1"])
+        with patch("trendpluse.collectors.repo_registry.Github"):
+            get_repo_registry("components_token", http_cache=first_cache)
+
+            # Act
+            registry = get_repo_registry(
+                "components_token", http_cache=second_cache, scheduler=scheduler
+            )
+
+        # Assert
+        assert registry.http_cache is second_cache
+        assert registry.scheduler is scheduler
+
+    def test_collectors_share_registry_client(self):
+        """测试：采集器共享注册表的客户端和句柄"""
+        # Arrange
+        mock_client = Mock()
+        mock_repo = Mock()
+        mock_repo.get_releases.return_value.get_page.return_value = []
+        mock_repo.get_pull.return_value.get_comments.return_value = []
+        mock_client.get_repo.return_value = mock_repo
+        registry = RepoRegistry(mock_client)
+
+        release_collector = ReleaseCollector(registry=registry)
+        fetcher = GitHubDetailFetcher(registry=registry)
+
+        # Act
+        release_collector.collect_releases(
+            repos=["owner/repo"], since=datetime.now(UTC)
+        )
+        fetcher.fetch_pr_comments("owner/repo", 1)
+
+        # Assert
+        assert release_collector.client is mock_client
+        assert fetcher.client is mock_client
+        mock_client.get_repo.assert_called_once_with("owner/repo")
+        assert registry.stats["repo_cache_hits"] == 1
@@ -154,7 +154,7 @@ class TestSignalDeduplicator:
         history = [sample_signals[0]]
 
         # Mock LLM 返回非重复
-        mock_llm_client.messages.create.return_value = MagicMock(
+        mock_llm_client.create_message.return_value = MagicMock(
             content=[MagicMock(text="UNIQUE")]
         )
 
@@ -164,7 +164,7 @@ class TestSignalDeduplicator:
         # Assert
         assert is_dup is False
         # 验证 LLM 被调用
-        mock_llm_client.messages.create.assert_called_once()
+        mock_llm_client.create_message.assert_called_once()
 
     def test_deduplicate_removes_duplicates(
         self, deduplicator, sample_signals, mock_llm_client
@@ -172,7 +172,7 @@ class TestSignalDeduplicator:
         """测试：去重应移除重复信号"""
         # Arrange
         # Mock LLM 返回重复
-        mock_llm_client.messages.create.return_value = MagicMock(
+        mock_llm_client.create_message.return_value = MagicMock(
             content=[MagicMock(text="DUPLICATE")]
         )
 
@@ -201,7 +201,7 @@ class TestSignalDeduplicator:
         deduplicator.history_path = Path(history_path)
 
         # Mock LLM 返回非重复
-        mock_llm_client.messages.create.return_value = MagicMock(
+        mock_llm_client.create_message.return_value = MagicMock(
             content=[MagicMock(text="UNIQUE")]
         )
 
@@ -321,7 +321,7 @@ class TestSignalDeduplicator:
         )
 
         # Mock LLM 返回重复
-        mock_llm_client.messages.create.return_value = MagicMock(
+        mock_llm_client.create_message.return_value = MagicMock(
             content=[MagicMock(text="DUPLICATE")]
         )
 
@@ -359,7 +359,7 @@ class TestSignalDeduplicator:
         )
 
         # Mock LLM 返回非重复
-        mock_llm_client.messages.create.return_value = MagicMock(
+        mock_llm_client.create_message.return_value = MagicMock(
             content=[MagicMock(text="UNIQUE")]
         )
 
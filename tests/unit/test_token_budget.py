@@ -0,0 +1,96 @@
+"""TokenBudget 单元测试"""
+
+from unittest.mock import patch
+
+import pytest
+from anthropic.types import Message
+
+from trendpluse.analyzers.llm_gateway import LLMGateway
+from trendpluse.analyzers.token_budget import (
+    STAGE_COMMITS,
+    STAGE_DEDUP,
+    STAGE_PR,
+    TokenBudget,
+    TokenBudgetExceededError,
+)
+
+
+def _message(input_tokens: int, output_tokens: int) -> Message:
+    """构造带 usage 的 Message 响应"""
+    return Message(
+        id="msg_1",
+        type="message",
+        role="assistant",
+        model="glm-4.7",
+        content=[{"type": "text", "text": "[]"}],
+        stop_reason="end_turn",
+        stop_sequence=None,
+        usage={"input_tokens": input_tokens, "output_tokens": output_tokens},
+    )
+
+
+class TestTokenBudget:
+    """测试每日 token 预算"""
+
+    def test_low_priority_stages_keep_reserve_for_higher_ones(self, tmp_path):
+        """测试：额度紧张时低优先级阶段先被跳过，PR 分析仍可使用剩余额度"""
+        # Arrange
+        budget = TokenBudget(daily_limit=1000, ledger_path=str(tmp_path / "l.json"))
+        budget.settle(STAGE_PR, budget.reserve(STAGE_PR, 600), 600)
+
+        # Act
+        commits = budget.reserve(STAGE_COMMITS, 150)
+        with pytest.raises(TokenBudgetExceededError):
+            budget.reserve(STAGE_DEDUP, 150)
+        pr = budget.reserve(STAGE_PR, 200)
+
+        # Assert
+        assert (commits, pr) == (150, 200)
+        assert budget.remaining() == 50
+        assert budget.stats["token_budget_skipped_dedup"] == 1
+        assert budget.stats["token_budget_skipped_commits"] == 0
+
+    def test_ledger_accumulates_across_runs(self, tmp_path):
+        """测试：同一天的用量写入账本，下次运行继续累计"""
+        # Arrange
+        ledger_path = str(tmp_path / "ledger.json")
+        first = TokenBudget(daily_limit=1000, ledger_path=ledger_path)
+        first.settle(STAGE_COMMITS, first.reserve(STAGE_COMMITS, 500), 300)
+
+        # Act
+        second = TokenBudget(daily_limit=1000, ledger_path=ledger_path)
+
+        # Assert
+        assert second.used_today() == 300
+        assert second.remaining() == 700
+        # 本次运行尚未消耗
+        assert second.stats["token_budget_used"] == 0
+
+    @patch("trendpluse.analyzers.llm_gateway.Anthropic")
+    def test_gateway_records_usage_and_skips_over_budget(
+        self, mock_anthropic, tmp_path
+    ):
+        """测试：网关按响应 usage 记账，额度不足时不发出请求"""
+        # Arrange
+        budget = TokenBudget(daily_limit=200, ledger_path=str(tmp_path / "l.json"))
+        gateway = LLMGateway(api_key="test_key", budget=budget)
+        mock_create = mock_anthropic.return_value.messages.create
+        mock_create.return_value = _message(40, 10)
+        request = {
+            "model": "glm-4.7",
+            "max_tokens": 100,
+            "messages": [{"role": "user", "content": "分析"}],
+        }
+
+        # Act
+        gateway.create_message(**request)
+        with pytest.raises(TokenBudgetExceededError):
+            gateway.create_message(
+                stage=STAGE_COMMITS, **{**request, "max_tokens": 150}
+            )
+
+        # Assert
+        mock_create.assert_called_once()
+        assert "stage" not in mock_create.call_args.kwargs
+        assert budget.stats["token_budget_used"] == 50
+        assert budget.stats["token_budget_skipped_commits"] == 1